@@ -67,6 +67,9 @@ Create-DynamoDBTable "studaxis-classes" "class_id"
 Create-DynamoDBTable "studaxis-assignments" "assignment_id"
 Create-DynamoDBTable "studaxis-teachers-$Environment" "classCode"
 
+# class_code / teacher_id GSIs (listStudentProgresses, assignments, class lookups)
+python "$PSScriptRoot\scripts\migrate_class_code_indexes.py" --region $Region --no-wait
+
 Write-Host ""
 
 # ============================================================================
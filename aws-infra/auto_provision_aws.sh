@@ -145,6 +145,11 @@ create_dynamodb_table "studaxis-assignments" "assignment_id"
 # studaxis-teachers-{env} (teacher auth)
 create_dynamodb_table "studaxis-teachers-${ENV}" "classCode"
 
+# class_code / teacher_id GSIs (listStudentProgresses, assignments, class lookups)
+echo -e "${GREEN}Ensuring class_code / teacher_id indexes${NC}"
+python3 "$(dirname "$0")/scripts/migrate_class_code_indexes.py" --region "$AWS_REGION" --no-wait \
+    || echo -e "${YELLOW}⚠ Index migration failed; Lambdas fall back to scans until it succeeds${NC}"
+
 echo ""
 
 # ============================================================================
@@ -292,6 +297,7 @@ CONTENT_DIST_POLICY='{
             "Action": ["dynamodb:GetItem", "dynamodb:Query", "dynamodb:Scan"],
             "Resource": [
                 "arn:aws:dynamodb:'$AWS_REGION':'$ACCOUNT_ID':table/studaxis-student-sync",
+                "arn:aws:dynamodb:'$AWS_REGION':'$ACCOUNT_ID':table/studaxis-student-sync/index/*",
                 "arn:aws:dynamodb:'$AWS_REGION':'$ACCOUNT_ID':table/studaxis-quiz-index"
             ]
         },
@@ -329,7 +335,10 @@ CLASS_MGR_POLICY='{
         {
             "Effect": "Allow",
             "Action": ["dynamodb:PutItem", "dynamodb:GetItem", "dynamodb:Query", "dynamodb:Scan"],
-            "Resource": "arn:aws:dynamodb:'$AWS_REGION':'$ACCOUNT_ID':table/studaxis-classes"
+            "Resource": [
+                "arn:aws:dynamodb:'$AWS_REGION':'$ACCOUNT_ID':table/studaxis-classes",
+                "arn:aws:dynamodb:'$AWS_REGION':'$ACCOUNT_ID':table/studaxis-classes/index/*"
+            ]
         }
     ]
 }'
@@ -379,6 +379,7 @@ if (-not $functionExists) {
       "Action": [
         "dynamodb:PutItem",
         "dynamodb:GetItem",
+        "dynamodb:BatchGetItem",
         "dynamodb:UpdateItem",
         "dynamodb:Scan",
         "dynamodb:Query",
@@ -12,26 +12,33 @@ Purpose:
 DynamoDB Tables:
   - studaxis-assignments: Assignment records
     PK: assignment_id (UUID)
-    GSI: class_code-created_at (for teacher queries)
-    GSI: user_id-due_date (for student queries)
+    GSI: class_code-created_at-index (for class/teacher queries; completion
+         rows have no class_code, so only assignments are indexed)
 
 Trigger: API Gateway REST
-IAM: dynamodb:PutItem, dynamodb:GetItem, dynamodb:Query
+IAM: dynamodb:PutItem, dynamodb:GetItem, dynamodb:BatchGetItem,
+     dynamodb:Query (table + index/*)
 """
 
 import os
 import json
 import uuid
 import logging
+import time
 from datetime import datetime, timezone
 from decimal import Decimal
 
 import boto3
+from boto3.dynamodb.conditions import Attr, Key
 from botocore.exceptions import ClientError
 
 LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
 ASSIGNMENTS_TABLE = os.environ.get("ASSIGNMENTS_TABLE_NAME", "studaxis-assignments")
 CLASSES_TABLE = os.environ.get("CLASSES_TABLE_NAME", "studaxis-classes")
+CLASS_CODE_INDEX = os.environ.get("ASSIGNMENTS_CLASS_CODE_INDEX", "class_code-created_at-index")
+BATCH_GET_LIMIT = 100          # BatchGetItem maximum keys per request
+BATCH_GET_MAX_RETRIES = 5      # rounds for UnprocessedKeys before giving up
+BATCH_GET_BACKOFF = 0.05       # seconds, doubled each retry
 
 logger = logging.getLogger("studaxis.assignment_manager")
 logger.setLevel(LOG_LEVEL)
@@ -61,6 +68,55 @@ def _decimal(value) -> Decimal:
     return value
 
 
+# Each Lambda is zipped from its own directory (deploy-lambdas.sh), so this helper and
+# the query-then-scan fallback are repeated in class_manager, content_distribution and backend/class_verify.py; keep them in sync.
+def _index_missing(err: ClientError) -> bool:
+    """True when a Query named a GSI that does not exist yet or is still backfilling."""
+    error = err.response.get("Error", {})
+    return error.get("Code") == "ValidationException" and "index" in error.get("Message", "").lower()
+
+
+def _read_all(read, **kwargs) -> list[dict]:
+    """Follow LastEvaluatedKey until the query/scan is exhausted."""
+    res = read(**kwargs)
+    items = res.get("Items", [])
+    while "LastEvaluatedKey" in res:
+        res = read(ExclusiveStartKey=res["LastEvaluatedKey"], **kwargs)
+        items.extend(res.get("Items", []))
+    return items
+
+
+def _batch_get_completions(completion_ids: list[str]) -> dict[str, dict]:
+    """
+    Fetch completion rows by id with BatchGetItem (100 keys per request).
+    UnprocessedKeys are retried with exponential backoff; ids still
+    unprocessed after BATCH_GET_MAX_RETRIES are logged and treated as missing.
+    Returns {completion_id: item} for rows that exist.
+    """
+    found = {}
+    ids = list(dict.fromkeys(completion_ids))  # BatchGetItem rejects duplicate keys
+    for start in range(0, len(ids), BATCH_GET_LIMIT):
+        request = {
+            ASSIGNMENTS_TABLE: {
+                "Keys": [{"assignment_id": cid} for cid in ids[start:start + BATCH_GET_LIMIT]],
+                "ProjectionExpression": "assignment_id, completed_at",
+            }
+        }
+        for attempt in range(BATCH_GET_MAX_RETRIES + 1):
+            res = dynamodb.batch_get_item(RequestItems=request)
+            for item in res.get("Responses", {}).get(ASSIGNMENTS_TABLE, []):
+                found[item["assignment_id"]] = item
+            request = res.get("UnprocessedKeys") or {}
+            if not request:
+                break
+            if attempt < BATCH_GET_MAX_RETRIES:
+                time.sleep(BATCH_GET_BACKOFF * (2 ** attempt))
+        if request:
+            missed = len(request.get(ASSIGNMENTS_TABLE, {}).get("Keys", []))
+            logger.warning("BatchGetItem left %d completion key(s) unprocessed", missed)
+    return found
+
+
 def create_assignment(data: dict) -> dict:
     """
     Create a new assignment.
@@ -117,23 +173,26 @@ def list_assignments_for_class(class_code: str, teacher_id: str = None) -> list[
     if not class_code:
         return []
     
+    filter_expr = Attr("status").eq("active")
+    if teacher_id:
+        filter_expr = filter_expr & Attr("teacher_id").eq(teacher_id)
+
     try:
-        # Scan with filter (GSI would be better for production)
-        filter_expr = "class_code = :cc AND #status = :active"
-        expr_values = {":cc": class_code, ":active": "active"}
-        expr_names = {"#status": "status"}
-        
-        if teacher_id:
-            filter_expr += " AND teacher_id = :tid"
-            expr_values[":tid"] = teacher_id
-        
-        res = assignments_table.scan(
-            FilterExpression=filter_expr,
-            ExpressionAttributeValues=expr_values,
-            ExpressionAttributeNames=expr_names,
-        )
-        
-        items = res.get("Items", [])
+        try:
+            # Newest first straight from the index (created_at is the sort key)
+            return _read_all(
+                assignments_table.query,
+                IndexName=CLASS_CODE_INDEX,
+                KeyConditionExpression=Key("class_code").eq(class_code),
+                FilterExpression=filter_expr,
+                ScanIndexForward=False,
+            )
+        except ClientError as e:
+            if not _index_missing(e):
+                raise
+            logger.warning("%s unavailable (%s) — falling back to scan", CLASS_CODE_INDEX, e)
+
+        items = _read_all(assignments_table.scan, FilterExpression=Attr("class_code").eq(class_code) & filter_expr)
         items.sort(key=lambda x: x.get("created_at", ""), reverse=True)
         return items
     except ClientError as e:
@@ -156,20 +215,20 @@ def get_student_assignments(user_id: str, class_code: str) -> list[dict]:
         # Get all active assignments for the class
         assignments = list_assignments_for_class(class_code)
         
-        # Check completion status for each
+        # Completion rows are keyed {user_id}_{assignment_id}; fetch them in batches
+        try:
+            completions = _batch_get_completions(
+                [f"{user_id}_{a['assignment_id']}" for a in assignments]
+            )
+        except ClientError as e:
+            # Still list the assignments; completion status degrades to "not completed"
+            logger.warning("Completion lookup failed for %s: %s", user_id, e)
+            completions = {}
         for assignment in assignments:
-            completion_id = f"{user_id}_{assignment['assignment_id']}"
-            try:
-                completion = assignments_table.get_item(
-                    Key={"assignment_id": completion_id}
-                )
-                if "Item" in completion:
-                    assignment["completed"] = True
-                    assignment["completed_at"] = completion["Item"].get("completed_at")
-                else:
-                    assignment["completed"] = False
-            except:
-                assignment["completed"] = False
+            completion = completions.get(f"{user_id}_{assignment['assignment_id']}")
+            assignment["completed"] = completion is not None
+            if completion is not None:
+                assignment["completed_at"] = completion.get("completed_at")
         
         return assignments
     except ClientError as e:
@@ -14,8 +14,8 @@ Frontend contract (teacher-dashboard-web teacherApi.ts):
 
 DynamoDB Table: studaxis-classes
   - PK: class_id (UUID)
-  - GSI: teacher_id-class_id (teacher_id as PK)
-  - GSI: class_code (class_code as PK, for verify)
+  - GSI: teacher_id-index (teacher_id as PK)
+  - GSI: class_code-index (class_code as PK, for verify)
 
 Trigger: API Gateway REST
 IAM: dynamodb:PutItem, dynamodb:GetItem, dynamodb:Query
@@ -30,10 +30,13 @@ import uuid
 from datetime import datetime, timezone
 
 import boto3
+from boto3.dynamodb.conditions import Attr, Key
 from botocore.exceptions import ClientError
 
 LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
 TABLE_NAME = os.environ.get("CLASSES_TABLE_NAME", "studaxis-classes")
+TEACHER_INDEX = os.environ.get("CLASSES_TEACHER_INDEX", "teacher_id-index")
+CLASS_CODE_INDEX = os.environ.get("CLASSES_CLASS_CODE_INDEX", "class_code-index")
 
 logger = logging.getLogger("studaxis.class_manager")
 logger.setLevel(LOG_LEVEL)
@@ -42,6 +45,35 @@ dynamodb = boto3.resource("dynamodb")
 table = dynamodb.Table(TABLE_NAME)
 
 
+# Each Lambda is zipped from its own directory (deploy-lambdas.sh), so this helper and
+# the query-then-scan fallback are repeated in assignment_manager, content_distribution and backend/class_verify.py; keep them in sync.
+def _index_missing(err: ClientError) -> bool:
+    """True when a Query named a GSI that does not exist yet or is still backfilling."""
+    error = err.response.get("Error", {})
+    return error.get("Code") == "ValidationException" and "index" in error.get("Message", "").lower()
+
+
+def _read_all(read, **kwargs) -> list[dict]:
+    """Follow LastEvaluatedKey until the query/scan is exhausted."""
+    res = read(**kwargs)
+    items = res.get("Items", [])
+    while "LastEvaluatedKey" in res:
+        res = read(ExclusiveStartKey=res["LastEvaluatedKey"], **kwargs)
+        items.extend(res.get("Items", []))
+    return items
+
+
+def _items_by(attr: str, value: str, index: str, **kwargs) -> list[dict]:
+    """All items with attr == value: GSI query, or a scan while the index is missing."""
+    try:
+        return _read_all(table.query, IndexName=index, KeyConditionExpression=Key(attr).eq(value), **kwargs)
+    except ClientError as e:
+        if not _index_missing(e):
+            raise
+        logger.warning("%s unavailable (%s) — falling back to scan", index, e)
+    return _read_all(table.scan, FilterExpression=Attr(attr).eq(value), **kwargs)
+
+
 def _generate_class_code() -> str:
     """Generate unique 6-character alphanumeric code (uppercase)."""
     chars = string.ascii_uppercase + string.digits
@@ -79,15 +111,10 @@ def create_class(teacher_id: str, class_name: str) -> dict:
     if not class_name:
         raise ValueError("class_name is required")
 
-    # Fetch existing codes to avoid collision (scan by teacher_id)
+    # Fetch existing codes to avoid collision (teacher's classes via teacher_id-index)
     existing = set()
     try:
-        scan_res = table.scan(
-            FilterExpression="teacher_id = :tid",
-            ExpressionAttributeValues={":tid": teacher_id},
-            ProjectionExpression="class_code",
-        )
-        for item in scan_res.get("Items", []):
+        for item in _items_by("teacher_id", teacher_id, TEACHER_INDEX, ProjectionExpression="class_code"):
             if item.get("class_code"):
                 existing.add(item["class_code"])
     except ClientError:
@@ -117,20 +144,7 @@ def get_classes_for_teacher(teacher_id: str) -> list[dict]:
         return []
 
     try:
-        # Table has GSI teacher_id-created_at or we scan by teacher_id
-        res = table.scan(
-            FilterExpression="teacher_id = :tid",
-            ExpressionAttributeValues={":tid": teacher_id},
-        )
-        items = res.get("Items", [])
-        while "LastEvaluatedKey" in res:
-            res = table.scan(
-                FilterExpression="teacher_id = :tid",
-                ExpressionAttributeValues={":tid": teacher_id},
-                ExclusiveStartKey=res["LastEvaluatedKey"],
-            )
-            items.extend(res.get("Items", []))
-
+        items = _items_by("teacher_id", teacher_id, TEACHER_INDEX)
         items.sort(key=lambda x: x.get("created_at", ""), reverse=True)
         return items
     except ClientError as e:
@@ -145,13 +159,7 @@ def verify_class_code(class_code: str) -> dict | None:
         return None
 
     try:
-        # Scan for class_code (or use GSI if available)
-        res = table.scan(
-            FilterExpression="class_code = :cc",
-            ExpressionAttributeValues={":cc": class_code},
-            Limit=1,
-        )
-        items = res.get("Items", [])
+        items = _items_by("class_code", class_code, CLASS_CODE_INDEX)
         if not items:
             return None
         item = items[0]
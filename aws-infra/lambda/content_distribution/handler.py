@@ -11,8 +11,19 @@ Purpose:
 
     DynamoDB query = ~10ms.  No S3 file reads needed for discovery.
 
+    Manifests are incremental: each one carries an opaque `manifestVersion`
+    (high-water mark of item timestamps + a hash of the request scope). A
+    device that sends it back as `sinceVersion` receives only items created
+    or updated since, tombstones for soft-deleted items, or `notModified`
+    with nothing to presign when the catalogue hasn't changed. Cursors older
+    than the tombstone retention window get a full manifest instead.
+
+    Pre-signed URLs are cached per warm container and reused until they are
+    within PRESIGN_REFRESH_MARGIN seconds of expiry.
+
 Trigger:  AWS AppSync GraphQL query  (e.g. `fetchOfflineContent`)
-IAM:      dynamodb:GetItem on studaxis-student-sync,
+IAM:      dynamodb:GetItem/Query on studaxis-student-sync (+ class_code-index;
+          GetItem also reads the CLASS#<code> rollups),
           dynamodb:Query/Scan on studaxis-quiz-index,
           s3:GetObject on studaxis-payloads (pre-signing only)
 Timeout:  15 seconds
@@ -21,9 +32,11 @@ Memory:   256 MB
 
 import os
 import json
+import time
 import uuid
+import hashlib
 import logging
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 
 import boto3
@@ -37,6 +50,17 @@ QUIZ_INDEX_TABLE = os.environ.get("QUIZ_INDEX_TABLE", "studaxis-quiz-index")
 CONTENT_TABLE_NAME = os.environ.get("CONTENT_DISTRIBUTION_TABLE", "studaxis-content-distribution")
 BUCKET_NAME = os.environ.get("S3_BUCKET_NAME", "studaxis-payloads")
 PRESIGNED_EXPIRY = int(os.environ.get("PRESIGNED_URL_EXPIRY_SECONDS", "3600"))  # 1 hour
+# GSI on studaxis-student-sync: class_code (HASH) + user_id (RANGE). Sparse —
+# quiz_attempt rows carry no class_code, so only student aggregates are indexed.
+SYNC_CLASS_CODE_INDEX = os.environ.get("SYNC_CLASS_CODE_INDEX", "class_code-index")
+# Reuse a cached URL while at least this much of its lifetime is left
+PRESIGN_REFRESH_MARGIN = int(os.environ.get("PRESIGN_REFRESH_MARGIN_SECONDS", "600"))
+PRESIGN_CACHE_MAX = 5000
+# Soft-deleted rows are kept (and reported as tombstones) this long; older cursors resync fully
+TOMBSTONE_RETENTION_DAYS = int(os.environ.get("TOMBSTONE_RETENTION_DAYS", "30"))
+# Cursor is held back this far behind "now" so rows committed during a scan aren't skipped
+CURSOR_SKEW_SECONDS = 60
+DELETED_STATUSES = ("deleted", "archived")
 
 logger = logging.getLogger("studaxis.content_distribution")
 logger.setLevel(LOG_LEVEL)
@@ -55,13 +79,70 @@ def _correlation_id() -> str:
     return uuid.uuid4().hex[:12]
 
 
-def _presigned_url(s3_key: str) -> str:
-    """Generate a time-limited download URL for the student app."""
-    return s3_client.generate_presigned_url(
+# (bucket, key) -> (url, monotonic expiry); survives across warm invocations
+_presign_cache: dict = {}
+
+
+def _presign(bucket: str, key: str) -> tuple:
+    """
+    Pre-signed GET URL for bucket/key and its remaining lifetime in seconds.
+    Cached URLs are reused until PRESIGN_REFRESH_MARGIN before they expire.
+    """
+    now = time.monotonic()
+    cached = _presign_cache.get((bucket, key))
+    if cached and cached[1] - now > PRESIGN_REFRESH_MARGIN:
+        return cached[0], int(cached[1] - now)
+    url = s3_client.generate_presigned_url(
         "get_object",
-        Params={"Bucket": BUCKET_NAME, "Key": s3_key},
+        Params={"Bucket": bucket, "Key": key},
         ExpiresIn=PRESIGNED_EXPIRY,
     )
+    if len(_presign_cache) >= PRESIGN_CACHE_MAX:
+        # Drop the URLs closest to expiry (they'd be re-signed soon anyway)
+        for stale in sorted(_presign_cache, key=lambda k: _presign_cache[k][1])[: PRESIGN_CACHE_MAX // 10]:
+            _presign_cache.pop(stale, None)
+    _presign_cache[(bucket, key)] = (url, now + PRESIGNED_EXPIRY)
+    return url, PRESIGNED_EXPIRY
+
+
+def _item_version(item: dict) -> str:
+    """ISO timestamp of an index row's last change."""
+    return str(item.get("updated_at") or item.get("created_at") or "")
+
+
+def _is_deleted(item: dict) -> bool:
+    return str(item.get("status", "")).lower() in DELETED_STATUSES
+
+
+def _changed_since(since: str | None):
+    """FilterExpression for rows created or updated after `since` (None = all rows)."""
+    if not since:
+        return None
+    return Attr("updated_at").gt(since) | Attr("created_at").gt(since)
+
+
+def _scope_hash(user_id: str, subject: str, class_key: str | None) -> str:
+    return hashlib.sha1(f"{user_id}|{subject.lower()}|{class_key or ''}".encode("utf-8")).hexdigest()[:10]
+
+
+def _encode_version(cursor: str, scope: str) -> str:
+    return f"{cursor}~{scope}"
+
+
+def _decode_version(token: str | None, scope: str) -> str | None:
+    """
+    Cursor from a previous manifestVersion, or None when a full manifest is
+    needed (no token, different scope, or older than tombstone retention).
+    """
+    if not token or "~" not in token:
+        return None
+    cursor, _, token_scope = token.rpartition("~")
+    if token_scope != scope or not cursor:
+        return None
+    horizon = (datetime.now(timezone.utc) - timedelta(days=TOMBSTONE_RETENTION_DAYS)).isoformat()
+    if cursor < horizon:
+        return None
+    return cursor
 
 
 def _decimal_to_native(obj):
@@ -75,26 +156,94 @@ def _decimal_to_native(obj):
     return obj
 
 
+# Each Lambda is zipped from its own directory (deploy-lambdas.sh), so this helper and
+# the query-then-scan fallback are repeated in assignment_manager, class_manager and backend/class_verify.py; keep them in sync.
+def _index_missing(err: ClientError) -> bool:
+    """True when a Query named a GSI that does not exist yet or is still backfilling."""
+    error = err.response.get("Error", {})
+    return error.get("Code") == "ValidationException" and "index" in error.get("Message", "").lower()
+
+
+def _class_summary(class_code: str, cid: str) -> dict | None:
+    """
+    Class KPIs from the `CLASS#<class_code>` rollup item the offline_sync
+    Lambda maintains (one GetItem instead of reading every student).
+    None when the class has no rollup yet or the read fails.
+    """
+    try:
+        item = sync_table.get_item(Key={"user_id": f"CLASS#{class_code}"}).get("Item")
+    except ClientError as e:
+        logger.warning("[%s] Class rollup read failed for %s: %s", cid, class_code, e)
+        return None
+    if not item:
+        return None
+
+    students = int(item.get("students", 0))
+    streaks, topics, active = {}, {}, {}
+    for attr, value in item.items():
+        kind, sep, name = attr.partition("#")
+        if not sep or not value:
+            continue
+        if kind == "streak_hist":
+            streaks[name] = int(value)
+        elif kind == "active":
+            active[name] = int(value)
+        elif kind in ("topic_attempts", "topic_accuracy_sum"):
+            topics.setdefault(name, {})[kind] = value
+    today = datetime.now(timezone.utc).date()
+    week = {(today - timedelta(days=d)).isoformat() for d in range(7)}
+    return {
+        "classCode": class_code,
+        "students": students,
+        "quizAttempts": int(item.get("quiz_attempts", 0)),
+        "avgScore": round(float(item.get("score_sum", 0)) / students, 2) if students else 0.0,
+        "avgStreak": round(float(item.get("streak_sum", 0)) / students, 2) if students else 0.0,
+        "streakHistogram": streaks,
+        "topics": [
+            {
+                "topic": name,
+                "attempts": int(t.get("topic_attempts", 0)),
+                "avgAccuracy": round(float(t.get("topic_accuracy_sum", 0)) / int(t["topic_attempts"]), 2)
+                if t.get("topic_attempts") else 0.0,
+            }
+            for name, t in sorted(topics.items())
+        ],
+        "activeToday": active.get(today.isoformat(), 0),
+        "active7d": sum(n for day, n in active.items() if day in week),
+        "updatedAt": item.get("updated_at"),
+    }
+
+
 def _list_student_progresses(class_code: str | None, limit: int, next_token: str | None, cid: str) -> dict:
     """
-    Scan studaxis-student-sync for student aggregates, filter by class_code.
-    Hackathon: Scan + FilterExpression (no GSI). Excludes quiz_attempt rows.
+    Page through student aggregates for one class via the class_code GSI, so a
+    dashboard refresh reads only that class's rows and every page is full.
+    Falls back to Scan + FilterExpression while the index is being created.
     Solo learners (class_code=SOLO) never appear in teacher view.
+    The first page also carries `summary`, the class rollup (see _class_summary).
     """
     if not class_code or not str(class_code).strip():
         logger.info("[%s] listStudentProgresses: no class_code — returning [] (teacher must provide)", cid)
         return {"items": [], "nextToken": None}
 
-    scan_kwargs = {
-        "FilterExpression": Attr("class_code").eq(str(class_code).strip()) & (
-            Attr("record_type").not_exists() | Attr("record_type").ne("quiz_attempt")
-        ),
-        "Limit": min(limit or 100, 200),
-    }
+    class_code = str(class_code).strip()
+    not_attempt = Attr("record_type").not_exists() | Attr("record_type").ne("quiz_attempt")
+    page_kwargs = {"Limit": min(limit or 100, 200)}
     if next_token:
-        scan_kwargs["ExclusiveStartKey"] = json.loads(next_token)
+        page_kwargs["ExclusiveStartKey"] = json.loads(next_token)
 
-    resp = sync_table.scan(**scan_kwargs)
+    try:
+        resp = sync_table.query(
+            IndexName=SYNC_CLASS_CODE_INDEX,
+            KeyConditionExpression=Key("class_code").eq(class_code),
+            FilterExpression=not_attempt,
+            **page_kwargs,
+        )
+    except ClientError as e:
+        if not _index_missing(e):
+            raise
+        logger.warning("[%s] %s unavailable (%s) — falling back to scan", cid, SYNC_CLASS_CODE_INDEX, e)
+        resp = sync_table.scan(FilterExpression=Attr("class_code").eq(class_code) & not_attempt, **page_kwargs)
     items = resp.get("Items", [])
     next_key = resp.get("LastEvaluatedKey")
 
@@ -109,36 +258,38 @@ def _list_student_progresses(class_code: str | None, limit: int, next_token: str
             "last_sync_timestamp": it.get("last_sync_timestamp") or "",
             "class_code": it.get("class_code"),
         })
-    return {
+    page = {
         "items": [_decimal_to_native(r) for r in result],
         "nextToken": json.dumps(next_key) if next_key else None,
     }
-
-
-def _get_last_sync_timestamp(user_id: str, cid: str) -> str | None:
-    """Look up when this student last synced so we can send only new content."""
-    try:
-        resp = sync_table.get_item(Key={"user_id": user_id})
-        item = resp.get("Item")
-        if item:
-            return item.get("last_sync_timestamp")
-    except ClientError as e:
-        logger.warning("[%s] Could not read sync table: %s", cid, e)
-    return None
+    if not next_token:
+        page["summary"] = _class_summary(class_code, cid)
+    return page
 
 
 # ── Core: DynamoDB-Based Quiz Discovery ────────────────────────────────────
 
-def _fetch_quizzes(subject: str, cid: str, class_id: str | None = None, class_code: str | None = None) -> list:
+def _fetch_quizzes(subject: str, cid: str, class_id: str | None = None, class_code: str | None = None,
+                   since: str | None = None) -> list:
     """
     Query the quiz index table.  Filters by subject at the DB layer
-    so we never pull unnecessary data.
+    so we never pull unnecessary data. With `since`, only rows created or
+    updated after that timestamp come back (including soft-deleted ones, so
+    they can be turned into tombstones).
     """
-    logger.info("[%s] Querying quiz index — subject=%s", cid, subject)
+    logger.info("[%s] Querying quiz index — subject=%s since=%s", cid, subject, since)
 
-    scan_kwargs = {}
+    conditions = []
     if subject and subject.lower() != "all":
-        scan_kwargs["FilterExpression"] = Attr("subject").eq(subject)
+        conditions.append(Attr("subject").eq(subject))
+    if since:
+        conditions.append(_changed_since(since))
+    scan_kwargs = {}
+    if conditions:
+        filter_expr = conditions[0]
+        for condition in conditions[1:]:
+            filter_expr = filter_expr & condition
+        scan_kwargs["FilterExpression"] = filter_expr
 
     response = quiz_index.scan(**scan_kwargs)
     items = response.get("Items", [])
@@ -153,10 +304,11 @@ def _fetch_quizzes(subject: str, cid: str, class_id: str | None = None, class_co
     return items
 
 
-def _enrich_with_urls(quizzes: list, cid: str) -> list:
+def _enrich_with_urls(quizzes: list, cid: str, ttls: list | None = None) -> list:
     """
     Attach a pre-signed S3 download URL to each quiz entry.
-    No file reads — just signing the key that's already in the index row.
+    No file reads — just signing (or reusing) the key already in the index row.
+    Remaining URL lifetimes are appended to `ttls` when given.
     """
     enriched = []
     for quiz in quizzes:
@@ -166,7 +318,9 @@ def _enrich_with_urls(quizzes: list, cid: str) -> list:
             continue
 
         try:
-            quiz["offlineQuizUrl"] = _presigned_url(s3_key)
+            quiz["offlineQuizUrl"], ttl = _presign(BUCKET_NAME, s3_key)
+            if ttls is not None:
+                ttls.append(ttl)
         except ClientError:
             quiz["offlineQuizUrl"] = None
 
@@ -175,85 +329,172 @@ def _enrich_with_urls(quizzes: list, cid: str) -> list:
     return enriched
 
 
-def _fetch_notes_for_class(class_id_or_code: str | None, cid: str) -> list:
+def _split_s3_uri(s3_uri: str) -> tuple:
+    """s3://bucket/key or a bare key (default bucket) -> (bucket, key)."""
+    if s3_uri.startswith("s3://"):
+        parts = s3_uri.replace("s3://", "").split("/", 1)
+        bucket = parts[0] if len(parts) > 0 else BUCKET_NAME
+        key_path = parts[1] if len(parts) > 1 else ""
+        return bucket, key_path
+    return BUCKET_NAME, s3_uri
+
+
+def _fetch_notes_for_class(class_id_or_code: str | None, cid: str, since: str | None = None) -> list:
     """
     Query studaxis-content-distribution for notes assigned to this class.
-    Uses class_id (or class_code for legacy) as partition key.
+    Uses class_id (or class_code for legacy) as partition key; with `since`,
+    only notes created or updated after it. Returns raw rows.
     """
     if not class_id_or_code or not str(class_id_or_code).strip():
         return []
     key = str(class_id_or_code).strip()
+    query_kwargs = {"KeyConditionExpression": Key("class_id").eq(key)}
+    if since:
+        query_kwargs["FilterExpression"] = _changed_since(since)
     try:
-        resp = content_table.query(KeyConditionExpression=Key("class_id").eq(key))
+        resp = content_table.query(**query_kwargs)
         items = resp.get("Items", [])
         while "LastEvaluatedKey" in resp:
-            resp = content_table.query(
-                KeyConditionExpression=Key("class_id").eq(key),
-                ExclusiveStartKey=resp["LastEvaluatedKey"],
-            )
+            resp = content_table.query(ExclusiveStartKey=resp["LastEvaluatedKey"], **query_kwargs)
             items.extend(resp.get("Items", []))
-        out = []
-        for it in items:
-            s3_uri = it.get("s3_uri", "")
-            if s3_uri:
-                try:
-                    # s3_uri may be s3://bucket/key or full URL
-                    if s3_uri.startswith("s3://"):
-                        parts = s3_uri.replace("s3://", "").split("/", 1)
-                        bucket = parts[0] if len(parts) > 0 else BUCKET_NAME
-                        key_path = parts[1] if len(parts) > 1 else ""
-                    else:
-                        bucket, key_path = BUCKET_NAME, s3_uri
-                    presigned = s3_client.generate_presigned_url(
-                        "get_object",
-                        Params={"Bucket": bucket, "Key": key_path},
-                        ExpiresIn=PRESIGNED_EXPIRY,
-                    )
-                except ClientError:
-                    presigned = None
-            else:
-                presigned = None
-            out.append(_decimal_to_native({
-                "content_id": it.get("content_id"),
-                "content_type": it.get("content_type", "notes"),
-                "topic": it.get("topic"),
-                "subject": it.get("subject"),
-                "s3_uri": s3_uri,
-                "presigned_url": presigned,
-            }))
-        logger.info("[%s] Found %d notes for class %s", cid, len(out), key)
-        return out
+        logger.info("[%s] Found %d notes for class %s", cid, len(items), key)
+        return items
     except ClientError as e:
         logger.warning("[%s] Content-distribution query failed: %s", cid, e)
         return []
 
 
-def _build_manifest(quizzes: list, user_id: str, cid: str, notes: list | None = None) -> dict:
+def _enrich_notes(notes: list, cid: str, ttls: list | None = None) -> list:
+    """Shape note rows for the manifest, with (cached) pre-signed URLs."""
+    out = []
+    for it in notes:
+        s3_uri = it.get("s3_uri", "")
+        presigned = None
+        if s3_uri:
+            try:
+                presigned, ttl = _presign(*_split_s3_uri(s3_uri))
+                if ttls is not None:
+                    ttls.append(ttl)
+            except ClientError:
+                presigned = None
+        out.append(_decimal_to_native({
+            "content_id": it.get("content_id"),
+            "content_type": it.get("content_type", "notes"),
+            "topic": it.get("topic"),
+            "subject": it.get("subject"),
+            "s3_uri": s3_uri,
+            "presigned_url": presigned,
+        }))
+    return out
+
+
+def _tombstones(quizzes: list, notes: list) -> list:
+    """Deletion markers for soft-deleted rows."""
+    out = [{"type": "quiz", "id": q.get("quiz_id"), "deletedAt": _item_version(q)} for q in quizzes]
+    out += [{"type": "notes", "id": n.get("content_id"), "deletedAt": _item_version(n)} for n in notes]
+    return out
+
+
+def _next_cursor(rows: list, since: str | None) -> str:
+    """
+    High-water mark for the next delta: the newest row timestamp seen, held
+    back CURSOR_SKEW_SECONDS behind now so rows committing concurrently with
+    this scan (timestamped slightly earlier) are picked up next time.
+    """
+    newest = max([_item_version(r) for r in rows] + [since or ""])
+    held_back = (datetime.now(timezone.utc) - timedelta(seconds=CURSOR_SKEW_SECONDS)).isoformat()
+    if since and newest > since:
+        return max(since, min(newest, held_back))
+    return min(newest, held_back) if newest else ""
+
+
+def _build_manifest(quizzes: list, user_id: str, cid: str, notes: list | None = None,
+                    manifest_version: str = "", full_sync: bool = True,
+                    tombstones: list | None = None, url_ttl: int | None = None) -> dict:
     """
     Build a lightweight content manifest the student app caches locally.
     Heavy payloads are referenced by pre-signed URL, not inlined.
+    `presignedUrlExpirySeconds` is the shortest remaining lifetime among the
+    (possibly cached) URLs in this manifest.
     """
     notes_list = notes if notes is not None else []
+    tombstones = tombstones or []
     manifest = {
         "manifestId": uuid.uuid4().hex[:16],
         "generatedAt": datetime.now(timezone.utc).isoformat(),
         "userId": user_id,
         "totalItems": len(quizzes) + len(notes_list),
-        "presignedUrlExpirySeconds": PRESIGNED_EXPIRY,
+        "presignedUrlExpirySeconds": url_ttl if url_ttl is not None else PRESIGNED_EXPIRY,
         "quizzes": quizzes,
         "notes": notes_list,
+        "manifestVersion": manifest_version,
+        "fullSync": full_sync,
+        "notModified": False,
+        "tombstones": tombstones,
     }
 
     logger.info(
-        "[%s] Manifest built — %d quizzes, %d notes, ~%.1f KB",
+        "[%s] Manifest built — %s, %d quizzes, %d notes, %d tombstones, ~%.1f KB",
         cid,
+        "full" if full_sync else "delta",
         len(quizzes),
         len(notes_list),
+        len(tombstones),
         len(json.dumps(manifest, default=str)) / 1024,
     )
     return manifest
 
 
+def _fetch_offline_content(user_id: str, subject: str, class_id: str | None, class_code: str | None,
+                           since_version: str | None, cid: str) -> dict:
+    """fetchOfflineContent: full manifest, delta since `since_version`, or notModified."""
+    class_key = class_id or class_code
+    scope = _scope_hash(user_id, subject, class_key)
+    since = _decode_version(since_version, scope)
+    if since_version and since is None:
+        logger.info("[%s] sinceVersion not usable (scope changed or too old) — full manifest", cid)
+
+    # class_id/class_code passed for future per-class filtering; quiz index may not have class yet
+    quizzes = _fetch_quizzes(subject, cid, class_id=class_id, class_code=class_code, since=since)
+    notes = _fetch_notes_for_class(class_key, cid, since=since)
+    cursor = _next_cursor(quizzes + notes, since)
+    manifest_version = _encode_version(cursor, scope) if cursor else ""
+
+    if since and not quizzes and not notes:
+        logger.info("[%s] Manifest not modified since %s", cid, since)
+        return {
+            "manifestId": uuid.uuid4().hex[:16],
+            "generatedAt": datetime.now(timezone.utc).isoformat(),
+            "userId": user_id,
+            "totalItems": 0,
+            "presignedUrlExpirySeconds": PRESIGNED_EXPIRY,
+            "quizzes": [],
+            "notes": [],
+            "manifestVersion": manifest_version or since_version,
+            "fullSync": False,
+            "notModified": True,
+            "tombstones": [],
+        }
+
+    deleted_quizzes = [q for q in quizzes if _is_deleted(q)]
+    deleted_notes = [n for n in notes if _is_deleted(n)]
+    live_quizzes = [q for q in quizzes if not _is_deleted(q)]
+    live_notes = [n for n in notes if not _is_deleted(n)]
+
+    ttls = []
+    enriched = _enrich_with_urls(live_quizzes, cid, ttls)
+    notes_out = _enrich_notes(live_notes, cid, ttls)
+
+    return _build_manifest(
+        enriched, user_id, cid, notes=notes_out,
+        manifest_version=manifest_version,
+        full_sync=since is None,
+        # A full manifest replaces the device's catalogue, so deletions are implicit
+        tombstones=_tombstones(deleted_quizzes, deleted_notes) if since else [],
+        url_ttl=min(ttls) if ttls else None,
+    )
+
+
 # ── Lambda Entry Point ─────────────────────────────────────────────────────
 
 def lambda_handler(event, context):
@@ -270,13 +511,16 @@ def lambda_handler(event, context):
         "userId":  "student_001",
         "subject": "Mathematics",   // optional, defaults to "All"
         "class_id": "uuid-...",     // optional, filters content for student's class
-        "class_code": "ABC123"      // optional, fallback when class_id not set (legacy)
+        "class_code": "ABC123",     // optional, fallback when class_id not set (legacy)
+        "sinceVersion": "..."       // optional, manifestVersion of the device's last manifest
       }
     }
     """
     cid = _correlation_id()
-    logger.info("[%s] Content Distribution Lambda invoked", cid)
-    logger.info("[%s] Event: %s", cid, json.dumps(event, default=str))
+    logger.info(
+        "[%s] Content Distribution Lambda invoked (field=%s)",
+        cid, event.get("info", {}).get("fieldName"),
+    )
 
     try:
         field = event.get("info", {}).get("fieldName", "fetchOfflineContent")
@@ -287,18 +531,8 @@ def lambda_handler(event, context):
         class_code = (args.get("class_code") or args.get("classCode") or "").strip() or None
 
         if field == "fetchOfflineContent":
-            # Check last sync to log delta info
-            last_sync = _get_last_sync_timestamp(user_id, cid)
-            if last_sync:
-                logger.info("[%s] Last sync for %s: %s", cid, user_id, last_sync)
-
-            # Query DynamoDB index (fast, filtered) then pre-sign URLs
-            # class_id/class_code passed for future per-class filtering; quiz index may not have class yet
-            quizzes = _fetch_quizzes(subject, cid, class_id=class_id, class_code=class_code)
-            # Fetch notes for this class from content-distribution table
-            notes = _fetch_notes_for_class(class_id or class_code, cid)
-            enriched = _enrich_with_urls(quizzes, cid)
-            manifest = _build_manifest(enriched, user_id, cid, notes=notes)
+            since_version = (args.get("sinceVersion") or "").strip() or None
+            manifest = _fetch_offline_content(user_id, subject, class_id, class_code, since_version, cid)
 
         elif field == "getQuizPresignedUrl":
             # Single quiz presigned URL lookup
@@ -315,11 +549,11 @@ def lambda_handler(event, context):
                 if not s3_key:
                     raise ValueError(f"Quiz {quiz_id} has no s3_key")
 
-                presigned = _presigned_url(s3_key)
+                presigned, ttl = _presign(BUCKET_NAME, s3_key)
                 return {
                     "quiz_id": quiz_id,
                     "presigned_url": presigned,
-                    "expires_at": datetime.now(timezone.utc).isoformat(),
+                    "expires_at": (datetime.now(timezone.utc) + timedelta(seconds=ttl)).isoformat(),
                 }
             except ClientError as e:
                 logger.error("[%s] DynamoDB error looking up %s: %s", cid, quiz_id, e)
@@ -329,7 +563,7 @@ def lambda_handler(event, context):
             # List all quizzes in the index
             logger.info("[%s] Listing all quizzes for teacher dashboard", cid)
             quizzes = _fetch_quizzes("All", cid)
-            return [_decimal_to_native(q) for q in quizzes]
+            return [_decimal_to_native(q) for q in quizzes if not _is_deleted(q)]
 
         elif field == "listStudentProgresses":
             # Teacher dashboard: students filtered by class_code (Scan + FilterExpression)
@@ -24,7 +24,7 @@ import logging
 from unittest.mock import Mock, MagicMock, patch, ANY
 from typing import Dict, Any, Optional
 from decimal import Decimal
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 # Setup paths
 sys.path.insert(0, os.path.dirname(__file__))
@@ -420,6 +420,521 @@ class TestS3Events:
         return True
 
 
+# ══════════════════════════════════════════════════════════════════════════
+# OFFLINE SYNC S3 BATCH TESTS (invoke the real handler)
+# ══════════════════════════════════════════════════════════════════════════
+
+def _load_handler(name):
+    """Import <name>/handler.py with boto3 clients created offline."""
+    import importlib.util
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), name, "handler.py")
+    spec = importlib.util.spec_from_file_location(f"{name}_handler", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _s3_batch_event(keys):
+    records = []
+    for key in keys:
+        record = S3EventFactory.s3_put_object("studaxis-payloads", key)["Records"][0]
+        records.append(record)
+    return {"Records": records}
+
+
+class TestOfflineSyncS3Batch:
+    """S3 batches: every record processed, newest payload per student wins."""
+
+    def _run(self, objects, failing=(), stored=None):
+        handler = _load_handler("offline_sync")
+        written = []
+        stored = {} if stored is None else stored
+        table = MagicMock()
+
+        def put_item(Item, ReturnValues=None):
+            written.append(Item)
+            previous = stored.get(Item["user_id"])
+            stored[Item["user_id"]] = Item
+            return {"Attributes": previous} if previous else {}
+
+        table.put_item.side_effect = put_item
+
+        def get_object(Bucket, Key):
+            if Key in failing:
+                from botocore.exceptions import ClientError
+                raise ClientError({"Error": {"Code": "NoSuchKey", "Message": "gone"}}, "GetObject")
+            body = MagicMock()
+            body.read.return_value = json.dumps(objects[Key]).encode("utf-8")
+            return {"Body": body}
+
+        handler.stats_table = table
+        handler.s3_client = MagicMock()
+        handler.s3_client.get_object.side_effect = get_object
+        result = handler.lambda_handler(_s3_batch_event(list(objects) + list(failing)), MockAWSContext())
+        return result, written, table
+
+    def test_all_records_processed_newest_wins(self):
+        objects = {
+            "sync/students/s1/a.json": {"student_id": "s1", "streak": 1, "last_sync": "2026-03-06T09:00:00Z", "version": 1},
+            "sync/students/s1/b.json": {"student_id": "s1", "streak": 3, "last_sync": "2026-03-09T09:00:00Z", "version": 2},
+            "sync/students/s2/a.json": {"student_id": "s2", "streak": 5, "last_sync": "2026-03-09T09:01:00Z"},
+        }
+        result, written, table = self._run(objects)
+        assert result["records"] == 3
+        assert (result["written"], result["superseded"], result["failed"]) == (2, 1, 0)
+        assert result["batchItemFailures"] == []
+        by_student = {item["user_id"]: item for item in written}
+        assert by_student["s1"]["current_streak"] == Decimal(3)
+        assert table.put_item.call_count == 2
+        assert all(c.kwargs["ReturnValues"] == "ALL_OLD" for c in table.put_item.call_args_list)
+        return True
+
+    def test_partial_failures_reported(self):
+        objects = {"sync/students/s1/a.json": {"student_id": "s1"}, "sync/students/s2/a.json": {}}
+        result, written, _table = self._run(objects, failing=("sync/students/s3/a.json",))
+        assert [w["user_id"] for w in written] == ["s1"]
+        failures = sorted(f["itemIdentifier"] for f in result["batchItemFailures"])
+        assert failures == ["sync/students/s2/a.json", "sync/students/s3/a.json"]
+        return True
+
+    def test_sqs_wrapped_notifications_report_message_ids(self):
+        handler = _load_handler("offline_sync")
+        handler.stats_table = MagicMock()
+        handler.s3_client = MagicMock()
+        handler.s3_client.get_object.side_effect = lambda Bucket, Key: {
+            "Body": MagicMock(read=MagicMock(return_value=b"not json"))
+        }
+        event = {"Records": [{
+            "eventSource": "aws:sqs",
+            "messageId": "msg-1",
+            "body": json.dumps(_s3_batch_event(["sync/students/s1/a%2Bb.json"])),
+        }]}
+        result = handler.lambda_handler(event, MockAWSContext())
+        assert result["batchItemFailures"] == [{"itemIdentifier": "msg-1"}]
+        handler.s3_client.get_object.assert_called_once_with(
+            Bucket="studaxis-payloads", Key="sync/students/s1/a+b.json"
+        )
+        return True
+
+
+_TEMPLATES = (
+    os.path.join(os.path.dirname(__file__), "sam-template.yaml"),
+    os.path.join(os.path.dirname(__file__), "..", "cloudformation", "lambda-functions.yaml"),
+)
+
+
+def _grants_list_bucket(template_path):
+    """
+    True when the template's UserStatsReconstruction policy grants
+    s3:ListBucket without a condition, which S3 needs to answer a GET on a
+    missing key with 404 (NoSuchKey) rather than 403 (AccessDenied).
+    """
+    with open(template_path, encoding="utf-8") as f:
+        text = f.read()
+    policy = text.split("PolicyName: UserStatsReconstruction", 1)[1].split("\n\n", 1)[0]
+    statement = policy.split("- s3:ListBucket", 1)
+    return len(statement) == 2 and "Condition:" not in statement[1].split("- Effect:", 1)[0]
+
+
+class _FakeS3:
+    """
+    In-memory bucket: get_object / put_object / list_objects_v2 (gzip bodies
+    kept as uploaded). Without list permission a missing key is AccessDenied,
+    as real S3 answers.
+    """
+
+    def __init__(self, objects=None, can_list=True):
+        self.objects = {k: json.dumps(v).encode("utf-8") for k, v in (objects or {}).items()}
+        self.can_list = can_list
+
+    def get_object(self, Bucket, Key):
+        from botocore.exceptions import ClientError
+        if Key not in self.objects:
+            if not self.can_list:
+                raise ClientError({"Error": {"Code": "AccessDenied", "Message": "denied"}}, "GetObject")
+            raise ClientError({"Error": {"Code": "NoSuchKey", "Message": "missing"}}, "GetObject")
+        return {"Body": MagicMock(read=MagicMock(return_value=self.objects[Key])), "ETag": self._etag(Key)}
+
+    def _etag(self, key):
+        import hashlib
+        return '"%s"' % hashlib.md5(self.objects[key]).hexdigest()
+
+    def put_object(self, Bucket, Key, Body, IfMatch=None, IfNoneMatch=None, **kwargs):
+        from botocore.exceptions import ClientError
+        exists = Key in self.objects
+        if (IfNoneMatch == "*" and exists) or (IfMatch and (not exists or self._etag(Key) != IfMatch)):
+            raise ClientError({"Error": {"Code": "PreconditionFailed", "Message": "etag"}}, "PutObject")
+        self.objects[Key] = Body
+
+    def list_objects_v2(self, Bucket, Prefix, **kwargs):
+        return {"Contents": [{"Key": k} for k in sorted(self.objects) if k.startswith(Prefix)], "IsTruncated": False}
+
+    def state(self, student_id):
+        import gzip
+        return json.loads(gzip.decompress(self.objects[f"state/students/{student_id}/user_stats.json"]))
+
+
+class TestUserStatsReconstruction:
+    """Snapshot/delta uploads rebuilt into state/students/<id>/user_stats.json."""
+
+    @staticmethod
+    def _upload(version, kind, last_sync, **body):
+        key = f"sync/students/s1/user_stats_20260309_0900{version:02d}_v{version}_{kind}.json"
+        return key, dict({"student_id": "s1", "payload_type": kind, "version": version,
+                          "last_sync": last_sync}, **body)
+
+    def _run(self, s3, keys):
+        handler = _load_handler("offline_sync")
+        handler.stats_table = MagicMock()
+        handler.stats_table.put_item.return_value = {}
+        handler.s3_client = s3
+        return handler.lambda_handler(_s3_batch_event(keys), MockAWSContext())
+
+    def test_snapshot_then_delta(self):
+        k1, v1 = self._upload(1, "snapshot", "2026-03-09T09:00:01Z",
+                              user_stats={"streak": {"current": 1}, "chat_history": ["a", "b"]})
+        k2, v2 = self._upload(2, "delta", "2026-03-09T09:00:02Z", base_version=1,
+                              delta=[["set", ["streak", "current"], 2], ["tail", ["chat_history"], 1, ["c"]]])
+        s3 = _FakeS3({k1: v1})
+        assert self._run(s3, [k1])["reconstructed"] == 1
+        s3.objects[k2] = json.dumps(v2).encode("utf-8")
+        result = self._run(s3, [k2])
+        assert (result["reconstructed"], result["failed"]) == (1, 0)
+        state = s3.state("s1")
+        assert state["version"] == 2
+        assert state["user_stats"] == {"streak": {"current": 2}, "chat_history": ["b", "c"]}
+        assert self._run(s3, [k2])["reconstructed"] == 0  # redelivery is a no-op
+        return True
+
+    def test_first_reconstruction_under_template_permissions(self):
+        k1, v1 = self._upload(1, "snapshot", "2026-03-09T09:00:01Z", user_stats={"xp": 1})
+        for template in _TEMPLATES:
+            s3 = _FakeS3({k1: v1}, can_list=_grants_list_bucket(template))
+            result = self._run(s3, [k1])
+            assert (result["reconstructed"], result["failed"]) == (1, 0), template
+            assert s3.state("s1")["user_stats"] == {"xp": 1}
+        return True
+
+    def test_access_denied_state_read_fails_record(self):
+        k1, v1 = self._upload(1, "snapshot", "2026-03-09T09:00:01Z", user_stats={"xp": 1})
+        other = "sync/students/s2/a.json"
+        s3 = _FakeS3({k1: v1, other: {"student_id": "s2"}}, can_list=False)
+        result = self._run(s3, [k1, other])
+        assert (result["written"], result["reconstructed"]) == (2, 0)
+        assert result["batchItemFailures"] == [{"itemIdentifier": k1}]
+        assert "state/students/s1/user_stats.json" not in s3.objects
+        return True
+
+    def test_gap_is_replayed_from_uploads(self):
+        k1, v1 = self._upload(1, "snapshot", "2026-03-09T09:00:01Z", user_stats={"xp": 1})
+        k2, v2 = self._upload(2, "delta", "2026-03-09T09:00:02Z", base_version=1, delta=[["set", ["xp"], 2]])
+        k3, v3 = self._upload(3, "delta", "2026-03-09T09:00:03Z", base_version=2,
+                              delta=[["set", ["badges"], ["first"]]])
+        s3 = _FakeS3({k1: v1, k2: v2, k3: v3})
+        result = self._run(s3, [k3])  # v1/v2 notifications not delivered yet
+        assert (result["reconstructed"], result["failed"]) == (1, 0)
+        assert s3.state("s1")["user_stats"] == {"xp": 2, "badges": ["first"]}
+        return True
+
+    def test_concurrent_newer_state_is_not_overwritten(self):
+        import gzip
+        k1, v1 = self._upload(1, "snapshot", "2026-03-09T09:00:01Z", user_stats={"xp": 1})
+        s3 = _FakeS3({k1: v1})
+        key = "state/students/s1/user_stats.json"
+        newer = {"student_id": "s1", "version": 2, "last_sync": "2026-03-09T09:00:02Z", "user_stats": {"xp": 2}}
+        put_object = s3.put_object
+
+        def racing_put(**kwargs):
+            # another invocation lands v2 between this one's read and write
+            s3.objects.setdefault(key, gzip.compress(json.dumps(newer).encode("utf-8")))
+            return put_object(**kwargs)
+
+        s3.put_object = racing_put
+        result = self._run(s3, [k1])
+        assert (result["reconstructed"], result["failed"]) == (0, 0)
+        assert s3.state("s1") == newer
+        return True
+
+    def test_missing_version_fails_record_but_writes_aggregate(self):
+        k1, v1 = self._upload(1, "snapshot", "2026-03-09T09:00:01Z", user_stats={"xp": 1})
+        k3, v3 = self._upload(3, "delta", "2026-03-09T09:00:03Z", base_version=2, delta=[["set", ["xp"], 3]])
+        other = "sync/students/s2/a.json"
+        s3 = _FakeS3({k1: v1, k3: v3, other: {"student_id": "s2"}})
+        result = self._run(s3, [k3, other])
+        assert (result["written"], result["failed"]) == (2, 1)
+        assert result["batchItemFailures"] == [{"itemIdentifier": k3}]
+        assert "state/students/s1/user_stats.json" not in s3.objects
+        return True
+
+
+class TestClassRollups:
+    """Per-class rollup items maintained with ADD deltas on every aggregate write."""
+
+    @staticmethod
+    def _rollup_updates(table):
+        """{class_code: {attr: value}} from the rollup UpdateItem calls."""
+        out = {}
+        for c in table.update_item.call_args_list:
+            kwargs = c.kwargs
+            if not kwargs["Key"]["user_id"].startswith("CLASS#"):
+                continue
+            names, values = kwargs["ExpressionAttributeNames"], kwargs["ExpressionAttributeValues"]
+            adds = kwargs["UpdateExpression"].split("ADD ", 1)[1].split(", ")
+            delta = out.setdefault(values[":cc"], {})
+            for add in adds:
+                name, value = add.split()
+                delta[names[name]] = delta.get(names[name], 0) + values[value]
+        return out
+
+    def test_s3_batch_applies_one_add_per_class(self):
+        stored = {"s2": {"user_id": "s2", "record_type": "student_aggregate", "class_code": "PHY10",
+                         "quizAttempts": Decimal(2), "totalScore": Decimal(60), "current_streak": Decimal(1),
+                         "last_sync_timestamp": "2026-03-08T09:00:00Z"}}
+        objects = {
+            "sync/students/s1/a.json": {"student_id": "s1", "class_code": "PHY10", "quiz_attempts": 4,
+                                        "total_score": 80, "streak": 3, "last_sync": "2026-03-09T09:00:00Z"},
+            "sync/students/s2/a.json": {"student_id": "s2", "class_code": "CHEM9", "quiz_attempts": 3,
+                                        "total_score": 70, "streak": 8, "last_sync": "2026-03-09T10:00:00Z"},
+            "sync/students/s3/a.json": {"student_id": "s3", "streak": 2},  # SOLO, not rolled up
+        }
+        result, _written, table = TestOfflineSyncS3Batch()._run(objects, stored=stored)
+        assert result["classes"] == 2
+        rollups = self._rollup_updates(table)
+        assert set(rollups) == {"PHY10", "CHEM9"}
+        # s1 joined PHY10, s2 moved PHY10 -> CHEM9
+        assert rollups["PHY10"] == {
+            "active#2026-03-08": -1, "active#2026-03-09": 1, "quiz_attempts": 2,
+            "score_sum": 20, "streak_hist#1-2": -1, "streak_hist#3-6": 1, "streak_sum": 2,
+        }
+        assert rollups["CHEM9"]["students"] == 1 and rollups["CHEM9"]["streak_hist#7-13"] == 1
+        assert table.update_item.call_count == 2
+        return True
+
+    def test_unchanged_payload_is_a_no_op(self):
+        objects = {"sync/students/s1/a.json": {"student_id": "s1", "class_code": "PHY10", "streak": 3,
+                                               "last_sync": "2026-03-09T09:00:00Z"}}
+        stored = {}
+        TestOfflineSyncS3Batch()._run(objects, stored=stored)
+        _result, _written, table = TestOfflineSyncS3Batch()._run(objects, stored=stored)
+        table.update_item.assert_not_called()
+        return True
+
+    def test_quiz_attempt_adds_topic_sums(self):
+        handler = _load_handler("offline_sync")
+        handler.stats_table = MagicMock()
+        handler.stats_table.update_item.return_value = {}
+        handler.lambda_handler({"info": {"fieldName": "recordQuizAttempt"}, "arguments": {
+            "userId": "s1", "quizId": "q1", "score": 3, "totalQuestions": 4,
+            "subject": "Physics", "classCode": "PHY10"}}, MockAWSContext())
+        rollup = self._rollup_updates(handler.stats_table)["PHY10"]
+        assert rollup["students"] == 1
+        assert rollup["topic_attempts#Physics"] == 1
+        assert rollup["topic_accuracy_sum#Physics"] == Decimal("75.0")
+        return True
+
+    def test_list_student_progresses_returns_class_summary(self):
+        handler = _load_handler("content_distribution")
+        handler.sync_table = MagicMock()
+        handler.sync_table.query.return_value = {"Items": [], "LastEvaluatedKey": {"user_id": "s9"}}
+        today = datetime.now(timezone.utc).date()
+        handler.sync_table.get_item.return_value = {"Item": {
+            "user_id": "CLASS#PHY10", "record_type": "class_rollup", "rollup_of": "PHY10",
+            "students": Decimal(4), "quiz_attempts": Decimal(10), "score_sum": Decimal(300),
+            "streak_sum": Decimal(12), "streak_hist#0": Decimal(1), "streak_hist#3-6": Decimal(3),
+            "streak_hist#1-2": Decimal(0),
+            "topic_attempts#Physics": Decimal(4), "topic_accuracy_sum#Physics": Decimal(300),
+            f"active#{today.isoformat()}": Decimal(2),
+            f"active#{(today - timedelta(days=3)).isoformat()}": Decimal(1),
+            f"active#{(today - timedelta(days=30)).isoformat()}": Decimal(1),
+            "updated_at": "2026-03-09T10:00:00+00:00",
+        }}
+        event = {"info": {"fieldName": "listStudentProgresses"}, "arguments": {"class_code": "PHY10"}}
+        page = handler.lambda_handler(event, MockAWSContext())
+        summary = page["summary"]
+        assert (summary["students"], summary["avgScore"], summary["avgStreak"]) == (4, 75.0, 3.0)
+        assert summary["streakHistogram"] == {"0": 1, "3-6": 3}
+        assert summary["topics"] == [{"topic": "Physics", "attempts": 4, "avgAccuracy": 75.0}]
+        assert (summary["activeToday"], summary["active7d"]) == (2, 3)
+        handler.sync_table.get_item.assert_called_once_with(Key={"user_id": "CLASS#PHY10"})
+
+        event["arguments"]["nextToken"] = page["nextToken"]
+        assert "summary" not in handler.lambda_handler(event, MockAWSContext())
+        assert handler.sync_table.get_item.call_count == 1
+        return True
+
+
+# ══════════════════════════════════════════════════════════════════════════
+# CLASS_CODE GSI QUERIES
+# ══════════════════════════════════════════════════════════════════════════
+
+def _missing_index_error():
+    from botocore.exceptions import ClientError
+    return ClientError(
+        {"Error": {"Code": "ValidationException", "Message": "The table does not have the specified index"}},
+        "Query",
+    )
+
+
+class TestClassCodeIndexQueries:
+    """Teacher-facing class lookups query GSIs and fall back to scans until they exist."""
+
+    def test_student_progresses_query_class_code_index(self):
+        handler = _load_handler("content_distribution")
+        handler.sync_table = MagicMock()
+        handler.sync_table.query.return_value = {
+            "Items": [{"user_id": "s1", "class_code": "PHY10", "current_streak": Decimal(4)}],
+            "LastEvaluatedKey": {"user_id": "s1", "class_code": "PHY10"},
+        }
+        page = handler._list_student_progresses(" PHY10 ", 50, None, "cid")
+        kwargs = handler.sync_table.query.call_args.kwargs
+        assert kwargs["IndexName"] == "class_code-index"
+        assert kwargs["Limit"] == 50
+        handler.sync_table.scan.assert_not_called()
+        assert page["items"][0]["current_streak"] == 4
+        assert json.loads(page["nextToken"]) == {"user_id": "s1", "class_code": "PHY10"}
+        return True
+
+    def test_missing_index_falls_back_to_scan(self):
+        handler = _load_handler("class_manager")
+        handler.table = MagicMock()
+        handler.table.query.side_effect = _missing_index_error()
+        handler.table.scan.side_effect = [
+            {"Items": [], "LastEvaluatedKey": {"class_id": "a"}},
+            {"Items": [{"class_id": "c1", "class_name": "Physics", "class_code": "PHY10"}]},
+        ]
+        assert handler.verify_class_code("phy10")["class_id"] == "c1"
+        assert handler.table.scan.call_count == 2  # keeps paging past empty filtered pages
+        return True
+
+    def test_assignments_newest_first_from_index(self):
+        handler = _load_handler("assignment_manager")
+        handler.assignments_table = MagicMock()
+        handler.assignments_table.query.side_effect = [
+            {"Items": [{"assignment_id": "a2"}], "LastEvaluatedKey": {"assignment_id": "a2"}},
+            {"Items": [{"assignment_id": "a1"}]},
+        ]
+        items = handler.list_assignments_for_class("PHY10", teacher_id="t1")
+        assert [i["assignment_id"] for i in items] == ["a2", "a1"]
+        kwargs = handler.assignments_table.query.call_args.kwargs
+        assert kwargs["IndexName"] == "class_code-created_at-index"
+        assert kwargs["ScanIndexForward"] is False
+        handler.assignments_table.scan.assert_not_called()
+        return True
+
+
+class TestAssignmentCompletionBatch:
+    """Completion status comes from chunked BatchGetItem, not one GetItem per assignment."""
+
+    def test_batches_of_100_with_unprocessed_retry(self):
+        handler = _load_handler("assignment_manager")
+        handler.BATCH_GET_BACKOFF = 0
+        table_name = handler.ASSIGNMENTS_TABLE
+        assignments = [{"assignment_id": f"a{i:03d}"} for i in range(150)]
+        handler.list_assignments_for_class = MagicMock(return_value=assignments)
+        handler.assignments_table = MagicMock()
+        requests = []
+
+        def batch_get_item(RequestItems):
+            keys = [k["assignment_id"] for k in RequestItems[table_name]["Keys"]]
+            requests.append(keys)
+            done = [k for k in keys if k.endswith(("0", "5"))]
+            if len(requests) == 1:  # throttle half of the first chunk
+                return {
+                    "Responses": {table_name: [{"assignment_id": k, "completed_at": "t"} for k in done[:5]]},
+                    "UnprocessedKeys": {table_name: {"Keys": [{"assignment_id": k} for k in keys[50:]]}},
+                }
+            return {"Responses": {table_name: [{"assignment_id": k, "completed_at": "t"} for k in done]}}
+
+        handler.dynamodb = MagicMock()
+        handler.dynamodb.batch_get_item.side_effect = batch_get_item
+        result = handler.get_student_assignments("stu1", "PHY10")
+
+        assert [len(r) for r in requests] == [100, 50, 50]
+        handler.assignments_table.get_item.assert_not_called()
+        completed = {a["assignment_id"] for a in result if a["completed"]}
+        expected = {f"a{i:03d}" for i in list(range(0, 25, 5)) + list(range(50, 150, 5))}
+        assert completed == expected
+        return True
+
+
+class TestIncrementalManifest:
+    """fetchOfflineContent: full manifest, then deltas/tombstones, then notModified."""
+
+    def _handler(self, quizzes):
+        from boto3.dynamodb.conditions import Attr
+        handler = _load_handler("content_distribution")
+        handler._presign_cache.clear()
+        handler.content_table = MagicMock()
+        handler.content_table.query.return_value = {"Items": []}
+        handler.s3_client = MagicMock()
+        handler.s3_client.generate_presigned_url.side_effect = lambda op, Params, ExpiresIn: f"https://signed/{Params['Key']}"
+
+        def scan(FilterExpression=None, **_):
+            since = None
+            if FilterExpression is not None:
+                # _changed_since(c) is "updated_at > c OR created_at > c"
+                since = FilterExpression.get_expression()["values"][0].get_expression()["values"][1]
+            rows = [dict(q) for q in quizzes if since is None or handler._item_version(q) > since]
+            return {"Items": rows}
+
+        handler.quiz_index = MagicMock()
+        handler.quiz_index.scan.side_effect = scan
+        return handler
+
+    def _fetch(self, handler, since=None):
+        args = {"userId": "stu1", "class_code": "PHY10"}
+        if since:
+            args["sinceVersion"] = since
+        return handler.lambda_handler({"info": {"fieldName": "fetchOfflineContent"}, "arguments": args}, MockAWSContext())
+
+    def test_full_then_delta_then_not_modified(self):
+        now = datetime.now(timezone.utc)
+        stamp = lambda hours_ago: (now - timedelta(hours=hours_ago)).isoformat()
+        quizzes = [
+            {"quiz_id": "q1", "s3_key": "quizzes/q1.json", "created_at": stamp(48)},
+            {"quiz_id": "q2", "s3_key": "quizzes/q2.json", "created_at": stamp(24)},
+        ]
+        handler = self._handler(quizzes)
+        full = self._fetch(handler)
+        assert full["fullSync"] and len(full["quizzes"]) == 2
+        assert handler.s3_client.generate_presigned_url.call_count == 2
+
+        unchanged = self._fetch(handler, full["manifestVersion"])
+        assert unchanged["notModified"] and unchanged["quizzes"] == []
+        assert unchanged["manifestVersion"] == full["manifestVersion"]
+
+        quizzes.append({"quiz_id": "q3", "s3_key": "quizzes/q3.json", "created_at": stamp(2)})
+        quizzes[0].update(status="deleted", updated_at=stamp(1))
+        delta = self._fetch(handler, full["manifestVersion"])
+        assert not delta["fullSync"] and not delta["notModified"]
+        assert [q["quiz_id"] for q in delta["quizzes"]] == ["q3"]
+        assert delta["tombstones"] == [{"type": "quiz", "id": "q1", "deletedAt": stamp(1)}]
+        assert handler.s3_client.generate_presigned_url.call_count == 3  # q3 only
+
+        other_scope = handler.lambda_handler(
+            {"info": {"fieldName": "fetchOfflineContent"},
+             "arguments": {"userId": "stu1", "class_code": "CHEM9", "sinceVersion": delta["manifestVersion"]}},
+            MockAWSContext(),
+        )
+        assert other_scope["fullSync"] and len(other_scope["quizzes"]) == 2
+        return True
+
+    def test_presigned_urls_reused_until_near_expiry(self):
+        handler = self._handler([])
+        handler.s3_client.generate_presigned_url.side_effect = None
+        handler.s3_client.generate_presigned_url.return_value = "https://signed/x"
+        with patch.object(handler.time, "monotonic", return_value=1000.0):
+            assert handler._presign("b", "k") == ("https://signed/x", handler.PRESIGNED_EXPIRY)
+            handler._presign("b", "k")
+        assert handler.s3_client.generate_presigned_url.call_count == 1
+        near_expiry = 1000.0 + handler.PRESIGNED_EXPIRY - handler.PRESIGN_REFRESH_MARGIN + 1
+        with patch.object(handler.time, "monotonic", return_value=near_expiry):
+            handler._presign("b", "k")
+        assert handler.s3_client.generate_presigned_url.call_count == 2
+        return True
+
+
 # ══════════════════════════════════════════════════════════════════════════
 # TEST RUNNER
 # ══════════════════════════════════════════════════════════════════════════
@@ -429,7 +944,13 @@ def run_all_tests():
     test_classes = [
         TestOfflineSyncLambda,
         TestContentDistributionLambda,
-        TestS3Events
+        TestS3Events,
+        TestOfflineSyncS3Batch,
+        TestUserStatsReconstruction,
+        TestClassRollups,
+        TestClassCodeIndexQueries,
+        TestAssignmentCompletionBatch,
+        TestIncrementalManifest
     ]
     
     total_tests = 0
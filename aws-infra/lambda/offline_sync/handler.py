@@ -6,18 +6,53 @@ Purpose:
     1. S3 TRIGGER: When student stats JSON uploaded to S3, auto-sync to DynamoDB
     2. AppSync API: Handle mutations like `recordQuizAttempt` from GraphQL
 
-Triggers: S3 (sync/ folder, .json files) + AWS AppSync mutations
-IAM:      s3:GetObject, dynamodb:PutItem, dynamodb:UpdateItem on studaxis-student-sync
+Triggers: S3 (sync/ folder, .json files; directly or via an SQS queue)
+          + AWS AppSync mutations
+IAM:      s3:GetObject, s3:PutObject, s3:ListBucket on the payload bucket;
+          dynamodb:PutItem, dynamodb:UpdateItem on studaxis-student-sync
 Timeout:  10 seconds
+
+S3 notifications arrive in batches (e.g. a whole class syncing after a
+weekend). Every record is processed: objects are fetched concurrently (at most
+S3_FETCH_CONCURRENCY at a time), only the newest payload per student is kept,
+and aggregates are written with pooled PutItem(ReturnValues=ALL_OLD) calls so
+each write also returns the row it replaced. Records that fail are reported as
+`batchItemFailures` so an SQS event source with ReportBatchItemFailures only
+redelivers those.
+
+user_stats reconstruction: devices upload either a full snapshot or a delta
+against the last version they uploaded (backend/aws_sync.py, payload_type
+"snapshot" | "delta"). For each student the newest upload is applied to the
+reconstructed document at state/students/<id>/user_stats.json (outside the
+sync/ trigger prefix). When its base_version is not the stored version —
+out-of-order delivery, a lost notification — the chain is replayed from the
+student's uploads under sync/students/<id>/, starting at the stored version
+or the newest snapshot. A version that is not in S3 yet fails the record so
+it is redelivered. The state is written with IfMatch / IfNoneMatch on the
+ETag that was read, so concurrent invocations for one student never replace
+a newer version with an older one.
+
+Class rollups: every student aggregate write also maintains one
+`CLASS#<class_code>` item in the same table (record_type "class_rollup")
+holding counts, sums, a streak histogram, per-topic sums and last-activity
+day buckets. Aggregates are written with ReturnValues=ALL_OLD, the rollup
+delta (new contribution − old contribution) is applied with a single
+UpdateExpression ADD per class, so dashboards read one item per class
+instead of every student. Solo learners are not rolled up.
 Memory:   256 MB
 """
 
 import os
+import re
+import gzip
 import json
 import uuid
 import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from decimal import Decimal
+from urllib.parse import unquote_plus
 
 import boto3
 from botocore.exceptions import ClientError
@@ -26,6 +61,19 @@ from botocore.exceptions import ClientError
 LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
 DYNAMODB_TABLE = os.environ.get("DYNAMODB_TABLE_NAME", "studaxis-student-sync")
 S3_BUCKET = os.environ.get("S3_BUCKET_NAME", "studaxis-payloads")
+S3_FETCH_CONCURRENCY = max(1, int(os.environ.get("S3_FETCH_CONCURRENCY", "8")))
+SYNC_UPLOAD_PREFIX = "sync/students/"
+USER_STATS_STATE_PREFIX = os.environ.get("USER_STATS_STATE_PREFIX", "state/students/")
+USER_STATS_WRITE_ATTEMPTS = 3
+# put_object condition failures: the state changed since it was read
+_WRITE_CONFLICT_CODES = ("PreconditionFailed", "ConditionalRequestConflict", "412", "409")
+# Device upload keys end in _v<version>_<payload_type>.json (backend/aws_sync.py)
+_UPLOAD_KEY_RE = re.compile(r"_v(\d+)_(snapshot|delta)\.json$")
+
+ROLLUP_PREFIX = "CLASS#"
+ROLLUP_RECORD_TYPE = "class_rollup"
+# Upper bounds (inclusive) of the streak histogram buckets; the last is open-ended
+STREAK_BUCKETS = ((0, "0"), (2, "1-2"), (6, "3-6"), (13, "7-13"))
 
 logger = logging.getLogger("studaxis.offline_sync")
 logger.setLevel(LOG_LEVEL)
@@ -125,7 +173,7 @@ def _write_quiz_attempt(data: dict, cid: str) -> dict:
     completed_at = data.get("completedAtLocal") or now_iso
     last_quiz_date = completed_at[:10] if len(completed_at) >= 10 else now_iso[:10]  # YYYY-MM-DD
     logger.info("[%s] Updating aggregate metadata for user %s (class_code=%s)", cid, data["userId"], class_code)
-    stats_table.update_item(
+    previous = stats_table.update_item(
         Key={"user_id": data["userId"]},
         UpdateExpression=(
             "SET last_sync_timestamp = :ts, "
@@ -145,7 +193,19 @@ def _write_quiz_attempt(data: dict, cid: str) -> dict:
             ":cc": class_code,
             ":one": _decimal(1),
         },
-    )
+        ReturnValues="ALL_OLD",
+    ).get("Attributes")
+
+    # ── 3. Class rollup: aggregate change + this attempt's topic sums ──
+    current = dict(previous or {}, user_id=data["userId"], last_sync_timestamp=now_iso, class_code=class_code)
+    deltas = _rollup_deltas(previous, current)
+    if class_code != "SOLO":
+        topic = data["subject"] or "General"
+        deltas.setdefault(class_code, Counter()).update({
+            f"topic_attempts#{topic}": Decimal(1),
+            f"topic_accuracy_sum#{topic}": _decimal(accuracy),
+        })
+    _apply_rollup_deltas(deltas, cid)
 
     return {
         "attemptId": attempt_id,
@@ -176,7 +236,7 @@ def _write_streak_update(args: dict, cid: str) -> dict:
     now_iso = datetime.now(timezone.utc).isoformat()
 
     logger.info("[%s] Streak update for %s → %d (class_code=%s)", cid, user_id, streak, class_code)
-    stats_table.update_item(
+    previous = stats_table.update_item(
         Key={"user_id": user_id},
         UpdateExpression=(
             "SET current_streak       = :streak, "
@@ -190,7 +250,11 @@ def _write_streak_update(args: dict, cid: str) -> dict:
             ":synced": "synced",
             ":cc": class_code,
         },
-    )
+        ReturnValues="ALL_OLD",
+    ).get("Attributes")
+    current = dict(previous or {}, user_id=user_id, current_streak=_decimal(streak),
+                   last_sync_timestamp=now_iso, class_code=class_code)
+    _apply_rollup_deltas(_rollup_deltas(previous, current), cid)
 
     return {
         "userId": user_id,
@@ -199,11 +263,281 @@ def _write_streak_update(args: dict, cid: str) -> dict:
     }
 
 
+# ── Class Rollups ───────────────────────────────────────────────────────────
+
+def _streak_bucket(streak: int) -> str:
+    for upper, label in STREAK_BUCKETS:
+        if streak <= upper:
+            return label
+    return f"{STREAK_BUCKETS[-1][0] + 1}+"
+
+
+def _rollup_contribution(item: dict | None) -> tuple:
+    """
+    (class_code, Counter) that one student aggregate row adds to its class
+    rollup, or (None, empty) for rows that are not rolled up (missing, quiz
+    attempts, rollups themselves, solo learners).
+    """
+    if not item or item.get("record_type") in ("quiz_attempt", ROLLUP_RECORD_TYPE):
+        return None, Counter()
+    class_code = str(item.get("class_code") or "").strip()
+    if not class_code or class_code == "SOLO":
+        return None, Counter()
+
+    streak = int(item.get("current_streak") or 0)
+    contribution = Counter({
+        "students": Decimal(1),
+        "quiz_attempts": _decimal(item.get("quizAttempts") or 0),
+        "score_sum": _decimal(item.get("totalScore") or 0),
+        "streak_sum": _decimal(streak),
+        f"streak_hist#{_streak_bucket(streak)}": Decimal(1),
+    })
+    last_active = str(item.get("last_sync_timestamp") or "")[:10]
+    if len(last_active) == 10:
+        contribution[f"active#{last_active}"] = Decimal(1)
+    return class_code, contribution
+
+
+def _rollup_deltas(old: dict | None, new: dict | None) -> dict:
+    """{class_code: Counter} turning old's rollup contribution into new's."""
+    deltas = {}
+    for item, sign in ((old, -1), (new, 1)):
+        class_code, contribution = _rollup_contribution(item)
+        if class_code is None:
+            continue
+        delta = deltas.setdefault(class_code, Counter())
+        for attr, value in contribution.items():
+            delta[attr] += sign * value
+    return {cc: d for cc, d in deltas.items() if any(d.values())}
+
+
+def _merge_deltas(total: dict, deltas: dict) -> None:
+    for class_code, delta in deltas.items():
+        total.setdefault(class_code, Counter()).update(delta)
+
+
+def _apply_rollup_deltas(deltas: dict, cid: str) -> int:
+    """
+    One UpdateItem per class: ADD every non-zero delta and stamp updated_at.
+    Best-effort — the student rows are already written, so a failure here is
+    logged (scripts/rebuild_class_rollups.py recomputes rollups from scratch).
+    Returns the number of classes updated.
+    """
+    updated = 0
+    now_iso = datetime.now(timezone.utc).isoformat()
+    for class_code, delta in deltas.items():
+        changes = [(attr, value) for attr, value in sorted(delta.items()) if value]
+        if not changes:
+            continue
+        names = {f"#a{i}": attr for i, (attr, _v) in enumerate(changes)}
+        values = {f":a{i}": value for i, (_a, value) in enumerate(changes)}
+        values.update({":rt": ROLLUP_RECORD_TYPE, ":cc": class_code, ":ts": now_iso})
+        try:
+            stats_table.update_item(
+                Key={"user_id": f"{ROLLUP_PREFIX}{class_code}"},
+                UpdateExpression=(
+                    "SET record_type = :rt, rollup_of = :cc, updated_at = :ts "
+                    "ADD " + ", ".join(f"#a{i} :a{i}" for i in range(len(changes)))
+                ),
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values,
+            )
+            updated += 1
+        except ClientError as ce:
+            logger.error("[%s] Rollup update for %s failed [%s]: %s",
+                         cid, class_code, ce.response["Error"]["Code"], ce)
+    return updated
+
+
+# ── user_stats Reconstruction ───────────────────────────────────────────────
+
+def _apply_user_stats_delta(doc: dict, ops: list) -> dict:
+    """
+    Apply delta ops to `doc` in place — same op format as
+    backend/aws_sync.py diff_user_stats() (the Lambda is packaged on its own):
+      ["set", path, value] · ["del", path] · ["tail", path, drop, items]
+    """
+    for op in ops:
+        kind, path = op[0], op[1]
+        if not path:
+            if kind == "set":
+                doc.clear()
+                doc.update(op[2])
+            continue
+        parent = doc
+        for key in path[:-1]:
+            parent = parent.setdefault(key, {})
+        leaf = path[-1]
+        if kind == "set":
+            parent[leaf] = op[2]
+        elif kind == "del":
+            parent.pop(leaf, None)
+        elif kind == "tail":
+            parent[leaf] = list(parent.get(leaf) or [])[op[2]:] + list(op[3])
+    return doc
+
+
+def _state_key(student_id: str) -> str:
+    return f"{USER_STATS_STATE_PREFIX}{student_id}/user_stats.json"
+
+
+def _read_user_stats_state(bucket: str, student_id: str) -> tuple:
+    """
+    (state, etag) for the stored reconstruction {student_id, version,
+    last_sync, user_stats}; (None, None) before the first one.
+    """
+    try:
+        response = s3_client.get_object(Bucket=bucket, Key=_state_key(student_id))
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+            return None, None
+        raise
+    raw = response["Body"].read()
+    if raw[:2] == b"\x1f\x8b":
+        raw = gzip.decompress(raw)
+    return json.loads(raw.decode("utf-8")), response.get("ETag")
+
+
+def _write_user_stats_state(bucket: str, student_id: str, state: dict, etag: str | None) -> bool:
+    """
+    Conditional write: replaces only the object read with `etag` (or creates
+    it when there was none). Returns False when another invocation wrote the
+    state in between.
+    """
+    body = json.dumps(state, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    condition = {"IfMatch": etag} if etag else {"IfNoneMatch": "*"}
+    try:
+        s3_client.put_object(
+            Bucket=bucket,
+            Key=_state_key(student_id),
+            Body=gzip.compress(body),
+            ContentType="application/json",
+            ContentEncoding="gzip",
+            **condition,
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] in _WRITE_CONFLICT_CODES:
+            return False
+        raise
+    return True
+
+
+def _list_uploads(bucket: str, student_id: str) -> dict:
+    """{version: (payload_type, key)} for the student's uploads under sync/students/<id>/."""
+    uploads = {}
+    kwargs = {"Bucket": bucket, "Prefix": f"{SYNC_UPLOAD_PREFIX}{student_id}/"}
+    while True:
+        page = s3_client.list_objects_v2(**kwargs)
+        for obj in page.get("Contents") or []:
+            match = _UPLOAD_KEY_RE.search(obj["Key"])
+            if match:
+                uploads[int(match.group(1))] = (match.group(2), obj["Key"])
+        if not page.get("IsTruncated"):
+            return uploads
+        kwargs["ContinuationToken"] = page["NextContinuationToken"]
+
+
+def _replay_user_stats(bucket: str, student_id: str, target: dict, state: dict | None,
+                       known: dict, cid: str) -> dict:
+    """
+    user_stats at target's version, replayed from the stored state (or the
+    newest snapshot at or below the target, whichever is later) through every
+    following upload. `known` holds this batch's payloads by version so they
+    are not fetched again. Raises LookupError when a version is missing.
+    """
+    version = int(target["version"])
+    uploads = _list_uploads(bucket, student_id)
+    kinds = {v: kind for v, (kind, _key) in uploads.items()}
+    kinds.update({v: p.get("payload_type") for v, p in known.items()})
+    snapshot = max((v for v, kind in kinds.items() if kind == "snapshot" and v <= version), default=None)
+    stored = int(state.get("version") or 0) if state else None
+
+    if stored is not None and stored < version and (snapshot is None or stored >= snapshot):
+        doc, current = state.get("user_stats") or {}, stored
+    elif snapshot is not None:
+        doc, current = {}, snapshot - 1
+    else:
+        raise LookupError(f"no snapshot of user_stats for {student_id} at or below v{version}")
+
+    while current < version:
+        current += 1
+        payload = known.get(current)
+        if payload is None:
+            if current not in uploads:
+                raise LookupError(f"user_stats v{current} for {student_id} is not in S3 yet")
+            payload = _read_s3_object(bucket, uploads[current][1], cid)
+        if payload.get("payload_type") == "snapshot":
+            doc = payload.get("user_stats") or {}
+        else:
+            doc = _apply_user_stats_delta(doc, payload.get("delta") or [])
+    logger.info("[%s] Replayed user_stats for %s up to v%d", cid, student_id, version)
+    return doc
+
+
+def _reconstruct_user_stats(bucket: str, student_id: str, payloads: list, cid: str) -> str:
+    """
+    Bring the stored user_stats for one student up to the newest of this
+    batch's payloads. Returns "snapshot" | "delta" | "replayed" for a write,
+    "current" when the stored version is already as new, "none" when the
+    payloads carry no user_stats (older devices).
+
+    The state is written conditionally on the ETag that was read, so two
+    invocations for the same student cannot replace a newer version with an
+    older one; the loser re-reads and retries (at most
+    USER_STATS_WRITE_ATTEMPTS times).
+    """
+    typed = [p for p in payloads if p.get("payload_type") in ("snapshot", "delta") and p.get("version")]
+    if not typed:
+        return "none"
+    newest = max(typed, key=_payload_order)
+
+    for _attempt in range(USER_STATS_WRITE_ATTEMPTS):
+        state, etag = _read_user_stats_state(bucket, student_id)
+        if state is not None and _payload_order(state) >= _payload_order(newest):
+            return "current"
+
+        if newest["payload_type"] == "snapshot":
+            doc, outcome = newest.get("user_stats") or {}, "snapshot"
+        elif state is not None and int(state.get("version") or 0) == int(newest.get("base_version") or -1):
+            doc, outcome = _apply_user_stats_delta(state.get("user_stats") or {}, newest.get("delta") or []), "delta"
+        else:
+            known = {int(p["version"]): p for p in typed}
+            doc, outcome = _replay_user_stats(bucket, student_id, newest, state, known, cid), "replayed"
+
+        if _write_user_stats_state(bucket, student_id, {
+            "student_id": student_id,
+            "version": int(newest["version"]),
+            "last_sync": newest.get("last_sync"),
+            "user_stats": doc,
+        }, etag):
+            return outcome
+        logger.info("[%s] user_stats for %s changed while rebuilding; retrying", cid, student_id)
+    raise RuntimeError(f"user_stats for {student_id} kept changing; gave up after "
+                       f"{USER_STATS_WRITE_ATTEMPTS} attempts")
+
+
 # ── S3 Trigger Handlers ─────────────────────────────────────────────────────
 
+def _s3_notifications(record: dict) -> list:
+    """
+    S3 notification records carried by one event record: the record itself
+    for a direct S3 trigger, or the notifications inside an SQS message body.
+    """
+    if record.get("s3"):
+        return [record]
+    if record.get("eventSource") == "aws:sqs":
+        try:
+            body = json.loads(record.get("body") or "{}")
+        except (TypeError, ValueError):
+            return []
+        return [r for r in body.get("Records") or [] if r.get("s3")]
+    return []
+
+
 def _is_s3_event(event: dict) -> bool:
-    """Check if event is an S3 trigger (has Records.s3 structure)."""
-    return bool(event.get("Records") and event["Records"][0].get("s3"))
+    """Check if event is an S3 trigger (direct, or S3 notifications delivered via SQS)."""
+    records = event.get("Records")
+    return bool(records) and any(_s3_notifications(r) for r in records)
 
 
 def _read_s3_object(bucket: str, key: str, cid: str) -> dict:
@@ -211,8 +545,10 @@ def _read_s3_object(bucket: str, key: str, cid: str) -> dict:
     logger.info("[%s] Reading S3 object: s3://%s/%s", cid, bucket, key)
     try:
         response = s3_client.get_object(Bucket=bucket, Key=key)
-        body = response["Body"].read().decode("utf-8")
-        payload = json.loads(body)
+        raw = response["Body"].read()
+        if raw[:2] == b"\x1f\x8b":  # device uploads are gzip'd (ContentEncoding: gzip)
+            raw = gzip.decompress(raw)
+        payload = json.loads(raw.decode("utf-8"))
         logger.info("[%s] S3 payload parsed successfully", cid)
         return payload
     except ClientError as e:
@@ -220,9 +556,9 @@ def _read_s3_object(bucket: str, key: str, cid: str) -> dict:
         raise Exception(f"S3Error: Failed to read {key}")
 
 
-def _write_student_aggregate_stats(payload: dict, cid: str) -> dict:
+def _build_student_aggregate(payload: dict, cid: str) -> dict:
     """
-    Process student stats from S3 and write aggregate record to DynamoDB.
+    Build the DynamoDB aggregate record for student stats read from S3.
     
     Expected S3 payload:
     {
@@ -271,19 +607,137 @@ def _write_student_aggregate_stats(payload: dict, cid: str) -> dict:
     }
     if last_quiz_date:
         put_item["last_quiz_date"] = last_quiz_date
-    stats_table.put_item(Item=put_item)
+    return put_item
 
+
+def _aggregate_result(item: dict) -> dict:
+    """API-shaped summary of an aggregate record."""
     return {
-        "studentId": student_id,
-        "deviceId": device_id,
-        "quizAttempts": quiz_attempts,
-        "totalScore": float(total_score),
-        "currentStreak": streak,
-        "syncedAt": now_iso,
+        "studentId": item["studentId"],
+        "deviceId": item["deviceId"],
+        "quizAttempts": int(item["quizAttempts"]),
+        "totalScore": float(item["totalScore"]),
+        "currentStreak": int(item["current_streak"]),
+        "syncedAt": item["syncedAt"],
         "syncStatus": "synced",
     }
 
 
+def _payload_order(payload: dict) -> tuple:
+    """
+    Sort key for "newest payload wins": device sync time first, then the
+    user_stats upload version (monotonic per device).
+    """
+    try:
+        version = int(payload.get("version") or 0)
+    except (TypeError, ValueError):
+        version = 0
+    return (str(payload.get("last_sync") or ""), version)
+
+
+def _fetch_payload(bucket: str, key: str, cid: str) -> tuple:
+    """Worker for the fetch pool: (payload, None) or (None, error message)."""
+    try:
+        return _read_s3_object(bucket, key, cid), None
+    except Exception as e:
+        return None, str(e)
+
+
+def _process_s3_batch(event: dict, cid: str) -> dict:
+    """
+    Process every S3 notification in the event.
+
+    Objects are fetched with at most S3_FETCH_CONCURRENCY concurrent
+    get_object calls. When several payloads for the same student arrive
+    together, only the newest is written (the rest are "superseded"); all of
+    them feed the user_stats reconstruction. Each aggregate is written with PutItem(ReturnValues=ALL_OLD) on the same pool,
+    so the previous row is known exactly; the resulting rollup deltas are
+    summed per class and applied with one ADD per class.
+
+    Returns a summary plus `batchItemFailures`, keyed by SQS messageId when
+    the notifications came through SQS, otherwise by S3 object key.
+    """
+    # (identifier, bucket, key) per notification
+    jobs = []
+    for record in event.get("Records") or []:
+        message_id = record.get("messageId")
+        for note in _s3_notifications(record):
+            bucket = note["s3"]["bucket"]["name"]
+            key = unquote_plus(note["s3"]["object"]["key"])  # keys arrive URL-encoded
+            jobs.append((message_id or key, bucket, key))
+
+    failed = set()
+    newest = {}  # student_id -> (order, identifier, item, bucket)
+    payloads = {}  # student_id -> every valid payload in the batch (user_stats chain)
+    superseded = 0
+    workers = min(S3_FETCH_CONCURRENCY, len(jobs)) or 1
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        fetched = list(pool.map(lambda job: _fetch_payload(job[1], job[2], cid), jobs))
+
+    for (identifier, bucket, key), (payload, error) in zip(jobs, fetched):
+        if error is not None:
+            logger.error("[%s] Skipping %s: %s", cid, key, error)
+            failed.add(identifier)
+            continue
+        try:
+            item = _build_student_aggregate(payload, cid)
+        except (ValueError, TypeError) as e:
+            logger.warning("[%s] Invalid payload in %s: %s", cid, key, e)
+            failed.add(identifier)
+            continue
+        payloads.setdefault(item["user_id"], []).append(payload)
+        order = _payload_order(payload)
+        current = newest.get(item["user_id"])
+        if current is not None:
+            superseded += 1
+            if order < current[0]:
+                continue
+        newest[item["user_id"]] = (order, identifier, item, bucket)
+
+    def put(entry):
+        _order, identifier, item, bucket = entry
+        try:
+            outcome = _reconstruct_user_stats(bucket, item["user_id"], payloads[item["user_id"]], cid)
+        except Exception as e:  # the aggregate below is still written
+            logger.error("[%s] user_stats for %s not reconstructed: %s", cid, item["user_id"], e)
+            outcome = None
+        try:
+            previous = stats_table.put_item(Item=item, ReturnValues="ALL_OLD").get("Attributes")
+            return identifier, item, previous, None, outcome
+        except ClientError as ce:
+            return identifier, item, None, ce, outcome
+
+    written = []
+    rollups = {}
+    reconstructed = 0
+    if newest:
+        with ThreadPoolExecutor(max_workers=min(S3_FETCH_CONCURRENCY, len(newest))) as pool:
+            for identifier, item, previous, error, outcome in pool.map(put, list(newest.values())):
+                if outcome is None:
+                    failed.add(identifier)  # redelivered once the missing version is in S3
+                elif outcome in ("snapshot", "delta", "replayed"):
+                    reconstructed += 1
+                if error is not None:
+                    logger.error("[%s] Write for %s failed [%s]: %s",
+                                 cid, item["user_id"], error.response["Error"]["Code"], error)
+                    failed.add(identifier)
+                    continue
+                written.append(item)
+                _merge_deltas(rollups, _rollup_deltas(previous, item))
+    classes = _apply_rollup_deltas(rollups, cid)
+
+    return {
+        "records": len(jobs),
+        "written": len(written),
+        "superseded": superseded,
+        "reconstructed": reconstructed,
+        "failed": len(failed),
+        "classes": classes,
+        "students": [_aggregate_result(item) for item in written],
+        "batchItemFailures": [{"itemIdentifier": i} for i in sorted(failed)],
+    }
+
+
 # ── Lambda Entry Point ─────────────────────────────────────────────────────
 
 def lambda_handler(event, context):
@@ -292,7 +746,9 @@ def lambda_handler(event, context):
 
     TRIGGER 1: S3 Event (automatic)
       When student_stats.json uploaded to s3://bucket/sync/
-      Event structure: {"Records": [{"s3": {"bucket": {...}, "object": {"key": "..."}}}]}
+      Event structure: {"Records": [{"s3": {"bucket": {...}, "object": {"key": "..."}}}, ...]}
+      (or SQS records whose body is such an S3 notification)
+      All records are processed; see _process_s3_batch for the response shape.
 
     TRIGGER 2: AppSync Mutation (API call)
       Supported field names (event['info']['fieldName']):
@@ -306,24 +762,26 @@ def lambda_handler(event, context):
       }
     """
     cid = _correlation_id()
-    logger.info("[%s] Offline Sync Lambda invoked", cid)
-    logger.info("[%s] Event: %s", cid, json.dumps(event, default=str))
+    records = event.get("Records") or []
+    logger.info(
+        "[%s] Offline Sync Lambda invoked (records=%d, field=%s)",
+        cid, len(records), event.get("info", {}).get("fieldName"),
+    )
 
     try:
         # ── Detect S3 trigger ───────────────────────────────────────────────
         if _is_s3_event(event):
-            logger.info("[%s] Detected S3 trigger", cid)
-            record = event["Records"][0]
-            bucket = record["s3"]["bucket"]["name"]
-            key = record["s3"]["object"]["key"]
-            
-            # Read S3 object
-            payload = _read_s3_object(bucket, key, cid)
-            
-            # Write to DynamoDB
-            result = _write_student_aggregate_stats(payload, cid)
-            
-            logger.info("[%s] S3 sync complete: %s", cid, json.dumps(result, default=str))
+            result = _process_s3_batch(event, cid)
+            logger.info(
+                "[%s] S3 sync complete: records=%d written=%d superseded=%d failed=%d classes=%d",
+                cid, result["records"], result["written"], result["superseded"], result["failed"],
+                result["classes"],
+            )
+            direct = not any(r.get("eventSource") == "aws:sqs" for r in records)
+            if direct and result["records"] and result["failed"] == result["records"]:
+                # Direct (async) S3 invocations ignore batchItemFailures; nothing was
+                # written, so let Lambda's async retry take the whole batch again.
+                raise Exception(f"S3SyncError: all {result['records']} records failed")
             return result
 
         # ── Detect AppSync mutation ───────────────────────────────────────
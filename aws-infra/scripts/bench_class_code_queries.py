@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Local benchmark: listStudentProgresses via class_code-index vs. Scan + filter.
+
+Runs the real content_distribution `_list_student_progresses` against an
+in-memory DynamoDB stand-in seeded with N students (plus their quiz_attempt
+rows) spread over classes of ~35. The stand-in implements Query/Scan paging
+the way DynamoDB does (Limit counts items *evaluated*, before the filter) and
+meters read capacity as DynamoDB bills it:
+
+    Scan   RCU = ceil(bytes of every item evaluated / 4 KB) * 0.5   (per page)
+    Query  RCU = ceil(bytes of index items read / 4 KB) * 0.5       (per page)
+
+Latency is modeled as  pages * --rtt-ms  + measured handler CPU time.
+No AWS credentials or network access needed.
+
+Usage:
+  python aws-infra/scripts/bench_class_code_queries.py
+  python aws-infra/scripts/bench_class_code_queries.py --students 10000 --attempts-per-student 5 --json out.json
+"""
+
+import argparse
+import bisect
+import importlib.util
+import json
+import math
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+
+from botocore.exceptions import ClientError
+
+HANDLER = os.path.join(os.path.dirname(__file__), "..", "lambda", "content_distribution", "handler.py")
+
+
+def _item_size(item: dict) -> int:
+    return len(json.dumps(item, default=str).encode("utf-8"))
+
+
+def _matches(condition, item: dict) -> bool:
+    """Evaluate the boto3 condition objects the handlers build."""
+    if condition is None:
+        return True
+    expr = condition.get_expression()
+    op, values = expr["operator"], expr["values"]
+    if op == "AND":
+        return all(_matches(v, item) for v in values)
+    if op == "OR":
+        return any(_matches(v, item) for v in values)
+    if op == "=":
+        return item.get(values[0].name) == values[1]
+    if op == "<>":
+        return values[0].name in item and item[values[0].name] != values[1]
+    if op == "attribute_not_exists":
+        return values[0].name not in item
+    if op == "attribute_exists":
+        return values[0].name in item
+    raise NotImplementedError(op)
+
+
+class StandInTable:
+    """Just enough of a boto3 Table for Query/Scan paging with capacity metering."""
+
+    def __init__(self, items: list, index_attr: str = "class_code", has_index: bool = True):
+        self.items = sorted(items, key=lambda it: it["user_id"])
+        self.sizes = {id(it): _item_size(it) for it in self.items}
+        self.has_index = has_index
+        self.index = {}
+        for it in self.items:
+            if index_attr in it:  # sparse, like a real GSI
+                self.index.setdefault(it[index_attr], []).append(it)
+        self._keys = {}  # id(candidate list) -> sorted user_ids, for ExclusiveStartKey
+        self.reset()
+
+    def reset(self) -> None:
+        self.requests = 0
+        self.rcu = 0.0
+        self.items_read = 0
+
+    def _page(self, candidates: list, Limit=None, ExclusiveStartKey=None, FilterExpression=None, **_):
+        start = 0
+        if ExclusiveStartKey:
+            keys = self._keys.get(id(candidates))
+            if keys is None:
+                keys = self._keys[id(candidates)] = [it["user_id"] for it in candidates]
+            start = bisect.bisect_right(keys, ExclusiveStartKey["user_id"])
+        evaluated = candidates[start:start + Limit] if Limit else candidates[start:]
+        self.requests += 1
+        self.items_read += len(evaluated)
+        self.rcu += math.ceil(sum(self.sizes[id(it)] for it in evaluated) / 4096) * 0.5
+        resp = {"Items": [it for it in evaluated if _matches(FilterExpression, it)]}
+        if start + len(evaluated) < len(candidates):
+            resp["LastEvaluatedKey"] = {"user_id": evaluated[-1]["user_id"]}
+        return resp
+
+    def get_item(self, Key, **_):
+        self.requests += 1
+        self.rcu += 0.5
+        return {}  # no CLASS# rollup items seeded
+
+    def scan(self, **kwargs):
+        return self._page(self.items, **kwargs)
+
+    def query(self, IndexName=None, KeyConditionExpression=None, **kwargs):
+        if not self.has_index:
+            raise ClientError(
+                {"Error": {"Code": "ValidationException",
+                           "Message": "The table does not have the specified index: " + str(IndexName)}},
+                "Query",
+            )
+        expr = KeyConditionExpression.get_expression()
+        return self._page(self.index.get(expr["values"][1], []), **kwargs)
+
+
+def seed(students: int, class_size: int, attempts: int, seed_value: int = 7) -> tuple[list, list]:
+    rng = random.Random(seed_value)
+    n_classes = max(1, students // class_size)
+    codes = [f"C{i:05d}" for i in range(n_classes)]
+    items = []
+    for s in range(students):
+        user_id = f"stu-{s:06d}"
+        items.append({
+            "user_id": user_id,
+            "record_type": "student_aggregate",
+            "class_code": codes[s % n_classes],
+            "current_streak": Decimal(rng.randint(0, 30)),
+            "device_id": f"dev-{s:06d}",
+            "last_quiz_date": "2026-03-0%d" % rng.randint(1, 9),
+            "last_sync_timestamp": "2026-03-09T09:%02d:00+00:00" % rng.randint(0, 59),
+            "quizAttempts": Decimal(attempts),
+            "totalScore": Decimal(str(round(rng.uniform(40, 100), 1))),
+        })
+        for a in range(attempts):
+            items.append({
+                "user_id": f"{user_id}_quiz-{a}_{1772000000 + a}",
+                "record_type": "quiz_attempt",
+                "userId": user_id,
+                "quizId": f"quiz-{a}",
+                "score": Decimal(rng.randint(0, 10)),
+                "totalQuestions": Decimal(10),
+                "subject": "Physics",
+                "syncedAt": "2026-03-09T09:00:00+00:00",
+            })
+    return items, codes
+
+
+def _load_handler():
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    spec = importlib.util.spec_from_file_location("content_distribution_handler", HANDLER)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.logger.disabled = True  # fallback warnings would flood the output
+    return module
+
+
+def run(handler, table: StandInTable, codes: list, dashboards: int, page_size: int, rtt_ms: float) -> dict:
+    """Each dashboard refresh pages through one whole class."""
+    handler.sync_table = table
+    table.reset()
+    latencies = []
+    students_seen = 0
+    for code in codes[:dashboards]:
+        started = time.perf_counter()
+        requests_before = table.requests
+        token = None
+        while True:
+            page = handler._list_student_progresses(code, page_size, token, "bench")
+            students_seen += len(page["items"])
+            token = page["nextToken"]
+            if not token:
+                break
+        cpu_ms = (time.perf_counter() - started) * 1000
+        latencies.append(cpu_ms + (table.requests - requests_before) * rtt_ms)
+    latencies.sort()
+    return {
+        "refreshes": len(latencies),
+        "students_returned": students_seen,
+        "requests_per_refresh": round(table.requests / len(latencies), 1),
+        "items_read_per_refresh": round(table.items_read / len(latencies), 1),
+        "rcu_per_refresh": round(table.rcu / len(latencies), 2),
+        "latency_ms_p50": round(latencies[len(latencies) // 2], 1),
+        "latency_ms_p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 1),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--class-size", type=int, default=35)
+    parser.add_argument("--attempts-per-student", type=int, default=5)
+    parser.add_argument("--dashboards", type=int, default=20, help="Class refreshes to time")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--rtt-ms", type=float, default=8.0, help="Modeled DynamoDB round trip per request")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    handler = _load_handler()
+    items, codes = seed(args.students, args.class_size, args.attempts_per_student)
+    random.Random(1).shuffle(codes)
+
+    results = {
+        "config": vars(args) | {"table_items": len(items), "classes": len(codes)},
+        "scan": run(handler, StandInTable(items, has_index=False), codes, args.dashboards, args.page_size, args.rtt_ms),
+        "query": run(handler, StandInTable(items), codes, args.dashboards, args.page_size, args.rtt_ms),
+    }
+    assert results["scan"]["students_returned"] == results["query"]["students_returned"]
+
+    print(f"{len(items)} items, {len(codes)} classes, {args.dashboards} dashboard refreshes")
+    print(f"{'':8}{'requests':>10}{'items read':>12}{'RCU':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for mode in ("scan", "query"):
+        r = results[mode]
+        print(f"{mode:8}{r['requests_per_refresh']:>10}{r['items_read_per_refresh']:>12}"
+              f"{r['rcu_per_refresh']:>10}{r['latency_ms_p50']:>10}{r['latency_ms_p95']:>10}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
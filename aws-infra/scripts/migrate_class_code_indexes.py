@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Create and backfill the class_code / teacher_id GSIs used by the Lambdas.
+
+    studaxis-student-sync   class_code-index             class_code (HASH) + user_id (RANGE)
+    studaxis-assignments    class_code-created_at-index  class_code (HASH) + created_at (RANGE)
+    studaxis-classes        teacher_id-index             teacher_id (HASH)
+                            class_code-index             class_code (HASH)
+
+listStudentProgresses, list_assignments_for_class, get_classes_for_teacher and
+verify_class_code query these indexes and fall back to a scan until they are
+ACTIVE, so this can run against a live deployment in any order.
+
+Backfill (runs before the index is created, so the initial build picks it up):
+  - key attributes stored as non-strings or with stray whitespace are rewritten
+    as trimmed strings (the index only accepts type S; class codes are also
+    uppercased in studaxis-classes, matching verify_class_code)
+  - quiz_attempt rows in studaxis-student-sync lose any class_code attribute,
+    keeping class_code-index sparse (student aggregates only)
+  - assignments without created_at get the epoch, so they still sort last
+
+Usage:
+  python aws-infra/scripts/migrate_class_code_indexes.py --dry-run
+  python aws-infra/scripts/migrate_class_code_indexes.py --region ap-south-1
+  python aws-infra/scripts/migrate_class_code_indexes.py --table studaxis-classes
+  python aws-infra/scripts/migrate_class_code_indexes.py --endpoint-url http://localhost:8000  # DynamoDB Local
+
+Idempotent: existing indexes are left alone, already-clean items are not rewritten.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+EPOCH = "1970-01-01T00:00:00+00:00"
+
+# table -> [(index name, [(attribute, key type), ...])]
+INDEXES = {
+    "studaxis-student-sync": [
+        ("class_code-index", [("class_code", "HASH"), ("user_id", "RANGE")]),
+    ],
+    "studaxis-assignments": [
+        ("class_code-created_at-index", [("class_code", "HASH"), ("created_at", "RANGE")]),
+    ],
+    "studaxis-classes": [
+        ("teacher_id-index", [("teacher_id", "HASH")]),
+        ("class_code-index", [("class_code", "HASH")]),
+    ],
+}
+
+
+def _fix_item(table_name: str, item: dict) -> tuple[dict, list]:
+    """Return (attributes to SET, attributes to REMOVE) for one item."""
+    sets, removes = {}, []
+    if table_name == "studaxis-student-sync" and item.get("record_type") == "quiz_attempt":
+        if "class_code" in item:
+            removes.append("class_code")
+        return sets, removes
+
+    index_attrs = {attr for _, keys in INDEXES[table_name] for attr, _ in keys}
+    for attr in sorted(index_attrs):
+        if attr not in item:
+            continue
+        value = item[attr]
+        clean = str(value).strip()
+        if attr == "class_code" and table_name == "studaxis-classes":
+            clean = clean.upper()
+        if not clean:
+            removes.append(attr)  # empty strings cannot be index keys
+        elif clean != value:
+            sets[attr] = clean
+
+    if table_name == "studaxis-assignments" and item.get("class_code") and not item.get("created_at"):
+        sets["created_at"] = EPOCH
+    return sets, removes
+
+
+def backfill(table, table_name: str, dry_run: bool) -> int:
+    """Scan the table once and rewrite items whose index attributes need cleaning."""
+    key_attrs = [k["AttributeName"] for k in table.key_schema]
+    changed = 0
+    kwargs = {}
+    while True:
+        res = table.scan(**kwargs)
+        for item in res.get("Items", []):
+            sets, removes = _fix_item(table_name, item)
+            # Table key attributes cannot be updated in place
+            sets = {k: v for k, v in sets.items() if k not in key_attrs}
+            removes = [k for k in removes if k not in key_attrs]
+            if not sets and not removes:
+                continue
+            changed += 1
+            key = {k: item[k] for k in key_attrs}
+            if dry_run:
+                print(f"  would update {key}: set={sets} remove={removes}")
+                continue
+            names, parts = {}, []
+            values = {}
+            if sets:
+                assignments = []
+                for i, (attr, value) in enumerate(sets.items()):
+                    names[f"#s{i}"] = attr
+                    values[f":s{i}"] = value
+                    assignments.append(f"#s{i} = :s{i}")
+                parts.append("SET " + ", ".join(assignments))
+            if removes:
+                for i, attr in enumerate(removes):
+                    names[f"#r{i}"] = attr
+                parts.append("REMOVE " + ", ".join(f"#r{i}" for i in range(len(removes))))
+            update = {
+                "Key": key,
+                "UpdateExpression": " ".join(parts),
+                "ExpressionAttributeNames": names,
+            }
+            if values:
+                update["ExpressionAttributeValues"] = values
+            table.update_item(**update)
+        if "LastEvaluatedKey" not in res:
+            return changed
+        kwargs["ExclusiveStartKey"] = res["LastEvaluatedKey"]
+
+
+def _index_status(client, table_name: str) -> dict:
+    desc = client.describe_table(TableName=table_name)["Table"]
+    return {g["IndexName"]: g["IndexStatus"] for g in desc.get("GlobalSecondaryIndexes", [])}
+
+
+def create_indexes(client, table_name: str, dry_run: bool, wait: bool) -> list:
+    """Create missing GSIs one at a time (DynamoDB allows one GSI creation per UpdateTable)."""
+    created = []
+    for index_name, keys in INDEXES[table_name]:
+        if index_name in _index_status(client, table_name):
+            print(f"  {index_name}: exists")
+            continue
+        if dry_run:
+            print(f"  {index_name}: would create")
+            continue
+        desc = client.describe_table(TableName=table_name)["Table"]
+        create = {
+            "IndexName": index_name,
+            "KeySchema": [{"AttributeName": a, "KeyType": t} for a, t in keys],
+            "Projection": {"ProjectionType": "ALL"},
+        }
+        if desc.get("BillingModeSummary", {}).get("BillingMode", "PROVISIONED") == "PROVISIONED":
+            throughput = desc["ProvisionedThroughput"]
+            create["ProvisionedThroughput"] = {
+                "ReadCapacityUnits": throughput["ReadCapacityUnits"],
+                "WriteCapacityUnits": throughput["WriteCapacityUnits"],
+            }
+        client.update_table(
+            TableName=table_name,
+            AttributeDefinitions=[{"AttributeName": a, "AttributeType": "S"} for a, _ in keys],
+            GlobalSecondaryIndexUpdates=[{"Create": create}],
+        )
+        print(f"  {index_name}: creating")
+        created.append(index_name)
+        # The next CreateIndex is rejected while this one builds, so always wait in between
+        if wait or len(created) < len(INDEXES[table_name]):
+            _wait_active(client, table_name, index_name)
+    return created
+
+
+def _wait_active(client, table_name: str, index_name: str, poll: float = 10.0) -> None:
+    started = time.monotonic()
+    while True:
+        desc = client.describe_table(TableName=table_name)["Table"]
+        status = _index_status(client, table_name).get(index_name)
+        if status == "ACTIVE" and desc.get("TableStatus") == "ACTIVE":
+            print(f"  {index_name}: ACTIVE after {time.monotonic() - started:.0f}s")
+            return
+        time.sleep(poll)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--region", default=os.environ.get("AWS_REGION", "ap-south-1"))
+    parser.add_argument("--endpoint-url", default=os.environ.get("DYNAMODB_ENDPOINT"))
+    parser.add_argument("--table", action="append", choices=sorted(INDEXES), help="Limit to these tables")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without writing")
+    parser.add_argument("--no-wait", action="store_true", help="Don't wait for the last index build")
+    parser.add_argument("--skip-backfill", action="store_true")
+    args = parser.parse_args()
+
+    import boto3
+    from botocore.exceptions import ClientError
+
+    session_kwargs = {"region_name": args.region}
+    if args.endpoint_url:
+        session_kwargs["endpoint_url"] = args.endpoint_url
+    client = boto3.client("dynamodb", **session_kwargs)
+    resource = boto3.resource("dynamodb", **session_kwargs)
+
+    for table_name in args.table or INDEXES:
+        print(f"{table_name}:")
+        try:
+            table = resource.Table(table_name)
+            table.load()
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "ResourceNotFoundException":
+                print("  table not found, skipping")
+                continue
+            raise
+        if not args.skip_backfill:
+            changed = backfill(table, table_name, args.dry_run)
+            print(f"  backfill: {changed} item(s) {'to update' if args.dry_run else 'updated'}")
+        create_indexes(client, table_name, args.dry_run, wait=not args.no_wait)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -24,6 +24,9 @@ aws dynamodb create-table \
 echo "[3/4] S3: studaxis-payloads"
 aws s3 mb "s3://studaxis-payloads" --region "$REGION" 2>/dev/null || echo "  (exists)"
 
+echo "      class_code / teacher_id indexes"
+python3 "$(dirname "$0")/migrate_class_code_indexes.py" --region "$REGION" --no-wait || echo "  (index migration failed)"
+
 echo "[4/4] Verify"
 aws dynamodb list-tables --region "$REGION"
 aws s3 ls --region "$REGION" | grep studaxis
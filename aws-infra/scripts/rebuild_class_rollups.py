@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Recompute the per-class rollup items (user_id = CLASS#<class_code>) in
+studaxis-student-sync from the student rows.
+
+The offline_sync Lambda keeps rollups current with ADD deltas on every
+aggregate write; run this once to backfill classes that existed before
+rollups, or to repair drift after a failed rollup update (logged by the
+Lambda as "Rollup update for <class> failed"). Contributions are computed
+with the Lambda's own _rollup_contribution, so both always agree.
+
+Topic sums come from quiz_attempt rows, attributed to the class the
+student belongs to now.
+
+Rollups are replaced with PutItem; writes arriving during the rebuild can
+be lost from the totals, so run it when devices are quiet.
+
+Usage:
+  python aws-infra/scripts/rebuild_class_rollups.py --dry-run
+  python aws-infra/scripts/rebuild_class_rollups.py --region ap-south-1 --class-code PHY10
+  python aws-infra/scripts/rebuild_class_rollups.py --endpoint-url http://localhost:8000  # DynamoDB Local
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+from collections import Counter
+from datetime import datetime, timezone
+from decimal import Decimal
+
+HANDLER = os.path.join(os.path.dirname(__file__), "..", "lambda", "offline_sync", "handler.py")
+
+
+def _load_handler():
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    spec = importlib.util.spec_from_file_location("offline_sync_handler", HANDLER)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def compute_rollups(handler, items) -> dict:
+    """{class_code: Counter} from every row of the sync table."""
+    rollups = {}
+    attempts = []
+    class_of = {}
+    for item in items:
+        if item.get("record_type") == "quiz_attempt":
+            attempts.append(item)
+            continue
+        class_code, contribution = handler._rollup_contribution(item)
+        if class_code is None:
+            continue
+        class_of[item["user_id"]] = class_code
+        rollups.setdefault(class_code, Counter()).update(contribution)
+
+    for attempt in attempts:
+        class_code = class_of.get(attempt.get("userId"))
+        if class_code is None:
+            continue
+        topic = attempt.get("subject") or "General"
+        rollups[class_code].update({
+            f"topic_attempts#{topic}": Decimal(1),
+            f"topic_accuracy_sum#{topic}": Decimal(attempt.get("accuracyPercentage") or 0),
+        })
+    return rollups
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--region", default=os.environ.get("AWS_REGION", "ap-south-1"))
+    parser.add_argument("--endpoint-url", default=os.environ.get("DYNAMODB_ENDPOINT"))
+    parser.add_argument("--table", default=os.environ.get("DYNAMODB_TABLE_NAME", "studaxis-student-sync"))
+    parser.add_argument("--class-code", action="append", help="Only rebuild these classes")
+    parser.add_argument("--dry-run", action="store_true", help="Print rollups without writing")
+    args = parser.parse_args()
+
+    import boto3
+
+    handler = _load_handler()
+    resource_kwargs = {"region_name": args.region}
+    if args.endpoint_url:
+        resource_kwargs["endpoint_url"] = args.endpoint_url
+    table = boto3.resource("dynamodb", **resource_kwargs).Table(args.table)
+
+    items, kwargs = [], {}
+    while True:
+        res = table.scan(**kwargs)
+        items.extend(res.get("Items", []))
+        if "LastEvaluatedKey" not in res:
+            break
+        kwargs["ExclusiveStartKey"] = res["LastEvaluatedKey"]
+
+    rollups = compute_rollups(handler, items)
+    existing = {it["rollup_of"] for it in items if it.get("record_type") == handler.ROLLUP_RECORD_TYPE}
+    wanted = set(args.class_code) if args.class_code else set(rollups) | existing
+    now_iso = datetime.now(timezone.utc).isoformat()
+    print(f"{len(items)} rows scanned, {len(rollups)} classes with students")
+
+    for class_code in sorted(wanted):
+        counts = {k: v for k, v in rollups.get(class_code, Counter()).items() if v}
+        print(f"  {class_code}: students={counts.get('students', 0)} attributes={len(counts)}")
+        if args.dry_run:
+            continue
+        key = {"user_id": f"{handler.ROLLUP_PREFIX}{class_code}"}
+        if not counts:
+            table.delete_item(Key=key)  # class has no students left
+            continue
+        table.put_item(Item={
+            **key,
+            "record_type": handler.ROLLUP_RECORD_TYPE,
+            "rollup_of": class_code,
+            "updated_at": now_iso,
+            **counts,
+        })
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -37,6 +37,7 @@ from utils.export_helpers import (
     notes_to_docx, notes_to_pdf,
 )
 from utils.content_uploader import ContentUploader
+from utils.s3_client import S3StatsClient
 from utils.api_gateway_client import TeacherApiClient
 
 # Load environment variables
@@ -328,6 +329,11 @@ with st.sidebar:
 
     school_name = st.text_input("School Name", value="Demo School")
     class_name  = st.selectbox("Select Class", ["Class 10", "Class 11", "Class 12"])
+    class_code  = st.text_input(
+        "Class Code",
+        value=os.getenv('DASHBOARD_CLASS_CODE', ''),
+        help="Read live class KPIs from this class's rollup (kept current at sync time)",
+    ).strip().upper()
     subject     = st.multiselect(
         "Filter by Subject",
         ["Mathematics", "Science", "English", "History", "Geography"],
@@ -403,43 +409,37 @@ if auto_refresh and refresh_interval > 0:
 # DATA LOADING FUNCTIONS (WITH FALLBACK)
 # ─────────────────────────────────────────────────────────────────────────────
 
+def _flatten_student_stats(key, stats_data):
+    """One dashboard row from a student_<id>_*.json stats document."""
+    return {
+        'student_id': key.split('_')[1],
+        'last_sync': stats_data.get('last_sync_time', 'N/A'),
+        'total_quizzes': len(stats_data.get('quiz_scores', {})),
+        'avg_score': calculate_avg_score(stats_data.get('quiz_scores', {})),
+        'current_streak': stats_data.get('streak', 0),
+        'connectivity_status': stats_data.get('connectivity_status', 'Unknown'),
+    }
+
+
+@st.cache_resource
+def _stats_loader(bucket_name):
+    return S3StatsClient(bucket_name)
+
+
 @st.cache_data(ttl=30)
-def fetch_student_stats_from_s3(bucket_name=STUDENT_STATS_BUCKET):
+def fetch_student_stats_from_s3(bucket_name=STUDENT_STATS_BUCKET, class_key="all"):
     """
     Fetch all student_*.json files from S3 bucket.
+    Paginated listing, parallel fetch, and a per-class ETag cache on disk, so
+    a refresh only downloads students whose file changed.
     Returns empty DataFrame if bucket doesn't exist or has no data.
     """
     try:
-        response = s3_client.list_objects_v2(Bucket=bucket_name, Prefix='student_')
-        
-        if 'Contents' not in response:
-            return pd.DataFrame()
-        
-        all_stats = []
-        
-        for obj in response['Contents']:
-            if obj['Key'].endswith('.json'):
-                try:
-                    file_obj = s3_client.get_object(Bucket=bucket_name, Key=obj['Key'])
-                    stats_data = json.loads(file_obj['Body'].read().decode('utf-8'))
-                    
-                    student_id = obj['Key'].split('_')[1]
-                    
-                    flattened = {
-                        'student_id': student_id,
-                        'last_sync': stats_data.get('last_sync_time', 'N/A'),
-                        'total_quizzes': len(stats_data.get('quiz_scores', {})),
-                        'avg_score': calculate_avg_score(stats_data.get('quiz_scores', {})),
-                        'current_streak': stats_data.get('streak', 0),
-                        'connectivity_status': stats_data.get('connectivity_status', 'Unknown'),
-                    }
-                    all_stats.append(flattened)
-                except Exception as e:
-                    st.warning(f"⚠️ Error reading {obj['Key']}")
-                    continue
-        
-        return pd.DataFrame(all_stats)
-    
+        rows, report = _stats_loader(bucket_name).load_all(_flatten_student_stats, class_key=class_key)
+        if report['errors']:
+            st.warning(f"⚠️ Could not read {len(report['errors'])} student file(s), e.g. {report['errors'][0]}")
+        return pd.DataFrame(rows)
+
     except Exception as e:
         # Graceful fallback — don't crash, just return empty
         st.warning(f"⚠️ Could not connect to S3: {e}")
@@ -486,25 +486,74 @@ def call_appsync_mutation(mutation_string, variables, operation_name=None):
         st.error(f"AppSync error: {str(exc)}")
         return None
 
+def _scan_all(table, **kwargs):
+    """Every item of a DynamoDB scan, following LastEvaluatedKey."""
+    response = table.scan(**kwargs)
+    items = response.get('Items', [])
+    while 'LastEvaluatedKey' in response:
+        response = table.scan(ExclusiveStartKey=response['LastEvaluatedKey'], **kwargs)
+        items.extend(response.get('Items', []))
+    return items
+
 @st.cache_data(ttl=15)
 def fetch_sync_metadata_from_dynamodb():
     """Query DynamoDB 'studaxis-student-sync' for student sync metadata"""
     try:
-        table = dynamodb.Table(SYNC_TABLE_NAME)
-        response = table.scan()
-        items = response.get('Items', [])
+        items = [i for i in _scan_all(dynamodb.Table(SYNC_TABLE_NAME))
+                 if i.get('record_type') != 'class_rollup']  # CLASS#<code> rollup items
         return pd.DataFrame(items)
     except Exception as e:
         st.warning(f"⚠️ DynamoDB connection issue ({SYNC_TABLE_NAME}): {e}")
         return pd.DataFrame()
 
+@st.cache_data(ttl=15)
+def fetch_class_rollup(class_code):
+    """
+    Class KPIs from the CLASS#<class_code> rollup item the offline_sync Lambda
+    keeps current — one GetItem instead of reading every student.
+    Returns None when there is no rollup (or no class code) yet.
+    """
+    if not class_code:
+        return None
+    try:
+        item = dynamodb.Table(SYNC_TABLE_NAME).get_item(Key={'user_id': f'CLASS#{class_code}'}).get('Item')
+    except Exception as e:
+        st.warning(f"⚠️ Could not read class rollup for {class_code}: {e}")
+        return None
+    if not item or not item.get('students'):
+        return None
+
+    students = int(item['students'])
+    topics, active = {}, {}
+    for attr, value in item.items():
+        kind, _, name = attr.partition('#')
+        if kind in ('topic_attempts', 'topic_accuracy_sum'):
+            topics.setdefault(name, {})[kind] = float(value)
+        elif kind == 'active':
+            active[name] = int(value)
+    today = datetime.now(timezone.utc).date()
+    return {
+        'students': students,
+        'avg_score': float(item.get('score_sum', 0)) / students,
+        'avg_streak': float(item.get('streak_sum', 0)) / students,
+        'quiz_attempts': int(item.get('quiz_attempts', 0)),
+        'active_today': active.get(today.isoformat(), 0),
+        'active_7d': sum(n for day, n in active.items()
+                         if day >= (today - timedelta(days=6)).isoformat()),
+        'topics': pd.DataFrame([
+            {'Topic': name,
+             'Avg Score': round(t.get('topic_accuracy_sum', 0) / t['topic_attempts'], 1),
+             'Attempts': int(t['topic_attempts'])}
+            for name, t in sorted(topics.items()) if t.get('topic_attempts')
+        ]),
+    }
+
 @st.cache_data(ttl=600)
 def fetch_quiz_index_from_dynamodb():
     """Query DynamoDB 'studaxis-quiz-index' for quiz metadata"""
     try:
-        table = dynamodb.Table(QUIZ_INDEX_TABLE)
-        response = table.scan()
-        items = response.get('Items', [])
+        items = [i for i in _scan_all(dynamodb.Table(QUIZ_INDEX_TABLE))
+                 if i.get('status') != 'deleted']  # skip tombstones
         return pd.DataFrame(items)
     except Exception as e:
         st.warning(f"⚠️ DynamoDB connection issue ({QUIZ_INDEX_TABLE}): {e}")
@@ -514,11 +563,11 @@ def fetch_quiz_index_from_dynamodb():
 # HELPER: Choose between real or demo data
 # ─────────────────────────────────────────────────────────────────────────────
 
-def get_student_stats(use_demo=False):
+def get_student_stats(use_demo=False, class_key="all"):
     """Returns either real or demo student stats"""
     if use_demo:
         return get_demo_student_stats()
-    real_data = fetch_student_stats_from_s3()
+    real_data = fetch_student_stats_from_s3(class_key=class_key)
     if real_data.empty:
         st.markdown('<div class="alert-strip alert-info">No live data yet — showing sample data. Your students\' results will appear here once their devices sync.</div>',
                     unsafe_allow_html=True)
@@ -583,7 +632,7 @@ with tab1:
     st.markdown(f'<div class="section-title">Class Overview — {class_name}</div>',
                 unsafe_allow_html=True)
 
-    df_stats = get_student_stats(use_demo=use_demo_data)
+    df_stats = get_student_stats(use_demo=use_demo_data, class_key=class_name)
 
     if df_stats.empty:
         # ── Glassmorphic empty state ────────────────────────────────────────
@@ -610,10 +659,20 @@ with tab1:
 
     else:
         # ── Glassmorphic KPI row ─────────────────────────────────────────────
-        avg_class_score = df_stats['avg_score'].mean()
-        avg_streak      = df_stats['current_streak'].mean()
-        total_quizzes   = df_stats['total_quizzes'].sum()
-        online_count    = len(df_stats[df_stats['connectivity_status'] == 'online'])
+        rollup = None if use_demo_data else fetch_class_rollup(class_code)
+        if rollup:
+            student_count   = rollup['students']
+            avg_class_score = rollup['avg_score']
+            avg_streak      = rollup['avg_streak']
+            total_quizzes   = rollup['quiz_attempts']
+            active_label    = f"▲ {rollup['active_today']} active today · {rollup['active_7d']} this week"
+        else:
+            student_count   = len(df_stats)
+            avg_class_score = df_stats['avg_score'].mean()
+            avg_streak      = df_stats['current_streak'].mean()
+            total_quizzes   = df_stats['total_quizzes'].sum()
+            online_count    = len(df_stats[df_stats['connectivity_status'] == 'online'])
+            active_label    = f"▲ {online_count} active now"
 
         kc1, kc2, kc3, kc4 = st.columns(4, gap="medium")
 
@@ -628,7 +687,7 @@ with tab1:
                 </div>
                 """, unsafe_allow_html=True)
 
-        kpi(kc1, "grad-maroon", "Total Students",     len(df_stats),             f"▲ {online_count} active now")
+        kpi(kc1, "grad-maroon", "Total Students",     student_count,             active_label)
         kpi(kc2, "grad-sage",   "Class Average",      f"{avg_class_score:.1f}%", "▲ +3.2 pts this week")
         kpi(kc3, "grad-blue",   "Avg Streak",         f"{avg_streak:.0f} days",  "▲ +1.4 days")
         kpi(kc4, "grad-sunset", "Total Quizzes Done",  total_quizzes,            "Class-wide total")
@@ -689,7 +748,11 @@ with tab2:
     st.markdown(f'<div class="alert-strip alert-info" style="display:inline-block;margin-bottom:14px;">📖 Selected subjects: <strong>{", ".join(subject)}</strong></div>',
                 unsafe_allow_html=True)
 
-    topic_data = get_demo_topic_performance()
+    class_rollup = None if use_demo_data else fetch_class_rollup(class_code)
+    if class_rollup is not None and not class_rollup['topics'].empty:
+        topic_data = class_rollup['topics']
+    else:
+        topic_data = get_demo_topic_performance()
 
     if topic_data.empty:
         st.markdown('<div class="alert-strip alert-warn">⚠️ No topic data available.</div>',
@@ -765,7 +828,7 @@ with tab2:
 with tab3:
     st.markdown('<div class="section-title">Students Who May Need Extra Support</div>', unsafe_allow_html=True)
 
-    df_stats = get_student_stats(use_demo=use_demo_data)
+    df_stats = get_student_stats(use_demo=use_demo_data, class_key=class_name)
 
     if df_stats.empty:
         st.markdown('<div class="alert-strip alert-info">No student data available yet.</div>',
@@ -1522,7 +1585,7 @@ with tab7:
         )
         assigned_students = []
         if assign_mode == "Specific Students":
-            df_for_assign = get_student_stats(use_demo=use_demo_data)
+            df_for_assign = get_student_stats(use_demo=use_demo_data, class_key=class_name)
             if not df_for_assign.empty:
                 available_ids = df_for_assign["student_id"].tolist()
                 assigned_students = st.multiselect(
@@ -15,12 +15,15 @@ import boto3
 import json
 import uuid
 import logging
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional
 from botocore.exceptions import ClientError
 
 logger = logging.getLogger(__name__)
 
+# Matches the ContentDistribution Lambda: tombstones older than this trigger a full resync
+TOMBSTONE_RETENTION_DAYS = 30
+
 
 class ContentUploader:
     """Upload quiz content to S3 and register in DynamoDB quiz index."""
@@ -149,21 +152,38 @@ class ContentUploader:
                 response = self.table.scan(**scan_kwargs)
                 items.extend(response.get("Items", []))
 
+            items = [i for i in items if i.get("status") != "deleted"]
             return sorted(items, key=lambda x: x.get("created_at", ""), reverse=True)
         except ClientError as e:
             logger.error("Failed to list quizzes: %s", e)
             return []
 
     def delete_quiz(self, quiz_id: str, s3_key: str) -> Dict:
-        """Remove a quiz from both S3 and DynamoDB."""
+        """
+        Remove a quiz from S3 and mark its index row deleted.
+
+        The row stays behind as a tombstone (status="deleted", updated_at) so
+        incremental offline manifests can tell devices to drop the quiz;
+        `expires_at` lets DynamoDB TTL purge it after the retention window.
+        """
         errors = []
         try:
             self.s3_client.delete_object(Bucket=self.s3_bucket, Key=s3_key)
         except ClientError as e:
             errors.append(f"S3 delete failed: {e}")
 
+        now = datetime.now(timezone.utc)
         try:
-            self.table.delete_item(Key={"quiz_id": quiz_id})
+            self.table.update_item(
+                Key={"quiz_id": quiz_id},
+                UpdateExpression="SET #st = :deleted, updated_at = :now, expires_at = :exp",
+                ExpressionAttributeNames={"#st": "status"},
+                ExpressionAttributeValues={
+                    ":deleted": "deleted",
+                    ":now": now.isoformat(),
+                    ":exp": int((now + timedelta(days=TOMBSTONE_RETENTION_DAYS)).timestamp()),
+                },
+            )
         except ClientError as e:
             errors.append(f"DynamoDB delete failed: {e}")
 
@@ -1,29 +1,78 @@
-import boto3
+"""
+Studaxis — Student stats loader for the Teacher Dashboard
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Loads every student_*.json from the stats bucket without re-downloading
+students whose file has not changed:
+
+  1. List the prefix with the list_objects_v2 paginator (no 1000-key cap).
+  2. Keys whose listed ETag matches the local cache are served from it.
+  3. The rest are fetched on a thread pool with GetObject(IfNoneMatch=<cached
+     ETag>), so a file that changed back (or raced the listing) costs a 304.
+  4. The cache ({key: {etag, row}}) is persisted per class as JSON, written
+     atomically, so a dashboard restart starts warm.
+
+Rows are whatever `transform(key, stats)` returns; only transformed rows are
+cached, never the raw stats documents.
+"""
+
 import json
-from typing import Dict, List
 import logging
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_CACHE_DIR = Path(os.getenv(
+    "DASHBOARD_CACHE_DIR", Path.home() / ".cache" / "studaxis-dashboard"
+))
+FETCH_WORKERS = int(os.getenv("DASHBOARD_FETCH_WORKERS", "16"))
+# Bump when the cached row shape changes so old caches are ignored
+CACHE_VERSION = 1
+
+
+def _slug(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", value).strip("_") or "all"
+
+
 class S3StatsClient:
-    """Helper to fetch student stats from S3"""
-    
-    def __init__(self, bucket_name: str):
-        self.s3_client = boto3.client('s3')
+    """Paginated, parallel, ETag-cached loader for student stats files."""
+
+    def __init__(
+        self,
+        bucket_name: str,
+        prefix: str = "student_",
+        cache_dir: Optional[Path] = None,
+        max_workers: int = FETCH_WORKERS,
+        s3_client=None,
+    ):
         self.bucket_name = bucket_name
-    
-    def list_student_files(self) -> List[str]:
-        """List all student_*.json files in bucket"""
-        try:
-            response = self.s3_client.list_objects_v2(
-                Bucket=self.bucket_name,
-                Prefix='student_'
-            )
-            return [obj['Key'] for obj in response.get('Contents', []) if obj['Key'].endswith('.json')]
-        except Exception as e:
-            logger.error(f"Error listing S3 files: {e}")
-            return []
-    
+        self.prefix = prefix
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.max_workers = max(1, max_workers)
+        # Default pool is 10 connections; size it to the fetch workers
+        self.s3_client = s3_client or boto3.client(
+            "s3", config=Config(max_pool_connections=self.max_workers)
+        )
+
+    def list_student_files(self) -> List[Dict]:
+        """All student_*.json objects as [{'Key', 'ETag'}], across every page."""
+        paginator = self.s3_client.get_paginator("list_objects_v2")
+        files = []
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=self.prefix):
+            for obj in page.get("Contents", []):
+                if obj["Key"].endswith(".json"):
+                    files.append({"Key": obj["Key"], "ETag": obj.get("ETag", "")})
+        return files
+
     def get_student_stats(self, student_id: str) -> Dict:
         """Fetch User_Stats.json for a specific student"""
         try:
@@ -32,4 +81,104 @@ class S3StatsClient:
             return json.loads(obj['Body'].read().decode('utf-8'))
         except Exception as e:
             logger.error(f"Error fetching stats for {student_id}: {e}")
-            return {}            
\ No newline at end of file
+            return {}
+
+    # ── Cached bulk load ────────────────────────────────────────────────────
+
+    def _cache_path(self, class_key: str) -> Path:
+        return self.cache_dir / f"student_stats_{_slug(self.bucket_name)}_{_slug(class_key)}.json"
+
+    def _read_cache(self, class_key: str) -> Dict[str, Dict]:
+        try:
+            data = json.loads(self._cache_path(class_key).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != CACHE_VERSION or data.get("prefix") != self.prefix:
+            return {}
+        return data.get("entries", {})
+
+    def _write_cache(self, class_key: str, entries: Dict[str, Dict]) -> None:
+        path = self._cache_path(class_key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump({"version": CACHE_VERSION, "prefix": self.prefix, "entries": entries}, fh, default=str)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning("Could not persist stats cache %s: %s", path, e)
+
+    def _fetch(self, key: str, cached_etag: Optional[str]) -> Tuple[str, Optional[str], Optional[Dict]]:
+        """(status, etag, stats) where status is 'fetched' or 'not_modified'."""
+        kwargs = {"Bucket": self.bucket_name, "Key": key}
+        if cached_etag:
+            kwargs["IfNoneMatch"] = cached_etag
+        try:
+            obj = self.s3_client.get_object(**kwargs)
+        except ClientError as e:
+            code = str(e.response.get("Error", {}).get("Code", ""))
+            status = e.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+            if code in ("304", "NotModified") or status == 304:
+                return "not_modified", cached_etag, None
+            raise
+        stats = json.loads(obj["Body"].read().decode("utf-8"))
+        return "fetched", obj.get("ETag", ""), stats
+
+    def load_all(
+        self,
+        transform: Callable[[str, Dict], Dict],
+        class_key: str = "all",
+    ) -> Tuple[List[Dict], Dict]:
+        """
+        Return (rows, report). report counts listed / cached / fetched /
+        not_modified / errors (a list of "key: error" strings) and seconds.
+        A failed fetch falls back to the cached row when there is one.
+        """
+        started = time.monotonic()
+        cache = self._read_cache(class_key)
+        listed = self.list_student_files()
+
+        entries: Dict[str, Dict] = {}
+        stale = []
+        for obj in listed:
+            hit = cache.get(obj["Key"])
+            if hit and obj["ETag"] and hit.get("etag") == obj["ETag"]:
+                entries[obj["Key"]] = hit
+            else:
+                stale.append(obj["Key"])
+
+        report = {"listed": len(listed), "cached": len(entries), "fetched": 0,
+                  "not_modified": 0, "errors": []}
+
+        def work(key: str):
+            cached_etag = (cache.get(key) or {}).get("etag")
+            try:
+                return key, self._fetch(key, cached_etag), None
+            except Exception as e:
+                return key, None, e
+
+        if stale:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(stale))) as pool:
+                for key, result, error in pool.map(work, stale):
+                    if error is None:
+                        status, etag, stats = result
+                        if status == "not_modified":
+                            entries[key] = cache[key]
+                            report["not_modified"] += 1
+                            continue
+                        try:
+                            entries[key] = {"etag": etag, "row": transform(key, stats)}
+                            report["fetched"] += 1
+                            continue
+                        except Exception as e:
+                            error = e
+                    report["errors"].append(f"{key}: {error}")
+                    if key in cache:
+                        entries[key] = cache[key]
+
+        if entries != cache:
+            self._write_cache(class_key, entries)
+        report["seconds"] = round(time.monotonic() - started, 2)
+        logger.info("Student stats %s/%s: %s", self.bucket_name, class_key,
+                    {k: v for k, v in report.items() if k != "errors"})
+        return [e["row"] for e in entries.values()], report
@@ -9,6 +9,7 @@ if str(_BACKEND_DIR) not in sys.path:
 
 from functools import lru_cache
 from utils.local_storage import LocalStorage
+from rag.context_packer import clip_to_tokens, context_budget, pack_context
 
 from langchain_core.prompts import ChatPromptTemplate
 from typing import Any
@@ -35,15 +36,10 @@ def get_llm_model() -> str:
 
 LLM_MODEL: str = "llama3.2:3b"  # fallback only; _get_llm uses get_llm_model()
 
-# Approximate chars-per-token ratio for budget estimation
-_CHARS_PER_TOKEN = 4
 # Max tokens for llama3.2:3b context window (conservative)
 _MAX_CONTEXT_TOKENS = 3800
+# Generation reserve; the prompt template + question are counted per request (rag.context_packer)
 _NUM_PREDICT = 512
-# Reserve for prompt template + question + generation
-_RESERVED_TOKENS = _NUM_PREDICT + 400
-_CONTEXT_BUDGET_TOKENS = _MAX_CONTEXT_TOKENS - _RESERVED_TOKENS
-_CONTEXT_BUDGET_CHARS = _CONTEXT_BUDGET_TOKENS * _CHARS_PER_TOKEN
 
 
 # ---------------------------------------------------------------------------
@@ -343,6 +339,14 @@ def ask_ai(question: str, subject: str | None = None, user_id: str | None = None
         print(f"[warning] Error during retrieval: {e}")
         docs = []
 
+    # Token budget: model window minus generation reserve and the rendered template/question
+    budget_tokens = context_budget(
+        prompt.format(context="", textbook_context="", question=question),
+        context_tokens=_MAX_CONTEXT_TOKENS,
+        reserve_tokens=_NUM_PREDICT,
+    )
+    used_tokens = 0
+
     # Process and validate retrieved documents
     context: str = ""
     retrieved_context_available: bool = False
@@ -368,13 +372,14 @@ def ask_ai(question: str, subject: str | None = None, user_id: str | None = None
                     print(f"  ✓ Chunk {i+1}: {chunk_text[:60]}... {source_info}")
         
         if valid_chunks:
-            context = "\n\n".join(valid_chunks)
-            # Enforce token budget on retrieved context
-            if len(context) > _CONTEXT_BUDGET_CHARS:
-                context = context[:_CONTEXT_BUDGET_CHARS]
-                print(f"[debug] Trimmed retrieved context to {_CONTEXT_BUDGET_CHARS} chars (token budget)")
-            retrieved_context_available = True
-            retrieved_chunk_count = len(valid_chunks)
+            # Greedy by rank into the token budget; overlapping splitter edges removed
+            packed = pack_context(valid_chunks, budget_tokens)
+            context = packed.text
+            if packed.dropped:
+                print(f"[debug] Packed {len(packed.chunks)} chunks ({packed.tokens} tokens), dropped {packed.dropped}")
+            retrieved_context_available = bool(context)
+            retrieved_chunk_count = len(packed.chunks)
+            used_tokens = packed.tokens
             print(f"✅ Retrieved {retrieved_chunk_count} relevant chunks from semantic search")
     
     if not retrieved_context_available:
@@ -404,13 +409,17 @@ def ask_ai(question: str, subject: str | None = None, user_id: str | None = None
     if retrieved_context_available:
         final_context = context
         # Only add textbook if we have remaining budget (else redundant — chunks came from textbooks)
-        remaining_budget = _CONTEXT_BUDGET_CHARS - len(final_context)
-        if textbook_available and remaining_budget > 200:
-            final_textbook = textbook_ctx[:remaining_budget]
+        remaining_budget = budget_tokens - used_tokens
+        if textbook_available and remaining_budget > 50:
+            final_textbook = clip_to_tokens(textbook_ctx, remaining_budget)
         else:
             final_textbook = ""
     else:
-        final_context = textbook_ctx if textbook_available else "[No study material available]"
+        final_context = (
+            clip_to_tokens(textbook_ctx, budget_tokens)
+            if textbook_available
+            else "[No study material available]"
+        )
         final_textbook = ""
     
     # ============ STEP 5: CREATE RAG CHAIN ============
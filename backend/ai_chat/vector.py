@@ -66,6 +66,39 @@ CHROMA_DIR: Path = DATA_DIR / "chromadb"
 
 EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
 COLLECTION_NAME: str = "studaxis_textbooks"
+STRUCTURE_INDEX_DIR: Path = DATA_DIR / "textbook_index"
+
+
+def _slide_documents(file: Path) -> list[Any]:
+    """One Document per slide (metadata 'page' = slide index) so chunks map back to slide titles."""
+    from langchain_core.documents import Document
+    from utils.text_cache import get_text_cache
+
+    cache = get_text_cache(DATA_DIR / "cache" / "extracted_text")
+    return [
+        Document(page_content=text, metadata={"page": i})
+        for i, text in enumerate(cache.iter_pages(file))
+        if text.strip()
+    ]
+
+
+def _index_structure(file: Path, split_docs: list[Any]) -> None:
+    """Build the chapter/section index for `file` and tag its chunks (best-effort)."""
+    try:
+        from rag.structure_index import annotate_chunks, load_or_build, save_structure
+        structure = load_or_build(file, DATA_DIR)
+        for sec in structure.sections:
+            sec.chunk_start = sec.chunk_end = None
+        annotate_chunks(structure, split_docs)
+        save_structure(structure, STRUCTURE_INDEX_DIR)
+        logging.getLogger("studaxis.vector").info(
+            "Structure index for %s: %d chapters, %d sections (%s)",
+            file.name, len(structure.chapters()), len(structure.sections), structure.method,
+        )
+    except Exception as e:
+        logging.getLogger("studaxis.vector").warning("Structure index skipped for %s: %s", file.name, e)
+        for i, doc in enumerate(split_docs):
+            doc.metadata["chunk_index"] = i
 
 
 def build_vector_store(rebuild: bool = False) -> Chroma:
@@ -153,6 +186,7 @@ def build_vector_store(rebuild: bool = False) -> Chroma:
             subject: str = file.stem.split("_")[0].lower()
 
             loader = None
+            docs: list[Any] | None = None
             suffix = file.suffix.lower()
             print(f"[debug] Processing {file.name} (suffix {suffix})")
 
@@ -168,7 +202,10 @@ def build_vector_store(rebuild: bool = False) -> Chroma:
                 loader = TextLoader(str(file), encoding="utf-8")
             elif suffix == ".csv" and CSVLoader is not None:
                 loader = CSVLoader(str(file))
-            elif suffix in (".pptx", ".ppt") and UnstructuredPowerPointLoader is not None:
+            elif suffix == ".pptx":
+                # one document per slide, read straight from the package
+                docs = _slide_documents(file)
+            elif suffix == ".ppt" and UnstructuredPowerPointLoader is not None:
                 loader = UnstructuredPowerPointLoader(str(file))
             elif suffix in (".xlsx", ".xls") and UnstructuredExcelLoader is not None:
                 loader = UnstructuredExcelLoader(str(file))
@@ -181,11 +218,11 @@ def build_vector_store(rebuild: bool = False) -> Chroma:
                 print(f"[debug] Unsupported file type, skipping: {file.name}")
                 continue
 
-            if loader is None:
-                print(f"[debug] No loader available for {file.name}, skipping")
-                continue
-
-            docs: list[Any] = loader.load()
+            if docs is None:
+                if loader is None:
+                    print(f"[debug] No loader available for {file.name}, skipping")
+                    continue
+                docs = loader.load()
 
             # for text files, also look for youtube links lines
             if suffix == ".txt" and YoutubeLoader is not None and docs:
@@ -250,12 +287,22 @@ def build_vector_store(rebuild: bool = False) -> Chroma:
     splitter: RecursiveCharacterTextSplitter = RecursiveCharacterTextSplitter(
         chunk_size=600,   # ~150 tokens, safely within 256-token embedding limit
         chunk_overlap=100,
-        separators=["\n\n", "\n", ". ", " ", ""]
+        separators=["\n\n", "\n", ". ", " ", ""],
+        add_start_index=True,  # lets the structure index place chunks within a page
     )
 
     split_docs: list[Any] = splitter.split_documents(documents)
     print(f"✓ Created {len(split_docs)} chunks")
 
+    # Chapter/section metadata per textbook file (enables chapter-scoped retrieval)
+    chunks_by_source: dict[str, list[Any]] = {}
+    for doc in split_docs:
+        chunks_by_source.setdefault(doc.metadata.get("source", ""), []).append(doc)
+    files_by_name = {f.name: f for f in textbook_files}
+    for source, source_chunks in chunks_by_source.items():
+        if source in files_by_name and files_by_name[source].suffix.lower() in (".pdf", ".txt", ".text", ".md", ".pptx"):
+            _index_structure(files_by_name[source], source_chunks)
+
     # Generate deterministic IDs from content hash for deduplication
     import hashlib
     doc_ids: list[str] = []
@@ -307,14 +354,17 @@ def add_textbook_to_vector_store(file_path: Path) -> None:
         loader = PyPDFLoader(str(file_path))
     elif suffix in (".txt", ".text"):
         loader = TextLoader(str(file_path), encoding="utf-8")
-    elif suffix in (".pptx", ".ppt") and UnstructuredPowerPointLoader is not None:
+    elif suffix == ".ppt" and UnstructuredPowerPointLoader is not None:
         loader = UnstructuredPowerPointLoader(str(file_path))
-    else:
+    elif suffix != ".pptx":
         log.warning("[add_textbook] No loader for %s", file_path.name)
         return
 
     try:
-        docs: list[Any] = loader.load()
+        if suffix == ".pptx":
+            docs: list[Any] = _slide_documents(file_path)
+        else:
+            docs = loader.load()
     except Exception as e:
         log.exception("[add_textbook] Failed to load %s: %s", file_path.name, e)
         raise
@@ -334,8 +384,10 @@ def add_textbook_to_vector_store(file_path: Path) -> None:
         chunk_size=600,
         chunk_overlap=100,
         separators=["\n\n", "\n", ". ", " ", ""],
+        add_start_index=True,
     )
     split_docs = splitter.split_documents(docs)
+    _index_structure(file_path, split_docs)
 
     doc_ids = []
     for i, doc in enumerate(split_docs):
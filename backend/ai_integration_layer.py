@@ -15,12 +15,21 @@ import hashlib
 import json
 import os
 import re
-import threading
 import time
 from typing import Any, Optional
 
 import requests
 
+from ai_telemetry import AITelemetry, get_telemetry
+from rag.context_packer import (
+    MODEL_CONTEXT_TOKENS,
+    clip_to_tokens,
+    context_budget,
+    count_tokens,
+    pack_context,
+)
+from utils.structured_log import StructuredLog, get_structured_log
+
 # Strictly local; env override for non-default Ollama port
 _OLLAMA_BASE = os.environ.get("OLLAMA_BASE_URL", "http://localhost:11434").rstrip("/")
 OLLAMA_API_URL = f"{_OLLAMA_BASE}/api/generate"
@@ -74,7 +83,8 @@ class AIConfig:
     CLOUD_AI_MODEL: str = "[CLOUD_AI_MODEL]"
     EMBEDDING_MODEL: str = "[EMBEDDING_MODEL]"
     AI_TIMEOUT_SECONDS: int = 60
-    AI_RESPONSE_MAX_TOKENS: int = 512
+    AI_RESPONSE_MAX_TOKENS: int = 512  # reserved out of MODEL_CONTEXT_TOKENS for generation
+    MODEL_CONTEXT_TOKENS: int = MODEL_CONTEXT_TOKENS
     MAX_INPUT_CHARS: int = 6000
     MAX_CONTEXT_ITEMS: int = 12
     MAX_CHAT_HISTORY_ITEMS: int = 20
@@ -82,6 +92,10 @@ class AIConfig:
     ENABLE_CLOUD_INFERENCE: bool = True
     ENABLE_LOCAL_INFERENCE: bool = True
     ENABLE_AI_LOGGING: bool = True
+    ENABLE_AI_TELEMETRY: bool = True
+    LOG_MAX_BYTES: int = 2 * 1024 * 1024  # rotate ai_request_log.jsonl past this size
+    LOG_MAX_AGE_SECONDS: int = 7 * 24 * 3600  # ... or once it is a week old
+    LOG_BACKUP_COUNT: int = 3  # gzip'd backups kept (.1.gz newest)
 
 
 @dataclass
@@ -292,12 +306,17 @@ class AIEngine:
 
     _rag_failed_once = False  # log RAG init failure only once
 
-    def __init__(self, base_path: str = ".", config: Optional[AIConfig] = None) -> None:
+    def __init__(
+        self,
+        base_path: str = ".",
+        config: Optional[AIConfig] = None,
+        telemetry: Optional[AITelemetry] = None,
+    ) -> None:
         self.base_path = base_path
         self.config = config or AIConfig()
         self.templates = PromptTemplateLibrary()
         self.state_machine = AIStateMachine()
-        self._log_lock = threading.Lock()
+        self.telemetry = telemetry or get_telemetry()
         # RAG components (lazy-loaded from ai_chat)
         self._rag_ready: bool = False
         self._rag_retriever_fn: Optional[Any] = None
@@ -359,10 +378,16 @@ class AIEngine:
         task_type: AITaskType,
         user_input: str,
         context_data: dict[str, Any],
-        retrieved_context: str,
+        retrieved_chunks: list[Any],
         textbook_context: str,
     ) -> str:
-        """Build task-specific RAG prompt with guardrails and fallback instruction."""
+        """
+        Build task-specific RAG prompt with guardrails and fallback instruction.
+
+        Retrieved chunks (rank order) are packed into whatever token budget
+        remains after the fixed prompt and the generation reserve; the textbook
+        reference is then clipped to fill what is left.
+        """
         template = self.templates.select(task_type)
         subject = context_data.get("subject") or context_data.get("topic") or ""
         difficulty = context_data.get("difficulty", "Beginner")
@@ -387,26 +412,41 @@ class AIEngine:
                 f"Focus all content on {subj}.\n\n"
             )
 
-        combined_context = retrieved_context
-        if textbook_context and textbook_context.strip():
-            combined_context = f"{retrieved_context}\n\n{textbook_context}".strip()
-
-        # Strict token budget for 4GB RAM (limit context size)
-        max_ctx_chars = 3200
-        if len(combined_context) > max_ctx_chars:
-            combined_context = combined_context[:max_ctx_chars] + "\n[...truncated...]"
+        def render(context_block: str) -> str:
+            return (
+                f"{self._GUARDRAILS_OVERLAY}"
+                f"{subject_prefix}"
+                f"{template.system_instruction}\n\n"
+                f"{self._FALLBACK_INSTRUCTION}\n"
+                f"TEXTBOOK CONTEXT:\n{context_block}\n\n"
+                f"Response style: {template.response_format_rules}\n\n"
+                + (f"Recent conversation:\n{history_block}\n\n" if history_block else "")
+                + f"User question:\n{user_input}\n\n"
+                "Answer directly for the learner. Do not repeat instructions."
+            )
 
-        return (
-            f"{self._GUARDRAILS_OVERLAY}"
-            f"{subject_prefix}"
-            f"{template.system_instruction}\n\n"
-            f"{self._FALLBACK_INSTRUCTION}\n"
-            f"TEXTBOOK CONTEXT:\n{combined_context}\n\n"
-            f"Response style: {template.response_format_rules}\n\n"
-            + (f"Recent conversation:\n{history_block}\n\n" if history_block else "")
-            + f"User question:\n{user_input}\n\n"
-            "Answer directly for the learner. Do not repeat instructions."
+        header = (
+            "The following content from the student's textbook is relevant to their question. "
+            "Focus your answer on these specific concepts, not on chapter structure or headings:\n\n"
+        )
+        budget = context_budget(
+            render(header),
+            context_tokens=self.config.MODEL_CONTEXT_TOKENS,
+            reserve_tokens=self.config.AI_RESPONSE_MAX_TOKENS,
         )
+        packed = pack_context(retrieved_chunks, budget)
+        parts = list(packed.chunks)
+        reference = (textbook_context or "").strip()
+        if reference:
+            # Lowest priority: clipped to whatever the retrieved chunks left over.
+            reference = clip_to_tokens(reference, budget - packed.tokens)
+            if reference and not any(reference in p for p in parts):
+                parts.append(reference)
+        context_text = "\n\n".join(parts)
+        if not context_text:
+            return render("[No matching content found in vector store]")
+        context_block = (header + context_text) if retrieved_chunks else context_text
+        return render(context_block)
 
     def _run_rag_inference(
         self,
@@ -423,6 +463,43 @@ class AIEngine:
             rag_subject = str(subject).strip()
         retrieval_query = (query_for_retrieval or user_input).strip()
 
+        with self.telemetry.span("retrieve"):
+            docs, textbook_ctx = self._retrieve_rag_context(
+                rag_subject, textbook_id, retrieval_query, subject
+            )
+
+        with self.telemetry.span("prompt_build"):
+            prompt = self._build_rag_prompt(
+                task_type=task_type,
+                user_input=user_input,
+                context_data=context_data,
+                retrieved_chunks=list(docs or []),
+                textbook_context=textbook_ctx,
+            )
+        trace = self.telemetry.current_trace()
+        if trace is not None:
+            trace.prompt_chars = len(prompt)
+        ollama_options = None
+        if task_type == AITaskType.FLASHCARD_GENERATION:
+            import random
+            variation_seed = random.randint(1, 2_147_483_647)
+            ollama_options = {"temperature": 0.95, "seed": variation_seed}
+        with self.telemetry.span("inference"):
+            return self._call_ollama(
+                self._resolve_model_name(AIExecutionTarget.LOCAL),
+                prompt,
+                self.config.AI_TIMEOUT_SECONDS,
+                options=ollama_options,
+            )
+
+    def _retrieve_rag_context(
+        self,
+        rag_subject: Optional[str],
+        textbook_id: Optional[str],
+        retrieval_query: str,
+        subject: Optional[str],
+    ) -> tuple[list[Any], str]:
+        """Fetch retrieved chunks and optional whole-subject textbook context."""
         docs: list[Any] = []
         if textbook_id and self._rag_topic_aware_retrieve_fn:
             try:
@@ -441,41 +518,10 @@ class AIEngine:
             except Exception:
                 docs = []
 
-        if docs:
-            raw_context = "\n\n".join(
-                getattr(d, "page_content", str(d)) for d in docs
-            )
-            retrieved_context = (
-                "The following content from the student's textbook is relevant to their question. "
-                "Focus your answer on these specific concepts, not on chapter structure or headings:\n\n"
-                f"{raw_context}"
-            )
-        else:
-            retrieved_context = "[No matching content found in vector store]"
-
         textbook_ctx = ""
         if not textbook_id and self._rag_textbook_fn:
             textbook_ctx = self._rag_textbook_fn(subject or "")  # type: ignore[misc]
-        textbook_ctx = (textbook_ctx or "").strip() or ""
-
-        prompt = self._build_rag_prompt(
-            task_type=task_type,
-            user_input=user_input,
-            context_data=context_data,
-            retrieved_context=retrieved_context,
-            textbook_context=textbook_ctx,
-        )
-        ollama_options = None
-        if task_type == AITaskType.FLASHCARD_GENERATION:
-            import random
-            variation_seed = random.randint(1, 2_147_483_647)
-            ollama_options = {"temperature": 0.95, "seed": variation_seed}
-        return self._call_ollama(
-            self._resolve_model_name(AIExecutionTarget.LOCAL),
-            prompt,
-            self.config.AI_TIMEOUT_SECONDS,
-            options=ollama_options,
-        )
+        return docs, (textbook_ctx or "").strip() or ""
 
     def request(
         self,
@@ -496,19 +542,28 @@ class AIEngine:
             privacy_sensitive=privacy_sensitive,
         )
         self.state_machine.set_state(request.request_id, AIState.REQUEST_SENT)
+        trace = self.telemetry.start_trace(request.task_type.value)
+        response: Optional[AIResponse] = None
+        target: Optional[AIExecutionTarget] = None
 
         try:
-            sanitized_input = self._sanitize_input(request.user_input)
-            bounded_context = self._sanitize_context(request.context_data)
-            template = self.templates.select(request.task_type)
-            task_prompt = self._build_task_specific_prompt(
-                request.task_type, sanitized_input, bounded_context
-            )
-            prompt = (
-                task_prompt
-                if task_prompt is not None
-                else self._build_prompt(template, sanitized_input, bounded_context)
-            )
+            with trace.span("sanitize"):
+                sanitized_input = self._sanitize_input(request.user_input)
+                bounded_context = self._sanitize_context(request.context_data)
+            with trace.span("prompt_build"):
+                template = self.templates.select(request.task_type)
+                task_prompt = self._build_task_specific_prompt(
+                    request.task_type, sanitized_input, bounded_context
+                )
+                prompt = (
+                    task_prompt
+                    if task_prompt is not None
+                    else self._build_prompt(template, sanitized_input, bounded_context)
+                )
+                prompt = self._fit_prompt_to_budget(
+                    prompt, request.task_type, template, sanitized_input, bounded_context
+                )
+            trace.prompt_chars = len(prompt)
 
             target = self._select_inference_target(request)
             model_name = self._resolve_model_name(target)
@@ -530,40 +585,75 @@ class AIEngine:
                 context_data=bounded_context,
             )
 
-            parsed = self._parse_response(
-                request=request,
-                raw_response=raw_response,
-                target=target,
-                model_name=model_name,
-                template=template,
-            )
-            self._log_request_and_response(request, parsed)
-            return parsed
+            with trace.span("parse"):
+                response = self._parse_response(
+                    request=request,
+                    raw_response=raw_response,
+                    target=target,
+                    model_name=model_name,
+                    template=template,
+                )
+            return response
         except TimeoutError:
             self.state_machine.set_state(request.request_id, AIState.TIMEOUT)
-            fallback = self._make_fallback_response(
+            response = self._make_fallback_response(
                 request,
                 "AI response timeout. Returning safe fallback response.",
             )
-            self._log_request_and_response(request, fallback)
-            return fallback
+            return response
         except ConnectionError as exc:
             self.state_machine.set_state(request.request_id, AIState.ERROR)
-            fallback = self._make_fallback_response(
+            response = self._make_fallback_response(
                 request,
                 str(exc),
                 custom_text=OLLAMA_CONNECTION_FALLBACK,
             )
-            self._log_request_and_response(request, fallback)
-            return fallback
+            return response
         except Exception as exc:  # pragma: no cover - defensive path
             self.state_machine.set_state(request.request_id, AIState.ERROR)
-            fallback = self._make_fallback_response(
+            response = self._make_fallback_response(
                 request,
                 f"AI processing failed: {exc}",
             )
-            self._log_request_and_response(request, fallback)
-            return fallback
+            return response
+        finally:
+            target_value = target.value if target is not None else ""
+            if self.config.ENABLE_AI_TELEMETRY and response is not None:
+                self.telemetry.finish_trace(trace, state=response.state.value, target=target_value)
+                response.metadata["timings_ms"] = {
+                    k: round(v * 1000, 1) for k, v in trace.spans.items()
+                }
+            else:
+                self.telemetry.discard_trace(trace)
+            if response is not None:
+                self._log_request_and_response(request, response, trace)
+
+    def _prompt_budget_tokens(self) -> int:
+        """Prompt tokens allowed once AI_RESPONSE_MAX_TOKENS is reserved for generation."""
+        return max(0, self.config.MODEL_CONTEXT_TOKENS - self.config.AI_RESPONSE_MAX_TOKENS)
+
+    def _fit_prompt_to_budget(
+        self,
+        prompt: str,
+        task_type: AITaskType,
+        template: PromptTemplate,
+        user_input: str,
+        context_data: dict[str, Any],
+    ) -> str:
+        """
+        Shrink source_content by the prompt's token overflow and rebuild, so
+        Ollama never silently truncates the head of an over-long prompt.
+        """
+        budget = self._prompt_budget_tokens()
+        overflow = count_tokens(prompt) - budget
+        source = context_data.get("source_content")
+        if overflow <= 0 or not isinstance(source, str) or not source:
+            return prompt
+        context_data["source_content"] = clip_to_tokens(
+            source, max(0, count_tokens(source) - overflow - 16)
+        )
+        rebuilt = self._build_task_specific_prompt(task_type, user_input, context_data)
+        return rebuilt if rebuilt is not None else self._build_prompt(template, user_input, context_data)
 
     def mark_displayed(self, request_id: str) -> None:
         self.state_machine.set_state(request_id, AIState.DISPLAYED)
@@ -634,9 +724,11 @@ class AIEngine:
                 }:
                     continue
 
-                # Allow source_content to carry full textbook/URL content for generation prompts
-                max_len = 12000 if key == "source_content" else 2000
-                sanitized[key] = stripped[:max_len]
+                if key == "source_content":
+                    # Token-budgeted; the final prompt is fitted again in _fit_prompt_to_budget
+                    sanitized[key] = clip_to_tokens(stripped, self._prompt_budget_tokens())
+                    continue
+                sanitized[key] = stripped[:2000]
                 continue
 
             sanitized[key] = value
@@ -693,8 +785,7 @@ class AIEngine:
             )
             return (
                 f"You are creating exam-style flashcards for a {difficulty} level {subject} student.\n\n"
-                f"Topic: {topic}\n"
-                f"Context from source material: {context_chunk}\n\n"
+                f"Topic: {topic}\n\n"
                 f"Generate {num_cards} flashcards about this topic.\n"
                 f"{no_context_note}\n"
                 f"{variation_note}"
@@ -724,7 +815,7 @@ class AIEngine:
             content_preview = ""
             if source_content:
                 sc = str(source_content).strip()
-                content_preview = f"\n\nExtracted content to base questions on:\n{sc[:12000]}\n\n"
+                content_preview = f"\n\nExtracted content to base questions on:\n{sc}\n\n"
             if question_format == "mcq":
                 return (
                     f"Using the extracted content below, generate exactly {count} multiple choice questions "
@@ -973,8 +1064,14 @@ class AIEngine:
             )
             resp.raise_for_status()
             data = resp.json()
+            self.telemetry.record_ollama_stats(data)
             out = data.get("response", "").strip() or ""
-            log.info("[ollama] response len=%d", len(out))
+            log.info(
+                "[ollama] response len=%d eval_count=%s eval_ms=%s",
+                len(out),
+                data.get("eval_count"),
+                (data.get("eval_duration") or 0) // 1_000_000,
+            )
             return out
         except requests.exceptions.ConnectionError:
             raise ConnectionError(OLLAMA_CONNECTION_FALLBACK)
@@ -1018,6 +1115,9 @@ class AIEngine:
                         query_for_retrieval=query_for_retrieval,
                     )
                 except Exception as exc:
+                    trace = self.telemetry.current_trace()
+                    if trace is not None:
+                        trace.rag_fallback = True
                     print(f"[ai_engine] RAG inference failed, falling back to Ollama: {exc}")
             # Fallback: direct Ollama HTTP call
             ollama_options = None
@@ -1025,16 +1125,18 @@ class AIEngine:
                 import random
                 variation_seed = random.randint(1, 2_147_483_647)
                 ollama_options = {"temperature": 0.95, "seed": variation_seed}
-            return self._call_ollama(
-                model_name, prompt, timeout_seconds, options=ollama_options
-            )
+            with self.telemetry.span("inference"):
+                return self._call_ollama(
+                    model_name, prompt, timeout_seconds, options=ollama_options
+                )
 
         # CLOUD target: keep simulated until cloud API is configured
         started = time.time()
         simulated_latency = 0.05
         if simulated_latency > timeout_seconds:
             raise TimeoutError("Inference exceeded timeout.")
-        time.sleep(simulated_latency)
+        with self.telemetry.span("inference"):
+            time.sleep(simulated_latency)
         elapsed = time.time() - started
         if elapsed > timeout_seconds:
             raise TimeoutError("Inference exceeded timeout.")
@@ -1194,32 +1296,45 @@ class AIEngine:
             error_message=reason,
         )
 
-    def _log_request_and_response(self, request: AIRequest, response: AIResponse) -> None:
+    def _log_request_and_response(
+        self,
+        request: AIRequest,
+        response: AIResponse,
+        trace: Optional[Any] = None,
+    ) -> None:
+        """Queue one compact JSON row per request on the shared rotating log writer."""
         if not self.config.ENABLE_AI_LOGGING:
             return
-        log_path = os.path.join(self.base_path, self.config.LOG_FILE_RELATIVE_PATH)
-        os.makedirs(os.path.dirname(log_path), exist_ok=True)
 
-        row = {
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "request": {
-                "request_id": request.request_id,
-                "task_type": request.task_type.value,
-                "user_id": request.user_id,
-                "offline_mode": request.offline_mode,
-                "privacy_sensitive": request.privacy_sensitive,
-                "input_preview": request.user_input[:250],
-            },
-            "response": {
-                "state": response.state.value,
-                "confidence_score": response.confidence_score,
-                "model_name": response.metadata.get("model_name"),
-                "execution_target": response.metadata.get("execution_target"),
-                "text_preview": response.text[:250],
-                "error_message": response.error_message,
-            },
+        row: dict[str, Any] = {
+            "ts": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "id": request.request_id,
+            "task": request.task_type.value,
+            "user": request.user_id,
+            "state": response.state.value,
+            "target": response.metadata.get("execution_target"),
+            "model": response.metadata.get("model_name"),
+            "in_chars": len(request.user_input or ""),
+            "out_chars": len(response.text or ""),
         }
+        if request.offline_mode:
+            row["offline"] = True
+        if response.error_message:
+            row["err"] = response.error_message[:200]
+        if trace is not None:
+            row.update(trace.summary())
+
+        self._get_request_log().append(row)
+
+    def _get_request_log(self) -> StructuredLog:
+        log_path = os.path.join(self.base_path, self.config.LOG_FILE_RELATIVE_PATH)
+        return get_structured_log(
+            log_path,
+            max_bytes=self.config.LOG_MAX_BYTES,
+            max_age_seconds=self.config.LOG_MAX_AGE_SECONDS,
+            backup_count=self.config.LOG_BACKUP_COUNT,
+        )
 
-        with self._log_lock:
-            with open(log_path, "a", encoding="utf-8") as handle:
-                handle.write(json.dumps(row, ensure_ascii=False) + "\n")
+    def flush_logs(self, timeout: float = 5.0) -> None:
+        """Wait for queued request-log rows to reach disk."""
+        self._get_request_log().flush(timeout)
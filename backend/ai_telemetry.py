@@ -0,0 +1,308 @@
+"""
+Studaxis — AI Request Telemetry
+═══════════════════════════════════════════════════════════════
+In-process latency and throughput metrics for AIEngine.
+
+Each AIEngine.request() opens a RequestTrace; pipeline stages (sanitize,
+retrieve, prompt_build, inference, parse) are timed as spans on that trace
+and Ollama's eval counters are attached when the local model answers.
+Finished traces feed per-task-type histograms that /api/metrics renders
+in the Prometheus text exposition format.
+
+Everything is kept in memory with bounded windows — no external deps.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+# Seconds. Covers cheap local stages (ms) up to slow CPU-only inference (minutes).
+LATENCY_BUCKETS: tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0,
+)
+TOKENS_PER_SECOND_BUCKETS: tuple[float, ...] = (1, 2, 5, 10, 20, 40, 80, 160)
+PROMPT_CHARS_BUCKETS: tuple[float, ...] = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+_NS_PER_SECOND = 1_000_000_000
+
+
+class RollingHistogram:
+    """
+    Prometheus-style cumulative histogram plus a bounded window of recent
+    samples used for p50/p95 so quantiles reflect current behaviour.
+    """
+
+    def __init__(self, buckets: tuple[float, ...], window: int = 512) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.total = 0.0
+        self._recent: deque[float] = deque(maxlen=window)
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self._recent.append(value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self._recent:
+            return None
+        ordered = sorted(self._recent)
+        idx = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+        return ordered[idx]
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        out: list[tuple[float, int]] = []
+        running = 0
+        for bound, c in zip(self.buckets, self.counts):
+            running += c
+            out.append((bound, running))
+        return out
+
+
+class RequestTrace:
+    """Span and counter collector for a single AI request."""
+
+    def __init__(self, task_type: str) -> None:
+        self.task_type = task_type
+        self.started = time.perf_counter()
+        self.spans: dict[str, float] = {}
+        self.ollama: dict[str, int] = {}
+        self.prompt_chars = 0
+        self.rag_fallback = False
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            # Stages may run more than once (e.g. RAG prompt then fallback prompt); accumulate.
+            self.spans[name] = self.spans.get(name, 0.0) + (time.perf_counter() - t0)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def tokens_per_second(self) -> Optional[float]:
+        eval_count = self.ollama.get("eval_count") or 0
+        eval_ns = self.ollama.get("eval_duration") or 0
+        if eval_count <= 0 or eval_ns <= 0:
+            return None
+        return eval_count / (eval_ns / _NS_PER_SECOND)
+
+    def time_to_first_token(self) -> Optional[float]:
+        """Non-streaming approximation: model load + prompt evaluation."""
+        if "prompt_eval_duration" not in self.ollama and "load_duration" not in self.ollama:
+            return None
+        ns = (self.ollama.get("load_duration") or 0) + (self.ollama.get("prompt_eval_duration") or 0)
+        return ns / _NS_PER_SECOND
+
+    def summary(self) -> dict[str, Any]:
+        """Compact dict for the on-disk request log (milliseconds, rounded)."""
+        out: dict[str, Any] = {
+            "ms": round(self.elapsed() * 1000, 1),
+            "spans": {k: round(v * 1000, 1) for k, v in self.spans.items()},
+            "prompt_chars": self.prompt_chars,
+        }
+        if self.ollama:
+            out["eval_count"] = self.ollama.get("eval_count")
+            out["prompt_eval_count"] = self.ollama.get("prompt_eval_count")
+            tps = self.tokens_per_second()
+            if tps is not None:
+                out["tps"] = round(tps, 2)
+            ttft = self.time_to_first_token()
+            if ttft is not None:
+                out["ttft_ms"] = round(ttft * 1000, 1)
+        if self.rag_fallback:
+            out["rag_fallback"] = True
+        return out
+
+
+_OLLAMA_COUNTERS = (
+    "total_duration",
+    "load_duration",
+    "prompt_eval_count",
+    "prompt_eval_duration",
+    "eval_count",
+    "eval_duration",
+)
+
+
+class AITelemetry:
+    """Process-wide registry of AI request metrics."""
+
+    def __init__(self, window: int = 512) -> None:
+        self._window = window
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._histograms: dict[tuple[str, tuple[tuple[str, str], ...]], RollingHistogram] = {}
+        self._counters: dict[tuple[str, tuple[tuple[str, str], ...]], float] = {}
+
+    # ── trace lifecycle ──────────────────────────────────────────────
+
+    def start_trace(self, task_type: str) -> RequestTrace:
+        trace = RequestTrace(task_type)
+        self._local.trace = trace
+        return trace
+
+    def current_trace(self) -> Optional[RequestTrace]:
+        return getattr(self._local, "trace", None)
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Time a stage on the current thread's trace; no-op outside a request."""
+        trace = self.current_trace()
+        if trace is None:
+            yield
+            return
+        with trace.span(name):
+            yield
+
+    def discard_trace(self, trace: RequestTrace) -> None:
+        """Detach a trace without recording it (telemetry disabled)."""
+        if getattr(self._local, "trace", None) is trace:
+            self._local.trace = None
+
+    def record_ollama_stats(self, data: dict[str, Any]) -> None:
+        trace = self.current_trace()
+        if trace is None or not isinstance(data, dict):
+            return
+        for key in _OLLAMA_COUNTERS:
+            value = data.get(key)
+            if isinstance(value, (int, float)):
+                trace.ollama[key] = int(value)
+
+    def finish_trace(self, trace: RequestTrace, *, state: str, target: str = "") -> None:
+        self.discard_trace(trace)
+        task = trace.task_type
+        with self._lock:
+            self._inc("studaxis_ai_requests_total", task_type=task, state=state, target=target or "none")
+            if trace.rag_fallback:
+                self._inc("studaxis_ai_rag_fallbacks_total", task_type=task)
+            self._observe("studaxis_ai_request_seconds", LATENCY_BUCKETS, trace.elapsed(), task_type=task)
+            for stage, seconds in trace.spans.items():
+                self._observe("studaxis_ai_stage_seconds", LATENCY_BUCKETS, seconds, task_type=task, stage=stage)
+            if trace.prompt_chars:
+                self._observe("studaxis_ai_prompt_chars", PROMPT_CHARS_BUCKETS, trace.prompt_chars, task_type=task)
+            tps = trace.tokens_per_second()
+            if tps is not None:
+                self._observe("studaxis_ai_tokens_per_second", TOKENS_PER_SECOND_BUCKETS, tps, task_type=task)
+            ttft = trace.time_to_first_token()
+            if ttft is not None:
+                self._observe("studaxis_ai_time_to_first_token_seconds", LATENCY_BUCKETS, ttft, task_type=task)
+            if trace.ollama.get("eval_count"):
+                self._inc("studaxis_ai_eval_tokens_total", trace.ollama["eval_count"], task_type=task)
+            if trace.ollama.get("prompt_eval_count"):
+                self._inc("studaxis_ai_prompt_tokens_total", trace.ollama["prompt_eval_count"], task_type=task)
+
+    # ── registry internals (caller holds _lock) ──────────────────────
+
+    def _inc(self, name: str, amount: float = 1, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        self._counters[key] = self._counters.get(key, 0) + amount
+
+    def _observe(self, name: str, buckets: tuple[float, ...], value: float, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        hist = self._histograms.get(key)
+        if hist is None:
+            hist = RollingHistogram(buckets, window=self._window)
+            self._histograms[key] = hist
+        hist.observe(value)
+
+    # ── export ───────────────────────────────────────────────────────
+
+    def snapshot(self) -> dict[str, Any]:
+        """JSON-friendly view: counters plus count/sum/p50/p95 per histogram series."""
+        with self._lock:
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+            histograms = [
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": h.count,
+                    "sum": h.total,
+                    "p50": h.quantile(0.5),
+                    "p95": h.quantile(0.95),
+                }
+                for (name, labels), h in sorted(self._histograms.items())
+            ]
+        return {"counters": counters, "histograms": histograms}
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: list[str] = []
+        with self._lock:
+            seen: set[str] = set()
+            for (name, labels), value in sorted(self._counters.items()):
+                if name not in seen:
+                    lines.append(f"# TYPE {name} counter")
+                    seen.add(name)
+                lines.append(f"{name}{_fmt_labels(labels)} {_fmt_value(value)}")
+
+            for (name, labels), h in sorted(self._histograms.items()):
+                if name not in seen:
+                    lines.append(f"# TYPE {name} histogram")
+                    seen.add(name)
+                for bound, cum in h.cumulative():
+                    lines.append(f"{name}_bucket{_fmt_labels(labels + (('le', _fmt_value(bound)),))} {cum}")
+                lines.append(f"{name}_bucket{_fmt_labels(labels + (('le', '+Inf'),))} {h.count}")
+                lines.append(f"{name}_sum{_fmt_labels(labels)} {_fmt_value(h.total)}")
+                lines.append(f"{name}_count{_fmt_labels(labels)} {h.count}")
+
+            # Rolling-window quantiles as a separate summary family.
+            for (name, labels), h in sorted(self._histograms.items()):
+                recent = f"{name}_recent"
+                if recent not in seen:
+                    lines.append(f"# TYPE {recent} summary")
+                    seen.add(recent)
+                for q in (0.5, 0.95):
+                    v = h.quantile(q)
+                    if v is not None:
+                        lines.append(f"{recent}{_fmt_labels(labels + (('quantile', str(q)),))} {_fmt_value(v)}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+def _fmt_labels(labels: tuple[tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for k, v in labels:
+        escaped = str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{k}="{escaped}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _fmt_value(value: float) -> str:
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+_telemetry: Optional[AITelemetry] = None
+_telemetry_lock = threading.Lock()
+
+
+def get_telemetry() -> AITelemetry:
+    """Process-wide telemetry registry shared by all AIEngine instances."""
+    global _telemetry
+    if _telemetry is None:
+        with _telemetry_lock:
+            if _telemetry is None:
+                _telemetry = AITelemetry()
+    return _telemetry
@@ -8,10 +8,15 @@ Architecture: SyncManager MUST NOT talk directly to DynamoDB.
 Flow:
   1. Lightweight: SyncManager sends GraphQL mutations to AppSync
   2. Heavy: Upload user_stats/chat logs to S3; include S3 key in metadata sync via AppSync where applicable
+     (gzip'd JSON, only when stats changed: a delta against the last acknowledged version,
+     with a periodic full snapshot). The offline_sync Lambda applies each upload to the
+     reconstructed document at state/students/{user_id}/user_stats.json.
 """
 
 from __future__ import annotations
 
+import gzip
+import hashlib
 import json
 import logging
 import os
@@ -36,14 +41,191 @@ def _load_dotenv() -> None:
         pass
 
 
+# ── Change tracking + deltas ─────────────────────────────────────────────────
+# Each upload is versioned. The last acknowledged (successfully uploaded) stats
+# are kept under data/users/{id}/sync/, so the next upload can be a delta
+# against them. Unchanged stats are not re-uploaded. A full snapshot is sent
+# every SNAPSHOT_EVERY deltas, after SNAPSHOT_MAX_AGE_SECONDS, or when the
+# delta would be more than half the size of a snapshot.
+
+SNAPSHOT_EVERY = 20
+SNAPSHOT_MAX_AGE_SECONDS = 7 * 24 * 3600
+_VOLATILE_KEYS = ("last_sync_timestamp",)  # written back after each upload; not a change
+
+
+def _sync_dir(base_path: Path, user_id: str) -> Path:
+    return base_path / "data" / "users" / user_id / "sync"
+
+
+def _trackable(stats: dict[str, Any]) -> dict[str, Any]:
+    return {k: v for k, v in stats.items() if k not in _VOLATILE_KEYS}
+
+
+def _canonical(stats: dict[str, Any]) -> bytes:
+    return json.dumps(stats, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _load_sync_state(base_path: Path, user_id: str) -> tuple[dict[str, Any], Optional[dict[str, Any]]]:
+    """(meta, last acknowledged stats) — both empty/None before the first upload."""
+    d = _sync_dir(base_path, user_id)
+    try:
+        meta = json.loads((d / "user_stats.sync.json").read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}, None
+    try:
+        base = json.loads((d / "user_stats.base.json").read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        base = None
+    return meta, base
+
+
+def _save_sync_state(base_path: Path, user_id: str, meta: dict[str, Any], base_bytes: bytes) -> None:
+    d = _sync_dir(base_path, user_id)
+    d.mkdir(parents=True, exist_ok=True)
+    for name, data in (("user_stats.base.json", base_bytes), ("user_stats.sync.json", json.dumps(meta).encode("utf-8"))):
+        tmp = d / (name + ".tmp")
+        tmp.write_bytes(data)
+        tmp.replace(d / name)
+
+
+def _tail_edit(old: list, new: list) -> Optional[tuple[int, list]]:
+    """(drop, items) if `new` == old[drop:] + items (append, possibly trimmed from the front)."""
+    if not old:
+        return 0, list(new)
+    n_old = len(old)
+    if len(new) >= n_old and new[n_old - 1] == old[-1] and new[:n_old] == old:
+        return 0, new[n_old:]
+    if not new:
+        return None
+    # Only offsets where new starts are candidates; each is checked by its last
+    # element before the one full slice comparison.
+    first = new[0]
+    for drop in range(1, n_old):
+        if old[drop] != first:
+            continue
+        kept = n_old - drop
+        if kept <= len(new) and new[kept - 1] == old[-1] and new[:kept] == old[drop:]:
+            return drop, new[kept:]
+    return None
+
+
+def diff_user_stats(old: Any, new: Any, path: Optional[list] = None) -> list[list]:
+    """
+    Ops turning `old` into `new`:
+      ["set", path, value] · ["del", path] · ["tail", path, drop, items]
+    Dicts are diffed per key; lists that only grew (or were trimmed at the front,
+    e.g. capped chat history) become "tail" ops; anything else is replaced.
+    """
+    path = path or []
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops: list[list] = []
+        for k, v in new.items():
+            if k not in old:
+                ops.append(["set", path + [k], v])
+            elif old[k] != v:
+                ops.extend(diff_user_stats(old[k], v, path + [k]))
+        ops.extend(["del", path + [k]] for k in old if k not in new)
+        return ops
+    if isinstance(old, list) and isinstance(new, list):
+        edit = _tail_edit(old, new)
+        if edit is not None and (edit[0] or edit[1]):
+            return [["tail", path, edit[0], edit[1]]]
+    return [["set", path, new]]
+
+
+def apply_user_stats_delta(doc: dict[str, Any], ops: list[list]) -> dict[str, Any]:
+    """Apply diff_user_stats() ops to `doc` in place and return it."""
+    for op in ops:
+        kind, path = op[0], op[1]
+        if not path:
+            if kind == "set":
+                doc.clear()
+                doc.update(op[2])
+            continue
+        parent = doc
+        for key in path[:-1]:
+            parent = parent.setdefault(key, {})
+        leaf = path[-1]
+        if kind == "set":
+            parent[leaf] = op[2]
+        elif kind == "del":
+            parent.pop(leaf, None)
+        elif kind == "tail":
+            parent[leaf] = list(parent.get(leaf) or [])[op[2]:] + list(op[3])
+    return doc
+
+
+def _build_stats_body(
+    stats: dict[str, Any],
+    canonical: bytes,
+    meta: dict[str, Any],
+    base: Optional[dict[str, Any]],
+    now: datetime,
+) -> tuple[str, dict[str, Any]]:
+    """("snapshot" | "delta", fields to merge into the upload payload)."""
+    version = int(meta.get("version", 0)) + 1
+    snapshot_age = now.timestamp() - float(meta.get("snapshot_at", 0) or 0)
+    if (
+        base is not None
+        and meta.get("version")
+        and int(meta.get("deltas_since_snapshot", 0)) < SNAPSHOT_EVERY
+        and snapshot_age < SNAPSHOT_MAX_AGE_SECONDS
+    ):
+        ops = diff_user_stats(base, stats)
+        encoded = json.dumps(ops, separators=(",", ":"), ensure_ascii=False)
+        if len(encoded) * 2 < len(canonical):
+            return "delta", {"version": version, "base_version": int(meta["version"]), "delta": ops}
+    return "snapshot", {"version": version, "user_stats": stats}
+
+
+def _payload_context(base_path: Path, user_id: str) -> dict[str, Any]:
+    """
+    Payload fields that do not come from user_stats: device_id, and class
+    context from the profile (SyncManager uses the same path). They are part
+    of the upload digest, so joining or changing class is uploaded even when
+    no stat changed.
+    """
+    device_id = ""
+    try:
+        from device_id import get_or_generate_device_id
+        device_id = get_or_generate_device_id() or ""
+    except Exception:
+        pass
+
+    # Class context from profile
+    class_code = "SOLO"
+    class_id = None
+    try:
+        profile_path = base_path / "data" / "users" / user_id / "profile.json"
+        if not profile_path.exists():
+            profile_path = base_path / "data" / "profile.json"
+        if profile_path.exists():
+            with open(profile_path, encoding="utf-8") as pf:
+                prof = json.load(pf)
+            cc = prof.get("class_code")
+            if cc and str(cc).strip():
+                class_code = str(cc).strip()
+            cid = prof.get("class_id")
+            if cid and str(cid).strip():
+                class_id = str(cid).strip()
+    except (OSError, json.JSONDecodeError, KeyError):
+        pass
+
+    context = {"device_id": device_id or "unknown", "class_code": class_code}
+    if class_id:
+        context["class_id"] = class_id
+    return context
+
+
 def upload_heavy_payload_to_s3(
     base_path: Path,
     user_id: str,
     stats: Optional[dict[str, Any]] = None,
 ) -> Optional[str]:
     """
-    Upload heavy payload (user_stats) to S3. S3 event triggers offline_sync Lambda.
-    Returns S3 key on success, None on failure. Never raises.
+    Upload user_stats changes to S3 as gzip'd compact JSON. S3 event triggers offline_sync Lambda.
+    Returns the S3 key on success (the last acknowledged key when nothing changed),
+    None on failure. Never raises.
 
     - base_path: backend root
     - user_id: student user id
@@ -61,28 +243,36 @@ def upload_heavy_payload_to_s3(
         logger.debug("S3 upload skipped: no user_id")
         return None
 
-    try:
-        import boto3
-    except ImportError:
-        logger.warning("boto3 not installed; S3 payload sync disabled")
-        return None
-
     if stats is None:
-        stats_path = base_path / "data" / "users" / user_id / "user_stats.json"
-        if not stats_path.exists():
-            logger.debug("No user_stats.json at %s", stats_path)
-            return None
-        try:
-            with open(stats_path, encoding="utf-8") as f:
-                stats = json.load(f)
-        except (OSError, json.JSONDecodeError) as e:
-            logger.warning("Failed to load user_stats: %s", e)
+        from user_stats_store import ALL_SECTIONS, UserStatsStore
+
+        # Full legacy-shaped document (hot summary + cold sections), including
+        # changes still waiting in the write-back cache
+        user_dir = base_path / "data" / "users" / user_id
+        stats = UserStatsStore(user_dir).load(ALL_SECTIONS)
+        if stats is None:
+            logger.debug("No readable user_stats.json in %s", user_dir)
             return None
 
     if not isinstance(stats, dict):
         logger.warning("user_stats is not a dict")
         return None
 
+    tracked = _trackable(stats)
+    canonical = _canonical(tracked)
+    context = _payload_context(base_path, user_id)
+    digest = hashlib.sha256(canonical + b"\n" + _canonical(context)).hexdigest()
+    meta, base = _load_sync_state(base_path, user_id)
+    if meta.get("digest") == digest and meta.get("last_key"):
+        logger.debug("S3 upload skipped: user_stats unchanged since v%s", meta.get("version"))
+        return meta["last_key"]
+
+    try:
+        import boto3
+    except ImportError:
+        logger.warning("boto3 not installed; S3 payload sync disabled")
+        return None
+
     now = datetime.now(timezone.utc)
 
     # Lambda _write_student_aggregate_stats expects this format for S3 payload
@@ -96,51 +286,26 @@ def upload_heavy_payload_to_s3(
     quiz_attempts = int(qs.get("total_attempted", 0)) if isinstance(qs, dict) else 0
     total_score = float(qs.get("total_score_sum", 0) or qs.get("average_score", 0) * quiz_attempts) if isinstance(qs, dict) else 0.0
 
-    device_id = ""
-    try:
-        from device_id import get_or_generate_device_id
-        device_id = get_or_generate_device_id() or ""
-    except Exception:
-        pass
-
-    # Class context from profile (SyncManager uses same path)
-    class_code = "SOLO"
-    class_id = None
-    try:
-        profile_path = base_path / "data" / "users" / user_id / "profile.json"
-        if not profile_path.exists():
-            profile_path = base_path / "data" / "profile.json"
-        if profile_path.exists():
-            with open(profile_path, encoding="utf-8") as pf:
-                prof = json.load(pf)
-            cc = prof.get("class_code")
-            if cc and str(cc).strip():
-                class_code = str(cc).strip()
-            cid = prof.get("class_id")
-            if cid and str(cid).strip():
-                class_id = str(cid).strip()
-    except (OSError, json.JSONDecodeError, KeyError):
-        pass
-
     # Lambda-compatible payload for S3 trigger (offline_sync expects class_code)
     lambda_payload = {
         "student_id": user_id,
-        "device_id": device_id or "unknown",
         "quiz_attempts": quiz_attempts,
         "total_score": total_score,
         "streak": streak,
         "last_sync": now.isoformat(),
-        "class_code": class_code,
+        **context,
     }
-    if class_id:
-        lambda_payload["class_id"] = class_id
-    # Also include full user_stats for downstream use (chat logs, etc.)
-    lambda_payload["_full_user_stats"] = stats
+    # Full user_stats (chat logs, etc.) for downstream use: a snapshot, or a delta
+    # against the last acknowledged version.
+    kind, body = _build_stats_body(tracked, canonical, meta, base, now)
+    lambda_payload["payload_type"] = kind
+    lambda_payload.update(body)
 
-    payload_bytes = json.dumps(lambda_payload, indent=2, ensure_ascii=False).encode("utf-8")
+    raw = json.dumps(lambda_payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    payload_bytes = gzip.compress(raw, mtime=0)
 
     # S3 key under sync/ prefix — Lambda S3 trigger listens here (if configured)
-    s3_key = f"sync/students/{user_id}/user_stats_{now.strftime('%Y%m%d_%H%M%S')}.json"
+    s3_key = f"sync/students/{user_id}/user_stats_{now.strftime('%Y%m%d_%H%M%S')}_v{body['version']}_{kind}.json"
 
     try:
         s3 = boto3.client("s3", region_name=region)
@@ -149,35 +314,54 @@ def upload_heavy_payload_to_s3(
             Key=s3_key,
             Body=payload_bytes,
             ContentType="application/json",
+            ContentEncoding="gzip",
+        )
+        logger.info(
+            "Uploaded user_stats %s v%d to s3://%s/%s (%d bytes gzip, %d raw)",
+            kind, body["version"], bucket, s3_key, len(payload_bytes), len(raw),
         )
-        logger.info("Uploaded heavy payload to s3://%s/%s (%d bytes)", bucket, s3_key, len(payload_bytes))
-        _update_local_last_sync(base_path, user_id, now.isoformat())
-        return s3_key
     except Exception as e:
         logger.warning("S3 upload failed: %s", e)
         return None
 
+    # Acknowledged: this version becomes the base for the next delta.
+    new_meta = {
+        "version": body["version"],
+        "digest": digest,
+        "last_key": s3_key,
+        "deltas_since_snapshot": 0 if kind == "snapshot" else int(meta.get("deltas_since_snapshot", 0)) + 1,
+        "snapshot_at": now.timestamp() if kind == "snapshot" else meta.get("snapshot_at", 0),
+    }
+    try:
+        _save_sync_state(base_path, user_id, new_meta, canonical)
+    except OSError as e:
+        logger.warning("Could not save sync state (next upload will be a snapshot): %s", e)
+    _update_local_last_sync(base_path, user_id, now.isoformat())
+    return s3_key
+
 
 def _update_local_last_sync(base_path: Path, user_id: str, timestamp: str) -> None:
     """Update last_sync_timestamp in user_stats.json. Never raises."""
     try:
-        stats_path = base_path / "data" / "users" / user_id / "user_stats.json"
-        if not stats_path.exists():
-            return
-        with open(stats_path, encoding="utf-8") as f:
-            data = json.load(f)
-        if isinstance(data, dict):
+        from user_stats_store import UserStatsStore
+
+        store = UserStatsStore(base_path / "data" / "users" / user_id)
+        with store.lock():
+            data = store.load()
+            if data is None:
+                return
             data["last_sync_timestamp"] = timestamp
-            tmp = stats_path.with_suffix(".tmp")
-            with open(tmp, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            tmp.replace(stats_path)
-            logger.debug("Updated last_sync_timestamp for %s", user_id)
+            store.save(data)
+        logger.debug("Updated last_sync_timestamp for %s", user_id)
     except Exception as e:
         logger.debug("Could not update last_sync_timestamp: %s", e)
 
 
 def is_payload_heavy(stats: dict[str, Any]) -> bool:
-    """Return True if payload (e.g. chat_history) exceeds 4KB."""
-    size = len(json.dumps(stats, ensure_ascii=False).encode("utf-8"))
-    return size > HEAVY_PAYLOAD_THRESHOLD_BYTES
+    """Return True if payload (e.g. chat_history) exceeds 4KB. Stops encoding once past the threshold."""
+    size = 0
+    for piece in json.JSONEncoder(ensure_ascii=False).iterencode(stats):
+        size += len(piece.encode("utf-8"))
+        if size > HEAVY_PAYLOAD_THRESHOLD_BYTES:
+            return True
+    return False
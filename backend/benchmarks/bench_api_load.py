@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Load benchmark: the FastAPI backend in-process against a mock Ollama.
+
+Starts benchmarks/mock_ollama.py on a free port (it also answers AppSync
+mutations), points the backend at it and at a throwaway data dir, seeds
+synthetic students and drives the app through httpx's ASGI transport, so
+no network, uvicorn or real model is involved. Sync endpoints run on the
+same anyio thread pool (40 threads) they get under uvicorn.
+
+Students cycle through three profiles so per-user file sizes vary:
+
+  light     20 cards,    5 quiz results,  2 chat sessions
+  typical   200 cards,  40 quiz results, 15 chat sessions
+  heavy     1500 cards, 250 quiz results, 80 chat sessions
+
+Scenarios (each student sends --requests of them back to back; every
+concurrency level uses the first N students):
+
+  chat              POST /api/chat                      1 generation
+  quiz_submit       POST /api/quiz/{id}/submit          2 generations
+  flashcard_review  POST /api/flashcards/review
+  due_cards         GET  /api/flashcards/due
+  insights          GET  /api/insights                  up to 2 generations
+  sync_flush        POST /api/sync                      after --sync-backlog queued
+                                                        quiz attempts per student
+
+Each scenario is warmed up with one unrecorded request. Reported per level
+and scenario: p50/p95/p99/mean/max latency (ms), throughput (successful
+requests per second of wall time), error count and mock Ollama generations.
+
+Results are written as JSON; pass an earlier file as --baseline to print
+p95 / throughput deltas and exit 1 when either regresses past --tolerance.
+
+Usage:
+  python backend/benchmarks/bench_api_load.py
+  python backend/benchmarks/bench_api_load.py --levels 1,10 --scenarios chat,due_cards --json run.json
+  python backend/benchmarks/bench_api_load.py --tokens-per-sec 20 --ollama-parallel 1   # slow CPU box
+  python backend/benchmarks/bench_api_load.py --baseline run.json --tolerance 15
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+_BENCH_DIR = Path(__file__).resolve().parent
+_BACKEND = _BENCH_DIR.parent
+sys.path.insert(0, str(_BACKEND))
+sys.path.insert(0, str(_BENCH_DIR))
+
+from mock_ollama import DEFAULT_MODEL, MockOllamaServer  # noqa: E402
+
+SCENARIOS = ("chat", "quiz_submit", "flashcard_review", "due_cards", "insights", "sync_flush")
+PROFILES = (
+    # name, cards, quiz results, chat sessions
+    ("light", 20, 5, 2),
+    ("typical", 200, 40, 15),
+    ("heavy", 1500, 250, 80),
+)
+TOPICS = ("Algebra", "Physics", "Biology", "Chemistry", "History")
+QUIZ_ITEMS = [
+    {
+        "id": f"q{i}",
+        "topic": TOPICS[i % len(TOPICS)],
+        "question": f"Question {i}?",
+        "options": ["A", "B", "C", "D"],
+        "correct": i % 4,
+        "explanation": "Because.",
+    }
+    for i in range(5)
+]
+
+
+class Student:
+    def __init__(self, username: str, token: str, profile: str, card_ids: list):
+        self.username = username
+        self.profile = profile
+        self.card_ids = card_ids
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+
+# ── Environment + seeding ───────────────────────────────────────────────────
+
+
+def _configure_env(base: Path, mock: MockOllamaServer) -> None:
+    """Must run before the backend is imported: several modules read these at import time."""
+    os.environ["STUDAXIS_BASE_PATH"] = str(base)
+    os.environ["OLLAMA_BASE_URL"] = mock.base_url
+    os.environ["OLLAMA_MODEL"] = mock.model
+    os.environ["STUDAXIS_OLLAMA_MODEL"] = mock.model
+    os.environ["APPSYNC_ENDPOINT"] = f"{mock.base_url}/graphql"
+    os.environ["APPSYNC_API_KEY"] = "bench"
+    # Empty (not unset) so a developer's backend/.env cannot enable real S3 uploads
+    os.environ["S3_BUCKET_NAME"] = ""
+    os.environ["AWS_S3_SYNC_BUCKET"] = ""
+
+
+def _seed_student(main, db, index: int, rng: random.Random) -> Student:
+    from auth_routes import _create_jwt
+    from database import User
+
+    name, n_cards, n_results, n_chats = PROFILES[index % len(PROFILES)]
+    username = f"bench_{index:03d}"
+    user = User(email=f"{username}@bench.local", username=username, hashed_password="x")
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+
+    today = datetime.now(timezone.utc).date()
+    cards = []
+    for c in range(n_cards):
+        due_in = rng.randint(-10, 10)  # about half due
+        cards.append({
+            "id": f"{username}_card_{c}",
+            "topic": TOPICS[c % len(TOPICS)],
+            "front": f"Term {c} of {username}",
+            "back": "Definition " * 8,
+            "ease": rng.choice(("hard", "medium", "easy")),
+            "next_review": (today + timedelta(days=due_in)).isoformat(),
+            "review_count": rng.randint(0, 12),
+            "mastered": False,
+        })
+    decks = [
+        {"id": f"deck_{username}_{t}", "title": topic, "subject": topic,
+         "created_at": today.isoformat(), "cards": [c for c in cards if c["topic"] == topic]}
+        for t, topic in enumerate(TOPICS)
+    ]
+    for deck in decks:
+        main._recompute_deck_counts(deck)
+    main._save_flashcard_decks(decks, username)
+
+    stats = json.loads(json.dumps(main._DEFAULT_STATS))
+    stats["user_id"] = username
+    stats["streak"].update(current=rng.randint(0, 20), longest=30,
+                           last_active_date=(today - timedelta(days=1)).isoformat())
+    stats["flashcard_stats"]["cards"] = {
+        c["id"]: {"ease": c["ease"], "next_review": c["next_review"],
+                  "review_count": c["review_count"], "mastered": False}
+        for c in cards
+    }
+    quiz_stats = stats["quiz_stats"]
+    for r in range(n_results):
+        percent = rng.randint(20, 100)
+        topic = TOPICS[r % len(TOPICS)]
+        main._save_quiz_result(username, f"quiz_{r}", {
+            "quiz_id": f"quiz_{r}",
+            "completed_at": (datetime.now(timezone.utc) - timedelta(hours=r)).isoformat(),
+            "score": percent / 10, "max_score": 10.0, "percent": percent, "subject": topic,
+            "question_type": "mcq",
+            "answers": [{"question_id": f"q{i}", "user_answer": "A", "correct": i % 2 == 0,
+                         "score": 10.0 if i % 2 == 0 else 0.0} for i in range(5)],
+        })
+        by_topic = quiz_stats["by_topic"].setdefault(topic, {"attempts": 0, "avg_score": 0.0})
+        by_topic["attempts"] += 1
+        by_topic["avg_score"] = round(percent / 10, 2)
+    quiz_stats["total_attempted"] = n_results
+    quiz_stats["average_score"] = 6.0 if n_results else 0.0
+    main._save_user_stats(stats, username)
+
+    sessions = main._chat_sessions(username)
+    for s in range(n_chats):
+        sessions.save({
+            "id": f"chat_{s}", "title": f"Session {s}", "subject": TOPICS[s % len(TOPICS)],
+            "timestamp": (datetime.now(timezone.utc) - timedelta(days=s)).isoformat(),
+            "messages": [{"role": "user" if m % 2 == 0 else "assistant", "content": "Explain osmosis. " * 5}
+                         for m in range(12)],
+        })
+
+    return Student(username, _create_jwt(user.id, username), name, [c["id"] for c in cards])
+
+
+def seed_students(main, count: int, seed: int = 41) -> list:
+    from database import SessionLocal, init_db
+
+    init_db()
+    rng = random.Random(seed)
+    db = SessionLocal()
+    try:
+        return [_seed_student(main, db, i, rng) for i in range(count)]
+    finally:
+        db.close()
+
+
+def _queue_sync_backlog(base: Path, students: list, per_student: int) -> None:
+    from sync_manager import SyncManager
+
+    for s in students:
+        sm = SyncManager(base_path=str(base), user_id=s.username)
+        for i in range(per_student):
+            sm.enqueue_quiz_sync(s.username, f"backlog_{i}", 70, 5, device_id="bench-device", class_code="SOLO")
+
+
+# ── Requests ────────────────────────────────────────────────────────────────
+
+
+def _request_for(scenario: str, student: Student, i: int, rng: random.Random) -> tuple:
+    """(method, url, json body or None)"""
+    if scenario == "chat":
+        return "POST", "/api/chat", {"message": f"Explain topic {i} in simple words", "subject": TOPICS[i % len(TOPICS)]}
+    if scenario == "quiz_submit":
+        answers = [{"question_id": it["id"], "answer": rng.choice("ABCD")} for it in QUIZ_ITEMS]
+        return "POST", f"/api/quiz/bench_{i}/submit", {"answers": answers, "items": QUIZ_ITEMS}
+    if scenario == "flashcard_review":
+        next_review = (datetime.now(timezone.utc).date() + timedelta(days=rng.randint(1, 9))).isoformat()
+        return "POST", "/api/flashcards/review", {
+            "card_id": rng.choice(student.card_ids), "ease": rng.choice(("hard", "medium", "easy")),
+            "next_review": next_review,
+        }
+    if scenario == "due_cards":
+        return "GET", "/api/flashcards/due", None
+    if scenario == "insights":
+        return "GET", "/api/insights", None
+    if scenario == "sync_flush":
+        return "POST", "/api/sync", None
+    raise ValueError(scenario)
+
+
+def _percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct))]
+
+
+async def run_scenario(client, scenario: str, students: list, requests_per_student: int,
+                       mock: MockOllamaServer, seed: int) -> dict:
+    latencies, errors, samples = [], 0, []
+    before = mock.snapshot_counts()
+
+    async def student_loop(n: int, student: Student) -> None:
+        nonlocal errors
+        rng = random.Random(seed * 1000 + n)
+        for i in range(requests_per_student):
+            method, url, body = _request_for(scenario, student, i, rng)
+            started = time.perf_counter()
+            resp = await client.request(method, url, json=body, headers=student.headers)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if resp.status_code >= 400:
+                errors += 1
+                if len(samples) < 3:
+                    samples.append(f"{resp.status_code}: {resp.text[:200]}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(student_loop(n, s) for n, s in enumerate(students)))
+    wall = time.perf_counter() - started
+
+    after = mock.snapshot_counts()
+    generations = sum(after.get(p, 0) - before.get(p, 0) for p in ("/api/generate", "/api/chat"))
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "error_samples": samples,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round((len(latencies) - errors) / wall, 2) if wall else 0.0,
+        "latency_ms": {
+            "p50": round(_percentile(latencies, 0.50), 1),
+            "p95": round(_percentile(latencies, 0.95), 1),
+            "p99": round(_percentile(latencies, 0.99), 1),
+            "mean": round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+            "max": round(latencies[-1], 1) if latencies else 0.0,
+        },
+        "ollama_generations": generations,
+    }
+
+
+async def run_all(main, base: Path, students: list, args, mock: MockOllamaServer) -> dict:
+    import httpx
+
+    app = main.app
+    results = {}
+    await app.router.startup()
+    try:
+        # An unhandled app exception becomes a recorded 500 instead of aborting the run
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+            for scenario in args.scenarios:
+                method, url, body = _request_for(scenario, students[0], 0, random.Random(0))
+                await client.request(method, url, json=body, headers=students[0].headers)
+            for level in args.levels:
+                cohort = students[:level]
+                results[str(level)] = {}
+                for scenario in args.scenarios:
+                    if scenario == "sync_flush":
+                        _queue_sync_backlog(base, cohort, args.sync_backlog)
+                    r = await run_scenario(client, scenario, cohort, args.requests, mock, args.seed)
+                    results[str(level)][scenario] = r
+                    lat = r["latency_ms"]
+                    print(f"{level:>6} {scenario:<18}{r['requests']:>6}{r['errors']:>6}"
+                          f"{lat['p50']:>10}{lat['p95']:>10}{r['throughput_rps']:>10}{r['ollama_generations']:>8}",
+                          flush=True)
+    finally:
+        await app.router.shutdown()
+    return results
+
+
+# ── Baseline comparison ─────────────────────────────────────────────────────
+
+
+def compare(current: dict, baseline: dict, tolerance_pct: float) -> list:
+    """Print deltas vs a baseline run; return the regressions found."""
+    regressions = []
+    print(f"\nvs baseline ({baseline.get('started_at', '?')}), tolerance {tolerance_pct}%")
+    print(f"{'level':>6} {'scenario':<18}{'p95 ms':>18}{'rps':>18}")
+    for level, scenarios in current["results"].items():
+        for scenario, r in scenarios.items():
+            b = baseline.get("results", {}).get(level, {}).get(scenario)
+            if not b:
+                continue
+            p95, b_p95 = r["latency_ms"]["p95"], b["latency_ms"]["p95"]
+            rps, b_rps = r["throughput_rps"], b["throughput_rps"]
+            d_p95 = (p95 - b_p95) / b_p95 * 100 if b_p95 else 0.0
+            d_rps = (rps - b_rps) / b_rps * 100 if b_rps else 0.0
+            flag = ""
+            if d_p95 > tolerance_pct or d_rps < -tolerance_pct:
+                flag = "  REGRESSION"
+                regressions.append({"level": level, "scenario": scenario,
+                                    "p95_change_pct": round(d_p95, 1), "rps_change_pct": round(d_rps, 1)})
+            print(f"{level:>6} {scenario:<18}{p95:>9} ({d_p95:+5.0f}%){rps:>9} ({d_rps:+5.0f}%){flag}")
+    return regressions
+
+
+def _git_commit() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=_BACKEND,
+                             capture_output=True, text=True, timeout=5)
+        return out.stdout.strip()
+    except Exception:
+        return ""
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", default="1,10,100", help="Comma-separated concurrent student counts")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--requests", type=int, default=3, help="Requests per student per scenario")
+    parser.add_argument("--sync-backlog", type=int, default=5, help="Quiz attempts queued per student before sync_flush")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Mock Ollama time to first token")
+    parser.add_argument("--tokens", type=int, default=32, help="Mock Ollama tokens per response")
+    parser.add_argument("--tokens-per-sec", type=float, default=400.0)
+    parser.add_argument("--ollama-parallel", type=int, default=4, help="Concurrent mock generations")
+    parser.add_argument("--appsync-latency-ms", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=41)
+    parser.add_argument("--data-dir", help="Seed into this dir and keep it (default: temp dir)")
+    parser.add_argument("--json", help="Results file (default: api_load_<UTC time>.json in the current dir)")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=20.0, help="Allowed p95 / throughput change, percent")
+    parser.add_argument("--verbose", action="store_true", help="Keep backend INFO logging")
+    args = parser.parse_args()
+    args.levels = sorted({int(x) for x in args.levels.split(",") if x.strip()})
+    args.scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    # Configured before the backend's startup hook calls basicConfig, which then does nothing
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR)
+
+    tmp = None
+    if args.data_dir:
+        base = Path(args.data_dir).resolve()
+        base.mkdir(parents=True, exist_ok=True)
+    else:
+        tmp = tempfile.TemporaryDirectory(prefix="studaxis-bench-", ignore_cleanup_errors=True)
+        base = Path(tmp.name)
+
+    mock = MockOllamaServer(latency_ms=args.latency_ms, tokens=args.tokens, tokens_per_sec=args.tokens_per_sec,
+                            parallel=args.ollama_parallel, appsync_latency_ms=args.appsync_latency_ms,
+                            model=DEFAULT_MODEL).start()
+    try:
+        _configure_env(base, mock)
+        started_at = datetime.now(timezone.utc)
+        import main as backend
+
+        t0 = time.perf_counter()
+        students = seed_students(backend, max(args.levels), args.seed)
+        print(f"Seeded {len(students)} students in {time.perf_counter() - t0:.1f}s under {base}")
+        print(f"{'level':>6} {'scenario':<18}{'reqs':>6}{'errs':>6}{'p50 ms':>10}{'p95 ms':>10}{'rps':>10}{'gens':>8}")
+        results = asyncio.run(run_all(backend, base, students, args, mock))
+    finally:
+        mock.stop()
+        if tmp is not None:
+            tmp.cleanup()
+
+    report = {
+        "started_at": started_at.isoformat(),
+        "git_commit": _git_commit(),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "cpus": os.cpu_count()},
+        "config": {k: v for k, v in vars(args).items() if k not in ("json", "baseline", "verbose")},
+        "profiles": [dict(zip(("name", "cards", "quiz_results", "chat_sessions"), p)) for p in PROFILES],
+        "results": results,
+    }
+    out = Path(args.json or f"api_load_{started_at.strftime('%Y%m%dT%H%M%SZ')}.json")
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Results written to {out}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.tolerance}%")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-entity conflict handling vs ConflictResolutionEngine.reconcile_bulk.
+
+Builds N synthetic UserStats-like entity pairs (nested dicts, lists, shared
+last_sync timestamps) where a configurable share has concurrent edits, clock
+divergence, identical content or no cloud copy. Then times:
+
+  per-entity  detect_conflict + resolve_conflict for each entity, and
+              save_pending_conflict for each one needing user input
+              (what ConflictAwareOrchestrator.detect_and_resolve_conflict does)
+  bulk        one reconcile_bulk() call
+
+Both run against a fresh temp data dir with the same config. Pending
+conflicts come from "manual" entities of a teacher-owned type with auto
+merge and last-write-wins disabled, so the file-write pattern is exercised.
+
+Usage:
+  python backend/benchmarks/bench_conflict_reconciliation.py
+  python backend/benchmarks/bench_conflict_reconciliation.py --entities 10000 --pending 0.02 --json out.json
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from conflict_resolution_engine import ConflictConfig, ConflictResolutionEngine  # noqa: E402
+
+LAST_SYNC = ["2026-03-05T09:00:00Z", "2026-03-05T09:30:00Z", "2026-03-05T10:00:00Z"]
+
+
+def make_entities(n: int, conflict_share: float, seed: int = 11) -> tuple[dict, dict]:
+    rng = random.Random(seed)
+    local, cloud = {}, {}
+    for i in range(n):
+        entity_id = f"stats_{i:06d}"
+        last_sync = rng.choice(LAST_SYNC)
+        base = {
+            "user_id": f"stu_{i:06d}",
+            "version": 3,
+            "updated_at": "2026-03-05T08:59:58Z",
+            "last_sync_timestamp": last_sync,
+            "streak": {"current": rng.randint(0, 20), "longest": rng.randint(20, 40)},
+            "quiz_stats": {
+                "total_attempted": rng.randint(0, 50),
+                "by_topic": {t: rng.randint(0, 10) for t in ("Algebra", "Physics", "Biology")},
+            },
+            "recent_scores": [rng.randint(0, 10) for _ in range(20)],
+            "preferences": {"theme": "light", "sync_enabled": True},
+        }
+        roll = rng.random()
+        other = json.loads(json.dumps(base))
+        if roll < conflict_share / 2:
+            # both sides edited since last sync
+            base.update(version=4, updated_at="2026-03-05T11:00:00Z")
+            other.update(version=5, updated_at="2026-03-05T11:02:00Z")
+            other["streak"]["current"] += 1
+            other["recent_scores"].append(7)
+        elif roll < conflict_share:
+            # clock divergence with identical content (false conflict)
+            other["updated_at"] = "2026-03-05T09:10:00Z"
+        elif roll < conflict_share + 0.05:
+            other = None  # never synced
+        local[entity_id] = base
+        if other is not None:
+            cloud[entity_id] = other
+    return local, cloud
+
+
+def make_manual(n: int) -> tuple[dict, dict]:
+    """Primitive-field conflicts on an owner-less teacher entity: only a user can resolve."""
+    local = {f"quiz_{i:05d}": {"title": "Draft A", "version": 2, "updated_at": "2026-03-05T10:00:00Z"} for i in range(n)}
+    cloud = {k: {"title": "Draft B", "version": 2, "updated_at": "2026-03-05T11:00:00Z"} for k in local}
+    return local, cloud
+
+
+def _engine(base: str, log: bool) -> ConflictResolutionEngine:
+    config = ConflictConfig()
+    config.ENABLE_CONFLICT_LOGGING = log
+    engine = ConflictResolutionEngine(base_path=base, config=config)
+    return engine
+
+
+def run_per_entity(local: dict, cloud: dict, manual: tuple, log: bool) -> dict:
+    with tempfile.TemporaryDirectory() as base:
+        engine = _engine(base, log)
+        started = time.perf_counter()
+        conflicts = pending = 0
+        for batch, entity_type, manual_mode in (((local, cloud), "UserStats", False), (manual, "Quiz", True)):
+            engine.config.ENABLE_AUTO_MERGE = not manual_mode
+            engine.config.ENABLE_LAST_WRITE_WINS = not manual_mode
+            batch_local, batch_cloud = batch
+            for entity_id in list(batch_local) + [e for e in batch_cloud if e not in batch_local]:
+                conflict = engine.detect_conflict(entity_id, entity_type, batch_local.get(entity_id), batch_cloud.get(entity_id))
+                if not conflict.conflict_detected:
+                    continue
+                conflicts += 1
+                engine.log_conflict_event(conflict)
+                resolution = engine.resolve_conflict(conflict)
+                if resolution.strategy.value == "pending":
+                    engine.save_pending_conflict(conflict)
+                    pending += 1
+                else:
+                    engine.log_conflict_resolution(conflict, resolution.strategy, "system", resolution.resolved_data)
+        seconds = time.perf_counter() - started
+        return {"seconds": round(seconds, 3), "conflicts": conflicts, "pending": pending,
+                "pending_file_bytes": engine.conflicts_path.stat().st_size if pending else 0}
+
+
+def run_bulk(local: dict, cloud: dict, manual: tuple, log: bool) -> dict:
+    with tempfile.TemporaryDirectory() as base:
+        engine = _engine(base, log)
+        started = time.perf_counter()
+        result = engine.reconcile_bulk(local, cloud, "UserStats")
+        engine.config.ENABLE_AUTO_MERGE = engine.config.ENABLE_LAST_WRITE_WINS = False
+        manual_result = engine.reconcile_bulk(*manual, "Quiz")
+        seconds = time.perf_counter() - started
+        pending = len(result.pending) + len(manual_result.pending)
+        return {"seconds": round(seconds, 3), "conflicts": len(result.conflicts) + len(manual_result.conflicts),
+                "pending": pending,
+                "pending_file_bytes": engine.conflicts_path.stat().st_size if pending else 0}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entities", type=int, default=10000)
+    parser.add_argument("--conflicts", type=float, default=0.3, help="Share of entities with a detectable conflict")
+    parser.add_argument("--pending", type=float, default=0.02, help="Extra manual conflicts, as a share of --entities")
+    parser.add_argument("--log", action="store_true", help="Keep conflict_log.jsonl audit logging on")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.WARNING)  # per-entity log lines would dominate the timing
+
+    local, cloud = make_entities(args.entities, args.conflicts)
+    manual = make_manual(int(args.entities * args.pending))
+    results = {
+        "config": vars(args),
+        "per_entity": run_per_entity(local, cloud, manual, args.log),
+        "bulk": run_bulk(local, cloud, manual, args.log),
+    }
+    assert results["per_entity"]["conflicts"] == results["bulk"]["conflicts"]
+    assert results["per_entity"]["pending"] == results["bulk"]["pending"]
+    results["speedup"] = round(results["per_entity"]["seconds"] / max(results["bulk"]["seconds"], 1e-9), 1)
+
+    print(f"{args.entities} entities (+{len(manual[0])} manual), "
+          f"{results['bulk']['conflicts']} conflicts, {results['bulk']['pending']} pending")
+    print(f"{'':12}{'seconds':>10}")
+    for mode in ("per_entity", "bulk"):
+        print(f"{mode:12}{results[mode]['seconds']:>10}")
+    print(f"speedup     {results['speedup']}x")
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
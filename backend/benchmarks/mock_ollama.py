@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Mock Ollama (and AppSync) HTTP server for benchmarks.
+
+Serves just enough of the Ollama API for the backend's AI paths:
+
+  GET  /api/tags, /api/version, /api/ps
+  POST /api/generate, /api/chat      stream=false → one JSON body,
+                                     stream=true  → NDJSON chunks (ollama client / langchain)
+  POST /api/pull, /api/show
+
+Each generation takes  latency_ms + tokens / tokens_per_sec  and at most
+`parallel` generations run at once (like OLLAMA_NUM_PARALLEL); the rest
+queue. eval_count / eval_duration are filled in so telemetry sees them.
+
+POST /graphql answers AppSync mutations with {"data": {...}} after
+appsync_latency_ms, so SyncManager.try_sync() can flush its queue.
+
+Usage (standalone, to point a running backend at it):
+  python backend/benchmarks/mock_ollama.py --port 11434 --tokens-per-sec 20
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+DEFAULT_MODEL = "mock-llm:latest"
+_WORD = "study "
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_Server"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args) -> None:  # keep benchmark output clean
+        pass
+
+    def _send_json(self, body: dict, status: int = 200) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return {}
+
+    def do_GET(self) -> None:
+        mock = self.server.mock
+        mock._count(self.path)
+        if self.path == "/api/tags":
+            self._send_json({"models": [{"name": mock.model, "model": mock.model, "size": 1}]})
+        elif self.path == "/api/version":
+            self._send_json({"version": "0.0.0-mock"})
+        elif self.path == "/api/ps":
+            self._send_json({"models": [{"name": mock.model, "model": mock.model}]})
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self) -> None:
+        mock = self.server.mock
+        mock._count(self.path)
+        body = self._read_json()
+        if self.path in ("/api/generate", "/api/chat"):
+            self._generate(body, chat=self.path == "/api/chat")
+        elif self.path == "/graphql":
+            time.sleep(mock.appsync_latency_ms / 1000)
+            self._send_json({"data": {"ok": True}})
+        elif self.path in ("/api/pull", "/api/show"):
+            self._send_json({"status": "success", "modelfile": "", "details": {}})
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def _generate(self, body: dict, chat: bool) -> None:
+        mock = self.server.mock
+        tokens = mock.tokens
+        per_token = 1.0 / mock.tokens_per_sec if mock.tokens_per_sec > 0 else 0.0
+        stream = body.get("stream", True)  # Ollama streams unless told not to
+        model = body.get("model") or mock.model
+
+        def chunk(text: str, done: bool, **extra) -> dict:
+            out = {"model": model, "created_at": datetime.now(timezone.utc).isoformat(), "done": done}
+            if chat:
+                out["message"] = {"role": "assistant", "content": text}
+            else:
+                out["response"] = text
+            out.update(extra)
+            return out
+
+        with mock._slots:
+            started = time.perf_counter()
+            time.sleep(mock.latency_ms / 1000)
+            if not stream:
+                time.sleep(tokens * per_token)
+                elapsed_ns = int((time.perf_counter() - started) * 1e9)
+                self._send_json(chunk(mock.reply(tokens), True, eval_count=tokens,
+                                      eval_duration=elapsed_ns, total_duration=elapsed_ns,
+                                      prompt_eval_count=len(str(body.get("prompt", ""))) // 4))
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for _ in range(tokens):
+                time.sleep(per_token)
+                self._write_chunk(chunk(_WORD, False))
+            elapsed_ns = int((time.perf_counter() - started) * 1e9)
+            self._write_chunk(chunk("", True, eval_count=tokens, eval_duration=elapsed_ns,
+                                    total_duration=elapsed_ns, done_reason="stop"))
+            self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, obj: dict) -> None:
+        data = json.dumps(obj).encode("utf-8") + b"\n"
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # default 5 refuses connections under benchmark load
+    mock: "MockOllamaServer"
+
+
+class MockOllamaServer:
+    """In-process mock; use as a context manager or start()/stop()."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 20.0,
+        tokens: int = 32,
+        tokens_per_sec: float = 400.0,
+        parallel: int = 4,
+        appsync_latency_ms: float = 10.0,
+        model: str = DEFAULT_MODEL,
+    ):
+        self.latency_ms = latency_ms
+        self.tokens = max(1, tokens)
+        self.tokens_per_sec = tokens_per_sec
+        self.appsync_latency_ms = appsync_latency_ms
+        self.model = model
+        self._slots = threading.BoundedSemaphore(max(1, parallel))
+        self._counts_lock = threading.Lock()
+        self.counts: dict[str, int] = {}
+        self._httpd = _Server((host, port), _Handler)
+        self._httpd.mock = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def reply(self, tokens: int) -> str:
+        return (_WORD * tokens).strip()
+
+    def _count(self, path: str) -> None:
+        with self._counts_lock:
+            self.counts[path] = self.counts.get(path, 0) + 1
+
+    def snapshot_counts(self) -> dict[str, int]:
+        with self._counts_lock:
+            return dict(self.counts)
+
+    def start(self) -> "MockOllamaServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "MockOllamaServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Time to first token")
+    parser.add_argument("--tokens", type=int, default=32, help="Tokens per response")
+    parser.add_argument("--tokens-per-sec", type=float, default=400.0)
+    parser.add_argument("--parallel", type=int, default=4, help="Concurrent generations (OLLAMA_NUM_PARALLEL)")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    args = parser.parse_args()
+    server = MockOllamaServer(args.host, args.port, args.latency_ms, args.tokens,
+                              args.tokens_per_sec, args.parallel, model=args.model)
+    print(f"Mock Ollama on {server.base_url} (model {args.model}); Ctrl+C to stop")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
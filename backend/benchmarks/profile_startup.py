@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Startup profile: what `import main` costs, and how soon the server answers.
+
+Import report (always): runs `python -X importtime -c "import main"` in a
+fresh interpreter --runs times against a throwaway STUDAXIS_BASE_PATH and
+prints
+  - wall time of the import (median of runs)
+  - main.py's own execution time (route + model definitions)
+  - main's direct imports, by cumulative cost
+  - packages by total self time, each marked backend / third-party
+
+Serve timing (--serve): starts `uvicorn main:app` on a free port and
+measures, from process spawn,
+  - first 200 from /api/health  (port bound, startup hook returned)
+  - first 200 from /api/ready   (background Ollama bootstrap finished)
+and prints the bootstrap stages reported by /api/ready.
+
+Usage:
+  python backend/benchmarks/profile_startup.py
+  python backend/benchmarks/profile_startup.py --serve --json startup.json
+  python backend/benchmarks/profile_startup.py --serve --ollama-url http://127.0.0.1:1   # Ollama down
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+_IMPORT_SNIPPET = (
+    "import time; t = time.perf_counter(); import main; "
+    "print('WALL', time.perf_counter() - t)"
+)
+
+
+def _env(base: str, ollama_url: str = None) -> dict:
+    env = dict(os.environ, STUDAXIS_BASE_PATH=base, PYTHONDONTWRITEBYTECODE="1")
+    if ollama_url:
+        env["OLLAMA_BASE_URL"] = ollama_url
+    return env
+
+
+def parse_importtime(stderr: str) -> list:
+    """[(depth, self_us, cumulative_us, module)] in the order -X importtime prints them."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|", 2)
+        if len(parts) != 3:
+            continue
+        self_us, cumulative_us, name = parts
+        name = name[1:]  # one space after the bar, then two per nesting level
+        try:
+            rows.append(((len(name) - len(name.lstrip(" "))) // 2, int(self_us), int(cumulative_us), name.strip()))
+        except ValueError:
+            continue  # the "self [us] | cumulative | imported package" header
+    return rows
+
+
+def main_subtree(rows: list, module: str = "main") -> tuple:
+    """(main's own row, rows imported while main was loading)."""
+    for i, row in enumerate(rows):
+        if row[0] == 0 and row[3] == module:
+            j = i
+            while j > 0 and rows[j - 1][0] > 0:
+                j -= 1
+            return row, rows[j:i]
+    raise ValueError(f"{module} not found in -X importtime output")
+
+
+def _origin(top: str) -> str:
+    if (BACKEND / top).is_dir() or (BACKEND / f"{top}.py").is_file():
+        return "backend"
+    return "third-party"
+
+
+def profile_imports(runs: int, top: int) -> dict:
+    walls = []
+    stderr = ""
+    with tempfile.TemporaryDirectory(prefix="studaxis-startup-") as base:
+        for _ in range(max(1, runs)):
+            proc = subprocess.run([sys.executable, "-X", "importtime", "-c", _IMPORT_SNIPPET],
+                                  cwd=BACKEND, env=_env(base), capture_output=True, text=True, timeout=300)
+            if proc.returncode != 0:
+                raise RuntimeError(f"import main failed:\n{proc.stderr[-2000:]}")
+            walls.append(float(next(l for l in proc.stdout.splitlines() if l.startswith("WALL")).split()[1]))
+            stderr = proc.stderr
+
+    main_row, subtree = main_subtree(parse_importtime(stderr))
+    direct = sorted((r for r in subtree if r[0] == 1), key=lambda r: r[2], reverse=True)
+    by_package = {}
+    for _, self_us, _, name in subtree:
+        top_name = name.split(".")[0]
+        by_package[top_name] = by_package.get(top_name, 0) + self_us
+    packages = sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)
+    return {
+        "import_wall_s": round(statistics.median(walls), 3),
+        "import_wall_runs_s": [round(w, 3) for w in walls],
+        "main_self_ms": round(main_row[1] / 1000, 1),
+        "main_cumulative_ms": round(main_row[2] / 1000, 1),
+        "modules_loaded": len(subtree),
+        "direct_imports": [{"module": r[3], "cumulative_ms": round(r[2] / 1000, 1)} for r in direct[:top]],
+        "packages": [{"package": p, "self_ms": round(us / 1000, 1), "origin": _origin(p)} for p, us in packages[:top]],
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _get(url: str) -> tuple:
+    try:
+        with urllib.request.urlopen(url, timeout=2) as resp:
+            return resp.status, json.loads(resp.read() or b"{}")
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"{}")
+    except (OSError, ValueError):
+        return None, None
+
+
+def profile_serve(ollama_url: str, ready_timeout: float) -> dict:
+    port = _free_port()
+    out = {}
+    with tempfile.TemporaryDirectory(prefix="studaxis-startup-") as base:
+        log_path = Path(base) / "server.log"
+        log = open(log_path, "wb")
+        started = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+             "--log-level", "warning"],
+            cwd=BACKEND, env=_env(base, ollama_url), stdout=log, stderr=subprocess.STDOUT,
+        )
+        try:
+            url = f"http://127.0.0.1:{port}"
+            deadline = started + ready_timeout
+            while time.perf_counter() < deadline and proc.poll() is None:
+                status, body = _get(f"{url}/api/health")
+                if status == 200:
+                    out["health_s"] = round(time.perf_counter() - started, 3)
+                    out["health"] = body
+                    break
+                time.sleep(0.02)
+            while "health_s" in out and time.perf_counter() < deadline:
+                status, body = _get(f"{url}/api/ready")
+                if status == 200:
+                    out["ready_s"] = round(time.perf_counter() - started, 3)
+                    out["ready"] = body
+                    break
+                time.sleep(0.1)
+        finally:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+            log.close()
+            if "health_s" not in out:
+                out["server_log_tail"] = log_path.read_text(encoding="utf-8", errors="replace")[-2000:]
+    return out
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="Fresh-interpreter imports to time")
+    parser.add_argument("--top", type=int, default=15, help="Rows per table")
+    parser.add_argument("--serve", action="store_true", help="Also time uvicorn until /api/health and /api/ready")
+    parser.add_argument("--ollama-url", help="OLLAMA_BASE_URL for --serve (default: environment)")
+    parser.add_argument("--ready-timeout", type=float, default=120.0)
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+
+    report = {"imports": profile_imports(args.runs, args.top)}
+    imp = report["imports"]
+    print(f"import main: {imp['import_wall_s']}s wall (median of {len(imp['import_wall_runs_s'])}), "
+          f"{imp['modules_loaded']} modules, main.py itself {imp['main_self_ms']} ms")
+    print(f"\n{'direct import':<32}{'cumulative ms':>14}")
+    for row in imp["direct_imports"]:
+        print(f"{row['module']:<32}{row['cumulative_ms']:>14}")
+    print(f"\n{'package':<32}{'self ms':>14}  origin")
+    for row in imp["packages"]:
+        print(f"{row['package']:<32}{row['self_ms']:>14}  {row['origin']}")
+
+    if args.serve:
+        report["serve"] = serve = profile_serve(args.ollama_url, args.ready_timeout)
+        print()
+        if "health_s" not in serve:
+            print("server did not answer /api/health")
+            print(serve.get("server_log_tail", ""))
+        else:
+            print(f"/api/health 200 after {serve['health_s']}s")
+            if "ready_s" in serve:
+                ready = serve["ready"]
+                print(f"/api/ready  200 after {serve['ready_s']}s ({ready.get('state')}, model {ready.get('model')})")
+                for name, stage in ready.get("stages", {}).items():
+                    print(f"  {name:<14}{stage.get('status'):<10}{stage.get('seconds', '')}")
+            else:
+                print(f"/api/ready  not 200 within {args.ready_timeout}s")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
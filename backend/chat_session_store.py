@@ -0,0 +1,338 @@
+"""
+Studaxis — Chat Session Store (append-only)
+════════════════════════════════════════════
+Saved chat sessions used to live in one chat_history.json that was parsed,
+prepended to and rewritten on every save, and returned whole by
+GET /api/chat/history. Heavy users have hundreds of sessions.
+
+  data/users/{user_id}/chat_sessions/
+    index.jsonl      {"op": "put", id, title, subject, timestamp,
+                      message_count, seg, off, len} | {"op": "del", "id"}
+    seg-000001.jsonl one full session per line, appended
+
+Saving appends the body to the active segment and one line to the index.
+Listing, paging and title search are served from the in-memory index
+(replayed once per process); a body is read with a single seek when a
+session is opened.
+
+Retention: the newest MAX_SESSIONS are kept, and sessions older than
+RETENTION_DAYS (0 = forever) are dropped; both are enforced on save via
+"del" records (STUDAXIS_CHAT_MAX_SESSIONS, STUDAXIS_CHAT_RETENTION_DAYS).
+Once dead body bytes exceed both the live bytes and COMPACT_MIN_BYTES,
+live sessions are copied into a fresh segment and the index is rewritten.
+
+A legacy chat_history.json is imported on first use and renamed to
+chat_history.json.migrated.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger("studaxis.chat_sessions")
+
+INDEX_FILE = "index.jsonl"
+LEGACY_FILE = "chat_history.json"
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def _tokens(text: str) -> set[str]:
+    return {t.lower() for t in _TOKEN.findall(text or "")}
+
+
+def _stamp(path: Path) -> Optional[tuple]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class ChatSessionStore:
+    """Per-user saved chat sessions: compact index in memory, bodies on disk."""
+
+    MAX_SESSIONS = int(os.environ.get("STUDAXIS_CHAT_MAX_SESSIONS", "500"))
+    RETENTION_DAYS = int(os.environ.get("STUDAXIS_CHAT_RETENTION_DAYS", "0"))
+    SEGMENT_MAX_BYTES = 4 * 1024 * 1024
+    COMPACT_MIN_BYTES = 1024 * 1024
+
+    def __init__(
+        self,
+        directory: Path,
+        legacy_path: Optional[Path] = None,
+        max_sessions: Optional[int] = None,
+        retention_days: Optional[int] = None,
+    ) -> None:
+        self.directory = Path(directory)
+        self.index_path = self.directory / INDEX_FILE
+        self.legacy_path = legacy_path
+        if max_sessions is not None:
+            self.MAX_SESSIONS = max_sessions
+        if retention_days is not None:
+            self.RETENTION_DAYS = retention_days
+        self._lock = threading.RLock()
+        self._sessions: dict[str, dict[str, Any]] = {}  # id → index entry, insertion = save order
+        self._terms: dict[str, set[str]] = {}  # title token → session ids
+        self._dead_bytes = 0
+        self._seg = 1
+        self._stamp: Optional[tuple] = None
+        self._loaded = False
+
+    # ── index replay ─────────────────────────────────────────────────
+
+    def _segment_path(self, seg: int) -> Path:
+        return self.directory / f"seg-{seg:06d}.jsonl"
+
+    def _ensure_loaded(self) -> None:
+        """Replay index.jsonl (then import a legacy chat_history.json). Caller holds the lock."""
+        stamp = _stamp(self.index_path)
+        if self._loaded and stamp == self._stamp:
+            return
+        self._sessions, self._terms = {}, {}
+        self._dead_bytes = 0
+        self._seg = 1
+        self._loaded = True
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        rec = json.loads(line)
+                    except json.JSONDecodeError:
+                        logger.warning("Skipping corrupt line in %s", self.index_path)
+                        continue
+                    if rec.get("op") == "put":
+                        self._apply_put({k: v for k, v in rec.items() if k != "op"})
+                    elif rec.get("op") == "del":
+                        self._apply_del(str(rec.get("id")))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("Could not read %s: %s", self.index_path, e)
+        if self._sessions:
+            self._seg = max(s["seg"] for s in self._sessions.values())
+        self._stamp = stamp
+        self._import_legacy()
+
+    def _apply_put(self, entry: dict[str, Any]) -> None:
+        sid = str(entry["id"])
+        if sid in self._sessions:
+            self._apply_del(sid)
+        self._sessions[sid] = entry
+        for term in _tokens(entry.get("title", "")):
+            self._terms.setdefault(term, set()).add(sid)
+
+    def _apply_del(self, sid: str) -> None:
+        entry = self._sessions.pop(sid, None)
+        if entry is None:
+            return
+        self._dead_bytes += int(entry.get("len", 0))
+        for term in _tokens(entry.get("title", "")):
+            ids = self._terms.get(term)
+            if ids is not None:
+                ids.discard(sid)
+                if not ids:
+                    del self._terms[term]
+
+    def _import_legacy(self) -> None:
+        if self.legacy_path is None or not self.legacy_path.is_file():
+            return
+        try:
+            data = json.loads(self.legacy_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning("Could not import %s: %s", self.legacy_path, e)
+            return
+        sessions = [s for s in data if isinstance(s, dict) and s.get("id")] if isinstance(data, list) else []
+        for session in reversed(sessions):  # the legacy file is newest first
+            self._append(session, enforce=False)
+        self._enforce_retention()
+        try:
+            self.legacy_path.replace(self.legacy_path.with_name(self.legacy_path.name + ".migrated"))
+        except OSError as e:
+            logger.warning("Could not retire %s: %s", self.legacy_path, e)
+        logger.info("Imported %d chat session(s) from %s", len(sessions), self.legacy_path)
+
+    # ── writers ──────────────────────────────────────────────────────
+
+    def _write_index(self, records: list[dict[str, Any]]) -> None:
+        with open(self.index_path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+        self._stamp = _stamp(self.index_path)
+
+    def _append(self, session: dict[str, Any], enforce: bool = True) -> dict[str, Any]:
+        """Append body + index entry. Caller holds the lock."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        body = (json.dumps(session, ensure_ascii=False) + "\n").encode("utf-8")
+        seg_path = self._segment_path(self._seg)
+        try:
+            size = seg_path.stat().st_size
+        except OSError:
+            size = 0
+        if size and size + len(body) > self.SEGMENT_MAX_BYTES:
+            self._seg += 1
+            seg_path, size = self._segment_path(self._seg), 0
+        with open(seg_path, "ab") as f:
+            f.write(body)
+        entry = {
+            "id": str(session["id"]),
+            "title": str(session.get("title") or ""),
+            "subject": str(session.get("subject") or "General"),
+            "timestamp": str(session.get("timestamp") or ""),
+            "message_count": len(session.get("messages") or []),
+            "seg": self._seg,
+            "off": size,
+            "len": len(body),
+        }
+        self._write_index([{"op": "put", **entry}])
+        self._apply_put(entry)
+        if enforce:
+            self._enforce_retention()
+            self._maybe_compact()
+        return entry
+
+    def save(self, session: dict[str, Any]) -> dict[str, Any]:
+        """Store a session (a repeated id replaces the earlier copy). Returns its summary."""
+        with self._lock:
+            self._ensure_loaded()
+            return self._summary(self._append(session))
+
+    def _enforce_retention(self) -> None:
+        """Drop sessions beyond MAX_SESSIONS (oldest first) or older than RETENTION_DAYS. Caller holds the lock."""
+        ordered = self._ordered()
+        drop = ordered[self.MAX_SESSIONS:] if self.MAX_SESSIONS > 0 else []
+        if self.RETENTION_DAYS > 0:
+            cutoff = (datetime.now(timezone.utc) - timedelta(days=self.RETENTION_DAYS)).isoformat()
+            drop += [e for e in ordered[:self.MAX_SESSIONS or None] if e["timestamp"] and e["timestamp"] < cutoff]
+        if not drop:
+            return
+        self._write_index([{"op": "del", "id": e["id"]} for e in drop])
+        for e in drop:
+            self._apply_del(e["id"])
+
+    def _maybe_compact(self) -> None:
+        """Copy live bodies into a fresh segment and rewrite the index. Caller holds the lock."""
+        live_bytes = sum(int(e.get("len", 0)) for e in self._sessions.values())
+        if self._dead_bytes <= max(self.COMPACT_MIN_BYTES, live_bytes):
+            return
+        old_segments = sorted(self.directory.glob("seg-*.jsonl"))
+        new_seg = self._seg + 1
+        new_path = self._segment_path(new_seg)
+        entries, off = [], 0
+        try:
+            with open(new_path, "wb") as out:
+                for entry in self._sessions.values():
+                    body = self._read_body(entry)
+                    if body is None:
+                        continue
+                    out.write(body)
+                    entries.append({**entry, "seg": new_seg, "off": off, "len": len(body)})
+                    off += len(body)
+                out.flush()
+                os.fsync(out.fileno())
+            tmp = self.index_path.with_suffix(".tmp")
+            tmp.write_text("".join(json.dumps({"op": "put", **e}, ensure_ascii=False) + "\n" for e in entries),
+                           encoding="utf-8")
+            tmp.replace(self.index_path)
+        except OSError as e:
+            logger.warning("Chat session compaction failed in %s: %s", self.directory, e)
+            return
+        for p in old_segments:
+            try:
+                p.unlink()
+            except OSError:
+                pass
+        self._sessions, self._terms = {}, {}
+        for entry in entries:
+            self._apply_put(entry)
+        self._seg, self._dead_bytes = new_seg, 0
+        self._stamp = _stamp(self.index_path)
+        logger.info("Compacted chat sessions in %s: %d live", self.directory, len(entries))
+
+    # ── readers ──────────────────────────────────────────────────────
+
+    def _ordered(self) -> list[dict[str, Any]]:
+        """Newest first by timestamp; save order breaks ties."""
+        entries = list(self._sessions.values())
+        entries.reverse()
+        entries.sort(key=lambda e: e["timestamp"], reverse=True)
+        return entries
+
+    @staticmethod
+    def _summary(entry: dict[str, Any]) -> dict[str, Any]:
+        return {k: entry[k] for k in ("id", "title", "subject", "timestamp", "message_count")}
+
+    def list(
+        self,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        q: Optional[str] = None,
+        subject: Optional[str] = None,
+    ) -> tuple[list[dict[str, Any]], int]:
+        """
+        (page of summaries newest first, total matching). q matches titles:
+        every word of q must prefix a word of the title (case-insensitive).
+        """
+        with self._lock:
+            self._ensure_loaded()
+            entries = self._ordered()
+            words = _tokens(q or "")
+            if words:
+                allowed: Optional[set[str]] = None
+                for word in words:
+                    ids: set[str] = set()
+                    for term, term_ids in self._terms.items():
+                        if term.startswith(word):
+                            ids |= term_ids
+                    allowed = ids if allowed is None else allowed & ids
+                entries = [e for e in entries if e["id"] in (allowed or set())]
+            if subject:
+                entries = [e for e in entries if e["subject"].lower() == subject.strip().lower()]
+            offset = max(0, offset)
+            page = entries[offset:offset + limit] if limit is not None else entries[offset:]
+            return [self._summary(e) for e in page], len(entries)
+
+    def _read_body(self, entry: dict[str, Any]) -> Optional[bytes]:
+        try:
+            with open(self._segment_path(int(entry["seg"])), "rb") as f:
+                f.seek(int(entry["off"]))
+                body = f.read(int(entry["len"]))
+        except OSError:
+            return None
+        return body if len(body) == int(entry["len"]) else None
+
+    def get(self, session_id: str) -> Optional[dict[str, Any]]:
+        """Full session (with messages), or None."""
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._sessions.get(session_id)
+            body = self._read_body(entry) if entry is not None else None
+        if body is None:
+            return None
+        try:
+            session = json.loads(body)
+        except json.JSONDecodeError:
+            return None
+        return session if isinstance(session, dict) else None
+
+
+_stores: dict[str, ChatSessionStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_chat_session_store(directory: Path, legacy_path: Optional[Path] = None) -> ChatSessionStore:
+    """Process-wide store per user directory (the index is replayed only once)."""
+    key = os.path.abspath(directory)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = ChatSessionStore(Path(directory), legacy_path=legacy_path)
+        return store
@@ -0,0 +1,298 @@
+"""
+Studaxis — Local Class Store (teachers, assignments, completions)
+══════════════════════════════════════════════════════════════════
+Teacher records (data/teachers/{class}.json) and assignments
+(data/assignments/{class}.json) were whole JSON files rewritten on every
+change, and a completion flipped the shared assignment's status — so
+concurrent completions from one class raced on the same file, and one
+student finishing marked the assignment done for everyone.
+
+Everything now lives in data/classes/classes.db (stdlib sqlite3, WAL):
+
+  teachers(class_code, data)                               one JSON record
+  assignments(class_code, id, quiz_id, title, due_date,
+              assigned_at, legacy_completed)
+  completions(class_code, assignment_id, user_id,
+              score, completed_at)                         PK of all three
+  assignment_counts(class_code, assignment_id,
+                    completed, score_sum)                  per assignment
+
+complete() is an atomic upsert on (class_code, assignment_id, user_id) and
+adjusts assignment_counts in the same transaction, so the teacher view
+reads counts without scanning completions.
+
+Class codes are keyed exactly as the file names were (unsafe characters →
+"_"). Legacy JSON files are imported the first time a class is touched and
+renamed to *.migrated; a legacy assignment already marked completed keeps
+reporting "completed" (legacy_completed) since the file never said by whom.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+logger = logging.getLogger("studaxis.classes")
+
+DB_FILE = "classes.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS teachers (
+    class_code TEXT PRIMARY KEY,
+    data       TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS assignments (
+    class_code       TEXT NOT NULL,
+    id               TEXT NOT NULL,
+    quiz_id          TEXT,
+    title            TEXT,
+    due_date         TEXT NOT NULL DEFAULT '',
+    assigned_at      TEXT,
+    legacy_completed INTEGER NOT NULL DEFAULT 0,
+    seq              INTEGER NOT NULL,
+    PRIMARY KEY (class_code, id)
+);
+CREATE TABLE IF NOT EXISTS completions (
+    class_code    TEXT NOT NULL,
+    assignment_id TEXT NOT NULL,
+    user_id       TEXT NOT NULL,
+    score         REAL NOT NULL DEFAULT 0,
+    completed_at  TEXT,
+    PRIMARY KEY (class_code, assignment_id, user_id)
+);
+CREATE INDEX IF NOT EXISTS ix_completions_user ON completions (class_code, user_id);
+CREATE TABLE IF NOT EXISTS assignment_counts (
+    class_code    TEXT NOT NULL,
+    assignment_id TEXT NOT NULL,
+    completed     INTEGER NOT NULL DEFAULT 0,
+    score_sum     REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (class_code, assignment_id)
+);
+CREATE TABLE IF NOT EXISTS imported (
+    kind       TEXT NOT NULL,
+    class_code TEXT NOT NULL,
+    PRIMARY KEY (kind, class_code)
+);
+"""
+
+
+def class_key(class_code: str) -> str:
+    """Storage key for a class code (same rule the per-class file names used)."""
+    return re.sub(r"[^a-zA-Z0-9_-]", "_", (class_code or "").strip())[:64] or "default"
+
+
+class ClassStore:
+    """Teachers, assignments and per-student completions for every local class."""
+
+    def __init__(self, directory: Path, legacy_dir: Optional[Path] = None) -> None:
+        self.directory = Path(directory)
+        self.db_path = self.directory / DB_FILE
+        self.legacy_dir = Path(legacy_dir) if legacy_dir is not None else None  # holds teachers/ and assignments/
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._imported: set[tuple[str, str]] = set()
+
+    # ── connection / legacy import ───────────────────────────────────
+
+    def _db(self) -> sqlite3.Connection:
+        """Open (or reopen after the file vanished) the database. Caller holds the lock."""
+        if self._conn is not None and self.db_path.exists():
+            return self._conn
+        if self._conn is not None:
+            self._conn.close()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        self._conn = conn
+        self._imported = set()
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Store lock + BEGIN IMMEDIATE … COMMIT (ROLLBACK on error)."""
+        with self._lock:
+            conn = self._db()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                self._imported.clear()
+                raise
+            conn.execute("COMMIT")
+
+    def _ensure_imported(self, conn: sqlite3.Connection, kind: str, key: str) -> None:
+        """Import data/{kind}/{key}.json once. Caller is inside a transaction."""
+        if (kind, key) in self._imported:
+            return
+        self._imported.add((kind, key))
+        if conn.execute("SELECT 1 FROM imported WHERE kind = ? AND class_code = ?", (kind, key)).fetchone():
+            return
+        conn.execute("INSERT INTO imported (kind, class_code) VALUES (?, ?)", (kind, key))
+        if self.legacy_dir is None:
+            return
+        path = self.legacy_dir / kind / f"{key}.json"
+        if not path.is_file():
+            return
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning("Could not import %s: %s", path, e)
+            return
+        if kind == "teachers" and isinstance(data, dict):
+            conn.execute("INSERT OR IGNORE INTO teachers (class_code, data) VALUES (?, ?)",
+                         (key, json.dumps(data, ensure_ascii=False)))
+        elif kind == "assignments" and isinstance(data, list):
+            for a in data:
+                if isinstance(a, dict) and a.get("id"):
+                    self._insert_assignment(conn, key, a, legacy_completed=a.get("status") == "completed")
+        try:
+            path.replace(path.with_name(path.name + ".migrated"))
+        except OSError as e:
+            logger.warning("Could not retire %s: %s", path, e)
+        logger.info("Imported %s for class %s", path.name, key)
+
+    # ── teachers ─────────────────────────────────────────────────────
+
+    def get_teacher(self, class_code: str) -> Optional[dict[str, Any]]:
+        key = class_key(class_code)
+        with self._transaction() as conn:
+            self._ensure_imported(conn, "teachers", key)
+            row = conn.execute("SELECT data FROM teachers WHERE class_code = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_teacher(self, class_code: str, data: dict[str, Any]) -> None:
+        key = class_key(class_code)
+        with self._transaction() as conn:
+            self._ensure_imported(conn, "teachers", key)
+            conn.execute(
+                "INSERT INTO teachers (class_code, data) VALUES (?, ?) "
+                "ON CONFLICT(class_code) DO UPDATE SET data = excluded.data",
+                (key, json.dumps(data, ensure_ascii=False)),
+            )
+
+    # ── assignments ──────────────────────────────────────────────────
+
+    def _insert_assignment(self, conn: sqlite3.Connection, key: str, a: dict[str, Any],
+                           legacy_completed: bool = False) -> None:
+        seq = conn.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM assignments WHERE class_code = ?",
+                           (key,)).fetchone()[0]
+        conn.execute(
+            "INSERT OR IGNORE INTO assignments "
+            "(class_code, id, quiz_id, title, due_date, assigned_at, legacy_completed, seq) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, str(a["id"]), a.get("quiz_id"), a.get("title"), a.get("due_date") or "",
+             a.get("assigned_at"), int(legacy_completed), seq),
+        )
+
+    def add_assignment(self, class_code: str, assignment: dict[str, Any]) -> None:
+        key = class_key(class_code)
+        with self._transaction() as conn:
+            self._ensure_imported(conn, "assignments", key)
+            self._insert_assignment(conn, key, assignment)
+
+    def list_assignments(self, class_code: str, user_id: Optional[str] = None) -> list[dict[str, Any]]:
+        """
+        Assignments in creation order with completion counts; with user_id,
+        status/score/completed_at are that student's own.
+        """
+        key = class_key(class_code)
+        with self._transaction() as conn:
+            self._ensure_imported(conn, "assignments", key)
+            rows = conn.execute(
+                "SELECT a.id, a.quiz_id, a.title, a.due_date, a.assigned_at, a.legacy_completed, "
+                "COALESCE(n.completed, 0), COALESCE(n.score_sum, 0), c.score, c.completed_at "
+                "FROM assignments a "
+                "LEFT JOIN assignment_counts n ON n.class_code = a.class_code AND n.assignment_id = a.id "
+                "LEFT JOIN completions c ON c.class_code = a.class_code AND c.assignment_id = a.id AND c.user_id = ? "
+                "WHERE a.class_code = ? ORDER BY a.seq",
+                (user_id or "", key),
+            ).fetchall()
+        out = []
+        for aid, quiz_id, title, due_date, assigned_at, legacy, completed, score_sum, score, completed_at in rows:
+            done = completed_at is not None or bool(legacy)
+            out.append({
+                "id": aid,
+                "quiz_id": quiz_id,
+                "title": title,
+                "due_date": due_date,
+                "assigned_at": assigned_at,
+                "status": "completed" if done else "pending",
+                "score": score,
+                "completed_at": completed_at,
+                "completed_count": completed,
+                "average_score": round(score_sum / completed, 2) if completed else None,
+            })
+        return out
+
+    # ── completions ──────────────────────────────────────────────────
+
+    def complete(self, class_code: str, assignment_id: str, user_id: str,
+                 score: float, completed_at: Optional[str] = None) -> bool:
+        """Upsert one student's completion and its assignment's counts. False if the assignment is unknown."""
+        key = class_key(class_code)
+        completed_at = completed_at or datetime.now(timezone.utc).isoformat()
+        with self._transaction() as conn:
+            self._ensure_imported(conn, "assignments", key)
+            if conn.execute("SELECT 1 FROM assignments WHERE class_code = ? AND id = ?",
+                            (key, assignment_id)).fetchone() is None:
+                return False
+            old = conn.execute(
+                "SELECT score FROM completions WHERE class_code = ? AND assignment_id = ? AND user_id = ?",
+                (key, assignment_id, user_id),
+            ).fetchone()
+            conn.execute(
+                "INSERT INTO completions (class_code, assignment_id, user_id, score, completed_at) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT(class_code, assignment_id, user_id) "
+                "DO UPDATE SET score = excluded.score, completed_at = excluded.completed_at",
+                (key, assignment_id, user_id, float(score), completed_at),
+            )
+            conn.execute(
+                "INSERT INTO assignment_counts (class_code, assignment_id, completed, score_sum) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT(class_code, assignment_id) DO UPDATE SET "
+                "completed = completed + excluded.completed, score_sum = score_sum + excluded.score_sum",
+                (key, assignment_id, 0 if old else 1, float(score) - (old[0] if old else 0.0)),
+            )
+        return True
+
+    def completions(self, class_code: str, assignment_id: str) -> list[dict[str, Any]]:
+        """Every student's completion of one assignment, most recent first."""
+        key = class_key(class_code)
+        with self._transaction() as conn:
+            self._ensure_imported(conn, "assignments", key)
+            rows = conn.execute(
+                "SELECT user_id, score, completed_at FROM completions "
+                "WHERE class_code = ? AND assignment_id = ? ORDER BY completed_at DESC",
+                (key, assignment_id),
+            ).fetchall()
+        return [{"user_id": u, "score": s, "completed_at": c} for u, s, c in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_stores: dict[str, ClassStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_class_store(directory: Path, legacy_dir: Optional[Path] = None) -> ClassStore:
+    """Process-wide store per directory (one SQLite connection)."""
+    key = os.path.abspath(directory)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = ClassStore(Path(directory), legacy_dir=legacy_dir)
+        return store
@@ -14,19 +14,52 @@ logger = logging.getLogger(__name__)
 
 CLASSES_TABLE_NAME = os.environ.get("CLASSES_TABLE_NAME", "studaxis-classes")
 AWS_REGION = os.environ.get("AWS_REGION", "ap-south-1")
+CLASS_CODE_INDEX = os.environ.get("CLASSES_CLASS_CODE_INDEX", "class_code-index")
 
 
 class ClassVerifyUnavailableError(Exception):
     """Raised when DynamoDB or boto3 is not configured/available."""
 
 
+# The backend is packaged separately from the Lambdas, so this mirrors the index
+# fallback in aws-infra/lambda/{assignment_manager,class_manager,content_distribution}.
+def _index_missing(err: Exception) -> bool:
+    """True when a Query named a GSI that does not exist yet or is still backfilling."""
+    error = err.response.get("Error", {})
+    return error.get("Code") == "ValidationException" and "index" in error.get("Message", "").lower()
+
+
+def _find_by_class_code(table, code: str, client_error: type) -> list:
+    """Items with class_code == code: GSI query, or a full paginated scan without the index."""
+    try:
+        res = table.query(
+            IndexName=CLASS_CODE_INDEX,
+            KeyConditionExpression="class_code = :cc",
+            ExpressionAttributeValues={":cc": code},
+            Limit=1,
+        )
+        return res.get("Items", [])
+    except client_error as e:
+        if not _index_missing(e):
+            raise
+        logger.warning("%s unavailable (%s); falling back to scan", CLASS_CODE_INDEX, e)
+    # Limit applies before FilterExpression on a scan, so keep paging until a match
+    kwargs = {"FilterExpression": "class_code = :cc", "ExpressionAttributeValues": {":cc": code}}
+    while True:
+        res = table.scan(**kwargs)
+        if res.get("Items") or "LastEvaluatedKey" not in res:
+            return res.get("Items", [])
+        kwargs["ExclusiveStartKey"] = res["LastEvaluatedKey"]
+
+
 def verify_class_code(class_code: str) -> dict | None:
     """
     Verify class code against studaxis-classes DynamoDB table.
     Returns { class_id, class_name, class_code } or None if not found.
 
     - class_code: 4+ chars, normalized to uppercase
-    - Uses scan with FilterExpression (same as Class Manager Lambda)
+    - Queries the class_code-index GSI (same as Class Manager Lambda); falls back
+      to a paginated scan while the index is missing or backfilling
     - Returns None when code is invalid or not found in DynamoDB
     - Raises ClassVerifyUnavailableError when boto3/table not configured
     - Raises ClientError/Exception on DynamoDB failures (caller maps to 503)
@@ -50,12 +83,7 @@ def verify_class_code(class_code: str) -> dict | None:
     try:
         dynamodb = boto3.resource("dynamodb", region_name=AWS_REGION)
         table = dynamodb.Table(table_name)
-        res = table.scan(
-            FilterExpression="class_code = :cc",
-            ExpressionAttributeValues={":cc": code},
-            Limit=1,
-        )
-        items = res.get("Items", [])
+        items = _find_by_class_code(table, code, ClientError)
         if not items:
             return None
         item = items[0]
@@ -16,12 +16,18 @@ No AWS dependencies for local testing.
 import json
 import logging
 import hashlib
+import os
+import tempfile
+import time
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Literal, Optional, Tuple
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from enum import Enum
 
+from utils.structured_log import StructuredLog, get_structured_log
+
 logger = logging.getLogger("studaxis.conflict_resolution")
 
 
@@ -111,6 +117,49 @@ class ResolutionResult:
             self.resolution_timestamp = datetime.now(timezone.utc).isoformat()
 
 
+@dataclass
+class BulkReconciliationResult:
+    """Result of reconcile_bulk() over a set of entities."""
+    resolved: Dict[str, dict] = field(default_factory=dict)       # entity_id -> data to keep
+    conflicts: List[ConflictResult] = field(default_factory=list)
+    resolutions: Dict[str, ResolutionResult] = field(default_factory=dict)
+    pending: List[str] = field(default_factory=list)              # entity_ids needing user input
+    checked: int = 0
+    seconds: float = 0.0
+
+    def summary(self) -> dict:
+        return {
+            "checked": self.checked,
+            "conflicts": len(self.conflicts),
+            "auto_resolved": len(self.resolutions),
+            "pending": len(self.pending),
+            "seconds": round(self.seconds, 4),
+        }
+
+
+@lru_cache(maxsize=4096)
+def _parse_iso(ts_string: str) -> datetime:
+    """Memoized ISO 8601 parse (sync timestamps repeat across fields and entities)."""
+    return datetime.fromisoformat(ts_string.replace("Z", "+00:00"))
+
+
+_PRIMITIVES = (str, int, float, bool, type(None))
+
+
+def _field_digest(value):
+    """
+    Comparable stand-in for one JSON field value: primitives as-is, containers
+    as a 16-byte digest of their canonical JSON (computed once per entity side).
+    """
+    if isinstance(value, _PRIMITIVES):
+        return value
+    try:
+        canonical = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    except (TypeError, ValueError):
+        return ("obj", id(value))  # unhashable shape; caller falls back to ==
+    return ("sha", hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).digest())
+
+
 # ═══════════════════════════════════════════════════════════════════════
 # CONFIGURATION
 # ═══════════════════════════════════════════════════════════════════════
@@ -142,6 +191,9 @@ class ConflictConfig:
     ENABLE_CONFLICT_LOGGING = True       # Log all conflicts
     LOG_DATA_SNAPSHOTS = True            # Include full data in logs
     COMPRESS_SNAPSHOTS = True            # Compress JSON snapshots
+    LOG_MAX_BYTES = 1024 * 1024          # Rotate conflict_log.jsonl past 1 MB
+    LOG_MAX_AGE_DAYS = 30                # ... or once it is 30 days old
+    LOG_BACKUP_COUNT = 5                 # gzip'd backups kept
     
     # UI Behavior
     SHOW_CONFLICT_BADGE = True           # Show badge in header
@@ -359,7 +411,7 @@ class ConflictResolutionEngine:
     
     def _parse_timestamp(self, ts_string: str) -> datetime:
         """Parse ISO 8601 timestamp string."""
-        return datetime.fromisoformat(ts_string.replace("Z", "+00:00"))
+        return _parse_iso(ts_string)
     
     
     def _find_conflicting_fields(self, local_data: dict, cloud_data: dict) -> List[str]:
@@ -371,16 +423,7 @@ class ConflictResolutionEngine:
         conflicting = []
         
         # Fields to exclude from comparison
-        exclude_fields = [
-            self.config.UPDATED_AT_FIELD,
-            self.config.DATA_VERSION_FIELD,
-            self.config.DEVICE_ID_FIELD,
-            self.config.LAST_SYNC_TIMESTAMP_FIELD,
-            "sync_status",
-            "synced_at",
-            "retry_count",
-            "last_sync_attempt"
-        ]
+        exclude_fields = self._sync_metadata_fields()
         
         all_keys = set(local_data.keys()) | set(cloud_data.keys())
         
@@ -418,9 +461,16 @@ class ConflictResolutionEngine:
         Returns:
             ResolutionResult with strategy and resolved data
         """
+        return self._resolve(conflict, self._check_identical_edits(conflict.local_data, conflict.cloud_data))
+    
+    
+    def _resolve(self, conflict: ConflictResult, identical: bool, verbose: bool = True) -> ResolutionResult:
+        """resolve_conflict() with the identical-data check already done (bulk path logs quietly)."""
+        log = logger.info if verbose else logger.debug
+        
         # Step 1: Check for false conflicts (identical data)
-        if self._check_identical_edits(conflict.local_data, conflict.cloud_data):
-            logger.info(f"Conflict is false positive - data is identical")
+        if identical:
+            log("Conflict is false positive - data is identical")
             return ResolutionResult(
                 strategy=ResolutionStrategy.AUTO_IDENTICAL,
                 resolved_data=conflict.cloud_data,
@@ -431,7 +481,7 @@ class ConflictResolutionEngine:
         if self.config.ENABLE_TEACHER_AUTHORITY:
             try:
                 resolved = self._apply_authority_resolution(conflict)
-                logger.info(f"Conflict auto-resolved via authority rule")
+                log("Conflict auto-resolved via authority rule")
                 return ResolutionResult(
                     strategy=ResolutionStrategy.AUTO_AUTHORITY,
                     resolved_data=resolved,
@@ -448,7 +498,7 @@ class ConflictResolutionEngine:
                         conflict.local_data,
                         conflict.cloud_data
                     )
-                    logger.info(f"Conflict auto-resolved via field merge")
+                    log("Conflict auto-resolved via field merge")
                     return ResolutionResult(
                         strategy=ResolutionStrategy.AUTO_MERGE,
                         resolved_data=merged,
@@ -460,7 +510,7 @@ class ConflictResolutionEngine:
         # Step 4: Apply last-write-wins
         if self.config.ENABLE_LAST_WRITE_WINS:
             resolved = self._resolve_by_timestamp(conflict.local_data, conflict.cloud_data)
-            logger.info(f"Conflict auto-resolved via last-write-wins")
+            log("Conflict auto-resolved via last-write-wins")
             return ResolutionResult(
                 strategy=ResolutionStrategy.AUTO_TIMESTAMP,
                 resolved_data=resolved,
@@ -468,7 +518,7 @@ class ConflictResolutionEngine:
             )
         
         # Step 5: Manual resolution required
-        logger.warning(f"Conflict requires manual resolution")
+        (logger.warning if verbose else logger.debug)("Conflict requires manual resolution")
         return ResolutionResult(
             strategy=ResolutionStrategy.PENDING,
             resolved_data=None,
@@ -491,7 +541,14 @@ class ConflictResolutionEngine:
     
     def _normalize_for_comparison(self, data: dict) -> dict:
         """Remove sync metadata fields before comparison."""
-        exclude_fields = [
+        exclude_fields = self._sync_metadata_fields() | {"checksum"}
+        
+        return {k: v for k, v in data.items() if k not in exclude_fields}
+    
+    
+    def _sync_metadata_fields(self) -> set:
+        """Fields that never count as a content difference."""
+        return {
             self.config.UPDATED_AT_FIELD,
             self.config.DATA_VERSION_FIELD,
             self.config.DEVICE_ID_FIELD,
@@ -500,10 +557,7 @@ class ConflictResolutionEngine:
             "synced_at",
             "retry_count",
             "last_sync_attempt",
-            "checksum"
-        ]
-        
-        return {k: v for k, v in data.items() if k not in exclude_fields}
+        }
     
     
     def _apply_authority_resolution(self, conflict: ConflictResult) -> dict:
@@ -749,6 +803,145 @@ class ConflictResolutionEngine:
         return merged
     
     
+    # ═══════════════════════════════════════════════════════════════════════
+    # BULK RECONCILIATION
+    # ═══════════════════════════════════════════════════════════════════════
+    
+    def reconcile_bulk(
+        self,
+        local_entities: Dict[str, dict],
+        cloud_entities: Dict[str, dict],
+        entity_type: str = "UserStats",
+        auto_resolve: bool = True,
+        save_pending: bool = True,
+    ) -> BulkReconciliationResult:
+        """
+        Detect and resolve conflicts for whole entity sets in one pass.
+        
+        Same outcome per entity as detect_conflict() + resolve_conflict(), but:
+          - every timestamp string is parsed once for the whole batch
+          - conflicting fields come from per-field digests, computed once per
+            entity side and reused for the identical-data check
+          - pending conflicts are written in one atomic file replace
+        
+        Args:
+            local_entities: entity_id -> local data
+            cloud_entities: entity_id -> cloud data
+            entity_type: Type shared by every entity in the batch
+            auto_resolve: Run the auto-resolution strategies on conflicts
+            save_pending: Persist conflicts that need user input
+        
+        Returns:
+            BulkReconciliationResult. `resolved` holds the data to keep for
+            every entity that needs no user input (local data when there is
+            no conflict, cloud data for cloud-only entities).
+        """
+        started = time.perf_counter()
+        cfg = self.config
+        result = BulkReconciliationResult()
+        parsed: Dict[str, Optional[datetime]] = {}
+        
+        def ts(value) -> Optional[datetime]:
+            """Parsed timestamp, None if missing or malformed (both mean 'no evidence')."""
+            if not value:
+                return None
+            if value not in parsed:
+                try:
+                    parsed[value] = self._parse_timestamp(value)
+                except Exception:
+                    parsed[value] = None
+            return parsed[value]
+        
+        entity_ids = list(local_entities)
+        entity_ids += [eid for eid in cloud_entities if eid not in local_entities]
+        for entity_id in entity_ids:
+            local_data = local_entities.get(entity_id)
+            cloud_data = cloud_entities.get(entity_id)
+            result.checked += 1
+            if not local_data or not cloud_data:
+                result.resolved[entity_id] = local_data or cloud_data
+                continue
+            
+            local_version = local_data.get(cfg.DATA_VERSION_FIELD, 0)
+            cloud_version = cloud_data.get(cfg.DATA_VERSION_FIELD, 0)
+            local_updated = local_data.get(cfg.UPDATED_AT_FIELD)
+            cloud_updated = cloud_data.get(cfg.UPDATED_AT_FIELD)
+            local_ts, cloud_ts = ts(local_updated), ts(cloud_updated)
+            
+            reason = None
+            if local_version != cloud_version:
+                sync_ts = ts(local_data.get(cfg.LAST_SYNC_TIMESTAMP_FIELD))
+                if local_ts and cloud_ts and sync_ts and local_ts > sync_ts and cloud_ts > sync_ts:
+                    reason = ConflictReason.CONCURRENT_EDITS
+            if reason is None and local_ts and cloud_ts:
+                if abs((local_ts - cloud_ts).total_seconds()) > cfg.TIMESTAMP_TOLERANCE_SECONDS:
+                    reason = ConflictReason.TIMESTAMP_DIVERGENCE
+            if reason is None:
+                result.resolved[entity_id] = local_data
+                continue
+            
+            conflicting, identical = self._diff_fields(local_data, cloud_data)
+            conflict = ConflictResult(
+                conflict_detected=True,
+                entity_id=entity_id,
+                entity_type=entity_type,
+                reason=reason,
+                local_version=local_version,
+                cloud_version=cloud_version,
+                local_updated_at=local_updated or "",
+                cloud_updated_at=cloud_updated or "",
+                local_data=local_data,
+                cloud_data=cloud_data,
+                conflicting_fields=conflicting,
+            )
+            result.conflicts.append(conflict)
+            self.log_conflict_event(conflict)
+            
+            if not auto_resolve:
+                result.pending.append(entity_id)
+                continue
+            resolution = self._resolve(conflict, identical, verbose=False)
+            if resolution.strategy == ResolutionStrategy.PENDING:
+                result.pending.append(entity_id)
+                continue
+            result.resolutions[entity_id] = resolution
+            result.resolved[entity_id] = resolution.resolved_data
+            self.log_conflict_resolution(conflict, resolution.strategy, "system", resolution.resolved_data)
+        
+        if save_pending and result.pending:
+            pending_ids = set(result.pending)
+            self.save_pending_conflicts([c for c in result.conflicts if c.entity_id in pending_ids])
+        
+        result.seconds = time.perf_counter() - started
+        logger.info(f"Bulk reconciliation ({entity_type}): {result.summary()}")
+        return result
+    
+    
+    def _diff_fields(self, local_data: dict, cloud_data: dict) -> Tuple[List[str], bool]:
+        """
+        (conflicting fields, identical) via per-field digests.
+        
+        Matches _find_conflicting_fields (a missing field equals None) and
+        _check_identical_edits (key sets must match, checksum ignored).
+        Digest mismatches are confirmed with == so 1 vs 1.0 stays equal.
+        """
+        exclude = self._sync_metadata_fields()
+        local_digests = {k: _field_digest(v) for k, v in local_data.items() if k not in exclude}
+        cloud_digests = {k: _field_digest(v) for k, v in cloud_data.items() if k not in exclude}
+        
+        conflicting = []
+        for key in local_digests.keys() | cloud_digests.keys():
+            if local_digests.get(key) == cloud_digests.get(key):
+                continue
+            if local_data.get(key) != cloud_data.get(key):
+                conflicting.append(key)
+        conflicting.sort()
+        
+        content_keys = (local_digests.keys() ^ cloud_digests.keys()) - {"checksum"}
+        identical = not content_keys and all(f == "checksum" for f in conflicting)
+        return conflicting, identical
+    
+    
     # ═══════════════════════════════════════════════════════════════════════
     # MANUAL RESOLUTION SUPPORT
     # ═══════════════════════════════════════════════════════════════════════
@@ -778,6 +971,36 @@ class ConflictResolutionEngine:
         logger.info(f"Saved pending conflict for {conflict.entity_type}:{conflict.entity_id}")
     
     
+    def save_pending_conflicts(self, conflicts: List[ConflictResult]):
+        """
+        Save many conflicts with one read and one atomic write of
+        pending_conflicts.json (replacing any pending entry per entity).
+        """
+        if not conflicts:
+            return
+        incoming = {}
+        for conflict in conflicts:
+            conflict_dict = asdict(conflict)
+            conflict_dict["reason"] = conflict.reason.value
+            incoming[conflict.entity_id] = conflict_dict
+        
+        kept = [c for c in self._load_pending_conflicts() if c.get("entity_id") not in incoming]
+        self._save_pending_conflicts(kept + list(incoming.values()))
+        
+        logger.info(f"Saved {len(incoming)} pending conflicts")
+    
+    
+    def remove_pending_conflicts(self, entity_ids: List[str]):
+        """Remove many resolved conflicts with a single rewrite."""
+        drop = set(entity_ids)
+        conflicts = self._load_pending_conflicts()
+        remaining = [c for c in conflicts if c.get("entity_id") not in drop]
+        if len(remaining) != len(conflicts):
+            self._save_pending_conflicts(remaining)
+        
+        logger.info(f"Removed {len(conflicts) - len(remaining)} pending conflicts")
+    
+    
     def get_pending_conflicts(self) -> List[dict]:
         """
         Get all pending conflicts requiring user resolution.
@@ -948,20 +1171,9 @@ class ConflictResolutionEngine:
         Returns:
             List of conflict log entries
         """
-        if not self.conflict_log_path.exists():
-            return []
-        
-        entries = []
-        
         try:
-            with open(self.conflict_log_path, "r") as f:
-                for line in f:
-                    if line.strip():
-                        entries.append(json.loads(line))
-            
-            # Return most recent entries
-            return entries[-limit:] if len(entries) > limit else entries
-        
+            # Seeks from the end of the file; older rows live in rotated backups
+            return self._conflict_log().tail(limit)
         except Exception as e:
             logger.error(f"Error reading conflict log: {e}")
             return []
@@ -1034,28 +1246,42 @@ class ConflictResolutionEngine:
     
     
     def _save_pending_conflicts(self, conflicts: List[dict]):
-        """Save pending conflicts to file."""
+        """Save pending conflicts to file (temp file + rename, so readers never see a partial write)."""
+        tmp = None
         try:
-            with open(self.conflicts_path, "w") as f:
+            fd, tmp = tempfile.mkstemp(dir=self.conflicts_path.parent, prefix=".pending_conflicts.", suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
                 json.dump(conflicts, f, indent=2)
+            os.replace(tmp, self.conflicts_path)
         except Exception as e:
             logger.error(f"Error saving pending conflicts: {e}")
+            if tmp and os.path.exists(tmp):
+                os.unlink(tmp)
     
     
     def _append_to_conflict_log(self, entry: dict):
         """
-        Append entry to conflict log (JSON Lines format).
+        Queue entry for the conflict log (JSON Lines, written by the background log writer).
         
         Args:
             entry: Log entry dictionary
         """
         try:
-            with open(self.conflict_log_path, "a") as f:
-                f.write(json.dumps(entry) + "\n")
+            self._conflict_log().append(entry)
         except Exception as e:
             logger.error(f"Error appending to conflict log: {e}")
     
     
+    def _conflict_log(self) -> StructuredLog:
+        """Shared rotating writer for this engine's conflict_log.jsonl."""
+        return get_structured_log(
+            self.conflict_log_path,
+            max_bytes=self.config.LOG_MAX_BYTES,
+            max_age_seconds=self.config.LOG_MAX_AGE_DAYS * 86400,
+            backup_count=self.config.LOG_BACKUP_COUNT,
+        )
+    
+    
     def _compress_data(self, data: dict) -> str:
         """
         Compress data for logging (if compression enabled).
@@ -1270,6 +1496,23 @@ class ConflictAwareOrchestrator:
             return (True, resolution.resolved_data)
     
     
+    def reconcile_bulk(
+        self,
+        local_entities: Dict[str, dict],
+        cloud_entities: Dict[str, dict],
+        entity_type: str = "UserStats",
+    ) -> BulkReconciliationResult:
+        """
+        Bulk counterpart of detect_and_resolve_conflict(): auto-resolves what
+        it can, saves the rest as pending in one write, and moves to CONFLICT
+        when anything needs the user.
+        """
+        result = self.conflict_engine.reconcile_bulk(local_entities, cloud_entities, entity_type)
+        if result.pending:
+            self.transition_to("CONFLICT")
+        return result
+    
+    
     # Delegate common methods to base orchestrator
     
     def enqueue_change(self, change_type: str, payload: Dict, priority: str = "normal") -> bool:
@@ -1428,6 +1671,7 @@ __all__ = [
     "ConflictAwareOrchestrator",
     "ConflictResult",
     "ResolutionResult",
+    "BulkReconciliationResult",
     "ConflictReason",
     "ResolutionStrategy",
     "ConflictConfig",
@@ -0,0 +1,178 @@
+"""
+Studaxis — Connectivity Monitor
+════════════════════════════════
+Shared, cached view of whether the AppSync endpoint is reachable.
+
+A daemon thread probes in the background (a TCP connect to the endpoint's
+host, no TLS handshake or GraphQL request):
+  - while online, every ONLINE_TTL seconds
+  - while offline, with exponential backoff (BACKOFF_BASE · 2^n, jittered,
+    capped at BACKOFF_MAX)
+
+Readers (SyncManager, SyncOrchestrator, /api/sync/status, diagnostics) get
+the cached state instantly. Real sync requests feed results back through
+report_success() / report_failure(), so a failed mutation flips the state
+without waiting for the next probe.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from typing import Callable, Dict, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger("studaxis.connectivity")
+
+
+class ConnectivityMonitor:
+    """Background reachability probe with TTL cache and offline backoff."""
+
+    ONLINE_TTL = 60.0         # seconds between probes while online
+    BACKOFF_BASE = 5.0        # first retry delay while offline
+    BACKOFF_MAX = 300.0       # cap (5 minutes)
+    JITTER_FACTOR = 0.1       # ±10%
+    PROBE_TIMEOUT = 3.0       # seconds
+
+    def __init__(self, endpoint: str, probe: Optional[Callable[[], bool]] = None):
+        self.endpoint = endpoint or ""
+        self._probe_fn = probe or self._tcp_probe
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._online = False
+        self._checked_at: Optional[float] = None  # monotonic
+        self._failures = 0
+        self._next_check = 0.0  # monotonic
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.endpoint) and "your-appsync" not in self.endpoint
+
+    # ── readers ──────────────────────────────────────────────────────
+
+    def is_online(self, wait: bool = False) -> bool:
+        """
+        Cached reachability. Never blocks unless `wait` is set and no probe has
+        completed yet; a stale cache wakes the background thread instead.
+        """
+        if not self.configured:
+            return False
+        self.start()
+        with self._lock:
+            checked = self._checked_at is not None
+            stale = checked and time.monotonic() >= self._next_check
+        if not checked and wait:
+            return self.check_now()
+        if stale or not checked:
+            self._wake.set()
+        with self._lock:
+            return self._online
+
+    def status(self) -> Dict:
+        """Snapshot for status endpoints (ages in seconds)."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "configured": self.configured,
+                "online": self._online if self.configured else False,
+                "checked_seconds_ago": round(now - self._checked_at, 1) if self._checked_at is not None else None,
+                "next_check_in": round(max(0.0, self._next_check - now), 1) if self._checked_at is not None else None,
+                "consecutive_failures": self._failures,
+            }
+
+    # ── writers ──────────────────────────────────────────────────────
+
+    def check_now(self) -> bool:
+        """Probe synchronously and update the cache."""
+        if not self.configured:
+            return False
+        try:
+            ok = bool(self._probe_fn())
+        except Exception as e:
+            logger.debug("Connectivity probe error: %s", e)
+            ok = False
+        self._record(ok)
+        return ok
+
+    def report_success(self) -> None:
+        """A real request reached the endpoint."""
+        self._record(True)
+
+    def report_failure(self) -> None:
+        """A real request failed with a connection error or timeout."""
+        self._record(False)
+
+    def _record(self, ok: bool) -> None:
+        now = time.monotonic()
+        with self._lock:
+            was_online = self._online
+            self._online = ok
+            self._checked_at = now
+            if ok:
+                self._failures = 0
+                delay = self.ONLINE_TTL
+            else:
+                self._failures += 1
+                delay = min(self.BACKOFF_MAX, self.BACKOFF_BASE * (2 ** (self._failures - 1)))
+                delay *= 1 + random.uniform(-self.JITTER_FACTOR, self.JITTER_FACTOR)
+            self._next_check = now + delay
+        self._wake.set()  # let the loop pick up the new schedule
+        if ok != was_online:
+            logger.info("Connectivity %s", "restored" if ok else "lost")
+
+    # ── background loop ──────────────────────────────────────────────
+
+    def start(self) -> None:
+        if not self.configured or (self._thread is not None and self._thread.is_alive()):
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="studaxis-connectivity", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            with self._lock:
+                due = self._checked_at is None or time.monotonic() >= self._next_check
+                wait_for = max(0.0, self._next_check - time.monotonic())
+            if due:
+                self.check_now()
+                continue
+            self._wake.wait(timeout=wait_for)
+            self._wake.clear()
+
+    def _tcp_probe(self) -> bool:
+        parsed = urlparse(self.endpoint)
+        host = parsed.hostname
+        if not host:
+            return False
+        port = parsed.port or (443 if parsed.scheme != "http" else 80)
+        with socket.create_connection((host, port), timeout=self.PROBE_TIMEOUT):
+            return True
+
+
+_monitors: Dict[str, ConnectivityMonitor] = {}
+_monitors_lock = threading.Lock()
+
+
+def get_connectivity_monitor(endpoint: Optional[str] = None) -> ConnectivityMonitor:
+    """Process-wide monitor per endpoint (defaults to APPSYNC_ENDPOINT)."""
+    endpoint = endpoint if endpoint is not None else os.getenv("APPSYNC_ENDPOINT", "")
+    with _monitors_lock:
+        monitor = _monitors.get(endpoint)
+        if monitor is None:
+            monitor = ConnectivityMonitor(endpoint)
+            _monitors[endpoint] = monitor
+        return monitor
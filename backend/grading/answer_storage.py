@@ -1,6 +1,7 @@
-import json
 from pathlib import Path
 
+from user_stats_store import UserStatsStore
+
 _BACKEND_DIR = Path(__file__).resolve().parent.parent
 _DATA_DIR = _BACKEND_DIR / "data"
 
@@ -11,16 +12,11 @@ class AnswerStorage:
         self._user_id = user_id
         self._file = _DATA_DIR / "users" / user_id / "user_stats.json"
         self._file.parent.mkdir(parents=True, exist_ok=True)
+        self._store = UserStatsStore(self._file.parent)
 
-        if self._file.exists():
-            with open(self._file, encoding="utf-8") as f:
-                self.data = json.load(f)
-        else:
-            self.data = {}
+        self.data = self._store.load(("grading_results",)) or {}
 
     def store(self, user_id, result):
-        grading_results = self.data.setdefault("grading_results", [])
-        grading_results.append(result)
-
-        with open(self._file, "w", encoding="utf-8") as f:
-            json.dump(self.data, f, indent=2)
\ No newline at end of file
+        # Appended to stats/grading_results.jsonl; the hot user_stats.json is not rewritten
+        self.data.setdefault("grading_results", []).append(result)
+        self._store.append_history("grading_results", [result])
\ No newline at end of file
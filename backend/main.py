@@ -16,19 +16,22 @@ Or: python main.py  (root main.py mounts SPA and runs uvicorn)
 
 from __future__ import annotations
 
+import time
+
+_IMPORT_STARTED = time.perf_counter()  # startup log reports time from here to serving
+
 import json
 import logging
 import os
 import re
-import time
 import uuid
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Annotated, Any, Optional
+from typing import Annotated, Any, Iterable, Optional
 
-from fastapi import Body, Depends, FastAPI, File, Form, HTTPException, UploadFile
+from fastapi import Body, Depends, FastAPI, File, Form, HTTPException, Query, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field
 
@@ -46,23 +49,21 @@ try:
 except ImportError:
     pass
 
+# Only what route signatures and hot paths need is imported here. Ollama/hardware
+# bootstrapping (psutil, subprocess) lives in startup_bootstrap and runs in the
+# background; per-feature modules are imported inside their endpoints.
+# Profile with: python backend/benchmarks/profile_startup.py
 from ai_integration_layer import AIEngine, AIState, AITaskType
-from model_config import get_best_model, get_config_path_for_log
-from hardware_validator import ensure_ollama_serve, ensure_ollama_model
-from grading.grader import Grader
-from grading.red_pen_feedback import RedPenFeedback
+from model_config import get_best_model
 from auth_routes import router as auth_router
 from database import User, init_db
 from dependencies import get_current_user, get_user_id
 from profile_store import UserProfile, load_profile, save_profile, load_profile_for_user, save_profile_for_user
-from recommendation_service import (
-    _has_flashcard_topic,
-    _has_quiz_data,
-    _get_quiz_profile,
-    build_flashcard_based_prompt,
-    build_quiz_only_prompt,
-    parse_ai_response,
-)
+from quiz_history_store import QuizHistoryStore, get_quiz_history_store
+from chat_session_store import ChatSessionStore, get_chat_session_store
+from notification_store import NotificationStore, get_notification_store
+from class_store import ClassStore, get_class_store
+from startup_bootstrap import get_ollama_bootstrap
 from stats_algorithms import (
     ensure_flashcard_structure,
     ensure_streak_structure,
@@ -71,6 +72,8 @@ from stats_algorithms import (
     update_quiz_stats as _update_quiz_stats,
     update_streak as _update_streak,
 )
+from user_stats_cache import get_user_stats_cache
+from user_stats_store import ALL_SECTIONS, UserStatsStore
 
 # ---------------------------------------------------------------------------
 # Base path for AI engine and data (user_stats, profile, etc.)
@@ -194,93 +197,31 @@ def _save_flashcard_decks(decks: list[dict[str, Any]], user_id: str, class_id: s
         pass
 
 
-def _enqueue_sync(base_path: Path, user_id: str, sync_type: str, payload: dict[str, Any]) -> None:
-    """Add item to sync queue for AWS when online."""
+def _enqueue_sync(base_path: Path, sync_type: str, payload: dict[str, Any]) -> None:
+    """Add item to sync queue for AWS when online (one append to the shared queue log)."""
+    if sync_type not in ("flashcard_review", "quiz_result", "flashcard_create", "assignment_complete"):
+        return
     try:
-        from sync_manager import SyncManager
-        sm = SyncManager(base_path=str(base_path), user_id=user_id)
-        if sync_type == "flashcard_review":
-            sm._enqueue_generic("flashcard_review", payload)
-        elif sync_type == "quiz_result":
-            sm._enqueue_generic("quiz_result", payload)
-        elif sync_type == "flashcard_create":
-            sm._enqueue_generic("flashcard_create", payload)
-        elif sync_type == "assignment_complete":
-            sm._enqueue_generic("assignment_complete", payload)
+        from sync_manager import enqueue_generic
+        enqueue_generic(str(base_path), sync_type, payload)
     except Exception:
         pass
 
 
-def _chat_history_file(user_id: str) -> Path:
-    """Return path to per-user chat_history.json."""
-    return _user_dir(user_id) / "chat_history.json"
-
-
-def _notifications_file(user_id: str) -> Path:
-    """Return path to per-user notifications.json."""
-    d = DATA_DIR / "notifications"
-    d.mkdir(parents=True, exist_ok=True)
-    return d / f"{user_id}.json"
-
-
-def _assignments_dir() -> Path:
-    d = DATA_DIR / "assignments"
-    d.mkdir(parents=True, exist_ok=True)
-    return d
-
-
-def _assignments_file(class_code: str) -> Path:
-    safe = re.sub(r"[^a-zA-Z0-9_-]", "_", class_code or "default")[:64]
-    return _assignments_dir() / f"{safe}.json"
-
-
-def _load_assignments(class_code: str) -> list[dict[str, Any]]:
-    try:
-        path = _assignments_file(class_code)
-        if path.is_file():
-            data = json.loads(path.read_text(encoding="utf-8"))
-            return data if isinstance(data, list) else []
-    except (OSError, json.JSONDecodeError):
-        pass
-    return []
-
-
-def _save_assignments(class_code: str, items: list[dict[str, Any]]) -> None:
-    try:
-        _assignments_file(class_code).write_text(
-            json.dumps(items, indent=2, ensure_ascii=False),
-            encoding="utf-8",
-        )
-    except OSError:
-        pass
+def _chat_sessions(user_id: str) -> ChatSessionStore:
+    """Saved chat sessions for user (data/users/{user_id}/chat_sessions/; imports chat_history.json once)."""
+    user_dir = _user_dir(user_id)
+    return get_chat_session_store(user_dir / "chat_sessions", legacy_path=user_dir / "chat_history.json")
 
 
-def _load_notifications(user_id: str) -> list[dict[str, Any]]:
-    """Load notifications from JSON file; return [] on missing/error."""
-    try:
-        f = _notifications_file(user_id)
-        if f.exists():
-            raw = f.read_text(encoding="utf-8")
-            data = json.loads(raw)
-            if isinstance(data, list):
-                return data
-            if isinstance(data, dict) and "notifications" in data:
-                return data["notifications"]
-    except (OSError, json.JSONDecodeError):
-        pass
-    return []
+def _notifications() -> NotificationStore:
+    """Notification store (data/notifications/notifications.db; imports legacy {user_id}.json per inbox)."""
+    return get_notification_store(DATA_DIR / "notifications")
 
 
-def _save_notifications(notifications: list[dict[str, Any]], user_id: str) -> None:
-    """Persist notifications to JSON file."""
-    try:
-        f = _notifications_file(user_id)
-        f.write_text(
-            json.dumps(notifications, indent=2, ensure_ascii=False),
-            encoding="utf-8",
-        )
-    except OSError:
-        pass
+def _classes() -> ClassStore:
+    """Local teachers/assignments/completions (data/classes/classes.db; imports data/teachers, data/assignments)."""
+    return get_class_store(DATA_DIR / "classes", legacy_dir=DATA_DIR)
 
 
 app = FastAPI(
@@ -295,18 +236,33 @@ app.include_router(auth_router)
 
 @app.on_event("startup")
 def _startup():
-    """Ensure auth DB tables exist on startup. Select hardware-aware model. Ensure Ollama is running and model is pulled."""
+    """
+    Ensure auth DB tables exist, then return so the port is bound right away.
+    Model selection and Ollama serve/pull run in the background (startup_bootstrap);
+    progress is reported by /api/ready.
+    """
     logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(name)s] %(levelname)s: %(message)s")
     init_db()
-    model = get_best_model()
-    logger.info("Studaxis started; hardware-aware model selected: %s (config: %s)", model, get_config_path_for_log())
-    if ensure_ollama_serve():
-        if ensure_ollama_model(model):
-            logger.info("Ollama ready; model %s available.", model)
-        else:
-            logger.warning("Ollama running but model %s could not be pulled. Run manually: ollama pull %s", model, model)
-    else:
-        logger.warning("Ollama not reachable. Install from https://ollama.com and ensure 'ollama serve' is running.")
+    try:
+        from connectivity_monitor import get_connectivity_monitor
+        get_connectivity_monitor().start()  # warm the cached online/offline state
+    except Exception:
+        pass
+    get_ollama_bootstrap().start()
+    logger.info(
+        "Studaxis API serving %.2fs after import began; Ollama bootstrap running in background",
+        time.perf_counter() - _IMPORT_STARTED,
+    )
+
+
+@app.on_event("shutdown")
+def _shutdown():
+    """Write user_stats still waiting in the write-back cache; stop ingestion workers and HTTP pools."""
+    get_user_stats_cache().flush()
+    from utils.ingest import shutdown_pool
+    from utils.web_text import close_all
+    shutdown_pool()
+    close_all()
 
 
 # CORS: allow local React (Vite 5173), same-origin (8000 default, 6782, 6783)
@@ -372,37 +328,31 @@ _DEFAULT_STATS: dict[str, Any] = {
 }
 
 
-def _load_user_stats(user_id: str) -> dict[str, Any]:
-    """Load user_stats.json for given user; return defaults on missing/error."""
-    try:
-        f = _stats_file(user_id)
-        if f.exists():
-            raw = f.read_text(encoding="utf-8")
-            data = json.loads(raw)
-            if isinstance(data, dict):
-                return data
-    except (OSError, json.JSONDecodeError):
-        pass
-    result = dict(_DEFAULT_STATS)
-    prefs = result.get("preferences") or {}
-    if not isinstance(prefs, dict):
-        prefs = {}
-    for key, default in _DEFAULT_STATS["preferences"].items():
-        prefs.setdefault(key, default)
-    result["preferences"] = prefs
-    return result
+def _user_stats_store(user_id: str) -> UserStatsStore:
+    """Hot summary (user_stats.json) + cold sections (stats/) for the given user."""
+    return UserStatsStore(_user_dir(user_id))
 
 
+def _load_user_stats(user_id: str, sections: Iterable[str] = ()) -> dict[str, Any]:
+    """
+    Load the user's stats (cached; returns a private copy); defaults on missing/error.
+    Only the hot summary unless cold sections are named (chat_history,
+    flashcard_stats.cards, quiz_stats.by_topic, grading_results; ALL_SECTIONS).
+    """
+    return _user_stats_store(user_id).load(sections, default=_DEFAULT_STATS)
+
+
+def _save_user_stats(stats: dict[str, Any], user_id: str, replace: bool = False) -> None:
+    """
+    Persist user stats. Cold sections present in stats are updated, absent ones
+    are kept (cleared with replace=True). Written back after a short delay.
+    """
+    _user_stats_store(user_id).save(stats, replace=replace)
 
-def _save_user_stats(stats: dict[str, Any], user_id: str) -> None:
-    """Persist user stats to per-user directory (atomic write)."""
-    try:
-        f = _stats_file(user_id)
-        tmp = f.with_suffix(".tmp")
-        tmp.write_text(json.dumps(stats, indent=2, ensure_ascii=False), encoding="utf-8")
-        tmp.replace(f)
-    except OSError:
-        pass
+
+def _user_stats_lock(user_id: str):
+    """Per-user lock; hold it from _load_user_stats to _save_user_stats so concurrent updates are not lost."""
+    return _user_stats_store(user_id).lock()
 
 
 # ---------------------------------------------------------------------------
@@ -429,6 +379,7 @@ class FlashcardItem(BaseModel):
 class FlashcardGenerateResponse(BaseModel):
     cards: list[FlashcardItem]
     topic: str
+    ingest: Optional[list[dict[str, Any]]] = None  # per-file timings for uploads
 
 
 class FlashcardExplainRequest(BaseModel):
@@ -800,15 +751,37 @@ def _normalize_quiz_items(raw: list[Any], subject: str) -> list[dict[str, Any]]:
 
 @app.get("/api/health")
 def health():
-    """Liveness/readiness; includes Ollama availability when possible."""
-    payload: dict[str, Any] = {"status": "ok", "service": "studaxis-api"}
-    try:
-        engine = get_ai_engine()
-        # Lightweight check: we don't call Ollama here to avoid latency; optional future: ping Ollama
-        payload["ollama_available"] = getattr(engine, "config", None) is not None
-    except Exception:
-        payload["ollama_available"] = False
-    return payload
+    """Liveness; answers as soon as the port is bound. Ollama availability comes from the startup bootstrap."""
+    bootstrap = get_ollama_bootstrap().status()
+    return {
+        "status": "ok",
+        "service": "studaxis-api",
+        "ollama_available": bootstrap["ai_ready"],
+        "startup": bootstrap["state"],
+    }
+
+
+@app.get("/api/ready")
+def ready():
+    """
+    Readiness of the local AI: 503 while the Ollama bootstrap is still running,
+    200 once it has finished ("ready", or "degraded" when Ollama is unavailable).
+    A degraded bootstrap is retried in the background when polled.
+    """
+    bootstrap = get_ollama_bootstrap()
+    bootstrap.start(retry=True)
+    status = bootstrap.status()
+    return JSONResponse(status, status_code=503 if status["state"] in ("starting", "not_started") else 200)
+
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+def metrics():
+    """AI request latency/throughput histograms in Prometheus text format."""
+    from ai_telemetry import get_telemetry
+    return PlainTextResponse(
+        get_telemetry().render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
 
 
 @app.get("/api/ollama/ping")
@@ -996,8 +969,12 @@ def _get_storage_files(user_id: str) -> list[dict[str, Any]]:
                 cards = _load_flashcards(user_id)
                 extra = f" — {len(cards)} cards" if cards else ""
             elif name == "user_stats.json":
-                stats = _load_user_stats(user_id)
-                chat_len = len(stats.get("chat_history") or [])
+                # cold sections (chat history, per-card and per-topic stats) live in stats/
+                try:
+                    size += sum(p.stat().st_size for p in (user_dir / "stats").glob("*") if p.is_file())
+                except OSError:
+                    pass
+                chat_len = len(_user_stats_store(user_id).history("chat_history"))
                 if chat_len:
                     extra = f" — {chat_len} chat messages"
             files.append({
@@ -1027,11 +1004,16 @@ def _get_storage_files(user_id: str) -> list[dict[str, Any]]:
                 "description": desc,
             })
         elif name == "sync_queue.json":
+            queue_dir = DATA_DIR / "sync_queue"
+            try:
+                size = sum(p.stat().st_size for p in queue_dir.iterdir() if p.is_file()) if queue_dir.is_dir() else 0
+            except OSError:
+                size = 0
             files.append({
-                "name": name,
-                "size_bytes": 0,
-                "size_human": "0 B",
-                "description": desc + " — not created yet",
+                "name": "sync_queue/" if size else name,
+                "size_bytes": size,
+                "size_human": _format_size(size),
+                "description": desc + ("" if size else " — not created yet"),
             })
 
     backups = DATA_DIR / "backups"
@@ -1092,6 +1074,30 @@ def textbooks_list():
     return {"textbooks": _list_textbooks()}
 
 
+@app.get("/api/textbooks/{textbook_id}/structure")
+def textbooks_structure(textbook_id: str):
+    """Chapters and sections detected for a textbook (built on first request if not indexed)."""
+    path = SAMPLE_TEXTBOOKS_DIR / textbook_id
+    if not path.is_file() or path.parent != SAMPLE_TEXTBOOKS_DIR:
+        raise HTTPException(status_code=404, detail=f"Textbook '{textbook_id}' not found")
+    structure = _textbook_structure(path)
+    if structure is None:
+        return {"textbook_id": textbook_id, "method": "none", "chapters": []}
+    chapters = []
+    for ch in structure.chapters():
+        chapters.append({
+            "id": ch.id,
+            "title": ch.title,
+            "pages": [ch.page_start + 1, ch.page_end],
+            "sections": [
+                {"id": s.id, "title": s.title, "pages": [s.page_start + 1, s.page_end]}
+                for s in structure.sections
+                if s.level == 2 and s.chapter_id == ch.id
+            ],
+        })
+    return {"textbook_id": textbook_id, "method": structure.method, "chapters": chapters}
+
+
 @app.post("/api/textbooks/upload")
 def textbooks_upload(file: UploadFile = File(...)):
     """Multipart file upload; save PDF or PPTX to sample_textbooks (shared with Flashcards and AI Chat)."""
@@ -1126,36 +1132,126 @@ def textbooks_upload(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=f"Upload failed: {e}")
 
 
-def _extract_text_from_pdf(path: Path) -> str:
-    """Extract text from PDF using PyPDF2 or PyPDFLoader."""
-    try:
-        from PyPDF2 import PdfReader
-        reader = PdfReader(str(path))
-        return "\n".join(p.extract_text() or "" for p in reader.pages)
-    except ImportError:
-        try:
-            from langchain_community.document_loaders import PyPDFLoader
-            docs = PyPDFLoader(str(path)).load()
-            return "\n".join(d.page_content for d in docs)
-        except ImportError:
-            raise HTTPException(status_code=501, detail="Install PyPDF2 or langchain-community for PDF extraction")
+def _text_cache():
+    from utils.text_cache import get_text_cache
+    return get_text_cache(DATA_DIR / "cache" / "extracted_text")
+
+
+def _url_text(url: str, timeout: float = 20.0) -> str:
+    """Article text at url via the pooled client and per-URL cache (raises utils.web_text.FetchError)."""
+    from utils.web_text import get_web_text_fetcher
+    return get_web_text_fetcher(DATA_DIR / "cache" / "url_text").fetch_text(url, timeout=timeout).text
+
+
+def _extract_text_from_pdf(path: Path, max_chars: Optional[int] = None) -> str:
+    """Extract text from PDF via the page-level cache (PyPDF2, else PyPDFLoader)."""
+    return _extract_text_from_file(path, max_chars=max_chars)
+
 
+def _extract_text_from_file(path: Path, max_chars: Optional[int] = None) -> str:
+    """Extract text from txt, pdf, or ppt/pptx.
 
-def _extract_text_from_file(path: Path) -> str:
-    """Extract text from txt, pdf, or ppt/pptx."""
+    PDF/PPTX pages are cached by file hash, and extraction stops once max_chars
+    are collected, so repeated textbook requests only read the pages they use.
+    """
     suf = path.suffix.lower()
     if suf == ".txt":
-        return path.read_text(encoding="utf-8", errors="replace")
-    if suf == ".pdf":
-        return _extract_text_from_pdf(path)
-    if suf in (".ppt", ".pptx"):
+        text = path.read_text(encoding="utf-8", errors="replace")
+        return text[:max_chars] if max_chars is not None else text
+    if suf not in (".pdf", ".ppt", ".pptx"):
+        return ""
+    from utils.text_cache import ExtractionUnavailable
+    try:
+        return _text_cache().read_text(path, max_chars=max_chars)
+    except ExtractionUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+
+
+_SOURCE_CHARS = 12000  # what the generators send to the model
+_SOURCE_CHARS_PER_ITEM = 1200
+
+
+def _ingest_uploads(uploads: list[UploadFile], items: int) -> tuple[str, list[dict[str, Any]]]:
+    """
+    Spool, extract (process pool) and combine uploads for `items` cards/questions.
+    Returns (combined text, per-file timings); 422 if a file fails or nothing is extractable.
+    """
+    from utils.ingest import cleanup, combine, extract_texts, spool_uploads
+
+    budget = min(_SOURCE_CHARS, max(4000, items * _SOURCE_CHARS_PER_ITEM))
+    t0 = time.perf_counter()
+    files = spool_uploads(uploads, DATA_DIR / "tmp_upload")
+    try:
+        extract_texts(files, budget, DATA_DIR / "cache" / "extracted_text")
+    finally:
+        cleanup(files)
+    timings = [f.timing() for f in files]
+    logger.info(
+        "Ingested %d file(s) in %.0f ms: %s",
+        len(files), (time.perf_counter() - t0) * 1000,
+        ", ".join(f"{t['file']} {t['extract_ms']:.0f} ms/{t['chars']} chars" for t in timings),
+    )
+    failed = next((f for f in files if f.error and not f.unavailable), None)
+    if failed is not None:
+        raise HTTPException(status_code=422, detail=f"Failed to process {failed.filename}: {failed.error}")
+    combined = combine(files, budget)
+    if not combined.strip():
+        msg = "No extractable text from files"
+        skipped = [f.filename for f in files if f.unavailable]
+        if skipped:
+            msg += f"; no extractor installed for: {', '.join(skipped)}"
+        raise HTTPException(status_code=422, detail=msg)
+    return combined, timings
+
+
+def _textbook_structure(path: Path):
+    """Chapter/section index for a textbook, or None if it cannot be built."""
+    import logging
+    from rag.structure_index import load_or_build
+    try:
+        return load_or_build(path, DATA_DIR)
+    except Exception as e:
+        logging.getLogger("studaxis.textbooks").warning("Structure index unavailable for %s: %s", path.name, e)
+        return None
+
+
+def _get_chapter_content(path: Path, chapter: str, max_tokens: Optional[int] = None) -> str:
+    """
+    Text of one chapter/section, in reading order, for chapter-scoped generation.
+    Resolves `chapter` against the structure index, then fetches exactly that
+    section's chunks from ChromaDB with a metadata filter; if the book is not
+    embedded yet, reads only the section's pages from the text cache.
+    Returns empty string when the chapter cannot be resolved.
+    """
+    from rag.context_packer import GENERATION_RESERVE_TOKENS, MODEL_CONTEXT_TOKENS, clip_to_tokens, pack_context
+    from rag.structure_index import metadata_filter
+
+    structure = _textbook_structure(path)
+    section = structure.find(chapter) if structure is not None else None
+    if section is None:
+        return ""
+    if max_tokens is None:
+        max_tokens = MODEL_CONTEXT_TOKENS - GENERATION_RESERVE_TOKENS
+
+    store = _get_rag_vector_store()
+    if store is not None:
         try:
-            from langchain_community.document_loaders import UnstructuredPowerPointLoader
-            docs = UnstructuredPowerPointLoader(str(path)).load()
-            return "\n".join(d.page_content for d in docs)
-        except ImportError:
-            raise HTTPException(status_code=501, detail="PPT support requires UnstructuredPowerPointLoader (pip install unstructured)")
-    return ""
+            got = store.get(where=metadata_filter(path.name, section), include=["documents", "metadatas"])
+            rows = sorted(
+                zip(got.get("documents") or [], got.get("metadatas") or []),
+                key=lambda row: (row[1] or {}).get("chunk_index", 0),
+            )
+            if rows:
+                return pack_context([doc for doc, _ in rows], max_tokens).text
+        except Exception:
+            pass
+
+    parts: list[str] = []
+    for i, page in enumerate(_text_cache().iter_pages(path, section.page_start, section.page_end)):
+        parts.append(page[section.char_start:] if i == 0 else page)
+        if sum(len(p) for p in parts) > max_tokens * 6:  # enough raw text for the budget
+            break
+    return clip_to_tokens("\n".join(parts).strip(), max_tokens)
 
 
 def _chunks_from_text(text: str, chunk_size: int = 800, overlap: int = 200) -> list[str]:
@@ -1711,9 +1807,13 @@ def flashcards_generate_textbook(req: TextbookGenerateRequest):
         raise HTTPException(status_code=404, detail=f"Textbook '{req.textbook_id}' not found")
 
     query = (req.query or req.chapter or "key concepts and definitions").strip()
-    retrieved = _get_relevant_chunks_from_chromadb(
-        query, k=5, source_filter=req.textbook_id
-    )
+    retrieved = ""
+    if req.chapter and not req.query:
+        retrieved = _get_chapter_content(path, req.chapter)
+    if not retrieved:
+        retrieved = _get_relevant_chunks_from_chromadb(
+            query, k=5, source_filter=req.textbook_id
+        )
     if retrieved:
         subject = (
             Path(req.textbook_id).stem.split("_")[0]
@@ -1728,7 +1828,7 @@ def flashcards_generate_textbook(req: TextbookGenerateRequest):
 
     # ChromaDB unavailable or no hits: fall back to file-based flow
     try:
-        content = _extract_text_from_file(path)
+        content = _extract_text_from_file(path, max_chars=12000)
         if content.strip():
             return _generate_cards_from_textbook(content, req.count, req.textbook_id)
     except Exception:
@@ -1751,15 +1851,11 @@ class WeblinkGenerateRequest(BaseModel):
 @app.post("/api/flashcards/generate/weblink", response_model=FlashcardGenerateResponse)
 def flashcards_generate_weblink(req: WeblinkGenerateRequest):
     """Fetch URL content, strip HTML, generate flashcards via AI."""
-    import requests
+    from utils.web_text import FetchError
     try:
-        r = requests.get(req.url.strip(), timeout=15, headers={"User-Agent": "Studaxis/1.0"})
-        r.raise_for_status()
-        html = r.text
-    except Exception as e:
-        raise HTTPException(status_code=422, detail=f"Could not fetch URL: {e}")
-    text = re.sub(r"<[^>]+>", " ", html)
-    text = re.sub(r"\s+", " ", text).strip()
+        text = _url_text(req.url, timeout=15)
+    except FetchError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     return _generate_cards_from_content(text, req.count, "weblink")
 
 
@@ -1772,65 +1868,20 @@ class GenerateFromUrlRequest(BaseModel):
 
 @app.post("/api/flashcards/generate-from-url", response_model=FlashcardGenerateResponse)
 def flashcards_generate_from_url(req: GenerateFromUrlRequest):
-    """Scrape URL with BeautifulSoup, topic extraction, smart flashcard generation."""
-    url = req.url.strip()
-    text = ""
+    """Scrape URL (cached per URL), topic extraction, smart flashcard generation."""
+    from utils.web_text import FetchError
     try:
-        import httpx
-        from bs4 import BeautifulSoup
-    except ImportError:
-        httpx = None
-        BeautifulSoup = None
-
-    if httpx is not None and BeautifulSoup is not None:
-        try:
-            response = httpx.get(
-                url,
-                timeout=10,
-                headers={"User-Agent": "Mozilla/5.0 (Windows NT 10.0; rv:91.0) Gecko/20100101 Firefox/91.0"},
-            )
-            if response.status_code in (401, 403):
-                raise HTTPException(
-                    status_code=422,
-                    detail="This website blocked access. Try pasting the article text directly.",
-                )
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
-            for tag in soup(["nav", "footer", "script", "style", "header", "aside"]):
-                tag.decompose()
-            text = soup.get_text(separator="\n", strip=True)[:8000]
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code in (401, 403):
-                raise HTTPException(
-                    status_code=422,
-                    detail="This website blocked access. Try pasting the article text directly.",
-                ) from e
+        text = _url_text(req.url, timeout=10)[:8000]
+    except FetchError as e:
+        if e.blocked:
             raise HTTPException(
                 status_code=422,
-                detail="Could not fetch that URL. Try another link or paste the text directly instead.",
+                detail="This website blocked access. Try pasting the article text directly.",
             ) from e
-        except (httpx.TimeoutException, httpx.ConnectError, httpx.RequestError):
-            raise HTTPException(
-                status_code=422,
-                detail="Could not fetch that URL. Try another link or paste the text directly instead.",
-            )
-    else:
-        import requests
-        try:
-            r = requests.get(url, timeout=10, headers={"User-Agent": "Mozilla/5.0"})
-            if r.status_code in (401, 403):
-                raise HTTPException(
-                    status_code=422,
-                    detail="This website blocked access. Try pasting the article text directly.",
-                )
-            r.raise_for_status()
-            text = re.sub(r"<[^>]+>", " ", r.text)
-            text = re.sub(r"\s+", " ", text).strip()[:8000]
-        except requests.exceptions.RequestException:
-            raise HTTPException(
-                status_code=422,
-                detail="Could not fetch that URL. Try another link or paste the text directly instead.",
-            )
+        raise HTTPException(
+            status_code=422,
+            detail="Could not fetch that URL. Try another link or paste the text directly instead.",
+        ) from e
 
     if len(text) < 200:
         raise HTTPException(
@@ -1937,50 +1988,14 @@ def flashcards_generate_from_file(
 
 @app.post("/api/flashcards/generate/files", response_model=FlashcardGenerateResponse)
 def flashcards_generate_files(files: list[UploadFile] = File(...), count: int = Form(10)):
-    """Multipart file upload; extract text from txt/pdf/ppt, generate via AI."""
+    """Multipart file upload; extract text from txt/pdf/ppt in parallel, generate via AI."""
     if not files:
         raise HTTPException(status_code=400, detail="No files provided")
-    texts: list[str] = []
-    ppt_skipped: list[str] = []
-    for uf in files:
-        if not uf.filename:
-            continue
-        suf = Path(uf.filename).suffix.lower()
-        if suf not in (".txt", ".pdf", ".ppt", ".pptx"):
-            continue
-        tmp = Path(uf.filename).name
-        try:
-            content = uf.file.read()
-            tmp_path = DATA_DIR / "tmp_upload" / tmp
-            tmp_path.parent.mkdir(parents=True, exist_ok=True)
-            tmp_path.write_bytes(content)
-            try:
-                if suf in (".ppt", ".pptx"):
-                    try:
-                        from langchain_community.document_loaders import UnstructuredPowerPointLoader
-                        docs = UnstructuredPowerPointLoader(str(tmp_path)).load()
-                        texts.append("\n".join(d.page_content for d in docs))
-                    except ImportError:
-                        ppt_skipped.append(uf.filename)
-                else:
-                    texts.append(_extract_text_from_file(tmp_path))
-            finally:
-                try:
-                    tmp_path.unlink(missing_ok=True)
-                except OSError:
-                    pass
-        except Exception as e:
-            raise HTTPException(status_code=422, detail=f"Failed to process {uf.filename}: {e}")
-    if ppt_skipped:
-        pass  # Already recorded
-    combined = "\n\n".join(texts)
-    if not combined.strip():
-        msg = "No extractable text."
-        if ppt_skipped:
-            msg += f" PPT support unavailable; skipped: {', '.join(ppt_skipped)}"
-        raise HTTPException(status_code=422, detail=msg)
     cnt = max(5, min(35, count))
-    return _generate_cards_from_content(combined, cnt, "file")
+    combined, timings = _ingest_uploads(files, cnt)
+    response = _generate_cards_from_content(combined, cnt, "file")
+    response.ingest = timings
+    return response
 
 
 @app.post("/api/flashcards/generate", response_model=FlashcardGenerateResponse)
@@ -2233,12 +2248,13 @@ class FlashcardsReplaceRequest(BaseModel):
 def flashcards_replace(req: FlashcardsReplaceRequest, user_id: str = Depends(get_user_id)):
     """Replace stored flashcards for the authenticated user."""
     _save_flashcards(req.cards, user_id)
-    stats = _load_user_stats(user_id)
-    ensure_streak_structure(stats)
-    ensure_flashcard_structure(stats)
-    update_flashcard_stats_from_cards(stats, req.cards)
-    _update_streak(stats)
-    _save_user_stats(stats, user_id)
+    with _user_stats_lock(user_id):
+        stats = _load_user_stats(user_id, ("flashcard_stats.cards",))
+        ensure_streak_structure(stats)
+        ensure_flashcard_structure(stats)
+        update_flashcard_stats_from_cards(stats, req.cards)
+        _update_streak(stats)
+        _save_user_stats(stats, user_id)
     return {"ok": True, "count": len(req.cards)}
 
 
@@ -2251,31 +2267,32 @@ class FlashcardReviewRequest(BaseModel):
 @app.post("/api/flashcards/review")
 def flashcards_review(req: FlashcardReviewRequest, user_id: str = Depends(get_user_id)):
     """Record a single flashcard review; updates streak and flashcard stats."""
-    stats = _load_user_stats(user_id)
-    ensure_streak_structure(stats)
-    ensure_flashcard_structure(stats)
-    mastered = req.ease == "easy"
-    update_flashcard_entry(stats, req.card_id, req.ease, req.next_review, mastered=mastered)
-    decks = _load_flashcard_decks(user_id)
-    for d in decks:
-        for c in d.get("cards") or []:
-            if (c.get("id") or "") == req.card_id:
-                c["ease"] = req.ease
-                c["next_review"] = req.next_review
-                c["review_count"] = int(c.get("review_count", 0)) + 1
-                c["mastered"] = mastered
-                _save_flashcard_decks(decks, user_id)
-                update_flashcard_stats_from_cards(stats, _all_cards_from_decks(decks))
-                _update_streak(stats)
-                _save_user_stats(stats, user_id)
-                _enqueue_sync(BASE_PATH, user_id, "flashcard_review", {
-                    "userId": user_id,
-                    "cardId": req.card_id,
-                    "ease": req.ease,
-                    "nextReview": req.next_review,
-                })
-                return {"ok": True}
-    return {"ok": True}
+    with _user_stats_lock(user_id):
+        stats = _load_user_stats(user_id, ("flashcard_stats.cards",))
+        ensure_streak_structure(stats)
+        ensure_flashcard_structure(stats)
+        mastered = req.ease == "easy"
+        update_flashcard_entry(stats, req.card_id, req.ease, req.next_review, mastered=mastered)
+        decks = _load_flashcard_decks(user_id)
+        for d in decks:
+            for c in d.get("cards") or []:
+                if (c.get("id") or "") == req.card_id:
+                    c["ease"] = req.ease
+                    c["next_review"] = req.next_review
+                    c["review_count"] = int(c.get("review_count", 0)) + 1
+                    c["mastered"] = mastered
+                    _save_flashcard_decks(decks, user_id)
+                    update_flashcard_stats_from_cards(stats, _all_cards_from_decks(decks))
+                    _update_streak(stats)
+                    _save_user_stats(stats, user_id)
+                    _enqueue_sync(BASE_PATH, "flashcard_review", {
+                        "userId": user_id,
+                        "cardId": req.card_id,
+                        "ease": req.ease,
+                        "nextReview": req.next_review,
+                    })
+                    return {"ok": True}
+        return {"ok": True}
 
 
 class FlashcardDeckCreateRequest(BaseModel):
@@ -2371,7 +2388,7 @@ def flashcard_create_deck(req: FlashcardDeckCreateRequest, user_id: str = Depend
         decks = [d for d in decks if (d.get("id") or "") != deck_id]
         decks.insert(0, deck)
         _save_flashcard_decks(decks, user_id)
-        _enqueue_sync(BASE_PATH, user_id, "flashcard_create", {
+        _enqueue_sync(BASE_PATH, "flashcard_create", {
             "userId": user_id,
             "deckId": deck_id,
             "title": req.title,
@@ -2389,7 +2406,7 @@ def flashcard_create_deck(req: FlashcardDeckCreateRequest, user_id: str = Depend
     }
     decks.append(deck)
     _save_flashcard_decks(decks, user_id)
-    _enqueue_sync(BASE_PATH, user_id, "flashcard_create", {
+    _enqueue_sync(BASE_PATH, "flashcard_create", {
         "userId": user_id,
         "deckId": deck_id,
         "title": req.title,
@@ -2423,41 +2440,42 @@ def flashcard_add_card(req: FlashcardCardAddRequest, user_id: str = Depends(get_
 @app.patch("/api/flashcards/review")
 def flashcard_patch_review(req: FlashcardReviewPatchRequest, user_id: str = Depends(get_user_id)):
     """Update card ease and next_review; update deck easy_count, hard_count, mastered when deck_id provided."""
-    stats = _load_user_stats(user_id)
-    ensure_streak_structure(stats)
-    ensure_flashcard_structure(stats)
-    mastered = req.ease == "easy"
-    next_review = req.next_review or datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    update_flashcard_entry(stats, req.card_id, req.ease, next_review, mastered=mastered)
-    decks = _load_flashcard_decks(user_id)
-    if req.deck_id:
-        deck = next((d for d in decks if (d.get("id") or "") == req.deck_id), None)
-        if not deck:
-            raise HTTPException(status_code=404, detail="Deck not found")
-        target_decks = [deck]
-    else:
-        target_decks = [d for d in decks if any((c.get("id") or "") == req.card_id for c in (d.get("cards") or []))]
-    for deck in target_decks:
-        for c in deck.get("cards") or []:
-            if (c.get("id") or "") == req.card_id:
-                c["ease"] = req.ease
-                c["next_review"] = next_review
-                c["review_count"] = int(c.get("review_count", 0)) + 1
-                c["mastered"] = mastered
-                _recompute_deck_counts(deck)
-                _save_flashcard_decks(decks, user_id)
-                update_flashcard_stats_from_cards(stats, _all_cards_from_decks(decks))
-                _update_streak(stats)
-                _save_user_stats(stats, user_id)
-                _enqueue_sync(BASE_PATH, user_id, "flashcard_review", {
-                    "userId": user_id,
-                    "deckId": req.deck_id or deck.get("id"),
-                    "cardId": req.card_id,
-                    "ease": req.ease,
-                    "nextReview": next_review,
-                })
-                return {"ok": True}
-    raise HTTPException(status_code=404, detail="Card not found")
+    with _user_stats_lock(user_id):
+        stats = _load_user_stats(user_id, ("flashcard_stats.cards",))
+        ensure_streak_structure(stats)
+        ensure_flashcard_structure(stats)
+        mastered = req.ease == "easy"
+        next_review = req.next_review or datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        update_flashcard_entry(stats, req.card_id, req.ease, next_review, mastered=mastered)
+        decks = _load_flashcard_decks(user_id)
+        if req.deck_id:
+            deck = next((d for d in decks if (d.get("id") or "") == req.deck_id), None)
+            if not deck:
+                raise HTTPException(status_code=404, detail="Deck not found")
+            target_decks = [deck]
+        else:
+            target_decks = [d for d in decks if any((c.get("id") or "") == req.card_id for c in (d.get("cards") or []))]
+        for deck in target_decks:
+            for c in deck.get("cards") or []:
+                if (c.get("id") or "") == req.card_id:
+                    c["ease"] = req.ease
+                    c["next_review"] = next_review
+                    c["review_count"] = int(c.get("review_count", 0)) + 1
+                    c["mastered"] = mastered
+                    _recompute_deck_counts(deck)
+                    _save_flashcard_decks(decks, user_id)
+                    update_flashcard_stats_from_cards(stats, _all_cards_from_decks(decks))
+                    _update_streak(stats)
+                    _save_user_stats(stats, user_id)
+                    _enqueue_sync(BASE_PATH, "flashcard_review", {
+                        "userId": user_id,
+                        "deckId": req.deck_id or deck.get("id"),
+                        "cardId": req.card_id,
+                        "ease": req.ease,
+                        "nextReview": next_review,
+                    })
+                    return {"ok": True}
+        raise HTTPException(status_code=404, detail="Card not found")
 
 
 @app.delete("/api/flashcards/{card_id}")
@@ -2522,7 +2540,16 @@ def flashcards_recommend(req: FlashcardRecommendRequest, user_id: str = Depends(
     - Else if quiz history exists: use quiz avg score, weak topics
     - Else: return has_data=False for UI to show empty message
     """
-    stats = _load_user_stats(user_id)
+    from recommendation_service import (
+        _get_quiz_profile,
+        _has_flashcard_topic,
+        _has_quiz_data,
+        build_flashcard_based_prompt,
+        build_quiz_only_prompt,
+        parse_ai_response,
+    )
+
+    stats = _load_user_stats(user_id, ("quiz_stats.by_topic",))
     has_fc = _has_flashcard_topic(req.subject, req.hard_cards)
     has_quiz = _has_quiz_data(stats)
 
@@ -2639,10 +2666,11 @@ def _resolve_chat_task_type(req: ChatRequest) -> AITaskType:
 @app.post("/api/chat", response_model=ChatResponse)
 def chat(req: ChatRequest, user_id: str = Depends(get_user_id)):
     """Turn-based chat with local LLM. Supports clarification, Explain, Quiz, Flashcards, Step-by-Step."""
-    stats = _load_user_stats(user_id)
-    ensure_streak_structure(stats)
-    _update_streak(stats)
-    _save_user_stats(stats, user_id)
+    with _user_stats_lock(user_id):
+        stats = _load_user_stats(user_id)
+        ensure_streak_structure(stats)
+        _update_streak(stats)
+        _save_user_stats(stats, user_id)
     engine = get_ai_engine()
     ctx: dict[str, Any] = dict(req.context) if req.context else {}
     ctx["is_clarification"] = req.is_clarification
@@ -2684,39 +2712,48 @@ class ChatHistorySession(BaseModel):
     subject: str = "General"
 
 
-def _load_chat_history(user_id: str) -> list[dict[str, Any]]:
-    """Load chat history for user from JSON file."""
-    path = _chat_history_file(user_id)
-    if not path.exists():
-        return []
-    try:
-        data = json.loads(path.read_text(encoding="utf-8"))
-        return data if isinstance(data, list) else []
-    except (json.JSONDecodeError, OSError):
-        return []
-
-
-def _save_chat_history(sessions: list[dict[str, Any]], user_id: str) -> None:
-    """Save chat history for user to JSON file."""
-    path = _chat_history_file(user_id)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(sessions, ensure_ascii=False, indent=2), encoding="utf-8")
-
-
 @app.post("/api/chat/history/save")
 def chat_history_save(session: ChatHistorySession, user_id: str = Depends(get_user_id)):
-    """Append a saved chat session to the user's chat_history.json."""
-    sessions = _load_chat_history(user_id)
-    sessions.insert(0, session.model_dump())
-    _save_chat_history(sessions, user_id)
-    return {"ok": True}
+    """Append a saved chat session (body + index line; a repeated id replaces the earlier copy)."""
+    summary = _chat_sessions(user_id).save(session.model_dump())
+    return {"ok": True, "session": summary}
 
 
 @app.get("/api/chat/history")
-def chat_history_get(user_id: str = Depends(get_user_id)):
-    """Return array of saved chat sessions for restore when localStorage is empty."""
-    sessions = _load_chat_history(user_id)
-    return sessions
+def chat_history_get(
+    user_id: str = Depends(get_user_id),
+    limit: int = Query(default=50, ge=1, le=200),
+    offset: int = Query(default=0, ge=0),
+    q: Optional[str] = Query(default=None, description="Title search (word prefixes)"),
+    subject: Optional[str] = None,
+    include_messages: bool = False,
+):
+    """
+    Saved chat sessions, newest first, from the session index: id, title,
+    subject, timestamp and message_count. Messages only with include_messages
+    (for this page); one full session is at /api/chat/history/{session_id}.
+    """
+    store = _chat_sessions(user_id)
+    sessions, total = store.list(limit=limit, offset=offset, q=q, subject=subject)
+    if include_messages:
+        sessions = [store.get(s["id"]) or s for s in sessions]
+    next_offset = offset + len(sessions)
+    return {
+        "sessions": sessions,
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "next_offset": next_offset if next_offset < total else None,
+    }
+
+
+@app.get("/api/chat/history/{session_id}")
+def chat_history_session(session_id: str, user_id: str = Depends(get_user_id)):
+    """One saved chat session with its messages."""
+    session = _chat_sessions(user_id).get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Chat session not found")
+    return session
 
 
 # ---------------------------------------------------------------------------
@@ -2734,10 +2771,21 @@ class NotificationPushRequest(BaseModel):
 
 
 @app.get("/api/notifications")
-def notifications_get(user_id: str = Depends(get_user_id)):
-    """Return notifications from backend/data/notifications/{user_id}.json."""
-    notifs = _load_notifications(user_id)
-    return {"notifications": notifs}
+def notifications_get(
+    user_id: str = Depends(get_user_id),
+    limit: int = Query(default=100, ge=1, le=500),
+    offset: int = Query(default=0, ge=0),
+    unread_only: bool = False,
+):
+    """Notifications for the user, newest first, with inbox counters."""
+    notifs, total, unread = _notifications().list(user_id, limit=limit, offset=offset, unread_only=unread_only)
+    return {"notifications": notifs, "total": total, "unread_count": unread}
+
+
+@app.get("/api/notifications/unread_count")
+def notifications_unread_count(user_id: str = Depends(get_user_id)):
+    """Unread counter only — cheap enough to poll."""
+    return {"unread_count": _notifications().unread_count(user_id)}
 
 
 @app.post("/api/notifications/push")
@@ -2745,23 +2793,51 @@ def notifications_push(
     req: NotificationPushRequest, user_id: str = Depends(get_user_id)
 ):
     """Add a notification and return the created item."""
-    notifs = _load_notifications(user_id)
-    nid = str(uuid.uuid4())
-    ts = datetime.now(timezone.utc).isoformat()
-    notif: dict[str, Any] = {
-        "id": nid,
-        "type": req.type or "info",
-        "title": req.title,
-        "message": req.message,
-        "tag": req.tag,
-        "pinned": req.pinned or False,
-        "read": False,
-        "timestamp": ts,
-        "action": req.action,
-    }
-    notifs.insert(0, notif)
-    _save_notifications(notifs, user_id)
-    return notif
+    return _notifications().push(user_id, req.model_dump())
+
+
+class NotificationFanoutRequest(NotificationPushRequest):
+    user_ids: list[str] = Field(default_factory=list)
+    class_code: Optional[str] = Field(default=None, description="Also deliver to every student linked to this class")
+
+
+def _class_student_ids(class_code: str) -> list[str]:
+    """Users whose profile links them to class_code (students only)."""
+    users_dir = DATA_DIR / "users"
+    code = (class_code or "").strip().upper()
+    if not code or not users_dir.is_dir():
+        return []
+    ids = []
+    for d in sorted(users_dir.iterdir()):
+        if not d.is_dir():
+            continue
+        p = load_profile_for_user(d.name)
+        if p and (p.class_code or "").strip().upper() == code and (p.user_role or "student") == "student":
+            ids.append(d.name)
+    return ids
+
+
+@app.post("/api/notifications/fanout")
+def notifications_fanout(req: NotificationFanoutRequest, user_id: str = Depends(get_user_id)):
+    """Teacher broadcast: one notification into many inboxes, written in a single transaction."""
+    profile = load_profile_for_user(user_id)
+    if not profile or profile.user_role != "teacher":
+        raise HTTPException(status_code=403, detail="Only teachers can send notifications to other users")
+    recipients = list(req.user_ids)
+    if req.class_code:
+        recipients += _class_student_ids(req.class_code)
+    fields = req.model_dump(exclude={"user_ids", "class_code"})
+    created = _notifications().push_many(recipients, fields)
+    return {"ok": True, "delivered": len(created)}
+
+
+# Registered before /{notif_id} so "all" and "clear" are not taken as ids.
+@app.delete("/api/notifications/all")
+@app.delete("/api/notifications/clear")
+def notifications_clear_all(user_id: str = Depends(get_user_id)):
+    """Clear all non-pinned notifications. Supports /all and /clear."""
+    _notifications().clear(user_id)
+    return {"ok": True}
 
 
 @app.patch("/api/notifications/{notif_id}/read")
@@ -2769,34 +2845,16 @@ def notifications_mark_read(
     notif_id: str, user_id: str = Depends(get_user_id)
 ):
     """Mark one notification as read."""
-    notifs = _load_notifications(user_id)
-    for n in notifs:
-        if n.get("id") == notif_id:
-            n["read"] = True
-            _save_notifications(notifs, user_id)
-            return {"ok": True}
-    raise HTTPException(status_code=404, detail="Notification not found")
+    if not _notifications().mark_read(user_id, notif_id):
+        raise HTTPException(status_code=404, detail="Notification not found")
+    return {"ok": True}
 
 
 @app.delete("/api/notifications/{notif_id}")
 def notifications_delete(notif_id: str, user_id: str = Depends(get_user_id)):
     """Remove one notification."""
-    notifs = _load_notifications(user_id)
-    prev_len = len(notifs)
-    notifs[:] = [n for n in notifs if n.get("id") != notif_id]
-    if len(notifs) == prev_len:
+    if not _notifications().delete(user_id, notif_id):
         raise HTTPException(status_code=404, detail="Notification not found")
-    _save_notifications(notifs, user_id)
-    return {"ok": True}
-
-
-@app.delete("/api/notifications/all")
-@app.delete("/api/notifications/clear")
-def notifications_clear_all(user_id: str = Depends(get_user_id)):
-    """Clear all non-pinned notifications. Supports /all and /clear."""
-    notifs = _load_notifications(user_id)
-    notifs[:] = [n for n in notifs if n.get("pinned")]
-    _save_notifications(notifs, user_id)
     return {"ok": True}
 
 
@@ -2847,9 +2905,42 @@ def grade(req: GradeRequest):
 
 
 @app.get("/api/quiz/history")
-def quiz_history(user_id: str = Depends(get_user_id)):
-    """Return all past quiz results for the authenticated user."""
-    return {"results": _load_quiz_history(user_id)}
+def quiz_history(
+    user_id: str = Depends(get_user_id),
+    limit: int = Query(default=50, ge=1, le=200),
+    offset: int = Query(default=0, ge=0),
+    subject: Optional[str] = None,
+    quiz_id: Optional[str] = None,
+    since: Optional[str] = Query(default=None, description="ISO date/datetime (inclusive)"),
+    until: Optional[str] = Query(default=None, description="ISO date/datetime (inclusive)"),
+    include_answers: bool = False,
+):
+    """
+    Past quiz attempts for the authenticated user, newest first, from the attempt index.
+    Summaries only unless include_answers (full results for this page); a single
+    full result is at /api/quiz/history/{attempt_id}.
+    """
+    store = _quiz_history(user_id)
+    results, total = store.query(subject=subject, quiz_id=quiz_id, since=since, until=until, limit=limit, offset=offset)
+    if include_answers:
+        results = [store.load_result(r["attempt_id"]) or r for r in results]
+    next_offset = offset + len(results)
+    return {
+        "results": results,
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "next_offset": next_offset if next_offset < total else None,
+    }
+
+
+@app.get("/api/quiz/history/{attempt_id}")
+def quiz_history_attempt(attempt_id: str, user_id: str = Depends(get_user_id)):
+    """Full result (answers, explanations) of one past attempt."""
+    result = _quiz_history(user_id).load_result(attempt_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Quiz attempt not found")
+    return result
 
 
 @app.get("/api/quiz/{quiz_id}")
@@ -2909,11 +3000,16 @@ def quiz_generate(
             topic = retrieved
         else:
             texts = []
+            remaining = 15000
             for tid in req.source_ids[:5]:
                 path = SAMPLE_TEXTBOOKS_DIR / tid
+                if remaining <= 0:
+                    break
                 if path.is_file():
                     try:
-                        texts.append(_extract_text_from_file(path))
+                        text = _extract_text_from_file(path, max_chars=remaining)
+                        texts.append(text)
+                        remaining -= len(text) + 2
                     except Exception:
                         pass
             if texts:
@@ -3016,13 +3112,15 @@ def panic_generate_textbook(req: PanicGenerateTextbookRequest):
     if not path.is_file():
         raise HTTPException(status_code=404, detail=f"Textbook '{req.textbook_id}' not found")
     query = (req.chapter or req.subject or "key concepts for exam").strip()
-    retrieved = _get_relevant_chunks_from_chromadb(
-        query, k=5, source_filter=req.textbook_id
-    )
+    retrieved = _get_chapter_content(path, req.chapter) if req.chapter else ""
+    if not retrieved:
+        retrieved = _get_relevant_chunks_from_chromadb(
+            query, k=5, source_filter=req.textbook_id
+        )
     if retrieved:
         content = retrieved
     else:
-        content = _extract_text_from_file(path)
+        content = _extract_text_from_file(path, max_chars=12000)
         if not content.strip():
             raise HTTPException(status_code=422, detail="Could not extract text from textbook")
     items = _generate_quiz_from_content(
@@ -3039,62 +3137,24 @@ def panic_generate_textbook(req: PanicGenerateTextbookRequest):
 @app.post("/api/quiz/panic/generate/weblink")
 def panic_generate_weblink(req: PanicGenerateWeblinkRequest):
     """Generate panic-mode questions from a web URL. Uses Ollama. Raises 503 if AI is unavailable."""
-    url = req.url.strip()
-    text = ""
-    try:
-        import httpx
-        from bs4 import BeautifulSoup
-    except ImportError:
-        httpx = None
-        BeautifulSoup = None
+    from utils.web_text import FetchError
     try:
-        if httpx is not None and BeautifulSoup is not None:
-            try:
-                response = httpx.get(
-                    url,
-                    timeout=20,
-                    headers={"User-Agent": "Mozilla/5.0 (Windows NT 10.0; rv:91.0) Gecko/20100101 Firefox/91.0"},
-                )
-                if response.status_code in (401, 403):
-                    raise HTTPException(
-                        status_code=422,
-                        detail="This website blocked access. Try a different link or paste the text directly.",
-                    )
-                response.raise_for_status()
-                soup = BeautifulSoup(response.text, "html.parser")
-                for tag in soup(["nav", "footer", "script", "style", "header", "aside"]):
-                    tag.decompose()
-                text = soup.get_text(separator="\n", strip=True)[:8000]
-            except httpx.HTTPStatusError as e:
-                raise HTTPException(status_code=422, detail=f"Could not fetch URL: {e}") from e
-            except (httpx.TimeoutException, httpx.ConnectError, httpx.RequestError) as e:
-                raise HTTPException(status_code=422, detail=f"Could not fetch URL: {e}") from e
-        else:
-            import requests as req_lib
-            try:
-                r = req_lib.get(url, timeout=20, headers={"User-Agent": "Mozilla/5.0 (Windows NT 10.0; rv:91.0) Gecko/20100101 Firefox/91.0"})
-                if r.status_code in (401, 403):
-                    raise HTTPException(
-                        status_code=422,
-                        detail="This website blocked access. Try a different link or paste the text directly.",
-                    )
-                r.raise_for_status()
-                text = re.sub(r"<[^>]+>", " ", r.text)
-                text = re.sub(r"\s+", " ", text).strip()[:8000]
-            except HTTPException:
-                raise
-            except Exception as e:
-                raise HTTPException(status_code=422, detail=f"Could not fetch URL: {e}")
-        if len(text) < 150:
+        text = _url_text(req.url, timeout=20)[:8000]
+    except FetchError as e:
+        if e.blocked:
             raise HTTPException(
                 status_code=422,
-                detail="Not enough content found at that URL. Try a different link or use Textbook/Files source.",
-            )
-        items = _generate_quiz_from_content(
-            text, req.subject, req.count, req.question_type
+                detail="This website blocked access. Try a different link or paste the text directly.",
+            ) from e
+        raise HTTPException(status_code=422, detail=str(e)) from e
+    if len(text) < 150:
+        raise HTTPException(
+            status_code=422,
+            detail="Not enough content found at that URL. Try a different link or use Textbook/Files source.",
         )
-    except HTTPException:
-        raise
+    items = _generate_quiz_from_content(
+        text, req.subject, req.count, req.question_type
+    )
     return {
         "id": "panic",
         "title": f"Panic Mode — {req.subject}",
@@ -3114,56 +3174,17 @@ class QuizGenerateFromUrlRequest(BaseModel):
 
 @app.post("/api/quiz/generate-from-url")
 def quiz_generate_from_url(req: QuizGenerateFromUrlRequest, user_id: str = Depends(get_user_id)):
-    """Scrape URL, extract content, generate quiz. Returns same format as /api/quiz/generate."""
-    url = req.url.strip()
-    text = ""
+    """Scrape URL (cached per URL), extract content, generate quiz. Returns same format as /api/quiz/generate."""
+    from utils.web_text import FetchError
     try:
-        import httpx
-        from bs4 import BeautifulSoup
-    except ImportError:
-        httpx = None
-        BeautifulSoup = None
-    try:
-        if httpx is not None and BeautifulSoup is not None:
-            try:
-                response = httpx.get(
-                    url, timeout=15, follow_redirects=True,
-                    headers={"User-Agent": "Mozilla/5.0 (Windows NT 10.0; rv:91.0) Gecko/20100101 Firefox/91.0"},
-                )
-                if response.status_code in (401, 403):
-                    raise HTTPException(
-                        status_code=422,
-                        detail="This website blocked access. Try pasting the article text directly.",
-                    )
-                response.raise_for_status()
-                soup = BeautifulSoup(response.text, "html.parser")
-                for tag in soup(["nav", "footer", "script", "style", "header", "aside"]):
-                    tag.decompose()
-                text = soup.get_text(separator=" ", strip=True)[:4000]
-            except HTTPException:
-                raise
-            except (httpx.HTTPStatusError, httpx.TimeoutException, httpx.ConnectError, httpx.RequestError):
-                raise HTTPException(status_code=400, detail="Could not fetch URL")
-        else:
-            import requests as req_lib
-            try:
-                r = req_lib.get(url, timeout=15, headers={"User-Agent": "Mozilla/5.0"})
-                if r.status_code in (401, 403):
-                    raise HTTPException(
-                        status_code=422,
-                        detail="This website blocked access. Try pasting the article text directly.",
-                    )
-                r.raise_for_status()
-                text = re.sub(r"<[^>]+>", " ", r.text)
-                text = re.sub(r"\s+", " ", text).strip()[:4000]
-            except HTTPException:
-                raise
-            except Exception:
-                raise HTTPException(status_code=400, detail="Could not fetch URL")
-    except HTTPException:
-        raise
-    except Exception:
-        raise HTTPException(status_code=400, detail="Could not fetch URL")
+        text = " ".join(_url_text(req.url, timeout=15).split("\n"))[:4000]
+    except FetchError as e:
+        if e.blocked:
+            raise HTTPException(
+                status_code=422,
+                detail="This website blocked access. Try pasting the article text directly.",
+            ) from e
+        raise HTTPException(status_code=400, detail="Could not fetch URL") from e
     if len(text) < 200:
         raise HTTPException(
             status_code=422,
@@ -3426,7 +3447,7 @@ def notes_generate_from_textbook(req: NotesGenerateFromTextbookRequest, user_id:
         content = retrieved
     else:
         try:
-            content = _extract_text_from_file(path)
+            content = _extract_text_from_file(path, max_chars=8000)
         except Exception as e:
             raise HTTPException(status_code=422, detail=f"Could not extract text: {e}")
         if not content or len(content.strip()) < 100:
@@ -3445,35 +3466,11 @@ def panic_generate_files(
     count: int = Form(5),
     question_type: str = Form("open_ended"),
 ):
-    """Generate panic-mode questions from uploaded files. One subject only."""
+    """Generate panic-mode questions from uploaded files (extracted in parallel). One subject only."""
     if not files:
         raise HTTPException(status_code=400, detail="No files provided")
-    texts: list[str] = []
-    for uf in files:
-        if not uf.filename:
-            continue
-        suf = Path(uf.filename).suffix.lower()
-        if suf not in (".txt", ".pdf", ".ppt", ".pptx"):
-            continue
-        tmp = Path(uf.filename).name
-        try:
-            content = uf.file.read()
-            tmp_path = DATA_DIR / "tmp_upload" / tmp
-            tmp_path.parent.mkdir(parents=True, exist_ok=True)
-            tmp_path.write_bytes(content)
-            try:
-                texts.append(_extract_text_from_file(tmp_path))
-            finally:
-                try:
-                    tmp_path.unlink(missing_ok=True)
-                except OSError:
-                    pass
-        except Exception as e:
-            raise HTTPException(status_code=422, detail=f"Failed to process {uf.filename}: {e}")
-    combined = "\n\n".join(texts)
-    if not combined.strip():
-        raise HTTPException(status_code=422, detail="No extractable text from files")
     cnt = max(3, min(15, count))
+    combined, timings = _ingest_uploads(files, cnt)
     qt = question_type if question_type in ("mcq", "open_ended") else "open_ended"
     items = _generate_quiz_from_content(combined, subject, cnt, qt)
     return {
@@ -3481,6 +3478,7 @@ def panic_generate_files(
         "title": f"Panic Mode — {subject}",
         "items": items,
         "question_type": qt,
+        "ingest": timings,
     }
 
 
@@ -3507,31 +3505,14 @@ def _load_quiz_from_file(user_id: str, quiz_id: str) -> dict[str, Any] | None:
         return None
 
 
-def _quiz_result_file(user_id: str, quiz_id: str, attempt_id: str) -> Path:
-    """Path for a single quiz result file."""
-    return _quizzes_dir(user_id) / f"{quiz_id}_{attempt_id}_result.json"
+def _quiz_history(user_id: str) -> QuizHistoryStore:
+    """Per-user quiz attempt index (data/quizzes/{user_id}/attempts.jsonl + results/)."""
+    return get_quiz_history_store(_quizzes_dir(user_id))
 
 
 def _save_quiz_result(user_id: str, quiz_id: str, result: dict[str, Any]) -> str:
-    """Save quiz result to JSON; returns attempt_id."""
-    attempt_id = f"{int(datetime.now(timezone.utc).timestamp())}_{uuid.uuid4().hex[:8]}"
-    path = _quiz_result_file(user_id, quiz_id, attempt_id)
-    path.write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
-    return attempt_id
-
-
-def _load_quiz_history(user_id: str) -> list[dict[str, Any]]:
-    """Load all quiz results from user's quiz directory."""
-    d = _quizzes_dir(user_id)
-    results = []
-    for p in sorted(d.iterdir(), reverse=True):
-        if p.is_file() and p.suffix == ".json" and "_result" in p.stem:
-            try:
-                data = json.loads(p.read_text(encoding="utf-8"))
-                results.append(data)
-            except (OSError, json.JSONDecodeError):
-                pass
-    return results
+    """Save quiz result and index it; returns attempt_id."""
+    return _quiz_history(user_id).record(quiz_id, result)
 
 
 def _resolve_quiz_items(quiz_id: str, items_list: list[dict[str, Any]] | None, user_id: str | None = None) -> list[dict[str, Any]]:
@@ -3575,49 +3556,50 @@ def _score_mcq_answer(user_answer: str, item: dict[str, Any]) -> float:
 def quiz_submit(quiz_id: str, req: QuizSubmitRequest, user_id: str = Depends(get_user_id)):
     """Submit quiz answers; grade via AI/local and update user stats."""
     engine = get_ai_engine()
-    stats = _load_user_stats(user_id)
-    ensure_streak_structure(stats)
-    quiz_stats = stats.setdefault("quiz_stats", {})
-    topic_scores: dict[str, list[float]] = {}
-    items_list = _resolve_quiz_items(quiz_id, req.items, user_id)
-    total_score = 0.0
-    max_score = len(req.answers) * 10.0 if req.answers else 0.0
-
-    for r in req.answers:
-        qid = r.get("question_id", "")
-        answer_text = str(r.get("user_answer") or r.get("answer", "")).strip()
-        score = float(r.get("score", 0))
-        if score == 0 and items_list:
-            for it in items_list:
-                if it.get("id") == qid:
-                    if it.get("options"):
-                        score = _score_mcq_answer(answer_text, it)
-                    else:
-                        score = _local_score(answer_text, it.get("expected_answer", it.get("sample_answer", "")))
-                    break
-        r["score"] = score
-        r["answer"] = answer_text
-        r["topic"] = r.get("topic") or next(
-            (it.get("topic", "General") for it in items_list if it.get("id") == qid),
-            "General",
-        )
-        topic = r["topic"]
-        total_score += score
-        topic_scores.setdefault(topic, []).append(score)
-        total_attempted = int(quiz_stats.get("total_attempted", 0)) + 1
-        total_correct = int(quiz_stats.get("total_correct", 0)) + (1 if score >= 6.0 else 0)
-        prev_avg = float(quiz_stats.get("average_score", 0.0))
-        quiz_stats["total_attempted"] = total_attempted
-        quiz_stats["total_correct"] = total_correct
-        quiz_stats["average_score"] = round(((prev_avg * (total_attempted - 1)) + score) / total_attempted, 2)
-        by_topic = quiz_stats.setdefault("by_topic", {})
-        te = by_topic.setdefault(topic, {"attempts": 0, "avg_score": 0.0})
-        te["attempts"] = int(te.get("attempts", 0)) + 1
-        te["avg_score"] = round(((float(te.get("avg_score", 0)) * (te["attempts"] - 1)) + score) / te["attempts"], 2)
-    if max_score > 0:
-        _update_quiz_stats(stats, total_score, max_score)
-    _update_streak(stats)
-    _save_user_stats(stats, user_id)
+    with _user_stats_lock(user_id):
+        stats = _load_user_stats(user_id, ("quiz_stats.by_topic",))
+        ensure_streak_structure(stats)
+        quiz_stats = stats.setdefault("quiz_stats", {})
+        topic_scores: dict[str, list[float]] = {}
+        items_list = _resolve_quiz_items(quiz_id, req.items, user_id)
+        total_score = 0.0
+        max_score = len(req.answers) * 10.0 if req.answers else 0.0
+
+        for r in req.answers:
+            qid = r.get("question_id", "")
+            answer_text = str(r.get("user_answer") or r.get("answer", "")).strip()
+            score = float(r.get("score", 0))
+            if score == 0 and items_list:
+                for it in items_list:
+                    if it.get("id") == qid:
+                        if it.get("options"):
+                            score = _score_mcq_answer(answer_text, it)
+                        else:
+                            score = _local_score(answer_text, it.get("expected_answer", it.get("sample_answer", "")))
+                        break
+            r["score"] = score
+            r["answer"] = answer_text
+            r["topic"] = r.get("topic") or next(
+                (it.get("topic", "General") for it in items_list if it.get("id") == qid),
+                "General",
+            )
+            topic = r["topic"]
+            total_score += score
+            topic_scores.setdefault(topic, []).append(score)
+            total_attempted = int(quiz_stats.get("total_attempted", 0)) + 1
+            total_correct = int(quiz_stats.get("total_correct", 0)) + (1 if score >= 6.0 else 0)
+            prev_avg = float(quiz_stats.get("average_score", 0.0))
+            quiz_stats["total_attempted"] = total_attempted
+            quiz_stats["total_correct"] = total_correct
+            quiz_stats["average_score"] = round(((prev_avg * (total_attempted - 1)) + score) / total_attempted, 2)
+            by_topic = quiz_stats.setdefault("by_topic", {})
+            te = by_topic.setdefault(topic, {"attempts": 0, "avg_score": 0.0})
+            te["attempts"] = int(te.get("attempts", 0)) + 1
+            te["avg_score"] = round(((float(te.get("avg_score", 0)) * (te["attempts"] - 1)) + score) / te["attempts"], 2)
+        if max_score > 0:
+            _update_quiz_stats(stats, total_score, max_score)
+        _update_streak(stats)
+        _save_user_stats(stats, user_id)
 
     weak_topics_text: Optional[str] = None
     recommendation_text: Optional[str] = None
@@ -3721,7 +3703,7 @@ def quiz_submit(quiz_id: str, req: QuizSubmitRequest, user_id: str = Depends(get
         "answers": answers_payload,
     }
     _save_quiz_result(user_id, quiz_id, result_payload)
-    _enqueue_sync(BASE_PATH, user_id, "quiz_result", {
+    _enqueue_sync(BASE_PATH, "quiz_result", {
         "userId": user_id,
         "quizId": quiz_id,
         "result": result_payload,
@@ -3744,9 +3726,11 @@ def quiz_submit(quiz_id: str, req: QuizSubmitRequest, user_id: str = Depends(get
 
 @app.get("/api/student/assignments")
 def student_assignments(class_code: str = "", user_id: str = Depends(get_user_id)):
-    """Return assignments for class. Used when profile.class_code is set (teacher_linked)."""
-    items = _load_assignments(class_code)
-    return [{"id": a.get("id"), "quiz_id": a.get("quiz_id"), "title": a.get("title"), "due_date": a.get("due_date"), "assigned_at": a.get("assigned_at"), "status": a.get("status", "pending")} for a in items]
+    """Return assignments for class with this student's own status. Used when profile.class_code is set (teacher_linked)."""
+    if not class_code:
+        return []
+    items = _classes().list_assignments(class_code, user_id=user_id)
+    return [{k: a[k] for k in ("id", "quiz_id", "title", "due_date", "assigned_at", "status", "score", "completed_at")} for a in items]
 
 
 class AssignmentCompleteRequest(BaseModel):
@@ -3763,17 +3747,11 @@ def student_assignment_complete(req: AssignmentCompleteRequest, user_id: str = D
         cc = (p.class_code if p else "") or ""
         if not cc:
             return {"ok": True}
-        items = _load_assignments(cc)
-        for a in items:
-            if a.get("id") == req.assignment_id:
-                a["status"] = "completed"
-                a["completed_at"] = req.completed_at
-                a["score"] = req.score
-                _save_assignments(cc, items)
-                return {"ok": True}
+        if _classes().complete(cc, req.assignment_id, user_id, req.score, req.completed_at):
+            return {"ok": True}
     except Exception:
         pass
-    _enqueue_sync(BASE_PATH, user_id, "assignment_complete", {
+    _enqueue_sync(BASE_PATH, "assignment_complete", {
         "userId": user_id,
         "assignment_id": req.assignment_id,
         "score": req.score,
@@ -3782,39 +3760,6 @@ def student_assignment_complete(req: AssignmentCompleteRequest, user_id: str = D
     return {"ok": True}
 
 
-def _teachers_dir() -> Path:
-    """Data directory for teacher records (onboarding, class creation)."""
-    d = DATA_DIR / "teachers"
-    d.mkdir(parents=True, exist_ok=True)
-    return d
-
-
-def _teacher_file(class_code: str) -> Path:
-    """Path to teacher record for a class. Keyed by class_code."""
-    safe = re.sub(r"[^a-zA-Z0-9_-]", "_", (class_code or "").strip())[:64]
-    return _teachers_dir() / f"{safe or 'default'}.json"
-
-
-def _load_teacher(class_code: str) -> dict[str, Any] | None:
-    """Load teacher record for class. Returns None if not found."""
-    try:
-        path = _teacher_file(class_code)
-        if path.is_file():
-            return json.loads(path.read_text(encoding="utf-8"))
-    except (OSError, json.JSONDecodeError):
-        pass
-    return None
-
-
-def _save_teacher(class_code: str, data: dict[str, Any]) -> None:
-    """Save teacher record for class."""
-    try:
-        path = _teacher_file(class_code)
-        path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
-    except OSError:
-        pass
-
-
 class TeacherOnboardRequest(BaseModel):
     """Teacher onboarding data from StudaxisTeacherDashboard.jsx flow."""
     name: str = Field(..., min_length=1)
@@ -3833,11 +3778,11 @@ class TeacherOnboardRequest(BaseModel):
 def teacher_onboard(req: TeacherOnboardRequest):
     """
     Register teacher + create first class. Public endpoint (no auth).
-    Persists to data/teachers/{class_code}.json for backend assignment routing.
+    Persists to the local class store for backend assignment routing.
     Called by teacher dashboard after onboarding completion.
     """
     cc = req.classCode.strip()
-    existing = _load_teacher(cc)
+    existing = _classes().get_teacher(cc)
     if existing:
         logger.info("Teacher class code %s already registered; updating", cc)
     payload = {
@@ -3853,7 +3798,7 @@ def teacher_onboard(req: TeacherOnboardRequest):
         "numStudents": req.numStudents,
         "onboarded_at": datetime.now(timezone.utc).isoformat(),
     }
-    _save_teacher(cc, payload)
+    _classes().save_teacher(cc, payload)
     return {"ok": True, "classCode": cc}
 
 
@@ -3867,7 +3812,7 @@ def teacher_lookup(classCode: str = ""):
     cc = (classCode or "").strip()
     if not cc or len(cc) < 3:
         raise HTTPException(status_code=400, detail="classCode is required (min 3 chars)")
-    teacher = _load_teacher(cc)
+    teacher = _classes().get_teacher(cc)
     if not teacher:
         raise HTTPException(status_code=404, detail="Class code not found")
     return teacher
@@ -3905,7 +3850,7 @@ def teacher_auth(req: TeacherAuthRequest):
     cc = (req.classCode or "").strip().upper()
     if len(cc) < 3:
         raise HTTPException(status_code=400, detail="classCode is required (min 3 chars)")
-    teacher = _load_teacher(cc)
+    teacher = _classes().get_teacher(cc)
     if not teacher:
         raise HTTPException(status_code=401, detail="Class code not found")
     teacher_id = teacher.get("teacherId") or teacher.get("classCode") or cc
@@ -3941,21 +3886,65 @@ class TeacherAssignQuizRequest(BaseModel):
 
 @app.post("/api/teacher/assign-quiz")
 def teacher_assign_quiz(req: TeacherAssignQuizRequest, user_id: str = Depends(get_user_id)):
-    """Create assignment for class. Saves to data/assignments/{class_code}.json"""
-    items = _load_assignments(req.class_code)
+    """Create assignment for class in the local class store and notify its students."""
     aid = str(uuid.uuid4())[:8]
-    items.append({
+    _classes().add_assignment(req.class_code, {
         "id": aid,
         "quiz_id": req.quiz_id,
         "title": req.title,
         "due_date": req.due_date or "",
         "assigned_at": datetime.now(timezone.utc).isoformat(),
-        "status": "pending",
     })
-    _save_assignments(req.class_code, items)
+    try:
+        _notifications().push_many(_class_student_ids(req.class_code), {
+            "type": "assignment",
+            "title": f"New assignment: {req.title}",
+            "message": f"Due {req.due_date}" if req.due_date else None,
+            "tag": "assignment",
+            "action": {"label": "Open quiz", "href": "/quiz"},
+        })
+    except Exception as e:
+        logger.warning("Assignment notification fan-out failed for %s: %s", req.class_code, e)
     return {"ok": True, "assignment_id": aid}
 
 
+def _account_email(user_id: str) -> Optional[str]:
+    """Email of the registered account behind user_id, or None (e.g. test users)."""
+    from database import SessionLocal
+    with SessionLocal() as db:
+        user = db.query(User).filter(User.username == user_id).first()
+        return user.email if user else None
+
+
+def _require_class_teacher(user_id: str, class_code: str) -> None:
+    """
+    403 unless the caller is the teacher who registered class_code, matched by
+    account email against the class's teacher record. profile.user_role is
+    not enough: any user can set it through POST /api/user/profile.
+    """
+    teacher = _classes().get_teacher(class_code) or {}
+    email = (_account_email(user_id) or "").strip().lower()
+    if not email or (teacher.get("email") or "").strip().lower() != email:
+        raise HTTPException(status_code=403, detail="Only the class teacher can view class assignment results")
+
+
+@app.get("/api/teacher/assignments")
+def teacher_assignments(class_code: str = Query(..., min_length=1), user_id: str = Depends(get_user_id)):
+    """Assignments for a class with completion counts and average score (kept incrementally). Class teacher only."""
+    _require_class_teacher(user_id, class_code)
+    items = _classes().list_assignments(class_code)
+    return [{k: a[k] for k in ("id", "quiz_id", "title", "due_date", "assigned_at", "completed_count", "average_score")} for a in items]
+
+
+@app.get("/api/teacher/assignments/{assignment_id}/completions")
+def teacher_assignment_completions(
+    assignment_id: str, class_code: str = Query(..., min_length=1), user_id: str = Depends(get_user_id)
+):
+    """Per-student completions of one assignment. Class teacher only."""
+    _require_class_teacher(user_id, class_code)
+    return {"assignment_id": assignment_id, "completions": _classes().completions(class_code, assignment_id)}
+
+
 def _enqueue_quiz_sync_for_submit(
     user_id: str, quiz_id: str, total_score: float, max_score: float,
     total_questions: int, subject: str, question_type: str,
@@ -4076,31 +4065,32 @@ def panic_grade_one(req: PanicGradeOneRequest):
 @app.post("/api/quiz/panic/finalize")
 def panic_finalize(req: PanicFinalizeRequest, user_id: str = Depends(get_user_id)):
     """Update stats from pre-graded results and return weak topics + recommendation. Falls back on timeout."""
-    stats = _load_user_stats(user_id)
-    ensure_streak_structure(stats)
-    quiz_stats = stats.setdefault("quiz_stats", {})
-    topic_scores: dict[str, list[float]] = {}
-    total_score = 0.0
-    max_score = len(req.results) * 10.0 if req.results else 0.0
-    for r in req.results:
-        topic = r.get("topic", "General")
-        score = float(r.get("score", 0))
-        total_score += score
-        topic_scores.setdefault(topic, []).append(score)
-        total_attempted = int(quiz_stats.get("total_attempted", 0)) + 1
-        total_correct = int(quiz_stats.get("total_correct", 0)) + (1 if score >= 6.0 else 0)
-        prev_avg = float(quiz_stats.get("average_score", 0.0))
-        quiz_stats["total_attempted"] = total_attempted
-        quiz_stats["total_correct"] = total_correct
-        quiz_stats["average_score"] = round(((prev_avg * (total_attempted - 1)) + score) / total_attempted, 2)
-        by_topic = quiz_stats.setdefault("by_topic", {})
-        te = by_topic.setdefault(topic, {"attempts": 0, "avg_score": 0.0})
-        te["attempts"] = int(te.get("attempts", 0)) + 1
-        te["avg_score"] = round(((float(te.get("avg_score", 0)) * (te["attempts"] - 1)) + score) / te["attempts"], 2)
-    if max_score > 0:
-        _update_quiz_stats(stats, total_score, max_score)
-    _update_streak(stats)
-    _save_user_stats(stats, user_id)
+    with _user_stats_lock(user_id):
+        stats = _load_user_stats(user_id, ("quiz_stats.by_topic",))
+        ensure_streak_structure(stats)
+        quiz_stats = stats.setdefault("quiz_stats", {})
+        topic_scores: dict[str, list[float]] = {}
+        total_score = 0.0
+        max_score = len(req.results) * 10.0 if req.results else 0.0
+        for r in req.results:
+            topic = r.get("topic", "General")
+            score = float(r.get("score", 0))
+            total_score += score
+            topic_scores.setdefault(topic, []).append(score)
+            total_attempted = int(quiz_stats.get("total_attempted", 0)) + 1
+            total_correct = int(quiz_stats.get("total_correct", 0)) + (1 if score >= 6.0 else 0)
+            prev_avg = float(quiz_stats.get("average_score", 0.0))
+            quiz_stats["total_attempted"] = total_attempted
+            quiz_stats["total_correct"] = total_correct
+            quiz_stats["average_score"] = round(((prev_avg * (total_attempted - 1)) + score) / total_attempted, 2)
+            by_topic = quiz_stats.setdefault("by_topic", {})
+            te = by_topic.setdefault(topic, {"attempts": 0, "avg_score": 0.0})
+            te["attempts"] = int(te.get("attempts", 0)) + 1
+            te["avg_score"] = round(((float(te.get("avg_score", 0)) * (te["attempts"] - 1)) + score) / te["attempts"], 2)
+        if max_score > 0:
+            _update_quiz_stats(stats, total_score, max_score)
+        _update_streak(stats)
+        _save_user_stats(stats, user_id)
 
     weak_topics_text: Optional[str] = None
     recommendation_text: Optional[str] = None
@@ -4176,15 +4166,16 @@ def user_me(current_user: Annotated[User, Depends(get_current_user)]):
 def user_stats_get(current_user: Annotated[User, Depends(get_current_user)], user_id: str = Depends(get_user_id)):
     """Return user progress, streaks, preferences for the authenticated user.
     Reconciles flashcard_stats from actual deck data so Cards Mastered and Due reflect reality."""
-    stats = _load_user_stats(user_id)
-    ensure_streak_structure(stats)
-    ensure_flashcard_structure(stats)
-    decks = _load_flashcard_decks(user_id)
-    cards = _all_cards_from_decks(decks)
-    if cards:
-        update_flashcard_stats_from_cards(stats, cards)
-    _update_streak(stats)
-    _save_user_stats(stats, user_id)
+    with _user_stats_lock(user_id):
+        stats = _load_user_stats(user_id, ALL_SECTIONS)
+        ensure_streak_structure(stats)
+        ensure_flashcard_structure(stats)
+        decks = _load_flashcard_decks(user_id)
+        cards = _all_cards_from_decks(decks)
+        if cards:
+            update_flashcard_stats_from_cards(stats, cards)
+        _update_streak(stats)
+        _save_user_stats(stats, user_id)
     return stats
 
 
@@ -4268,7 +4259,7 @@ def _build_insights_from_stats(stats: dict[str, Any], user_id: str) -> dict[str,
             pass
 
     trend_points: list[float] = []
-    quiz_history = _load_quiz_history(user_id)
+    quiz_history, _ = _quiz_history(user_id).query(limit=10)
     if quiz_history:
         percents = []
         for r in quiz_history[:10]:
@@ -4343,7 +4334,7 @@ def insights_get(current_user: Annotated[User, Depends(get_current_user)], user_
     Return structured AI insights for the current user.
     Auth-protected. Uses real AI for weak-topic detection and study recommendation.
     """
-    stats = _load_user_stats(user_id)
+    stats = _load_user_stats(user_id, ("quiz_stats.by_topic",))
     ensure_streak_structure(stats)
     _update_streak(stats)
     result = _build_insights_from_stats(stats, user_id)
@@ -4356,13 +4347,14 @@ def insights_get(current_user: Annotated[User, Depends(get_current_user)], user_
 @app.put("/api/user/stats")
 def user_stats_put(stats: dict[str, Any], current_user: Annotated[User, Depends(get_current_user)], user_id: str = Depends(get_user_id)):
     """Update user progress/preferences for the authenticated user. Merges with existing."""
-    existing = _load_user_stats(user_id)
-    for key, value in stats.items():
-        if isinstance(value, dict) and isinstance(existing.get(key), dict):
-            existing[key] = {**existing[key], **value}
-        else:
-            existing[key] = value
-    _save_user_stats(existing, user_id)
+    with _user_stats_lock(user_id):
+        existing = _load_user_stats(user_id)
+        for key, value in stats.items():
+            if isinstance(value, dict) and isinstance(existing.get(key), dict):
+                existing[key] = {**existing[key], **value}
+            else:
+                existing[key] = value
+        _save_user_stats(existing, user_id)
     return {"ok": True}
 
 
@@ -4377,7 +4369,7 @@ def data_export(user_id: str = Depends(get_user_id)):
     Export all user stats, flashcards, and profile for the authenticated user.
     """
     from datetime import datetime, timezone
-    stats = _load_user_stats(user_id)
+    stats = _load_user_stats(user_id, ALL_SECTIONS)
     cards = _load_flashcards(user_id)
     profile = load_profile_for_user(user_id)
     payload = {
@@ -4399,7 +4391,7 @@ def data_clear(user_id: str = Depends(get_user_id)):
     """
     default = dict(_DEFAULT_STATS)
     default["user_id"] = user_id
-    _save_user_stats(default, user_id)
+    _save_user_stats(default, user_id, replace=True)
     _save_flashcards([], user_id)
     existing = load_profile_for_user(user_id)
     reset_profile = UserProfile(
@@ -4490,26 +4482,27 @@ def _get_conflict_engine(user_id: str):
 
 def _persist_resolved_entity(entity_type: str, entity_id: str, resolved_data: dict, user_id: str) -> None:
     """Persist resolved conflict data to local store based on entity type."""
-    stats = _load_user_stats(user_id)
-    et = (entity_type or "").lower()
-    if et in ("userstats", "user_stats") or entity_id in ("user_stats", "stats"):
-        _save_user_stats(resolved_data, user_id)
-    elif et in ("streakrecord", "streak"):
-        merged = dict(stats)
-        merged["streak"] = {**(stats.get("streak") or {}), **resolved_data}
-        _save_user_stats(merged, user_id)
-    elif et in ("quizstats", "quiz_stats"):
-        merged = dict(stats)
-        merged["quiz_stats"] = {**(stats.get("quiz_stats") or {}), **resolved_data}
-        _save_user_stats(merged, user_id)
-    else:
-        # Default: deep merge top-level keys into user_stats
-        for k, v in resolved_data.items():
-            if k in stats and isinstance(stats[k], dict) and isinstance(v, dict):
-                stats[k] = {**stats[k], **v}
-            else:
-                stats[k] = v
-        _save_user_stats(stats, user_id)
+    with _user_stats_lock(user_id):
+        stats = _load_user_stats(user_id)
+        et = (entity_type or "").lower()
+        if et in ("userstats", "user_stats") or entity_id in ("user_stats", "stats"):
+            _save_user_stats(resolved_data, user_id, replace=True)
+        elif et in ("streakrecord", "streak"):
+            merged = dict(stats)
+            merged["streak"] = {**(stats.get("streak") or {}), **resolved_data}
+            _save_user_stats(merged, user_id)
+        elif et in ("quizstats", "quiz_stats"):
+            merged = dict(stats)
+            merged["quiz_stats"] = {**(stats.get("quiz_stats") or {}), **resolved_data}
+            _save_user_stats(merged, user_id)
+        else:
+            # Default: deep merge top-level keys into user_stats
+            for k, v in resolved_data.items():
+                if k in stats and isinstance(stats[k], dict) and isinstance(v, dict):
+                    stats[k] = {**stats[k], **v}
+                else:
+                    stats[k] = v
+            _save_user_stats(stats, user_id)
 
 
 @app.post("/api/sync")
@@ -4552,6 +4545,7 @@ def sync_status(current_user: Annotated[User, Depends(get_current_user)], user_i
         "last_sync_timestamp": last_sync,
         "online": False,
         "queue": {"total": 0, "quiz_attempts": 0, "streak_updates": 0, "oldest_item": None},
+        "connectivity": None,
     }
 
     if not sync_enabled:
@@ -4561,6 +4555,7 @@ def sync_status(current_user: Annotated[User, Depends(get_current_user)], user_i
         from sync_manager import SyncManager
         sm = SyncManager(base_path=str(BASE_PATH), user_id=user_id)
         out["online"] = sm.check_connectivity()
+        out["connectivity"] = sm.connectivity.status()
         out["queue"] = sm.get_queue_summary()
     except Exception:
         pass
@@ -4643,11 +4638,13 @@ def _get_rag_vector_store():
 
 
 def _get_relevant_chunks_from_chromadb(
-    query: str, k: int = 5, source_filter: Optional[str] = None, max_chars: int = 12_000
+    query: str, k: int = 5, source_filter: Optional[str] = None, max_tokens: Optional[int] = None
 ) -> str:
     """
     Run semantic search over ChromaDB and return concatenated chunk text for use as source_content.
     If source_filter is set, only chunks from that textbook (source metadata) are returned.
+    Chunks are packed by rank into max_tokens (default: the model's prompt budget), with the
+    splitter's overlapping edges removed.
     Returns empty string if store unavailable or on error (caller can fall back to file-based flow).
     """
     if not query or not query.strip():
@@ -4663,18 +4660,10 @@ def _get_relevant_chunks_from_chromadb(
         docs = retriever.invoke(query.strip())
     except Exception:
         return ""
-    parts: list[str] = []
-    total = 0
-    for doc in docs or []:
-        content = (getattr(doc, "page_content", None) or str(doc)).strip()
-        if not content:
-            continue
-        if total + len(content) + 2 > max_chars:
-            parts.append(content[: max_chars - total - 2].rstrip())
-            break
-        parts.append(content)
-        total += len(content) + 2
-    return "\n\n".join(parts) if parts else ""
+    from rag.context_packer import GENERATION_RESERVE_TOKENS, MODEL_CONTEXT_TOKENS, pack_context
+    if max_tokens is None:
+        max_tokens = MODEL_CONTEXT_TOKENS - GENERATION_RESERVE_TOKENS
+    return pack_context(list(docs or []), max_tokens).text
 
 
 def _rag_search(query: str, k: int = 5) -> tuple[list[dict[str, Any]], Optional[str]]:
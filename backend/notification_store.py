@@ -0,0 +1,345 @@
+"""
+Studaxis — Notification Store (SQLite)
+═══════════════════════════════════════
+Notifications used to be one JSON list per user (data/notifications/{id}.json)
+that push, mark-read and delete each loaded and rewrote in full, with no
+bound on its size. They now live in data/notifications/notifications.db:
+
+  notifications(seq, user_id, id, type, title, message, tag, pinned, read,
+                timestamp, action, expires_at)   UNIQUE(user_id, id)
+  inboxes(user_id, unread, total)                counters, updated in the
+                                                 same transaction as the rows
+
+Mark-read and delete are single-row updates by (user_id, id); unread_count
+is one primary-key lookup. push_many() delivers one notification to many
+inboxes in a single transaction (class announcements, new assignments).
+
+Bounds: non-pinned notifications expire after TTL_DAYS
+(STUDAXIS_NOTIFICATION_TTL_DAYS, default 30; 0 = never) and each inbox keeps
+at most MAX_PER_USER (STUDAXIS_NOTIFICATION_MAX, default 200) non-pinned
+items, the oldest evicted first. Expired rows are purged when an inbox is
+read or written.
+
+A legacy {user_id}.json is imported the first time that inbox is touched
+and renamed to {user_id}.json.migrated.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+logger = logging.getLogger("studaxis.notifications")
+
+DB_FILE = "notifications.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS notifications (
+    seq        INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id    TEXT NOT NULL,
+    id         TEXT NOT NULL,
+    type       TEXT NOT NULL DEFAULT 'info',
+    title      TEXT NOT NULL,
+    message    TEXT,
+    tag        TEXT,
+    pinned     INTEGER NOT NULL DEFAULT 0,
+    read       INTEGER NOT NULL DEFAULT 0,
+    timestamp  TEXT NOT NULL,
+    action     TEXT,
+    expires_at TEXT,
+    UNIQUE (user_id, id)
+);
+CREATE INDEX IF NOT EXISTS ix_notifications_expiry ON notifications (user_id, expires_at);
+CREATE TABLE IF NOT EXISTS inboxes (
+    user_id TEXT PRIMARY KEY,
+    unread  INTEGER NOT NULL DEFAULT 0,
+    total   INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+_COLUMNS = "id, type, title, message, tag, pinned, read, timestamp, action"
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _row_to_dict(row: tuple) -> dict[str, Any]:
+    nid, ntype, title, message, tag, pinned, read, timestamp, action = row
+    return {
+        "id": nid,
+        "type": ntype,
+        "title": title,
+        "message": message,
+        "tag": tag,
+        "pinned": bool(pinned),
+        "read": bool(read),
+        "timestamp": timestamp,
+        "action": json.loads(action) if action else None,
+    }
+
+
+class NotificationStore:
+    """All users' notifications in one SQLite database; one connection guarded by a lock."""
+
+    TTL_DAYS = int(os.environ.get("STUDAXIS_NOTIFICATION_TTL_DAYS", "30"))
+    MAX_PER_USER = int(os.environ.get("STUDAXIS_NOTIFICATION_MAX", "200"))
+
+    def __init__(
+        self,
+        directory: Path,
+        ttl_days: Optional[int] = None,
+        max_per_user: Optional[int] = None,
+    ) -> None:
+        self.directory = Path(directory)
+        self.db_path = self.directory / DB_FILE
+        if ttl_days is not None:
+            self.TTL_DAYS = ttl_days
+        if max_per_user is not None:
+            self.MAX_PER_USER = max_per_user
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._known: set[str] = set()  # inboxes that exist (legacy file already imported)
+
+    # ── connection / inboxes ─────────────────────────────────────────
+
+    def _db(self) -> sqlite3.Connection:
+        """Open (or reopen after the file vanished) the database. Caller holds the lock."""
+        if self._conn is not None and self.db_path.exists():
+            return self._conn
+        if self._conn is not None:
+            self._conn.close()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        self._conn = conn
+        self._known = set()
+        return conn
+
+    def _ensure_inboxes(self, conn: sqlite3.Connection, user_ids: Iterable[str]) -> None:
+        """Create missing inbox rows, importing legacy JSON files. Caller holds the lock, inside a transaction."""
+        missing = [u for u in user_ids if u not in self._known]
+        for user_id in missing:
+            if conn.execute("SELECT 1 FROM inboxes WHERE user_id = ?", (user_id,)).fetchone() is None:
+                conn.execute("INSERT INTO inboxes (user_id, unread, total) VALUES (?, 0, 0)", (user_id,))
+                self._import_legacy(conn, user_id)
+            self._known.add(user_id)
+
+    def _import_legacy(self, conn: sqlite3.Connection, user_id: str) -> None:
+        path = self.directory / f"{user_id}.json"
+        if not path.is_file():
+            return
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning("Could not import %s: %s", path, e)
+            return
+        if isinstance(data, dict):
+            data = data.get("notifications")
+        items = [n for n in data if isinstance(n, dict) and n.get("id")] if isinstance(data, list) else []
+        for n in reversed(items):  # the legacy list is newest first
+            self._insert(conn, user_id, n)
+        self._evict(conn, [user_id])
+        try:
+            path.replace(path.with_name(path.name + ".migrated"))
+        except OSError as e:
+            logger.warning("Could not retire %s: %s", path, e)
+        logger.info("Imported %d notification(s) for %s", len(items), user_id)
+
+    # ── writers ──────────────────────────────────────────────────────
+
+    def _insert(self, conn: sqlite3.Connection, user_id: str, n: dict[str, Any]) -> None:
+        pinned = bool(n.get("pinned"))
+        read = bool(n.get("read"))
+        expires_at = None
+        if self.TTL_DAYS > 0 and not pinned:
+            try:
+                ts = datetime.fromisoformat(str(n.get("timestamp")))
+            except ValueError:
+                ts = _now()
+            if ts.tzinfo is None:
+                ts = ts.replace(tzinfo=timezone.utc)
+            expires_at = (ts + timedelta(days=self.TTL_DAYS)).astimezone(timezone.utc).isoformat()
+        cur = conn.execute(
+            "INSERT OR IGNORE INTO notifications "
+            "(user_id, id, type, title, message, tag, pinned, read, timestamp, action, expires_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                user_id, str(n["id"]), n.get("type") or "info", str(n.get("title") or ""),
+                n.get("message"), n.get("tag"), int(pinned), int(read),
+                str(n.get("timestamp") or _now().isoformat()),
+                json.dumps(n["action"], ensure_ascii=False) if n.get("action") else None,
+                expires_at,
+            ),
+        )
+        if cur.rowcount:
+            conn.execute(
+                "UPDATE inboxes SET total = total + 1, unread = unread + ? WHERE user_id = ?",
+                (0 if read else 1, user_id),
+            )
+
+    def _delete_where(self, conn: sqlite3.Connection, where: str, params: tuple) -> int:
+        """Delete matching rows and take them off their inbox counters. Caller is inside a transaction."""
+        counts = conn.execute(
+            f"SELECT user_id, COUNT(*), SUM(1 - read) FROM notifications WHERE {where} GROUP BY user_id",
+            params,
+        ).fetchall()
+        if not counts:
+            return 0
+        conn.execute(f"DELETE FROM notifications WHERE {where}", params)
+        conn.executemany(
+            "UPDATE inboxes SET total = total - ?, unread = unread - ? WHERE user_id = ?",
+            [(total, unread, user_id) for user_id, total, unread in counts],
+        )
+        return sum(total for _, total, _ in counts)
+
+    def _purge_expired(self, conn: sqlite3.Connection, user_id: str) -> None:
+        if self.TTL_DAYS <= 0:
+            return
+        self._delete_where(conn, "user_id = ? AND expires_at < ?", (user_id, _now().isoformat()))
+
+    def _evict(self, conn: sqlite3.Connection, user_ids: list[str]) -> None:
+        """Keep at most MAX_PER_USER non-pinned notifications per inbox (oldest go first)."""
+        if self.MAX_PER_USER <= 0 or not user_ids:
+            return
+        placeholders = ",".join("?" * len(user_ids))
+        over = conn.execute(
+            f"SELECT user_id FROM inboxes WHERE user_id IN ({placeholders}) AND total > ?",
+            (*user_ids, self.MAX_PER_USER),
+        ).fetchall()
+        for (user_id,) in over:
+            self._delete_where(
+                conn,
+                "seq IN (SELECT seq FROM notifications WHERE user_id = ? AND pinned = 0 "
+                "ORDER BY seq DESC LIMIT -1 OFFSET ?)",
+                (user_id, self.MAX_PER_USER),
+            )
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Store lock + BEGIN IMMEDIATE … COMMIT (ROLLBACK on error)."""
+        with self._lock:
+            conn = self._db()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                self._known.clear()  # inbox rows created in this transaction are gone
+                raise
+            conn.execute("COMMIT")
+
+    def push_many(self, user_ids: Iterable[str], fields: dict[str, Any]) -> list[dict[str, Any]]:
+        """Deliver one notification to every user in a single transaction. Returns the created items."""
+        recipients = list(dict.fromkeys(u for u in user_ids if u))
+        if not recipients:
+            return []
+        ts = _now().isoformat()
+        created = []
+        with self._transaction() as conn:
+            self._ensure_inboxes(conn, recipients)
+            for user_id in recipients:
+                notif = {
+                    "id": str(uuid.uuid4()),
+                    "type": fields.get("type") or "info",
+                    "title": fields.get("title"),
+                    "message": fields.get("message"),
+                    "tag": fields.get("tag"),
+                    "pinned": bool(fields.get("pinned")),
+                    "read": False,
+                    "timestamp": ts,
+                    "action": fields.get("action"),
+                }
+                self._insert(conn, user_id, notif)
+                created.append(notif)
+            self._evict(conn, recipients)
+        return created
+
+    def push(self, user_id: str, fields: dict[str, Any]) -> dict[str, Any]:
+        return self.push_many([user_id], fields)[0]
+
+    def mark_read(self, user_id: str, notif_id: str) -> bool:
+        """Mark one notification read; False if it does not exist."""
+        with self._transaction() as conn:
+            self._ensure_inboxes(conn, [user_id])
+            row = conn.execute(
+                "SELECT read FROM notifications WHERE user_id = ? AND id = ?", (user_id, notif_id)
+            ).fetchone()
+            if row is None:
+                return False
+            if not row[0]:
+                conn.execute("UPDATE notifications SET read = 1 WHERE user_id = ? AND id = ?", (user_id, notif_id))
+                conn.execute("UPDATE inboxes SET unread = unread - 1 WHERE user_id = ?", (user_id,))
+            return True
+
+    def delete(self, user_id: str, notif_id: str) -> bool:
+        """Remove one notification; False if it does not exist."""
+        with self._transaction() as conn:
+            self._ensure_inboxes(conn, [user_id])
+            return self._delete_where(conn, "user_id = ? AND id = ?", (user_id, notif_id)) > 0
+
+    def clear(self, user_id: str) -> int:
+        """Remove every non-pinned notification. Returns how many were removed."""
+        with self._transaction() as conn:
+            self._ensure_inboxes(conn, [user_id])
+            return self._delete_where(conn, "user_id = ? AND pinned = 0", (user_id,))
+
+    # ── readers ──────────────────────────────────────────────────────
+
+    def list(
+        self,
+        user_id: str,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        unread_only: bool = False,
+    ) -> tuple[list[dict[str, Any]], int, int]:
+        """(page newest first, total, unread) for one inbox."""
+        with self._transaction() as conn:
+            self._ensure_inboxes(conn, [user_id])
+            self._purge_expired(conn, user_id)
+            sql = f"SELECT {_COLUMNS} FROM notifications WHERE user_id = ?"
+            if unread_only:
+                sql += " AND read = 0"
+            sql += " ORDER BY seq DESC LIMIT ? OFFSET ?"
+            rows = conn.execute(sql, (user_id, -1 if limit is None else limit, max(0, offset))).fetchall()
+            unread, total = conn.execute(
+                "SELECT unread, total FROM inboxes WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return [_row_to_dict(r) for r in rows], total, unread
+
+    def unread_count(self, user_id: str) -> int:
+        """Unread notifications in one inbox (a counter lookup)."""
+        with self._transaction() as conn:
+            self._ensure_inboxes(conn, [user_id])
+            self._purge_expired(conn, user_id)
+            return conn.execute("SELECT unread FROM inboxes WHERE user_id = ?", (user_id,)).fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_stores: dict[str, NotificationStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_notification_store(directory: Path) -> NotificationStore:
+    """Process-wide store per notifications directory (one SQLite connection)."""
+    key = os.path.abspath(directory)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = NotificationStore(Path(directory))
+        return store
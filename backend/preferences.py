@@ -1,19 +1,20 @@
 """
 Studaxis — User Preferences Persistence
 ════════════════════════════════════════
-Load and save user preferences to user_stats.json.
+Load and save user preferences to user_stats.json (hot summary; cold
+sections such as chat_history live in stats/, see user_stats_store).
 Shared by dashboard and settings pages.
 """
 
 from __future__ import annotations
 
-import json
-from pathlib import Path
 from typing import Any
 
 from path_config import get_data_dir
+from user_stats_store import ALL_SECTIONS, UserStatsStore
 
 _STATS_FILE = get_data_dir() / "user_stats.json"
+_STORE = UserStatsStore(_STATS_FILE.parent)
 
 _DEFAULT_STATS: dict[str, Any] = {
     "user_id": "student_001",
@@ -39,15 +40,10 @@ _DEFAULT_STATS: dict[str, Any] = {
 
 
 def load_user_stats() -> dict[str, Any]:
-    """Load user_stats.json; return safe defaults on any error."""
-    try:
-        if _STATS_FILE.exists():
-            raw = _STATS_FILE.read_text(encoding="utf-8")
-            data = json.loads(raw)
-            if isinstance(data, dict):
-                return data
-    except (OSError, json.JSONDecodeError):
-        pass
+    """Load user stats (hot summary + cold sections); return safe defaults on any error."""
+    data = _STORE.load(ALL_SECTIONS)
+    if data is not None:
+        return data
     result = _DEFAULT_STATS.copy()
     # Ensure preferences dict has all keys
     prefs = result.get("preferences") or {}
@@ -63,14 +59,13 @@ def load_user_stats() -> dict[str, Any]:
 def save_preference(key: str, value: Any) -> None:
     """Persist a single preference to user_stats.json preferences."""
     try:
-        stats = load_user_stats()
-        if "preferences" not in stats or not isinstance(stats["preferences"], dict):
-            stats["preferences"] = {}
-        stats["preferences"][key] = value
-        tmp = _STATS_FILE.with_suffix(".tmp")
         _STATS_FILE.parent.mkdir(parents=True, exist_ok=True)
-        tmp.write_text(json.dumps(stats, indent=2, ensure_ascii=False), encoding="utf-8")
-        tmp.replace(_STATS_FILE)
+        with _STORE.lock():
+            stats = _STORE.load(default=_DEFAULT_STATS)
+            if "preferences" not in stats or not isinstance(stats["preferences"], dict):
+                stats["preferences"] = {}
+            stats["preferences"][key] = value
+            _STORE.save(stats)
     except OSError:
         pass
 
@@ -0,0 +1,213 @@
+"""
+Studaxis — Quiz Attempt History (indexed)
+══════════════════════════════════════════
+/api/quiz/history used to list data/quizzes/{user_id}/ and JSON-parse every
+*_result.json on every call. Attempts are now indexed:
+
+  data/quizzes/{user_id}/
+    {quiz_id}.json                  quiz definitions (unchanged)
+    attempts.jsonl                  one summary line per attempt (append-only)
+    results/{quiz_id}_{attempt}.json  full result (answers), read on demand
+
+A summary carries attempt_id, quiz_id, subject, question_type, score,
+max_score, percent, completed_at and the result file name, so history
+pages, subject/date filters and the insights trend never open a result
+file. The index is replayed once per process and kept in memory; it is
+re-read only when the file changes underneath us.
+
+Result files from before the index (flat {quiz_id}_{attempt}_result.json)
+are indexed in place the first time a user's history is touched.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import threading
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger("studaxis.quiz_history")
+
+INDEX_FILE = "attempts.jsonl"
+RESULTS_DIR = "results"
+SUMMARY_FIELDS = ("quiz_id", "subject", "question_type", "score", "max_score", "percent", "completed_at")
+
+_LEGACY_RESULT = re.compile(r"^(?P<quiz_id>.+)_(?P<attempt_id>\d+_[0-9a-f]{8})_result$")
+
+
+def _stamp(path: Path) -> Optional[tuple]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def summarize(attempt_id: str, result: dict[str, Any], file: str) -> dict[str, Any]:
+    """Index line for one attempt: the result's summary fields, without answers."""
+    summary = {"attempt_id": attempt_id}
+    for key in SUMMARY_FIELDS:
+        summary[key] = result.get(key)
+    summary["file"] = file
+    return summary
+
+
+class QuizHistoryStore:
+    """Per-user quiz attempt index with lazily loaded full results."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = Path(directory)
+        self.index_path = self.directory / INDEX_FILE
+        self.results_dir = self.directory / RESULTS_DIR
+        self._lock = threading.RLock()
+        self._stamp: Optional[tuple] = None
+        self._attempts: list[dict[str, Any]] = []  # newest first
+        self._by_id: dict[str, dict[str, Any]] = {}
+        self._loaded = False
+
+    # ── index ────────────────────────────────────────────────────────
+
+    def _ensure_loaded(self) -> None:
+        """Replay attempts.jsonl (building it from legacy result files if absent). Caller holds the lock."""
+        stamp = _stamp(self.index_path)
+        if self._loaded and stamp == self._stamp:
+            return
+        if stamp is None:
+            self._build_from_legacy()
+            stamp = _stamp(self.index_path)
+        attempts: list[dict[str, Any]] = []
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        summary = json.loads(line)
+                    except json.JSONDecodeError:
+                        logger.warning("Skipping corrupt line in %s", self.index_path)
+                        continue
+                    if isinstance(summary, dict) and summary.get("attempt_id"):
+                        attempts.append(summary)
+        except OSError:
+            pass
+        self._set_attempts(attempts)
+        self._stamp = stamp
+        self._loaded = True
+
+    def _set_attempts(self, attempts: list[dict[str, Any]]) -> None:
+        # append order is chronological; a stable sort keeps it for equal timestamps
+        attempts.sort(key=lambda a: str(a.get("completed_at") or ""), reverse=True)
+        self._attempts = attempts
+        self._by_id = {a["attempt_id"]: a for a in attempts}
+
+    def _build_from_legacy(self) -> None:
+        """Index flat *_result.json files left by earlier versions (one pass, then never again)."""
+        lines = []
+        if self.directory.is_dir():
+            for p in sorted(self.directory.glob("*_result.json")):
+                m = _LEGACY_RESULT.match(p.stem)
+                attempt_id = m.group("attempt_id") if m else p.stem
+                try:
+                    data = json.loads(p.read_text(encoding="utf-8"))
+                except (OSError, json.JSONDecodeError):
+                    continue
+                if isinstance(data, dict):
+                    lines.append(json.dumps(summarize(attempt_id, data, p.name), ensure_ascii=False))
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp = self.index_path.with_suffix(".tmp")
+            tmp.write_text("".join(line + "\n" for line in lines), encoding="utf-8")
+            tmp.replace(self.index_path)
+        except OSError as e:
+            logger.warning("Could not write quiz index %s: %s", self.index_path, e)
+            return
+        if lines:
+            logger.info("Indexed %d legacy quiz result(s) in %s", len(lines), self.directory)
+
+    # ── writers ──────────────────────────────────────────────────────
+
+    def record(self, quiz_id: str, result: dict[str, Any]) -> str:
+        """Store a full result and append its summary to the index. Returns attempt_id."""
+        attempt_id = f"{int(datetime.now(timezone.utc).timestamp())}_{uuid.uuid4().hex[:8]}"
+        safe_quiz = re.sub(r"[^a-zA-Z0-9_-]", "_", str(quiz_id))[:64] or "quiz"
+        file = f"{RESULTS_DIR}/{safe_quiz}_{attempt_id}.json"
+        with self._lock:
+            self._ensure_loaded()
+            path = self.directory / file
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
+            tmp.replace(path)
+            summary = summarize(attempt_id, result, file)
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(summary, ensure_ascii=False) + "\n")
+            self._set_attempts([summary] + self._attempts)
+            self._stamp = _stamp(self.index_path)
+        return attempt_id
+
+    # ── readers ──────────────────────────────────────────────────────
+
+    def query(
+        self,
+        subject: Optional[str] = None,
+        quiz_id: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> tuple[list[dict[str, Any]], int]:
+        """
+        (page of summaries newest first, total matching). since/until are ISO
+        dates or datetimes; a date-only `until` includes that whole day.
+        """
+        subject_key = subject.strip().lower() if subject and subject.strip() else None
+        with self._lock:
+            self._ensure_loaded()
+            matches = [
+                a for a in self._attempts
+                if (subject_key is None or str(a.get("subject") or "").lower() == subject_key)
+                and (quiz_id is None or a.get("quiz_id") == quiz_id)
+                and (not since or str(a.get("completed_at") or "") >= since)
+                and (not until or str(a.get("completed_at") or "")[:len(until)] <= until)
+            ]
+        offset = max(0, offset)
+        page = matches[offset:offset + limit] if limit is not None else matches[offset:]
+        return [{k: v for k, v in a.items() if k != "file"} for a in page], len(matches)
+
+    def load_result(self, attempt_id: str) -> Optional[dict[str, Any]]:
+        """Full result (with answers) for one attempt; None if unknown or unreadable."""
+        with self._lock:
+            self._ensure_loaded()
+            summary = self._by_id.get(attempt_id)
+        if summary is None:
+            return None
+        path = (self.directory / str(summary.get("file") or "")).resolve()
+        if self.directory.resolve() not in path.parents:
+            return None
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return None
+        if isinstance(data, dict):
+            data.setdefault("attempt_id", attempt_id)
+            return data
+        return None
+
+
+_stores: dict[str, QuizHistoryStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_quiz_history_store(directory: Path) -> QuizHistoryStore:
+    """Process-wide store per user quiz directory (the index is replayed only once)."""
+    key = os.path.abspath(directory)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = QuizHistoryStore(Path(directory))
+        return store
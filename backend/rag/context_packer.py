@@ -0,0 +1,205 @@
+"""
+Token-budgeted context packing for RAG prompts.
+
+Token budgets are estimated: a word/punctuation count that tracks Llama-style
+BPE far better than a flat chars-per-token ratio, but is not exact. Neither
+the installer nor requirements.txt ships a tokenizer (Ollama keeps it inside
+the GGUF model), so exact counting only happens when an operator provides a
+tokenizer.json (STUDAXIS_TOKENIZER_PATH or data/tokenizer/) and installs the
+`tokenizers` package; it is then loaded once per process. Budgets keep a
+safety margin (context_budget) for the estimate's error.
+
+pack_context() fills a token budget greedily by retrieval score, drops chunks
+already contained in the packed text and strips the prefix that the
+RecursiveCharacterTextSplitter overlap (100 chars) repeats between neighbours.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import os
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Optional, Sequence
+
+logger = logging.getLogger("studaxis.context_packer")
+
+_BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Context window used for budgeting (llama3.2:3b, conservative) and generation reserve.
+MODEL_CONTEXT_TOKENS = int(os.environ.get("STUDAXIS_MODEL_CONTEXT_TOKENS", "3800"))
+GENERATION_RESERVE_TOKENS = 512
+
+# Splitter overlap is 100 chars; allow some slack for whitespace trimming.
+_MIN_OVERLAP_CHARS = 20
+_MAX_OVERLAP_CHARS = 160
+
+_WORD_RE = re.compile(r"[A-Za-z]+|\d|[^\sA-Za-z\d]")
+
+
+@lru_cache(maxsize=1)
+def _load_tokenizer() -> Optional[Any]:
+    """Load tokenizer.json once. Looks at STUDAXIS_TOKENIZER_PATH, then data/tokenizer/."""
+    candidates = []
+    env_path = os.environ.get("STUDAXIS_TOKENIZER_PATH")
+    if env_path:
+        candidates.append(Path(env_path))
+    candidates.append(_BACKEND_DIR / "data" / "tokenizer" / "tokenizer.json")
+    path = next((p for p in candidates if p.is_file()), None)
+    if path is None:
+        return None
+    try:
+        from tokenizers import Tokenizer  # type: ignore[import-not-found]
+        tok = Tokenizer.from_file(str(path))
+        logger.info("Loaded tokenizer from %s", path)
+        return tok
+    except Exception as e:
+        logger.warning("Tokenizer unavailable (%s); using estimate", e)
+        return None
+
+
+def _estimate_tokens(text: str) -> int:
+    """BPE-like estimate: one token per short word/digit/symbol, long words split every ~6 chars."""
+    total = 0
+    for piece in _WORD_RE.findall(text):
+        total += 1 if len(piece) <= 6 else math.ceil(len(piece) / 6)
+    return total
+
+
+# Retrieved chunks (600 chars) repeat across requests; long documents are counted uncached.
+_CACHEABLE_CHARS = 2048
+
+
+def count_tokens(text: str) -> int:
+    """Token count for `text` using the local tokenizer when available."""
+    if not text:
+        return 0
+    if len(text) <= _CACHEABLE_CHARS:
+        return _count_tokens_cached(text)
+    return _count_tokens(text)
+
+
+@lru_cache(maxsize=4096)
+def _count_tokens_cached(text: str) -> int:
+    return _count_tokens(text)
+
+
+def _count_tokens(text: str) -> int:
+    tok = _load_tokenizer()
+    if tok is not None:
+        try:
+            return len(tok.encode(text, add_special_tokens=False).ids)
+        except Exception:
+            pass
+    return _estimate_tokens(text)
+
+
+def clip_to_tokens(text: str, max_tokens: int, marker: str = "") -> str:
+    """Longest prefix of `text` within `max_tokens`, cut at a sentence or word boundary."""
+    if max_tokens <= 0 or not text:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if count_tokens(text[:mid]) <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    clipped = text[:lo]
+    cut = max(clipped.rfind(". "), clipped.rfind("\n"))
+    if cut < len(clipped) // 2:
+        cut = clipped.rfind(" ")
+    if cut > 0:
+        clipped = clipped[: cut + 1]
+    return clipped.rstrip() + marker
+
+
+def context_budget(
+    prompt_skeleton: str,
+    *,
+    context_tokens: int = MODEL_CONTEXT_TOKENS,
+    reserve_tokens: int = GENERATION_RESERVE_TOKENS,
+    safety_tokens: int = 32,
+) -> int:
+    """Tokens left for retrieved context once the fixed prompt and generation reserve are paid for."""
+    return max(0, context_tokens - reserve_tokens - safety_tokens - count_tokens(prompt_skeleton))
+
+
+def _strip_overlap(selected: Sequence[str], text: str) -> str:
+    """Remove a head or tail of `text` that duplicates the edge of an already selected chunk."""
+    for prev in selected:
+        upper = min(_MAX_OVERLAP_CHARS, len(prev), len(text))
+        for k in range(upper, _MIN_OVERLAP_CHARS - 1, -1):
+            if prev[-k:] == text[:k]:
+                return text[k:].lstrip()
+            if text[-k:] == prev[:k]:
+                return text[:-k].rstrip()
+    return text
+
+
+@dataclass
+class PackedContext:
+    text: str
+    tokens: int
+    chunks: list[str] = field(default_factory=list)
+    dropped: int = 0
+
+
+def pack_context(
+    chunks: Sequence[Any],
+    budget_tokens: int,
+    *,
+    scores: Optional[Sequence[float]] = None,
+    separator: str = "\n\n",
+    min_chunk_chars: int = 20,
+    text_of: Callable[[Any], str] = lambda c: getattr(c, "page_content", c) if not isinstance(c, str) else c,
+) -> PackedContext:
+    """
+    Pack retrieved chunks (strings or LangChain Documents) into `budget_tokens`.
+
+    Chunks are taken in descending score order (retrieval rank when no scores
+    are given); a chunk that does not fit is skipped so smaller, lower-ranked
+    ones can still use the remaining budget. If not even the best chunk fits,
+    it is clipped to the budget. Output keeps the chosen chunks in rank order.
+    """
+    order = list(range(len(chunks)))
+    if scores is not None:
+        order.sort(key=lambda i: -float(scores[i]) if i < len(scores) else 0.0)
+
+    sep_tokens = count_tokens(separator) if separator.strip() else 0
+    selected: list[str] = []
+    used = 0
+    dropped = 0
+    for i in order:
+        raw = (text_of(chunks[i]) or "").strip()
+        if len(raw) < min_chunk_chars:
+            dropped += 1
+            continue
+        if any(raw in s for s in selected):
+            dropped += 1
+            continue
+        text = _strip_overlap(selected, raw)
+        if len(text) < min_chunk_chars:
+            dropped += 1
+            continue
+        cost = count_tokens(text) + (sep_tokens if selected else 0)
+        if used + cost > budget_tokens:
+            dropped += 1
+            continue
+        selected.append(text)
+        used += cost
+
+    if not selected and order and budget_tokens > 0:
+        best = (text_of(chunks[order[0]]) or "").strip()
+        clipped = clip_to_tokens(best, budget_tokens)
+        if clipped:
+            selected.append(clipped)
+            used = count_tokens(clipped)
+            dropped = max(0, dropped - 1)
+
+    return PackedContext(text=separator.join(selected), tokens=used, chunks=selected, dropped=dropped)
@@ -0,0 +1,366 @@
+"""
+Chapter / section index for textbooks.
+
+Built at index time (ai_chat.vector) from, in order of preference:
+  - the PDF outline (bookmarks): depth 0 = chapter, depth 1 = section
+  - heading detection on page text ("Chapter 3 ...", "Unit IV", "3.2 Momentum")
+  - slide titles for PPTX decks
+
+Each section records its page range; annotate_chunks() tags split chunks with
+chapter/section ids (Chroma metadata) and records chunk ranges, so
+chapter-scoped generation can fetch exactly that section's chunks with a
+metadata filter. Indexes are saved as data/textbook_index/<source>.json.
+"""
+
+from __future__ import annotations
+
+import difflib
+import json
+import logging
+import re
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+logger = logging.getLogger("studaxis.structure_index")
+
+INDEX_VERSION = 1
+
+_CHAPTER_RE = re.compile(
+    r"^(?:chapter|unit|module|part|lesson)\s+([0-9]{1,3}|[ivxlc]{1,6})\b[\s:.\-–—]*(.{0,100})$",
+    re.IGNORECASE,
+)
+_NUMBERED_RE = re.compile(r"^(\d{1,2})(?:\.(\d{1,2}))?\.?\s+([A-Z][^\n]{2,80})$")
+_TOC_TAIL_RE = re.compile(r"(?:\.{2,}|\s)\s*\d{1,4}$")
+_ROMAN = {"i": 1, "v": 5, "x": 10, "l": 50, "c": 100}
+
+
+@dataclass
+class Section:
+    id: int
+    title: str
+    level: int  # 1 = chapter, 2 = section
+    page_start: int  # 0-based, inclusive
+    page_end: int = 0  # exclusive
+    char_start: int = 0  # heading offset within page_start
+    chapter_id: int = 0  # enclosing chapter (self for chapters)
+    chunk_start: Optional[int] = None
+    chunk_end: Optional[int] = None  # exclusive
+
+
+@dataclass
+class TextbookStructure:
+    source: str
+    content_hash: str
+    page_count: int
+    method: str  # outline | headings | slides | none
+    sections: list[Section] = field(default_factory=list)
+
+    def chapters(self) -> list[Section]:
+        return [s for s in self.sections if s.level == 1]
+
+    def locate(self, page: int, offset: int = 0) -> tuple[Optional[Section], Optional[Section]]:
+        """(chapter, section) containing position (page, char offset)."""
+        chapter: Optional[Section] = None
+        section: Optional[Section] = None
+        pos = (page, offset)
+        for s in self.sections:
+            if (s.page_start, s.char_start) > pos:
+                break
+            if s.level == 1:
+                chapter, section = s, None
+            else:
+                section = s
+        return chapter, section
+
+    def find(self, query: str) -> Optional[Section]:
+        """Resolve free-text like 'Chapter 3', '3.2', 'Newton's laws' to a section."""
+        q = _normalize(query)
+        if not q or not self.sections:
+            return None
+        m = re.match(r"^(?:chapter|unit|module|part|lesson|ch)?\s*([0-9]{1,3}|[ivxlc]{1,6})(?:\.(\d{1,2}))?$", q)
+        if m:
+            num = _to_int(m.group(1))
+            sub = int(m.group(2)) if m.group(2) else None
+            for s in self.sections:
+                t = _normalize(s.title)
+                nums = re.match(r"^(?:chapter|unit|module|part|lesson)?\s*([0-9]{1,3}|[ivxlc]{1,6})(?:\.(\d{1,2}))?\b", t)
+                if not nums or _to_int(nums.group(1)) != num:
+                    continue
+                s_sub = int(nums.group(2)) if nums.group(2) else None
+                if s_sub == sub:
+                    return s
+            if sub is None:
+                chapters = self.chapters()
+                if 1 <= num <= len(chapters):
+                    return chapters[num - 1]
+        for s in self.sections:
+            if q == _normalize(s.title) or q in _normalize(s.title):
+                return s
+        best, best_ratio = None, 0.0
+        for s in self.sections:
+            ratio = difflib.SequenceMatcher(None, q, _normalize(s.title)).ratio()
+            if ratio > best_ratio:
+                best, best_ratio = s, ratio
+        return best if best_ratio >= 0.6 else None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "version": INDEX_VERSION,
+            "source": self.source,
+            "content_hash": self.content_hash,
+            "page_count": self.page_count,
+            "method": self.method,
+            "sections": [asdict(s) for s in self.sections],
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict[str, Any]) -> "TextbookStructure":
+        return cls(
+            source=d.get("source", ""),
+            content_hash=d.get("content_hash", ""),
+            page_count=int(d.get("page_count", 0)),
+            method=d.get("method", "none"),
+            sections=[Section(**s) for s in d.get("sections", [])],
+        )
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s.]", " ", (text or "").lower())).strip()
+
+
+def _to_int(token: str) -> int:
+    token = token.lower()
+    if token.isdigit():
+        return int(token)
+    total, prev = 0, 0
+    for ch in reversed(token):
+        val = _ROMAN.get(ch, 0)
+        total = total - val if val < prev else total + val
+        prev = max(prev, val)
+    return total
+
+
+# ═══════════════════════════════════════════════════════════════
+# Detection
+# ═══════════════════════════════════════════════════════════════
+
+def _outline_sections(path: Path) -> list[Section]:
+    try:
+        from PyPDF2 import PdfReader
+        reader = PdfReader(str(path))
+        outline = reader.outline
+    except Exception as e:
+        logger.debug("No PDF outline for %s: %s", path.name, e)
+        return []
+    out: list[Section] = []
+
+    def walk(items: Sequence[Any], depth: int) -> None:
+        for item in items:
+            if isinstance(item, list):
+                if depth < 1:
+                    walk(item, depth + 1)
+                continue
+            try:
+                page = reader.get_destination_page_number(item)
+                title = str(getattr(item, "title", "") or "").strip()
+            except Exception:
+                continue
+            if title and page is not None and page >= 0:
+                out.append(Section(id=0, title=title, level=depth + 1, page_start=page))
+
+    walk(outline or [], 0)
+    return out
+
+
+def _heading_sections(pages: Sequence[str]) -> list[Section]:
+    chapters: list[Section] = []
+    numbered: list[tuple[Section, int, Optional[int]]] = []
+    for page_no, text in enumerate(pages):
+        page_chapters: list[Section] = []
+        offset = 0
+        for raw_line in (text or "").splitlines(keepends=True):
+            line = raw_line.strip()
+            line_offset = offset + (len(raw_line) - len(raw_line.lstrip()))
+            offset += len(raw_line)
+            if not line or len(line) > 100 or _TOC_TAIL_RE.search(line):
+                continue
+            m = _CHAPTER_RE.match(line)
+            if m:
+                page_chapters.append(Section(id=0, title=line, level=1, page_start=page_no, char_start=line_offset))
+                continue
+            m = _NUMBERED_RE.match(line)
+            if m and len(line.split()) <= 12 and not line.endswith((".", ",", ";")):
+                sec = Section(id=0, title=line, level=2 if m.group(2) else 1, page_start=page_no, char_start=line_offset)
+                numbered.append((sec, int(m.group(1)), int(m.group(2)) if m.group(2) else None))
+        # A page listing several chapter headings is a table of contents, not a chapter start.
+        if len(page_chapters) < 3:
+            chapters.extend(page_chapters)
+
+    sections: list[Section] = list(chapters)
+    # Numbered headings: keep only monotonically increasing ones, and ignore pages with
+    # several top-level numbers (numbered lists in body text, contents pages).
+    top_level_per_page: dict[int, int] = {}
+    for sec, _, minor in numbered:
+        if minor is None:
+            top_level_per_page[sec.page_start] = top_level_per_page.get(sec.page_start, 0) + 1
+    last_major, last_minor = 0, 0
+    for sec, major, minor in numbered:
+        if minor is None:
+            if chapters or major != last_major + 1 or top_level_per_page[sec.page_start] > 1:
+                continue
+            last_major, last_minor = major, 0
+            sections.append(sec)
+        else:
+            if major < last_major or (major == last_major and minor <= last_minor):
+                continue
+            if not chapters and major != last_major:
+                continue
+            last_major, last_minor = major, minor
+            sections.append(sec)
+    sections.sort(key=lambda s: (s.page_start, s.char_start))
+    return sections
+
+
+def _slide_sections(path: Path) -> list[Section]:
+    try:
+        from pptx import Presentation
+        prs = Presentation(str(path))
+    except Exception as e:
+        logger.debug("Slide titles unavailable for %s: %s", path.name, e)
+        return []
+    sections: list[Section] = []
+    previous = None
+    for idx, slide in enumerate(prs.slides):
+        title_shape = slide.shapes.title
+        title = (title_shape.text if title_shape is not None else "").strip()
+        if not title or title == previous:
+            continue
+        previous = title
+        layout = (getattr(slide.slide_layout, "name", "") or "").lower()
+        is_chapter = bool(_CHAPTER_RE.match(title)) or "section header" in layout or "title slide" in layout
+        sections.append(Section(id=0, title=title, level=1 if is_chapter else 2, page_start=idx))
+    if sections and not any(s.level == 1 for s in sections):
+        for s in sections:
+            s.level = 1
+    return sections
+
+
+def _finalize(sections: list[Section], page_count: int) -> list[Section]:
+    sections.sort(key=lambda s: (s.page_start, s.char_start))
+    chapter_id = 0
+    have_chapter = False
+    for i, s in enumerate(sections):
+        s.id = i
+        if s.level == 1:
+            chapter_id, have_chapter = i, True
+        s.chapter_id = chapter_id if have_chapter else i
+    for i, s in enumerate(sections):
+        end = page_count
+        for nxt in sections[i + 1:]:
+            if nxt.level <= s.level:
+                # Section ends on the page the next one starts (mid-page headings share it).
+                end = nxt.page_start + (1 if nxt.char_start > 0 else 0)
+                break
+        s.page_end = max(s.page_start + 1, min(end, page_count) if page_count else end)
+    return sections
+
+
+def build_structure(path: Path, pages: Sequence[str], content_hash: str = "") -> TextbookStructure:
+    """Detect chapters/sections for `path` whose extracted page texts are `pages`."""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    sections: list[Section] = []
+    method = "none"
+    if suffix == ".pdf":
+        sections = _outline_sections(path)
+        method = "outline" if sections else method
+    elif suffix in (".pptx", ".ppt"):
+        sections = _slide_sections(path)
+        method = "slides" if sections else method
+    if not sections:
+        sections = _heading_sections(pages)
+        method = "headings" if sections else "none"
+    return TextbookStructure(
+        source=path.name,
+        content_hash=content_hash,
+        page_count=len(pages),
+        method=method,
+        sections=_finalize(sections, len(pages)),
+    )
+
+
+# ═══════════════════════════════════════════════════════════════
+# Chunk annotation + persistence
+# ═══════════════════════════════════════════════════════════════
+
+def annotate_chunks(structure: TextbookStructure, split_docs: Sequence[Any]) -> None:
+    """
+    Tag one source's split chunks (in order) with chunk_index, chapter/section
+    ids and titles, and record chunk ranges on the sections.
+    Uses metadata 'page' (PyPDFLoader / per-slide docs) and 'start_index'.
+    """
+    by_id = {s.id: s for s in structure.sections}
+    for i, doc in enumerate(split_docs):
+        meta = doc.metadata
+        meta["chunk_index"] = i
+        page = int(meta.get("page", 0) or 0)
+        offset = int(meta.get("start_index", 0) or 0)
+        chapter, section = structure.locate(page, offset)
+        for sec in (chapter, section):
+            if sec is None:
+                continue
+            target = by_id[sec.id]
+            if target.chunk_start is None:
+                target.chunk_start = i
+            target.chunk_end = i + 1
+        if chapter is not None:
+            meta["chapter_id"] = chapter.id
+            meta["chapter"] = chapter.title[:200]
+        if section is not None:
+            meta["section_id"] = section.id
+            meta["section"] = section.title[:200]
+
+
+def metadata_filter(source: str, section: Section) -> dict[str, Any]:
+    """Chroma `where` filter selecting exactly this chapter's or section's chunks."""
+    key = "chapter_id" if section.level == 1 else "section_id"
+    return {"$and": [{"source": source}, {key: section.id}]}
+
+
+def index_path(index_dir: Path, source: str) -> Path:
+    return Path(index_dir) / f"{source}.json"
+
+
+def save_structure(structure: TextbookStructure, index_dir: Path) -> None:
+    dest = index_path(index_dir, structure.source)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_suffix(".tmp")
+    tmp.write_text(json.dumps(structure.to_dict(), indent=2), encoding="utf-8")
+    tmp.replace(dest)
+
+
+def load_structure(index_dir: Path, source: str) -> Optional[TextbookStructure]:
+    try:
+        data = json.loads(index_path(index_dir, source).read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+    if data.get("version") != INDEX_VERSION:
+        return None
+    return TextbookStructure.from_dict(data)
+
+
+def load_or_build(path: Path, data_dir: Path) -> TextbookStructure:
+    """Saved structure for `path` if its content hash still matches, else rebuild and save."""
+    from utils.text_cache import get_text_cache
+
+    path = Path(path)
+    index_dir = Path(data_dir) / "textbook_index"
+    cache = get_text_cache(Path(data_dir) / "cache" / "extracted_text")
+    digest = cache.content_hash(path)
+    existing = load_structure(index_dir, path.name)
+    if existing is not None and existing.content_hash == digest:
+        return existing
+    structure = build_structure(path, list(cache.iter_pages(path)), content_hash=digest)
+    save_structure(structure, index_dir)
+    return structure
@@ -16,9 +16,13 @@ Or from backend:
 
 from __future__ import annotations
 
+import multiprocessing
 import subprocess
 import sys
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parent.parent
-sys.exit(subprocess.call([sys.executable, str(ROOT / "run.py")] + sys.argv[1:]))
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()  # see run.py
+    sys.exit(subprocess.call([sys.executable, str(ROOT / "run.py")] + sys.argv[1:]))
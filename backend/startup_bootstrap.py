@@ -0,0 +1,200 @@
+"""
+Studaxis — Background Ollama Bootstrap
+═══════════════════════════════════════
+Runs the slow part of backend startup off the request path, so uvicorn
+binds the port and serves the SPA, /api/health and every non-AI endpoint
+immediately.
+
+Stages, in order, on a daemon thread:
+  select_model   hardware-aware model choice (psutil + config file I/O)
+  ollama_serve   ping Ollama; start `ollama serve` and poll up to 15 s
+  model_pull     make sure the model is present; `ollama pull` if not
+
+A failed or unreachable Ollama leaves the bootstrap "degraded", not stuck:
+AI endpoints keep their own per-request availability checks. /api/ready
+reports progress and, when degraded, re-runs the bootstrap at most every
+RETRY_SECONDS so starting Ollama later is picked up.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger("studaxis.startup")
+
+STAGES = ("select_model", "ollama_serve", "model_pull")
+
+
+def _select_model() -> str:
+    from model_config import get_best_model, get_config_path_for_log
+
+    model = get_best_model()
+    logger.info("Hardware-aware model selected: %s (config: %s)", model, get_config_path_for_log())
+    return model
+
+
+def _ensure_serve() -> bool:
+    from hardware_validator import ensure_ollama_serve
+    return ensure_ollama_serve()
+
+
+def _ensure_model(model: str) -> bool:
+    from hardware_validator import ensure_ollama_model
+    return ensure_ollama_model(model)
+
+
+class OllamaBootstrap:
+    """Model selection + Ollama serve/pull on a background thread, with a status snapshot."""
+
+    RETRY_SECONDS = 30.0
+
+    def __init__(
+        self,
+        select_model: Callable[[], str] = _select_model,
+        ensure_serve: Callable[[], bool] = _ensure_serve,
+        ensure_model: Callable[[str], bool] = _ensure_model,
+    ):
+        self._select_model = select_model
+        self._ensure_serve = ensure_serve
+        self._ensure_model = ensure_model
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stages: Dict[str, Dict[str, Any]] = {name: {"status": "pending"} for name in STAGES}
+        self._model: Optional[str] = None
+        self._ai_ready = False
+        self._runs = 0
+        self._started_at: Optional[float] = None   # monotonic
+        self._finished_at: Optional[float] = None  # monotonic
+
+    # ── control ──────────────────────────────────────────────────────
+
+    def start(self, retry: bool = False) -> bool:
+        """
+        Start the bootstrap thread if it has never run. With retry=True, also
+        re-run a finished, degraded bootstrap once RETRY_SECONDS have passed.
+        Returns True when a run was started.
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            if self._finished_at is not None:
+                if not retry or self._ai_ready:
+                    return False
+                if time.monotonic() - self._finished_at < self.RETRY_SECONDS:
+                    return False
+            self._done.clear()
+            self._thread = threading.Thread(target=self.run, name="studaxis-ollama-bootstrap", daemon=True)
+            self._thread.start()
+            return True
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the current run finishes (tests, scripts). True if finished."""
+        return self._done.wait(timeout)
+
+    def run(self) -> None:
+        """Run every stage synchronously on the calling thread."""
+        with self._lock:
+            self._runs += 1
+            self._started_at = time.monotonic()
+            self._finished_at = None
+            self._ai_ready = False
+            for name in STAGES:
+                self._stages[name] = {"status": "pending"}
+        try:
+            model = self._stage("select_model", self._select_model)
+            with self._lock:
+                self._model = model
+            if not model:
+                self._skip("ollama_serve")
+                self._skip("model_pull")
+                return
+            served = bool(self._stage("ollama_serve", self._ensure_serve))
+            if not served:
+                self._skip("model_pull")
+                logger.warning(
+                    "Ollama not reachable. Install from https://ollama.com and ensure 'ollama serve' is running."
+                )
+                return
+            pulled = bool(self._stage("model_pull", lambda: self._ensure_model(model)))
+            if pulled:
+                logger.info("Ollama ready; model %s available.", model)
+            else:
+                logger.warning(
+                    "Ollama running but model %s could not be pulled. Run manually: ollama pull %s", model, model
+                )
+            with self._lock:
+                self._ai_ready = pulled
+        finally:
+            with self._lock:
+                self._finished_at = time.monotonic()
+            self._done.set()
+
+    def _stage(self, name: str, fn: Callable[[], Any]) -> Any:
+        started = time.monotonic()
+        with self._lock:
+            self._stages[name] = {"status": "running"}
+        try:
+            result = fn()
+        except Exception as e:
+            logger.warning("Startup stage %s failed: %s", name, e)
+            with self._lock:
+                self._stages[name] = {
+                    "status": "failed",
+                    "seconds": round(time.monotonic() - started, 3),
+                    "error": str(e),
+                }
+            return None
+        with self._lock:
+            self._stages[name] = {
+                "status": "done" if result else "failed",
+                "seconds": round(time.monotonic() - started, 3),
+            }
+        return result
+
+    def _skip(self, name: str) -> None:
+        with self._lock:
+            self._stages[name] = {"status": "skipped"}
+
+    # ── readers ──────────────────────────────────────────────────────
+
+    @property
+    def ai_ready(self) -> bool:
+        with self._lock:
+            return self._ai_ready
+
+    def status(self) -> Dict[str, Any]:
+        """Snapshot for /api/ready and /api/health."""
+        now = time.monotonic()
+        with self._lock:
+            if self._started_at is None:
+                state = "not_started"
+            elif self._finished_at is None:
+                state = "starting"
+            else:
+                state = "ready" if self._ai_ready else "degraded"
+            end = self._finished_at if self._finished_at is not None else now
+            return {
+                "state": state,
+                "ai_ready": self._ai_ready,
+                "model": self._model,
+                "stages": {name: dict(info) for name, info in self._stages.items()},
+                "elapsed_seconds": round(end - self._started_at, 3) if self._started_at is not None else None,
+                "runs": self._runs,
+            }
+
+
+_bootstrap: Optional[OllamaBootstrap] = None
+_bootstrap_lock = threading.Lock()
+
+
+def get_ollama_bootstrap() -> OllamaBootstrap:
+    """Process-wide bootstrap (one Ollama per machine)."""
+    global _bootstrap
+    with _bootstrap_lock:
+        if _bootstrap is None:
+            _bootstrap = OllamaBootstrap()
+        return _bootstrap
@@ -24,6 +24,9 @@ from datetime import datetime, timezone
 from typing import Dict, List, Optional
 from dataclasses import dataclass, asdict
 
+from connectivity_monitor import ConnectivityMonitor, get_connectivity_monitor
+from sync_queue_log import SyncQueueLog, get_sync_queue
+
 logger = logging.getLogger("studaxis.sync_manager")
 
 
@@ -43,9 +46,9 @@ class SyncManager:
     Queues mutations locally and flushes to AppSync when online.
     """
 
-    QUEUE_FILE = "data/sync_queue.json"
+    QUEUE_DIR = "data/sync_queue"
+    QUEUE_FILE = "data/sync_queue.json"  # legacy whole-file queue, migrated on first open
     MAX_RETRIES = 5
-    CONNECTIVITY_TIMEOUT = 5  # seconds
 
     def __init__(
         self,
@@ -58,14 +61,14 @@ class SyncManager:
         self.appsync_api_key = appsync_api_key or os.getenv("APPSYNC_API_KEY", "")
         self.base_path = Path(base_path)
         self.user_id = user_id
-        self.queue_path = self.base_path / self.QUEUE_FILE
+        self.queue_path = self.base_path / self.QUEUE_DIR
         self.session = requests.Session()
+        self.connectivity: ConnectivityMonitor = get_connectivity_monitor(self.appsync_endpoint)
 
-        # Ensure data directory exists
-        self.queue_path.parent.mkdir(parents=True, exist_ok=True)
-
-        # Load existing queue
-        self._queue: List[Dict] = self._load_queue()
+        # Shared append-only queue (replayed once per process, not per instance)
+        self._queue: SyncQueueLog = get_sync_queue(
+            self.queue_path, legacy_path=self.base_path / self.QUEUE_FILE
+        )
 
     # ═══════════════════════════════════════════════════════════════════════
     # PUBLIC API — Queue Mutations
@@ -135,7 +138,6 @@ class SyncManager:
             queued_at=datetime.now(timezone.utc).isoformat(),
         )
         self._queue.append(asdict(item))
-        self._save_queue()
         logger.info("Queued quiz sync: %s (queue size: %d)", quiz_id, len(self._queue))
         return True
 
@@ -157,25 +159,12 @@ class SyncManager:
             queued_at=datetime.now(timezone.utc).isoformat(),
         )
         self._queue.append(asdict(item))
-        self._save_queue()
         logger.info("Queued streak sync: %s → %d", user_id, current_streak)
         return True
 
     def _enqueue_generic(self, sync_type: str, payload: Dict) -> bool:
         """Queue a generic sync item (flashcard_review, quiz_result, flashcard_create)."""
-        item = {
-            "id": f"sync_{datetime.now(timezone.utc).timestamp()}",
-            "type": sync_type,
-            "mutation_type": sync_type,
-            "payload": payload,
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "queued_at": datetime.now(timezone.utc).isoformat(),
-            "retries": 0,
-            "retry_count": 0,
-            "last_error": "",
-        }
-        self._queue.append(item)
-        self._save_queue()
+        self._queue.append(_generic_item(sync_type, payload))
         logger.info("Queued %s sync (queue size: %d)", sync_type, len(self._queue))
         return True
 
@@ -201,13 +190,10 @@ class SyncManager:
 
         # Respect user opt-out from Settings (Privacy Controls)
         try:
-            user_stats_path = self.base_path / "data" / "users" / self.user_id / "user_stats.json"
-            if user_stats_path.exists():
-                with open(user_stats_path, encoding="utf-8") as _f:
-                    _stats = json.load(_f)
-                prefs = _stats.get("preferences") or {}
-            else:
-                prefs = {}
+            from user_stats_store import UserStatsStore
+
+            _stats = UserStatsStore(self.base_path / "data" / "users" / self.user_id).load() or {}
+            prefs = _stats.get("preferences") or {}
             if not prefs.get("sync_enabled", True):
                 result["pending"] = len(self._queue)
                 result["online"] = self.check_connectivity()
@@ -218,16 +204,17 @@ class SyncManager:
             pass
 
         # Check connectivity first (needed for both queue flush and AWS payload sync)
-        if not self.check_connectivity():
+        if not self.check_connectivity(wait=True):
             result["pending"] = len(self._queue)
             logger.info("Offline — %d items queued for later", len(self._queue))
             return result
 
         result["online"] = True
 
-        # Flush queue if any (process in order, oldest first)
-        remaining = []
-        for item in self._queue:
+        # Flush queue if any (process in order, oldest first). Synced and dropped
+        # items are acked; failures append a retry record and stay pending.
+        done: List[int] = []
+        for seq, item in self._queue.pending():
             mutation_type = item["mutation_type"]
             payload = item["payload"]
             retry_count = item.get("retry_count", 0)
@@ -235,25 +222,25 @@ class SyncManager:
             max_retries = 3 if mutation_type in ("flashcard_review", "quiz_result", "flashcard_create") else self.MAX_RETRIES
             if retry_count >= max_retries:
                 logger.warning("Dropping item after %d retries: %s", retry_count, mutation_type)
+                done.append(seq)
                 result["failed"] += 1
                 result["errors"].append(f"Max retries exceeded for {mutation_type}")
                 continue
 
             success, error = self._execute_mutation(mutation_type, payload)
             if success:
+                done.append(seq)
                 result["synced"] += 1
                 logger.info("Synced: %s", mutation_type)
             else:
-                item["retry_count"] = retry_count + 1
-                item["last_error"] = error
-                remaining.append(item)
+                self._queue.update(seq, retry_count + 1, error)
                 result["failed"] += 1
                 result["errors"].append(error)
                 logger.warning("Sync failed for %s: %s", mutation_type, error)
 
-        self._queue = remaining
-        self._save_queue()
-        result["pending"] = len(remaining)
+        self._queue.ack(done)
+        self._queue.sync()
+        result["pending"] = len(self._queue)
 
         # Heavy payloads (chat logs, user_stats >4KB) → S3 only. Lambda triggered by S3 event. No direct DynamoDB.
         try:
@@ -271,33 +258,16 @@ class SyncManager:
         )
         return result
 
-    def check_connectivity(self) -> bool:
+    def check_connectivity(self, wait: bool = False) -> bool:
         """
-        Check if AppSync endpoint is reachable.
-        Returns True if online, False if offline.
+        Whether the AppSync endpoint is reachable, from the shared background
+        monitor (instant; no request is made here). With wait=True, blocks for
+        one probe only if the monitor has never completed one.
         """
-        if not self.appsync_endpoint or "your-appsync" in self.appsync_endpoint:
+        if not self.connectivity.configured:
             logger.debug("AppSync endpoint not configured")
             return False
-
-        try:
-            # Simple POST with empty query to test connectivity
-            resp = self.session.post(
-                self.appsync_endpoint,
-                json={"query": "{ __typename }"},
-                headers={
-                    "Content-Type": "application/json",
-                    "x-api-key": self.appsync_api_key,
-                },
-                timeout=self.CONNECTIVITY_TIMEOUT,
-            )
-            # Any response (even GraphQL errors) means we're connected
-            return resp.status_code in (200, 400, 401, 403)
-        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
-            return False
-        except Exception as e:
-            logger.debug("Connectivity check failed: %s", e)
-            return False
+        return self.connectivity.is_online(wait=wait)
 
     @property
     def queue_size(self) -> int:
@@ -307,15 +277,17 @@ class SyncManager:
     @property
     def sync_status(self) -> str:
         """Human-readable sync status."""
-        if not self._queue:
+        if not len(self._queue):
             return "synced"
         return f"{len(self._queue)} pending"
 
     def get_queue_summary(self) -> Dict:
         """Return summary of pending sync items."""
-        quiz_count = sum(1 for i in self._queue if i["mutation_type"] == "recordQuizAttempt")
-        streak_count = sum(1 for i in self._queue if i["mutation_type"] == "updateStreak")
-        oldest = self._queue[0]["queued_at"] if self._queue else None
+        counts = self._queue.counts_by_type()
+        quiz_count = counts.get("recordQuizAttempt", 0)
+        streak_count = counts.get("updateStreak", 0)
+        first = self._queue.oldest()
+        oldest = first.get("queued_at") if first else None
         return {
             "total": len(self._queue),
             "quiz_attempts": quiz_count,
@@ -392,6 +364,7 @@ class SyncManager:
                 },
                 timeout=15,
             )
+            self.connectivity.report_success()
 
             if resp.status_code == 200:
                 body = resp.json()
@@ -403,37 +376,39 @@ class SyncManager:
                 return False, f"HTTP {resp.status_code}: {resp.text[:200]}"
 
         except requests.exceptions.Timeout:
+            self.connectivity.report_failure()
             return False, "Request timed out (15s)"
         except requests.exceptions.ConnectionError:
+            self.connectivity.report_failure()
             return False, "Connection lost during sync"
         except Exception as e:
             return False, f"Unexpected error: {str(e)}"
 
-    # ═══════════════════════════════════════════════════════════════════════
-    # INTERNAL — Queue Persistence
-    # ═══════════════════════════════════════════════════════════════════════
 
-    def _load_queue(self) -> List[Dict]:
-        """Load sync queue from disk."""
-        if not self.queue_path.exists():
-            return []
-        try:
-            with open(self.queue_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                return data if isinstance(data, list) else []
-        except (json.JSONDecodeError, IOError) as e:
-            logger.warning("Failed to load sync queue: %s", e)
-            return []
-
-    def _save_queue(self):
-        """Persist sync queue to disk (atomic write)."""
-        try:
-            tmp = self.queue_path.with_suffix(".tmp")
-            with open(tmp, "w", encoding="utf-8") as f:
-                json.dump(self._queue, f, indent=2, ensure_ascii=False)
-            tmp.replace(self.queue_path)
-        except IOError as e:
-            logger.error("Failed to save sync queue: %s", e)
+def _generic_item(sync_type: str, payload: Dict) -> Dict:
+    """Queue record for flashcard_review / quiz_result / flashcard_create / assignment_complete."""
+    now = datetime.now(timezone.utc)
+    return {
+        "id": f"sync_{now.timestamp()}",
+        "type": sync_type,
+        "mutation_type": sync_type,
+        "payload": payload,
+        "created_at": now.isoformat(),
+        "queued_at": now.isoformat(),
+        "retries": 0,
+        "retry_count": 0,
+        "last_error": "",
+    }
+
+
+def enqueue_generic(base_path: str, sync_type: str, payload: Dict) -> int:
+    """
+    Append a generic item to the shared queue without building a SyncManager.
+    Hot path for flashcard reviews and quiz submits; returns the item's sequence number.
+    """
+    base = Path(base_path)
+    queue = get_sync_queue(base / SyncManager.QUEUE_DIR, legacy_path=base / SyncManager.QUEUE_FILE)
+    return queue.append(_generic_item(sync_type, payload))
 
 
 # ── Standalone test ─────────────────────────────────────────────────────────
@@ -0,0 +1,328 @@
+"""
+Studaxis — Sync Queue Log (append-only)
+════════════════════════════════════════
+Durable offline sync queue stored as an append-only segment log:
+
+  data/sync_queue/
+    seg-000001.log   JSON lines: enq / ack / upd records
+    seg-000002.log   (new segment once the active one exceeds SEGMENT_MAX_BYTES)
+    ack.json         ack offset (every seq <= acked_upto is done) + next_seq
+
+Enqueue is a single line append regardless of how many items are pending;
+fsync is batched (every FSYNC_EVERY records or FSYNC_INTERVAL seconds, and on
+sync()/close()). Fully acknowledged segments are deleted, and when dead
+records dominate the log the live items are rewritten into one fresh segment.
+
+Pending items are held in memory (replayed once per process), so one
+SyncQueueLog per directory is shared via get_sync_queue().
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+logger = logging.getLogger("studaxis.sync_queue")
+
+
+class SyncQueueLog:
+    """Append-only, segment-based queue of pending sync items keyed by sequence number."""
+
+    SEGMENT_MAX_BYTES = 1024 * 1024
+    FSYNC_EVERY = 32
+    FSYNC_INTERVAL = 1.0  # seconds
+    COMPACT_MIN_DEAD = 4096  # dead records before a rewrite is considered
+
+    def __init__(self, directory: Path, legacy_path: Optional[Path] = None) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._pending: dict[int, dict[str, Any]] = {}
+        self._types: Counter[str] = Counter()
+        self._next_seq = 1
+        self._acked_upto = 0
+        # segment number -> highest seq any of its records can refer to
+        self._segments: dict[int, int] = {}
+        self._active_no = 0
+        self._active: Any = None
+        self._active_size = 0
+        self._unsynced = 0
+        self._last_fsync = 0.0
+        self._dead = 0
+        self._replay()
+        if legacy_path is not None and not self._segments:
+            self._import_legacy(Path(legacy_path))
+
+    # ── public API ───────────────────────────────────────────────────
+
+    def append(self, item: dict[str, Any]) -> int:
+        """Queue an item; returns its sequence number."""
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            self._write({"op": "enq", "seq": seq, "item": item})
+            self._pending[seq] = item
+            self._types[str(item.get("mutation_type", ""))] += 1
+            return seq
+
+    def pending(self) -> list[tuple[int, dict[str, Any]]]:
+        """Snapshot of pending (seq, item) pairs, oldest first."""
+        with self._lock:
+            return list(self._pending.items())
+
+    def ack(self, seqs: Iterable[int]) -> None:
+        """Mark items done (synced or dropped); advances the ack offset."""
+        with self._lock:
+            done = [s for s in seqs if s in self._pending]
+            if not done:
+                return
+            self._write({"op": "ack", "seqs": done})
+            for s in done:
+                self._types[str(self._pending.pop(s).get("mutation_type", ""))] -= 1
+            self._dead += len(done) + 1
+            self._advance_ack_offset()
+            self._maybe_compact()
+
+    def update(self, seq: int, retry_count: int, last_error: str) -> None:
+        """Record a failed attempt for a pending item."""
+        with self._lock:
+            item = self._pending.get(seq)
+            if item is None:
+                return
+            self._write({"op": "upd", "seq": seq, "retry_count": retry_count, "last_error": last_error})
+            item["retry_count"] = retry_count
+            item["last_error"] = last_error
+            self._dead += 1
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def counts_by_type(self) -> dict[str, int]:
+        with self._lock:
+            return {k: v for k, v in self._types.items() if v > 0}
+
+    def oldest(self) -> Optional[dict[str, Any]]:
+        with self._lock:
+            return next(iter(self._pending.values()), None)
+
+    @property
+    def acked_upto(self) -> int:
+        with self._lock:
+            return self._acked_upto
+
+    def sync(self) -> None:
+        """fsync the active segment and persist the ack offset."""
+        with self._lock:
+            if self._active is not None and self._unsynced:
+                self._active.flush()
+                os.fsync(self._active.fileno())
+                self._unsynced = 0
+                self._last_fsync = time.monotonic()
+            self._save_state()
+
+    def compact(self) -> None:
+        """Rewrite live items into one fresh segment and drop all older segments."""
+        with self._lock:
+            self._close_active()
+            old = sorted(self._segments)
+            no = (old[-1] if old else 0) + 1
+            path = self._segment_path(no)
+            tmp = path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as fh:
+                for seq, item in self._pending.items():
+                    fh.write(json.dumps({"op": "enq", "seq": seq, "item": item}, ensure_ascii=False, separators=(",", ":")) + "\n")
+                fh.flush()
+                os.fsync(fh.fileno())
+            tmp.replace(path)
+            self._segments = {no: self._next_seq - 1}
+            self._save_state()
+            for n in old:
+                try:
+                    self._segment_path(n).unlink()
+                except OSError:
+                    pass
+            self._dead = 0
+            self._open_active(no + 1)
+            logger.info("Compacted sync queue: %d live item(s), %d segment(s) removed", len(self._pending), len(old))
+
+    def close(self) -> None:
+        with self._lock:
+            self.sync()
+            self._close_active()
+
+    # ── internal: files ──────────────────────────────────────────────
+
+    def _segment_path(self, no: int) -> Path:
+        return self.directory / f"seg-{no:06d}.log"
+
+    def _state_path(self) -> Path:
+        return self.directory / "ack.json"
+
+    def _save_state(self) -> None:
+        tmp = self._state_path().with_suffix(".tmp")
+        try:
+            tmp.write_text(json.dumps({"acked_upto": self._acked_upto, "next_seq": self._next_seq}), encoding="utf-8")
+            tmp.replace(self._state_path())
+        except OSError as e:
+            logger.warning("Failed to save sync queue ack offset: %s", e)
+
+    def _open_active(self, no: int) -> None:
+        self._active_no = no
+        path = self._segment_path(no)
+        self._active = open(path, "a", encoding="utf-8")
+        self._active_size = path.stat().st_size
+        self._segments.setdefault(no, self._next_seq - 1)
+
+    def _close_active(self) -> None:
+        if self._active is None:
+            return
+        try:
+            self._active.flush()
+            os.fsync(self._active.fileno())
+        except OSError:
+            pass
+        self._active.close()
+        self._active = None
+        self._unsynced = 0
+
+    def _write(self, record: dict[str, Any]) -> None:
+        if self._active is None or self._active_size >= self.SEGMENT_MAX_BYTES:
+            self._close_active()
+            self._open_active(max(self._segments, default=0) + 1)
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        self._active.write(line)
+        self._active.flush()
+        self._active_size += len(line.encode("utf-8"))
+        self._segments[self._active_no] = self._next_seq - 1
+        self._unsynced += 1
+        now = time.monotonic()
+        if self._unsynced >= self.FSYNC_EVERY or now - self._last_fsync >= self.FSYNC_INTERVAL:
+            os.fsync(self._active.fileno())
+            self._unsynced = 0
+            self._last_fsync = now
+
+    # ── internal: ack offset / compaction ────────────────────────────
+
+    def _advance_ack_offset(self) -> None:
+        low = next(iter(self._pending), self._next_seq)
+        self._acked_upto = low - 1
+        # Closed segments whose every record refers to acked items can go.
+        removable = [n for n, hi in self._segments.items() if n != self._active_no and hi <= self._acked_upto]
+        if removable:
+            self.sync()
+            for n in removable:
+                try:
+                    self._segment_path(n).unlink()
+                except OSError:
+                    continue
+                del self._segments[n]
+
+    def _maybe_compact(self) -> None:
+        if self._dead >= self.COMPACT_MIN_DEAD and self._dead > 2 * len(self._pending):
+            self.compact()
+
+    # ── internal: replay ─────────────────────────────────────────────
+
+    def _replay(self) -> None:
+        try:
+            state = json.loads(self._state_path().read_text(encoding="utf-8"))
+            self._acked_upto = int(state.get("acked_upto", 0))
+            self._next_seq = max(1, int(state.get("next_seq", 1)))
+        except (OSError, ValueError, TypeError):
+            pass
+        numbers = sorted(
+            int(p.stem.split("-", 1)[1]) for p in self.directory.glob("seg-*.log") if p.stem.split("-", 1)[1].isdigit()
+        )
+        for no in numbers:
+            hi = 0
+            try:
+                fh = open(self._segment_path(no), encoding="utf-8")
+            except OSError:
+                continue
+            with fh:
+                for line in fh:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue  # torn tail write
+                    op = rec.get("op")
+                    if op == "enq":
+                        seq = int(rec["seq"])
+                        hi = max(hi, seq)
+                        self._next_seq = max(self._next_seq, seq + 1)
+                        if seq > self._acked_upto:
+                            self._pending[seq] = rec.get("item") or {}
+                        else:
+                            self._dead += 1
+                    elif op == "ack":
+                        for s in rec.get("seqs") or []:
+                            self._pending.pop(int(s), None)
+                            hi = max(hi, int(s))
+                        self._dead += len(rec.get("seqs") or []) + 1
+                    elif op == "upd":
+                        hi = max(hi, int(rec.get("seq", 0)))
+                        item = self._pending.get(int(rec.get("seq", 0)))
+                        if item is not None:
+                            item["retry_count"] = rec.get("retry_count", 0)
+                            item["last_error"] = rec.get("last_error", "")
+                        self._dead += 1
+            self._segments[no] = hi
+        self._pending = dict(sorted(self._pending.items()))
+        for item in self._pending.values():
+            self._types[str(item.get("mutation_type", ""))] += 1
+
+    def _import_legacy(self, legacy_path: Path) -> None:
+        """One-time migration from the old whole-file sync_queue.json list."""
+        try:
+            items = json.loads(legacy_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if not isinstance(items, list):
+            return
+        for item in items:
+            if isinstance(item, dict):
+                self.append(item)
+        self.sync()
+        try:
+            legacy_path.replace(legacy_path.with_name(legacy_path.name + ".migrated"))
+        except OSError as e:
+            logger.warning("Could not retire legacy sync queue %s: %s", legacy_path, e)
+        logger.info("Migrated %d item(s) from %s", len(items), legacy_path.name)
+
+
+_queues: dict[str, SyncQueueLog] = {}
+_queues_lock = threading.Lock()
+
+
+def get_sync_queue(directory: Path, legacy_path: Optional[Path] = None) -> SyncQueueLog:
+    """Process-wide queue per directory (replays the log only once)."""
+    key = os.path.abspath(directory)
+    with _queues_lock:
+        q = _queues.get(key)
+        if q is not None and not q.directory.is_dir():
+            with q._lock:  # directory removed underneath us (reset / tests): start over
+                q._close_active()
+            q = None
+        if q is None:
+            q = SyncQueueLog(Path(directory), legacy_path=legacy_path)
+            _queues[key] = q
+        return q
+
+
+@atexit.register
+def _sync_all() -> None:
+    for q in list(_queues.values()):
+        if not q.directory.is_dir():
+            continue
+        try:
+            q.close()
+        except Exception:
+            pass
@@ -2,7 +2,10 @@
 Pytest configuration for backend tests.
 Ensures backend directory is first in sys.path so 'main' resolves to backend/main.py.
 Prevents root main.py from loading backend as 'backend_main'.
+Structured logs are written synchronously (STUDAXIS_LOG_SYNC, read once when
+utils.structured_log is imported) so temp dirs can be removed in tearDown.
 """
+import os
 import sys
 from pathlib import Path
 
@@ -12,3 +15,5 @@ _BACKEND_STR = str(_BACKEND)
 if _BACKEND_STR in sys.path:
     sys.path.remove(_BACKEND_STR)
 sys.path.insert(0, _BACKEND_STR)
+
+os.environ.setdefault("STUDAXIS_LOG_SYNC", "1")
@@ -0,0 +1,49 @@
+"""
+Shared helpers for backend tests (not collected: no test_ prefix).
+
+Import as `from tests.helpers import ...`; conftest.py and the per-file
+_BACKEND path setup both put backend/ on sys.path.
+"""
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+
+
+def remove_user_data(data_dir: Path, prefix: str) -> None:
+    """Delete per-user directories under data/users and data/quizzes whose name starts with prefix."""
+    for sub in ("users", "quizzes"):
+        parent = Path(data_dir) / sub
+        if not parent.is_dir():
+            continue
+        for path in parent.glob(f"{prefix}*"):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def make_pdf(pages: list[str]) -> bytes:
+    """Minimal multi-page PDF with one line of Helvetica text per page."""
+    n = len(pages)
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(n))
+    objs = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {n} >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(pages):
+        objs.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>"
+        )
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objs.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for i, obj in enumerate(objs):
+        offsets.append(len(out))
+        out += f"{i + 1} 0 obj\n{obj}\nendobj\n".encode()
+    xref = len(out)
+    out += f"xref\n0 {len(objs) + 1}\n0000000000 65535 f \n".encode()
+    for off in offsets:
+        out += f"{off:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objs) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
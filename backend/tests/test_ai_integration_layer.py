@@ -1,9 +1,11 @@
+import json
 import os
 import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
 
 from ai_integration_layer import AIConfig, AIEngine, AIState, AITaskType
+from ai_telemetry import AITelemetry
 
 
 def _mock_ollama_success(*args, **kwargs):
@@ -88,5 +90,66 @@ class TestAIIntegrationLayer(unittest.TestCase):
         self.assertGreater(os.path.getsize(log_path), 0)
 
 
+class TestAITelemetry(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.telemetry = AITelemetry()
+        config = AIConfig()
+        config.AI_TIMEOUT_SECONDS = 2
+        self.engine = AIEngine(base_path=self.tmpdir.name, config=config, telemetry=self.telemetry)
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def test_spans_and_ollama_stats_recorded(self) -> None:
+        def fake_ollama(engine_self, *args, **kwargs):
+            engine_self.telemetry.record_ollama_stats(
+                {"eval_count": 40, "eval_duration": 2_000_000_000, "prompt_eval_duration": 500_000_000}
+            )
+            return "Momentum is mass times velocity."
+
+        with patch("ai_integration_layer.AIEngine._call_ollama", autospec=True, side_effect=fake_ollama):
+            response = self.engine.request(
+                task_type=AITaskType.CHAT,
+                user_input="What is momentum?",
+                offline_mode=True,
+            )
+        for stage in ("sanitize", "prompt_build", "inference", "parse"):
+            self.assertIn(stage, response.metadata["timings_ms"])
+
+        snap = self.telemetry.snapshot()
+        tps = [h for h in snap["histograms"] if h["name"] == "studaxis_ai_tokens_per_second"]
+        self.assertEqual(len(tps), 1)
+        self.assertAlmostEqual(tps[0]["p50"], 20.0)
+        text = self.telemetry.render_prometheus()
+        self.assertIn('studaxis_ai_requests_total{state="RESPONSE_RECEIVED",target="local",task_type="chat"} 1', text)
+        self.assertIn('studaxis_ai_request_seconds_bucket{task_type="chat",le="+Inf"} 1', text)
+        self.assertIn("studaxis_ai_time_to_first_token_seconds_count", text)
+
+    def test_fallback_counted_per_task_type(self) -> None:
+        with patch("ai_integration_layer.AIEngine._call_ollama", side_effect=TimeoutError("slow")):
+            self.engine.request(task_type=AITaskType.GRADING, user_input="Grade this.")
+        text = self.telemetry.render_prometheus()
+        self.assertIn('state="FALLBACK_RESPONSE",target="local",task_type="grading"', text)
+
+    def test_log_is_compact_and_rotates(self) -> None:
+        self.engine.config.LOG_MAX_BYTES = 600
+        self.engine.config.LOG_BACKUP_COUNT = 2
+        with patch("ai_integration_layer.AIEngine._call_ollama", side_effect=_mock_ollama_success):
+            for _ in range(10):
+                self.engine.request(task_type=AITaskType.CHAT, user_input="x" * 500, offline_mode=True)
+        self.engine.flush_logs()
+        log_path = os.path.join(self.tmpdir.name, "data", "ai_request_log.jsonl")
+        self.assertTrue(os.path.exists(log_path + ".1.gz"))
+        self.assertTrue(os.path.exists(log_path + ".2.gz"))
+        self.assertFalse(os.path.exists(log_path + ".3.gz"))
+        with open(log_path, encoding="utf-8") as fh:
+            row = json.loads(fh.readline())
+        self.assertEqual(row["task"], "chat")
+        self.assertEqual(row["in_chars"], 500)
+        self.assertIn("spans", row)
+        self.assertLessEqual(os.path.getsize(log_path), 600)
+
+
 if __name__ == "__main__":
     unittest.main()
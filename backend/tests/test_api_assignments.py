@@ -0,0 +1,114 @@
+"""
+API tests for class assignments: teacher assign-quiz, student completion, teacher completion counts.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+_BACKEND = Path(__file__).resolve().parent.parent
+if str(_BACKEND) not in sys.path:
+    sys.path.insert(0, str(_BACKEND))
+
+from fastapi.testclient import TestClient
+
+import main as backend_main
+from class_store import ClassStore
+from database import User
+from dependencies import get_current_user
+from notification_store import NotificationStore
+from profile_store import UserProfile, save_profile_for_user
+from tests.helpers import remove_user_data
+
+
+class TestAssignmentsAPI(unittest.TestCase):
+    def setUp(self) -> None:
+        os.environ["STUDAXIS_TEST"] = "1"
+        self.prefix = f"asg_{os.getpid()}_{id(self)}"
+        self.code = f"CLS{os.getpid()}"
+        # Class and inbox databases go to a temp dir; student profiles are removed in tearDown.
+        self.tmpdir = tempfile.TemporaryDirectory()
+        tmp = Path(self.tmpdir.name)
+        self.classes = ClassStore(tmp / "classes", legacy_dir=tmp)
+        self.notifications = NotificationStore(tmp / "notifications")
+        # Account emails (normally the auth database); the class teacher is matched by email.
+        self.emails: dict[str, str] = {}
+        self.patchers = [
+            patch.object(backend_main, "_classes", return_value=self.classes),
+            patch.object(backend_main, "_notifications", return_value=self.notifications),
+            patch.object(backend_main, "_account_email", side_effect=self.emails.get),
+        ]
+        for p in self.patchers:
+            p.start()
+
+    def tearDown(self) -> None:
+        for p in self.patchers:
+            p.stop()
+        self.classes.close()
+        self.notifications.close()
+        self.tmpdir.cleanup()
+        remove_user_data(backend_main.DATA_DIR, self.prefix)
+        os.environ.pop("STUDAXIS_TEST", None)
+
+    def test_completion_is_per_student_and_counted_for_teacher(self) -> None:
+        teacher, s1, s2 = f"{self.prefix}_t", f"{self.prefix}_s1", f"{self.prefix}_s2"
+        save_profile_for_user(teacher, UserProfile(profile_name="T", user_role="teacher", class_code=self.code))
+        self.classes.save_teacher(self.code, {"name": "T", "email": "t@school.test", "classCode": self.code})
+        self.emails.update({teacher: "t@school.test", s1: "s1@school.test", s2: "s2@school.test"})
+        for student in (s1, s2):
+            save_profile_for_user(student, UserProfile(profile_name=student, user_role="student", class_code=self.code))
+
+        with TestClient(backend_main.app) as client:
+            created = client.post("/api/teacher/assign-quiz", headers={"X-Test-User": teacher}, json={
+                "class_code": self.code, "quiz_id": "q1", "title": "Optics",
+            }).json()
+            aid = created["assignment_id"]
+            for student, score in ((s1, 8), (s2, 4), (s1, 9)):
+                r = client.post("/api/student/assignment-complete", headers={"X-Test-User": student},
+                                json={"assignment_id": aid, "score": score})
+                self.assertEqual(r.status_code, 200, r.text)
+            mine = client.get(f"/api/student/assignments?class_code={self.code}", headers={"X-Test-User": s2}).json()
+            view = client.get(f"/api/teacher/assignments?class_code={self.code}", headers={"X-Test-User": teacher}).json()
+            per_student = client.get(f"/api/teacher/assignments/{aid}/completions?class_code={self.code}",
+                                     headers={"X-Test-User": teacher}).json()
+            inbox = client.get("/api/notifications/unread_count", headers={"X-Test-User": s1}).json()
+            denied = [
+                client.get(f"/api/teacher/assignments?class_code={self.code}", headers={"X-Test-User": s1}),
+                client.get(f"/api/teacher/assignments/{aid}/completions?class_code={self.code}",
+                           headers={"X-Test-User": s2}),
+            ]
+
+        self.assertEqual((mine[0]["status"], mine[0]["score"]), ("completed", 4.0))
+        self.assertEqual((view[0]["completed_count"], view[0]["average_score"]), (2, 6.5))
+        self.assertEqual(sorted(c["user_id"] for c in per_student["completions"]), [s1, s2])
+        self.assertEqual(inbox["unread_count"], 1)  # "New assignment" fan-out
+        self.assertEqual([r.status_code for r in denied], [403, 403])
+
+    def test_student_claiming_teacher_role_is_refused(self) -> None:
+        teacher, student = f"{self.prefix}_t", f"{self.prefix}_s1"
+        self.classes.save_teacher(self.code, {"name": "T", "email": "t@school.test", "classCode": self.code})
+        self.emails.update({teacher: "t@school.test", student: "s1@school.test"})
+        save_profile_for_user(student, UserProfile(profile_name=student, user_role="student", class_code=self.code))
+        backend_main.app.dependency_overrides[get_current_user] = lambda: User(username=student)
+        self.addCleanup(backend_main.app.dependency_overrides.pop, get_current_user, None)
+
+        with TestClient(backend_main.app) as client:
+            h = {"X-Test-User": student}
+            claimed = client.post("/api/user/profile", headers=h, json={"user_role": "teacher"}).json()
+            denied = [
+                client.get(f"/api/teacher/assignments?class_code={self.code}", headers=h),
+                client.get(f"/api/teacher/assignments/a1/completions?class_code={self.code}", headers=h),
+            ]
+            allowed = client.get(f"/api/teacher/assignments?class_code={self.code}", headers={"X-Test-User": teacher})
+
+        self.assertEqual(claimed["user_role"], "teacher")
+        self.assertEqual([r.status_code for r in denied], [403, 403])
+        self.assertEqual(allowed.status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
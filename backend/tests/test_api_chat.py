@@ -1,5 +1,5 @@
 """
-API tests for AI chat endpoint: POST /api/chat.
+API tests for AI chat endpoint: POST /api/chat, and saved sessions under /api/chat/history.
 
 These tests use a mocked get_ai_engine so the suite runs without Ollama.
 The real app uses real Ollama; only this test module mocks it.
@@ -21,6 +21,7 @@ from ai_integration_layer import AIResponse, AIState
 from fastapi.testclient import TestClient
 
 import main as backend_main
+from tests.helpers import remove_user_data
 
 
 def _mock_ai_response(text: str, state: AIState = AIState.RESPONSE_RECEIVED) -> AIResponse:
@@ -86,6 +87,33 @@ class TestChatAPI(unittest.TestCase):
             )
         self.assertEqual(r.status_code, 401, r.text)
 
+    def test_chat_history_index_search_and_session_body(self, mock_get_engine: MagicMock) -> None:
+        user = f"chathist_{os.getpid()}_{id(self)}"
+        self.addCleanup(remove_user_data, backend_main.DATA_DIR, user)
+        app = self._get_app()
+        with TestClient(app) as client:
+            headers = {"X-Test-User": user}
+            for i, title in enumerate(["Photosynthesis", "Newton's laws", "Newton and gravity"]):
+                r = client.post("/api/chat/history/save", headers=headers, json={
+                    "id": f"c{i}", "title": title, "subject": "Science",
+                    "timestamp": f"2026-04-0{i + 1}T12:00:00+00:00",
+                    "messages": [{"role": "user", "content": title}, {"role": "assistant", "content": "..."}],
+                })
+                self.assertEqual(r.status_code, 200, r.text)
+            page = client.get("/api/chat/history?limit=2", headers=headers).json()
+            found = client.get("/api/chat/history?q=newton", headers=headers).json()
+            body = client.get("/api/chat/history/c1", headers=headers)
+            missing = client.get("/api/chat/history/nope", headers=headers)
+
+        self.assertEqual([s["id"] for s in page["sessions"]], ["c2", "c1"])
+        self.assertEqual((page["total"], page["next_offset"]), (3, 2))
+        self.assertNotIn("messages", page["sessions"][0])
+        self.assertEqual(page["sessions"][0]["message_count"], 2)
+        self.assertEqual([s["id"] for s in found["sessions"]], ["c2", "c1"])
+        self.assertEqual(body.status_code, 200)
+        self.assertEqual(body.json()["messages"][0]["content"], "Newton's laws")
+        self.assertEqual(missing.status_code, 404)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,83 @@
+"""
+API tests for notification endpoints: push, list, unread_count, mark-read, clear, fan-out.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+_BACKEND = Path(__file__).resolve().parent.parent
+if str(_BACKEND) not in sys.path:
+    sys.path.insert(0, str(_BACKEND))
+
+from fastapi.testclient import TestClient
+
+import main as backend_main
+from notification_store import NotificationStore
+from profile_store import UserProfile, save_profile_for_user
+from tests.helpers import remove_user_data
+
+
+class TestNotificationsAPI(unittest.TestCase):
+    def setUp(self) -> None:
+        os.environ["STUDAXIS_TEST"] = "1"
+        self.prefix = f"notif_{os.getpid()}_{id(self)}"
+        # Inboxes go to a temp database; the profiles fan-out reads are removed in tearDown.
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = NotificationStore(Path(self.tmpdir.name) / "notifications")
+        self.patcher = patch.object(backend_main, "_notifications", return_value=self.store)
+        self.patcher.start()
+
+    def tearDown(self) -> None:
+        self.patcher.stop()
+        self.store.close()
+        self.tmpdir.cleanup()
+        remove_user_data(backend_main.DATA_DIR, self.prefix)
+        os.environ.pop("STUDAXIS_TEST", None)
+
+    def test_push_read_count_and_clear(self) -> None:
+        headers = {"X-Test-User": f"{self.prefix}_s"}
+        with TestClient(backend_main.app) as client:
+            first = client.post("/api/notifications/push", json={"title": "Hello"}, headers=headers).json()
+            client.post("/api/notifications/push", json={"title": "Pinned", "pinned": True}, headers=headers)
+            count = client.get("/api/notifications/unread_count", headers=headers).json()
+            read = client.patch(f"/api/notifications/{first['id']}/read", headers=headers)
+            listing = client.get("/api/notifications", headers=headers).json()
+            cleared = client.delete("/api/notifications/all", headers=headers)
+            after = client.get("/api/notifications", headers=headers).json()
+            missing = client.delete("/api/notifications/nope", headers=headers)
+
+        self.assertEqual(count, {"unread_count": 2})
+        self.assertEqual(read.status_code, 200)
+        self.assertEqual([n["title"] for n in listing["notifications"]], ["Pinned", "Hello"])
+        self.assertEqual((listing["total"], listing["unread_count"]), (2, 1))
+        self.assertEqual(cleared.status_code, 200, cleared.text)
+        self.assertEqual([n["title"] for n in after["notifications"]], ["Pinned"])
+        self.assertEqual(missing.status_code, 404)
+
+    def test_fanout_is_teacher_only_and_reaches_class(self) -> None:
+        code = f"C{os.getpid()}"
+        teacher, s1, s2 = f"{self.prefix}_t", f"{self.prefix}_s1", f"{self.prefix}_s2"
+        save_profile_for_user(teacher, UserProfile(profile_name="T", user_role="teacher", class_code=code))
+        for student in (s1, s2):
+            save_profile_for_user(student, UserProfile(profile_name=student, user_role="student", class_code=code))
+
+        with TestClient(backend_main.app) as client:
+            denied = client.post("/api/notifications/fanout", json={"title": "x", "class_code": code},
+                                 headers={"X-Test-User": s1})
+            sent = client.post("/api/notifications/fanout", json={"title": "Test on Friday", "class_code": code},
+                               headers={"X-Test-User": teacher})
+            counts = [client.get("/api/notifications/unread_count", headers={"X-Test-User": u}).json()["unread_count"]
+                      for u in (s1, s2, teacher)]
+
+        self.assertEqual(denied.status_code, 403)
+        self.assertEqual(sent.json(), {"ok": True, "delivered": 2})
+        self.assertEqual(counts, [1, 1, 0])
+
+
+if __name__ == "__main__":
+    unittest.main()
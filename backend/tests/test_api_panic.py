@@ -60,8 +60,16 @@ class TestPanicAPI(unittest.TestCase):
             backend_main, "SAMPLE_TEXTBOOKS_DIR", self.base / "data" / "sample_textbooks"
         )
         self._sample_textbooks_patcher.start()
+        # The sync queue (data/sync_queue/) follows BASE_PATH
+        self._base_path_patcher = patch.object(backend_main, "BASE_PATH", self.base)
+        self._base_path_patcher.start()
+        # Structure indexes (data/textbook_index/) and the text cache follow DATA_DIR
+        self._data_dir_patcher = patch.object(backend_main, "DATA_DIR", self.base / "data")
+        self._data_dir_patcher.start()
 
     def tearDown(self) -> None:
+        self._data_dir_patcher.stop()
+        self._base_path_patcher.stop()
         self._sample_textbooks_patcher.stop()
         os.environ.pop("STUDAXIS_TEST", None)
         os.environ.pop("STUDAXIS_BASE_PATH", None)
@@ -192,6 +200,7 @@ class TestPanicAPI(unittest.TestCase):
         data = r.json()
         self.assertIn("items", data)
         self.assertGreaterEqual(len(data["items"]), 1)
+        self.assertEqual(data["ingest"][0]["file"], "panic_test.txt")
 
     def test_panic_generate_textbook_returns_503_when_ai_unavailable(
         self, mock_get_engine: MagicMock
@@ -22,6 +22,7 @@ from ai_integration_layer import AIResponse, AIState
 from fastapi.testclient import TestClient
 
 import main as backend_main
+from tests.helpers import remove_user_data
 
 
 def _mock_ai_response(text: str, state: AIState = AIState.RESPONSE_RECEIVED) -> AIResponse:
@@ -47,8 +48,12 @@ class TestQuizAPI(unittest.TestCase):
         self.base = Path(self.tmpdir.name)
         os.environ["STUDAXIS_BASE_PATH"] = str(self.base)
         os.environ["STUDAXIS_TEST"] = "1"
+        # main read STUDAXIS_BASE_PATH at import; the sync queue (data/sync_queue/) follows BASE_PATH
+        self._base_path_patcher = patch.object(backend_main, "BASE_PATH", self.base)
+        self._base_path_patcher.start()
 
     def tearDown(self) -> None:
+        self._base_path_patcher.stop()
         os.environ.pop("STUDAXIS_TEST", None)
         os.environ.pop("STUDAXIS_BASE_PATH", None)
         self.tmpdir.cleanup()
@@ -143,6 +148,33 @@ class TestQuizAPI(unittest.TestCase):
         self.assertIn("score", data)
         self.assertIn("max_score", data)
 
+    def test_quiz_history_is_paginated_and_loads_answers_lazily(self, mock_get_engine: MagicMock) -> None:
+        user = f"histuser_{os.getpid()}_{id(self)}"
+        self.addCleanup(remove_user_data, backend_main.DATA_DIR, user)
+        for i, subject in enumerate(["Physics", "Biology", "Physics"]):
+            backend_main._save_quiz_result(user, f"quiz{i}", {
+                "quiz_id": f"quiz{i}",
+                "completed_at": f"2026-03-0{i + 1}T10:00:00+00:00",
+                "score": 10.0 * i, "max_score": 20.0, "percent": 50 * i, "subject": subject,
+                "answers": [{"question_id": "q1", "user_answer": "A", "score": 10.0}],
+            })
+
+        app = self._get_app()
+        with TestClient(app) as client:
+            headers = {"X-Test-User": user}
+            page = client.get("/api/quiz/history?limit=2", headers=headers).json()
+            physics = client.get("/api/quiz/history?subject=physics&until=2026-03-01", headers=headers).json()
+            full = client.get(f"/api/quiz/history/{page['results'][0]['attempt_id']}", headers=headers)
+            missing = client.get("/api/quiz/history/nope", headers=headers)
+
+        self.assertEqual([r["quiz_id"] for r in page["results"]], ["quiz2", "quiz1"])
+        self.assertEqual((page["total"], page["next_offset"]), (3, 2))
+        self.assertNotIn("answers", page["results"][0])
+        self.assertEqual([r["quiz_id"] for r in physics["results"]], ["quiz0"])
+        self.assertEqual(full.status_code, 200)
+        self.assertEqual(full.json()["answers"][0]["question_id"], "q1")
+        self.assertEqual(missing.status_code, 404)
+
     def test_quiz_grade_answer_returns_feedback(self, mock_get_engine: MagicMock) -> None:
         mock_engine = MagicMock()
         mock_engine.request.return_value = _mock_ai_response(
@@ -0,0 +1,142 @@
+"""Tests for aws_sync — change-tracked, delta-encoded user_stats uploads."""
+
+import copy
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import aws_sync
+from aws_sync import apply_user_stats_delta, diff_user_stats, is_payload_heavy, upload_heavy_payload_to_s3
+
+
+def _stats(messages: int = 50) -> dict:
+    return {
+        "streak": {"current": 3, "longest": 5},
+        "quiz_stats": {"total_attempted": 4, "average_score": 7.5, "by_topic": {"Physics": 2}},
+        "chat_history": [{"role": "user", "content": f"question {i} " * 8} for i in range(messages)],
+        "flashcard_stats": {"cards": {f"c{i}": {"box": i % 5} for i in range(40)}},
+        "preferences": {"sync_enabled": True},
+    }
+
+
+class TestStatsDelta(unittest.TestCase):
+    def test_round_trip(self) -> None:
+        old = _stats()
+        new = copy.deepcopy(old)
+        new["quiz_stats"]["total_attempted"] = 5
+        new["quiz_stats"]["by_topic"]["Chemistry"] = 1
+        new["chat_history"] = new["chat_history"][10:] + [{"role": "assistant", "content": "answer"}]
+        new["flashcard_stats"]["cards"]["c3"]["box"] = 4
+        del new["preferences"]
+        ops = diff_user_stats(old, new)
+        self.assertEqual(apply_user_stats_delta(copy.deepcopy(old), ops), new)
+        tail = next(op for op in ops if op[0] == "tail")
+        self.assertEqual((tail[1], tail[2], len(tail[3])), (["chat_history"], 10, 1))
+
+    def test_long_capped_history_is_a_tail(self) -> None:
+        old = list(range(20_000))
+        self.assertEqual(diff_user_stats({"h": old}, {"h": old + [-1]}), [["tail", ["h"], 0, [-1]]])
+        self.assertEqual(diff_user_stats({"h": old}, {"h": old[50:] + [-1, -2]}), [["tail", ["h"], 50, [-1, -2]]])
+        self.assertEqual(diff_user_stats({"h": [1, 1, 2]}, {"h": [1, 2, 3]}), [["tail", ["h"], 1, [3]]])
+
+    def test_unrelated_list_replaced(self) -> None:
+        ops = diff_user_stats({"a": [1, 2, 3]}, {"a": [4, 5]})
+        self.assertEqual(ops, [["set", ["a"], [4, 5]]])
+
+    def test_is_payload_heavy(self) -> None:
+        self.assertFalse(is_payload_heavy({"a": 1}))
+        self.assertTrue(is_payload_heavy(_stats()))
+
+
+class TestDeltaUpload(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.base = Path(self.tmpdir.name)
+        self.user_dir = self.base / "data" / "users" / "stu1"
+        self.user_dir.mkdir(parents=True)
+        self.s3 = MagicMock()
+        self.patches = [
+            patch.dict(os.environ, {"S3_BUCKET_NAME": "bucket"}),
+            patch("boto3.client", return_value=self.s3),
+            patch.object(aws_sync, "_load_dotenv"),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self) -> None:
+        for p in self.patches:
+            p.stop()
+        self.tmpdir.cleanup()
+
+    def _write(self, stats: dict) -> None:
+        (self.user_dir / "user_stats.json").write_text(json.dumps(stats), encoding="utf-8")
+
+    def _uploaded(self, call_index: int = -1) -> dict:
+        kwargs = self.s3.put_object.call_args_list[call_index].kwargs
+        self.assertEqual(kwargs["ContentEncoding"], "gzip")
+        return json.loads(gzip.decompress(kwargs["Body"]))
+
+    def test_snapshot_then_skip_then_delta(self) -> None:
+        stats = _stats()
+        self._write(stats)
+        first = upload_heavy_payload_to_s3(self.base, "stu1")
+        body = self._uploaded()
+        self.assertEqual((body["payload_type"], body["version"]), ("snapshot", 1))
+        self.assertEqual(body["quiz_attempts"], 4)
+        self.assertNotIn("last_sync_timestamp", body["user_stats"])
+
+        # last_sync_timestamp was written back, but nothing else changed
+        self.assertEqual(upload_heavy_payload_to_s3(self.base, "stu1"), first)
+        self.assertEqual(self.s3.put_object.call_count, 1)
+
+        stats["chat_history"].append({"role": "user", "content": "new question"})
+        self._write(stats)
+        key = upload_heavy_payload_to_s3(self.base, "stu1")
+        delta = self._uploaded()
+        self.assertTrue(key.endswith("_v2_delta.json"))
+        self.assertEqual((delta["payload_type"], delta["base_version"]), ("delta", 1))
+        self.assertLess(len(self.s3.put_object.call_args.kwargs["Body"]), 400)
+        rebuilt = apply_user_stats_delta(body["user_stats"], delta["delta"])
+        self.assertEqual(rebuilt["chat_history"][-1]["content"], "new question")
+
+    def test_class_change_is_uploaded_without_stat_changes(self) -> None:
+        self._write(_stats())
+        upload_heavy_payload_to_s3(self.base, "stu1")
+        self.assertEqual(self._uploaded()["class_code"], "SOLO")
+
+        (self.user_dir / "profile.json").write_text(json.dumps({"class_code": "PHY10"}), encoding="utf-8")
+        key = upload_heavy_payload_to_s3(self.base, "stu1")
+        joined = self._uploaded()
+        self.assertEqual(self.s3.put_object.call_count, 2)
+        self.assertTrue(key.endswith("_v2_delta.json"))
+        self.assertEqual((joined["class_code"], joined["delta"]), ("PHY10", []))
+
+        self.assertEqual(upload_heavy_payload_to_s3(self.base, "stu1"), key)
+        self.assertEqual(self.s3.put_object.call_count, 2)
+
+    def test_periodic_snapshot_and_failed_upload_not_acked(self) -> None:
+        stats = _stats()
+        with patch.object(aws_sync, "SNAPSHOT_EVERY", 2):
+            for i in range(4):
+                stats["streak"]["current"] = i + 10
+                self._write(stats)
+                upload_heavy_payload_to_s3(self.base, "stu1")
+            kinds = [self._uploaded(i)["payload_type"] for i in range(4)]
+            self.assertEqual(kinds, ["snapshot", "delta", "delta", "snapshot"])
+
+            self.s3.put_object.side_effect = RuntimeError("network down")
+            stats["streak"]["current"] = 99
+            self._write(stats)
+            self.assertIsNone(upload_heavy_payload_to_s3(self.base, "stu1"))
+            self.s3.put_object.side_effect = None
+            upload_heavy_payload_to_s3(self.base, "stu1")
+            retry = self._uploaded()
+            self.assertEqual((retry["version"], retry["base_version"]), (5, 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
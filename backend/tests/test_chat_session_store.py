@@ -0,0 +1,96 @@
+"""
+Tests for chat_session_store.ChatSessionStore — session index, title search, retention, compaction, legacy import.
+"""
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+_BACKEND = Path(__file__).resolve().parent.parent
+if str(_BACKEND) not in sys.path:
+    sys.path.insert(0, str(_BACKEND))
+
+from chat_session_store import ChatSessionStore  # noqa: E402
+
+
+def _session(n: int, title: str = "", subject: str = "Physics", messages: int = 2) -> dict:
+    return {
+        "id": f"s{n}",
+        "title": title or f"Session {n}",
+        "subject": subject,
+        "timestamp": f"2026-02-{n + 1:02d}T08:00:00+00:00",
+        "messages": [{"role": "user", "content": f"m{i} " + "x" * 100} for i in range(messages)],
+    }
+
+
+class TestChatSessionStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.user_dir = Path(self.tmpdir.name) / "users" / "u1"
+        self.dir = self.user_dir / "chat_sessions"
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def test_index_pages_search_and_lazy_bodies(self) -> None:
+        store = ChatSessionStore(self.dir)
+        store.save(_session(1, "Newton's laws of motion"))
+        store.save(_session(2, "Cell biology basics", subject="Biology", messages=5))
+        store.save(_session(3, "Motion graphs"))
+
+        page, total = store.list(limit=2)
+        self.assertEqual(([s["id"] for s in page], total), (["s3", "s2"], 3))
+        self.assertNotIn("messages", page[0])
+        self.assertEqual(page[1]["message_count"], 5)
+
+        self.assertEqual([s["id"] for s in store.list(q="MOT")[0]], ["s3", "s1"])
+        self.assertEqual([s["id"] for s in store.list(q="motion newton")[0]], ["s1"])
+        self.assertEqual(store.list(q="chemistry"), ([], 0))
+        self.assertEqual([s["id"] for s in store.list(subject="biology")[0]], ["s2"])
+
+        self.assertEqual(len(store.get("s2")["messages"]), 5)
+        self.assertIsNone(store.get("nope"))
+
+        # a resave replaces the earlier copy, and a fresh process sees the same index
+        store.save({**_session(1, "Kinematics"), "messages": []})
+        fresh = ChatSessionStore(self.dir)
+        self.assertEqual(fresh.list()[1], 3)
+        self.assertEqual(fresh.list(q="newton"), ([], 0))
+        self.assertEqual(fresh.get("s1")["title"], "Kinematics")
+
+    def test_retention_and_compaction(self) -> None:
+        store = ChatSessionStore(self.dir, max_sessions=5)
+        store.COMPACT_MIN_BYTES = 2000
+        for n in range(20):
+            store.save(_session(n, messages=3))
+        page, total = store.list()
+        self.assertEqual(total, 5)
+        self.assertEqual([s["id"] for s in page], [f"s{n}" for n in range(19, 14, -1)])
+        self.assertEqual(len(list(self.dir.glob("seg-*.jsonl"))), 1)
+        segment_bytes = sum(p.stat().st_size for p in self.dir.glob("seg-*.jsonl"))
+        self.assertLess(segment_bytes, 2000 + 6 * 400)
+        self.assertEqual(ChatSessionStore(self.dir).get("s19")["messages"][0]["content"][:2], "m0")
+
+        aged = ChatSessionStore(self.user_dir / "aged", retention_days=30)
+        aged.save(_session(1))  # February 2026: well past 30 days
+        aged.save({**_session(2), "timestamp": "2999-01-01T00:00:00+00:00"})
+        self.assertEqual([s["id"] for s in aged.list()[0]], ["s2"])
+
+    def test_legacy_chat_history_is_imported_once(self) -> None:
+        legacy = self.user_dir / "chat_history.json"
+        legacy.parent.mkdir(parents=True)
+        legacy.write_text(json.dumps([_session(2), _session(1)]), encoding="utf-8")  # newest first
+
+        store = ChatSessionStore(self.dir, legacy_path=legacy)
+        self.assertEqual([s["id"] for s in store.list()[0]], ["s2", "s1"])
+        self.assertFalse(legacy.exists())
+        self.assertTrue(legacy.with_name("chat_history.json.migrated").exists())
+        store.save(_session(3))
+        self.assertEqual(ChatSessionStore(self.dir, legacy_path=legacy).list()[1], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+Tests for class_store.ClassStore — per-student completions, incremental counts, legacy class files.
+"""
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+_BACKEND = Path(__file__).resolve().parent.parent
+if str(_BACKEND) not in sys.path:
+    sys.path.insert(0, str(_BACKEND))
+
+from class_store import ClassStore  # noqa: E402
+
+
+class TestClassStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.data = Path(self.tmpdir.name)
+        self.store = ClassStore(self.data / "classes", legacy_dir=self.data)
+
+    def tearDown(self) -> None:
+        self.store.close()
+        self.tmpdir.cleanup()
+
+    def test_completions_are_per_student_and_counted(self) -> None:
+        self.store.add_assignment("PHY11", {"id": "a1", "quiz_id": "q1", "title": "Kinematics"})
+        self.store.add_assignment("PHY11", {"id": "a2", "quiz_id": "q2", "title": "Forces"})
+        self.assertTrue(self.store.complete("PHY11", "a1", "s1", 8))
+        self.assertTrue(self.store.complete("PHY11", "a1", "s2", 6))
+        self.assertTrue(self.store.complete("PHY11", "a1", "s1", 10))  # retake replaces, not double-counts
+        self.assertFalse(self.store.complete("PHY11", "missing", "s1", 5))
+
+        own = self.store.list_assignments("PHY11", user_id="s2")
+        self.assertEqual([(a["id"], a["status"], a["score"]) for a in own], [("a1", "completed", 6.0), ("a2", "pending", None)])
+        self.assertEqual(self.store.list_assignments("PHY11", user_id="s3")[0]["status"], "pending")
+
+        teacher = self.store.list_assignments("PHY11")
+        self.assertEqual((teacher[0]["completed_count"], teacher[0]["average_score"]), (2, 8.0))
+        self.assertEqual((teacher[1]["completed_count"], teacher[1]["average_score"]), (0, None))
+        self.assertEqual({c["user_id"]: c["score"] for c in self.store.completions("PHY11", "a1")}, {"s1": 10.0, "s2": 6.0})
+
+    def test_concurrent_completions_from_one_class(self) -> None:
+        self.store.add_assignment("BIO", {"id": "a1", "title": "Cells"})
+
+        def finish(n: int) -> None:
+            self.store.complete("BIO", "a1", f"s{n}", n % 10)
+
+        threads = [threading.Thread(target=finish, args=(n,)) for n in range(60)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        row = self.store.list_assignments("BIO")[0]
+        self.assertEqual(row["completed_count"], 60)
+        self.assertEqual(row["average_score"], 4.5)
+
+    def test_legacy_files_are_imported_once(self) -> None:
+        (self.data / "teachers").mkdir()
+        (self.data / "assignments").mkdir()
+        (self.data / "teachers" / "CHEM1.json").write_text(json.dumps({"name": "T", "classCode": "CHEM1"}), encoding="utf-8")
+        (self.data / "assignments" / "CHEM1.json").write_text(json.dumps([
+            {"id": "old", "title": "Done before", "status": "completed", "score": 7},
+            {"id": "new", "title": "Open", "status": "pending"},
+        ]), encoding="utf-8")
+
+        self.assertEqual(self.store.get_teacher("CHEM1")["name"], "T")
+        items = self.store.list_assignments("CHEM1", user_id="s1")
+        self.assertEqual([(a["id"], a["status"]) for a in items], [("old", "completed"), ("new", "pending")])
+        self.assertTrue((self.data / "assignments" / "CHEM1.json.migrated").exists())
+        self.assertIsNone(self.store.get_teacher("NOPE"))
+
+        self.store.save_teacher("CHEM1", {"name": "T2"})
+        reopened = ClassStore(self.data / "classes", legacy_dir=self.data)
+        self.assertEqual(reopened.get_teacher("CHEM1"), {"name": "T2"})
+        self.assertEqual(len(reopened.list_assignments("CHEM1")), 2)
+        reopened.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
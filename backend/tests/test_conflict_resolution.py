@@ -976,6 +976,92 @@ class TestConflictTypes(unittest.TestCase):
         self.assertEqual(resolved["questions"][0]["q"], "Corrected")
 
 
+class TestBulkReconciliation(unittest.TestCase):
+    """reconcile_bulk() matches the per-entity path and writes pending conflicts once."""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.engine = ConflictResolutionEngine(base_path=self.temp_dir)
+        self.engine.config.ENABLE_CONFLICT_LOGGING = False
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+    
+    @staticmethod
+    def _entities(n, seed=3):
+        import random
+        rng = random.Random(seed)
+        stamps = ["2026-03-05T09:00:00Z", "2026-03-05T09:00:03Z", "2026-03-05T10:15:00Z",
+                  "2026-03-05T10:20:00+00:00", "not-a-date", None]
+        local, cloud = {}, {}
+        for i in range(n):
+            base = {"score": rng.randint(0, 3), "tags": ["a", "b"][: rng.randint(0, 2)],
+                    "meta": {"n": rng.choice([1, 1.0, 2])}, "version": rng.randint(1, 3),
+                    "updated_at": rng.choice(stamps), "last_sync_timestamp": rng.choice(stamps[:2])}
+            other = dict(base, score=rng.choice([base["score"], 9]), version=rng.randint(1, 3),
+                         updated_at=rng.choice(stamps), meta={"n": rng.choice([1, 2])})
+            if rng.random() < 0.2:
+                other["checksum"] = "x"
+            if rng.random() < 0.1:
+                other["extra"] = None
+            if rng.random() < 0.95:
+                local[f"e{i}"] = base
+            if rng.random() < 0.95:
+                cloud[f"e{i}"] = other
+        return local, cloud
+    
+    def test_matches_per_entity_detection_and_resolution(self):
+        local, cloud = self._entities(400)
+        result = self.engine.reconcile_bulk(local, cloud, "UserStats", save_pending=False)
+        bulk_conflicts = {c.entity_id: c for c in result.conflicts}
+        self.assertTrue(bulk_conflicts)
+        
+        for entity_id in set(local) | set(cloud):
+            single = self.engine.detect_conflict(entity_id, "UserStats", local.get(entity_id), cloud.get(entity_id))
+            self.assertEqual(single.conflict_detected, entity_id in bulk_conflicts, entity_id)
+            if not single.conflict_detected:
+                self.assertIs(result.resolved[entity_id], local.get(entity_id) or cloud.get(entity_id))
+                continue
+            bulk = bulk_conflicts[entity_id]
+            self.assertEqual(bulk.reason, single.reason)
+            self.assertEqual(set(bulk.conflicting_fields), set(single.conflicting_fields))
+            resolution = self.engine.resolve_conflict(single)
+            self.assertEqual(result.resolutions[entity_id].strategy, resolution.strategy)
+            self.assertEqual(result.resolved[entity_id], resolution.resolved_data)
+    
+    def test_pending_conflicts_written_once(self):
+        self.engine.config.ENABLE_LAST_WRITE_WINS = False
+        self.engine.config.ENABLE_AUTO_MERGE = False
+        local = {f"q{i}": {"score": 9, "version": 2, "updated_at": "2026-03-05T10:15:00Z"} for i in range(50)}
+        cloud = {f"q{i}": {"score": 7, "version": 2, "updated_at": "2026-03-05T11:15:00Z"} for i in range(50)}
+        self.engine.save_pending_conflict(ConflictResult(
+            conflict_detected=True, entity_id="old", entity_type="Quiz", reason=ConflictReason.CONCURRENT_EDITS))
+        
+        with patch.object(self.engine, "_save_pending_conflicts", wraps=self.engine._save_pending_conflicts) as save:
+            result = self.engine.reconcile_bulk(local, cloud, "Quiz")
+        self.assertEqual(save.call_count, 1)
+        self.assertEqual(len(result.pending), 50)
+        self.assertEqual(result.summary()["auto_resolved"], 0)
+        pending = self.engine.get_pending_conflicts()
+        self.assertEqual(len(pending), 51)
+        self.assertEqual(pending[-1]["reason"], "timestamp_divergence")
+        
+        self.engine.remove_pending_conflicts([f"q{i}" for i in range(50)])
+        self.assertEqual([c["entity_id"] for c in self.engine.get_pending_conflicts()], ["old"])
+    
+    def test_orchestrator_moves_to_conflict_state(self):
+        with patch("sync_orchestrator.SyncOrchestrator"):
+            orchestrator = ConflictAwareOrchestrator(base_path=self.temp_dir)
+        orchestrator.conflict_engine.config.ENABLE_CONFLICT_LOGGING = False
+        orchestrator.conflict_engine.config.ENABLE_LAST_WRITE_WINS = False
+        local = {"q1": {"score": 9, "updated_at": "2026-03-05T10:15:00Z"}}
+        cloud = {"q1": {"score": 7, "updated_at": "2026-03-05T11:15:00Z"}, "q2": {"score": 1}}
+        result = orchestrator.reconcile_bulk(local, cloud, "Quiz")
+        self.assertEqual(result.pending, ["q1"])
+        self.assertEqual(result.resolved, {"q2": {"score": 1}})
+        orchestrator.base_orchestrator.transition_to.assert_called_once_with("CONFLICT")
+
+
 # ═══════════════════════════════════════════════════════════════════════
 # TEST RUNNER
 # ═══════════════════════════════════════════════════════════════════════
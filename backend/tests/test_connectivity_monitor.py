@@ -0,0 +1,81 @@
+"""Tests for connectivity_monitor — cached reachability with offline backoff."""
+
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from connectivity_monitor import ConnectivityMonitor, get_connectivity_monitor
+from sync_manager import SyncManager
+
+_ENDPOINT = "https://example.appsync-api.local/graphql"
+
+
+class TestConnectivityMonitor(unittest.TestCase):
+    def _monitor(self, probe) -> ConnectivityMonitor:
+        monitor = ConnectivityMonitor(_ENDPOINT, probe=probe)
+        self.addCleanup(monitor.stop)
+        return monitor
+
+    def test_readers_do_not_block_on_slow_probe(self) -> None:
+        release = threading.Event()
+
+        def slow_probe() -> bool:
+            release.wait(5)
+            return True
+
+        monitor = self._monitor(slow_probe)
+        started = time.monotonic()
+        self.assertFalse(monitor.is_online())  # unknown yet -> cached False, probe in background
+        self.assertLess(time.monotonic() - started, 0.5)
+        release.set()
+        deadline = time.monotonic() + 2
+        while not monitor.is_online() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(monitor.is_online())
+
+    def test_wait_probes_once_then_serves_cache(self) -> None:
+        calls = []
+        monitor = self._monitor(lambda: calls.append(1) or True)
+        with patch.object(monitor, "start"):
+            self.assertTrue(monitor.is_online(wait=True))
+            self.assertTrue(monitor.is_online(wait=True))
+        self.assertEqual(len(calls), 1)
+        self.assertAlmostEqual(monitor.status()["next_check_in"], monitor.ONLINE_TTL, delta=1)
+
+    def test_offline_backoff_grows_and_caps(self) -> None:
+        monitor = self._monitor(lambda: False)
+        monitor.JITTER_FACTOR = 0.0
+        delays = []
+        for _ in range(8):
+            monitor.check_now()
+            delays.append(monitor.status()["next_check_in"])
+        self.assertEqual(delays[:3], [5.0, 10.0, 20.0])
+        self.assertEqual(delays[-1], monitor.BACKOFF_MAX)
+        monitor.report_success()
+        self.assertEqual(monitor.status()["consecutive_failures"], 0)
+        self.assertTrue(monitor.status()["online"])
+
+    def test_unconfigured_endpoint_is_offline_without_probing(self) -> None:
+        monitor = ConnectivityMonitor("https://your-appsync-endpoint", probe=lambda: self.fail("probed"))
+        self.assertFalse(monitor.is_online(wait=True))
+        self.assertIsNone(monitor._thread)
+
+
+class TestSyncManagerConnectivity(unittest.TestCase):
+    def test_check_connectivity_reads_shared_monitor(self) -> None:
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        sm = SyncManager(appsync_endpoint=_ENDPOINT, appsync_api_key="k", base_path=tmpdir.name)
+        self.assertIs(sm.connectivity, get_connectivity_monitor(_ENDPOINT))
+        with patch.object(sm.session, "post", side_effect=AssertionError("network call")), \
+                patch.object(sm.connectivity, "start"):
+            sm.connectivity.report_failure()
+            self.assertFalse(sm.check_connectivity())
+            sm.connectivity.report_success()
+            self.assertTrue(sm.check_connectivity())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+"""Tests for rag.context_packer and its use in AIEngine prompt building."""
+
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from ai_integration_layer import AIConfig, AIEngine, AITaskType
+from rag.context_packer import clip_to_tokens, context_budget, count_tokens, pack_context
+
+
+class _Doc:
+    def __init__(self, text: str) -> None:
+        self.page_content = text
+
+
+def _sentence(word: str, n: int) -> str:
+    return " ".join(f"{word}{i}" for i in range(n)) + "."
+
+
+class TestContextPacker(unittest.TestCase):
+    def test_count_tokens_counts_words_and_symbols(self) -> None:
+        self.assertEqual(count_tokens(""), 0)
+        self.assertEqual(count_tokens("F = m a ."), 5)
+        self.assertGreater(count_tokens("electromagnetism"), 1)
+
+    def test_greedy_skips_chunk_that_does_not_fit(self) -> None:
+        big = _sentence("alpha", 200)
+        small = _sentence("beta", 10)
+        packed = pack_context([big, small], budget_tokens=count_tokens(small) + 5)
+        self.assertEqual(packed.chunks, [small])
+        self.assertEqual(packed.dropped, 1)
+
+    def test_scores_override_rank_order(self) -> None:
+        a, b = _sentence("first", 10), _sentence("second", 10)
+        packed = pack_context([a, b], budget_tokens=count_tokens(b) + 2, scores=[0.1, 0.9])
+        self.assertEqual(packed.chunks, [b])
+
+    def test_splitter_overlap_is_stripped(self) -> None:
+        text = _sentence("word", 120)
+        first, second = text[:600], text[500:1100]  # 100-char overlap like the splitter
+        packed = pack_context([_Doc(first), _Doc(second)], budget_tokens=10_000)
+        self.assertEqual(len(packed.chunks), 2)
+        self.assertFalse(packed.chunks[1].startswith(text[500:520]))
+        self.assertIn(text[600:620].strip(), packed.chunks[1])
+
+    def test_contained_duplicate_dropped(self) -> None:
+        a = _sentence("gamma", 30)
+        packed = pack_context([a, a[10:200]], budget_tokens=10_000)
+        self.assertEqual(packed.chunks, [a])
+
+    def test_best_chunk_clipped_when_nothing_fits(self) -> None:
+        big = _sentence("delta", 300)
+        packed = pack_context([big], budget_tokens=50)
+        self.assertEqual(len(packed.chunks), 1)
+        self.assertLessEqual(packed.tokens, 50)
+
+    def test_clip_and_budget(self) -> None:
+        text = _sentence("eta", 500)
+        self.assertLessEqual(count_tokens(clip_to_tokens(text, 100)), 100)
+        self.assertEqual(clip_to_tokens("short text", 100), "short text")
+        self.assertEqual(context_budget("x " * 100, context_tokens=1000, reserve_tokens=500, safety_tokens=0), 400)
+
+
+class TestEnginePromptBudget(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        config = AIConfig()
+        config.ENABLE_AI_LOGGING = False
+        config.MODEL_CONTEXT_TOKENS = 1200
+        config.AI_RESPONSE_MAX_TOKENS = 200
+        self.engine = AIEngine(base_path=self.tmpdir.name, config=config)
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def test_source_content_fitted_to_prompt_budget(self) -> None:
+        captured = {}
+
+        def fake_ollama(model_name, prompt, timeout_seconds, **kwargs):
+            captured["prompt"] = prompt
+            return "[]"
+
+        with patch.object(self.engine, "_call_ollama", side_effect=fake_ollama):
+            self.engine.request(
+                task_type=AITaskType.QUIZ_GENERATION,
+                user_input="Generate quiz",
+                context_data={"subject": "Physics", "source_content": _sentence("theta", 3000)},
+                offline_mode=True,
+            )
+        self.assertLessEqual(count_tokens(captured["prompt"]), 1000)
+        self.assertIn("theta0", captured["prompt"])
+
+    def test_rag_prompt_packs_chunks_within_budget(self) -> None:
+        docs = [_Doc(_sentence(f"c{i}x", 150)) for i in range(10)]
+        prompt = self.engine._build_rag_prompt(
+            task_type=AITaskType.CHAT,
+            user_input="Explain",
+            context_data={},
+            retrieved_chunks=docs,
+            textbook_context="",
+        )
+        self.assertLessEqual(count_tokens(prompt), 1000)
+        self.assertIn("c0x0", prompt)
+
+    def test_textbook_reference_clipped_into_leftover_budget(self) -> None:
+        prompt = self.engine._build_rag_prompt(
+            task_type=AITaskType.CHAT,
+            user_input="Explain",
+            context_data={},
+            retrieved_chunks=[_Doc(_sentence("chunk", 60))],
+            textbook_context=_sentence("ref", 3000),
+        )
+        self.assertLessEqual(count_tokens(prompt), 1000)
+        self.assertIn("chunk0", prompt)
+        self.assertIn("ref0", prompt)
+
+
+if __name__ == "__main__":
+    unittest.main()
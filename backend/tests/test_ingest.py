@@ -0,0 +1,69 @@
+"""Tests for utils.ingest — spooling uploads, pooled extraction with a char budget, fair combining."""
+
+import io
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from tests.helpers import make_pdf
+from utils import ingest
+from utils.ingest import IngestedFile, combine, extract_texts, spool_uploads
+
+
+def _upload(name: str, data: bytes) -> SimpleNamespace:
+    return SimpleNamespace(filename=name, file=io.BytesIO(data))
+
+
+class TestIngest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmpdir.name)
+
+    def tearDown(self) -> None:
+        ingest.shutdown_pool()
+        self.tmpdir.cleanup()
+
+    def test_spool_gives_each_upload_its_own_file(self) -> None:
+        files = spool_uploads(
+            [_upload("notes.txt", b"first"), _upload("notes.txt", b"second"), _upload("x.exe", b"no"), _upload("", b"")],
+            self.root / "spool",
+        )
+        self.assertEqual([f.filename for f in files], ["notes.txt", "notes.txt"])
+        self.assertNotEqual(files[0].path, files[1].path)
+        self.assertEqual([f.path.read_bytes() for f in files], [b"first", b"second"])
+        self.assertEqual(files[1].size_bytes, 6)
+        ingest.cleanup(files)
+        self.assertEqual(list((self.root / "spool").iterdir()), [])
+
+    def test_pool_extracts_documents_within_budget(self) -> None:
+        uploads = [
+            _upload("a.pdf", make_pdf([f"Alpha page {i} on optics" for i in range(8)])),
+            _upload("b.pdf", make_pdf([f"Beta page {i} on waves" for i in range(8)])),
+            _upload("c.txt", b"gamma " * 100),
+        ]
+        files = spool_uploads(uploads, self.root / "spool")
+        with patch.dict(os.environ, {"STUDAXIS_INGEST_WORKERS": "2"}):
+            extract_texts(files, 60, self.root / "cache")
+        self.assertIsNotNone(ingest._pool)
+        self.assertTrue(files[0].text.startswith("Alpha page 0"))
+        self.assertTrue(files[1].text.startswith("Beta page 0"))
+        self.assertTrue(all(len(f.text) <= 60 and f.error is None for f in files))
+        self.assertEqual(files[2].text, ("gamma " * 100)[:60])
+        timing = files[0].timing()
+        self.assertEqual((timing["file"], timing["chars"]), ("a.pdf", len(files[0].text)))
+        self.assertGreater(timing["extract_ms"], 0)
+
+    def test_combine_shares_budget_across_files(self) -> None:
+        files = [IngestedFile("a", text="a" * 10), IngestedFile("b", text="b" * 500), IngestedFile("c", text="c" * 500)]
+        text = combine(files, 104, sep="|")
+        parts = text.split("|")
+        self.assertEqual(len(text), 104)
+        self.assertEqual([len(p) for p in parts], [10, 46, 46])
+        self.assertEqual(combine([IngestedFile("e", text="  ")], 100), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
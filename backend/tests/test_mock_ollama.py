@@ -0,0 +1,67 @@
+"""
+Tests for benchmarks/mock_ollama.py — the Ollama stand-in used by the load benchmark.
+"""
+from __future__ import annotations
+
+import json
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+
+import requests
+
+_BENCH = Path(__file__).resolve().parent.parent / "benchmarks"
+if str(_BENCH) not in sys.path:
+    sys.path.insert(0, str(_BENCH))
+
+from mock_ollama import MockOllamaServer  # noqa: E402
+
+
+class TestMockOllama(unittest.TestCase):
+    def test_generate_non_streaming_takes_configured_time(self) -> None:
+        with MockOllamaServer(latency_ms=30, tokens=10, tokens_per_sec=200) as mock:
+            tags = requests.get(f"{mock.base_url}/api/tags", timeout=5).json()
+            self.assertEqual(tags["models"][0]["name"], mock.model)
+
+            started = time.perf_counter()
+            r = requests.post(f"{mock.base_url}/api/generate",
+                              json={"model": mock.model, "prompt": "hi", "stream": False}, timeout=5)
+            elapsed = time.perf_counter() - started
+        data = r.json()
+        self.assertTrue(data["done"])
+        self.assertEqual(data["eval_count"], 10)
+        self.assertEqual(len(data["response"].split()), 10)
+        self.assertGreaterEqual(elapsed, 0.030 + 10 / 200)
+        self.assertEqual(mock.snapshot_counts()["/api/generate"], 1)
+
+    def test_streaming_chat_and_appsync(self) -> None:
+        with MockOllamaServer(latency_ms=0, tokens=5, tokens_per_sec=0) as mock:
+            r = requests.post(f"{mock.base_url}/api/chat",
+                              json={"model": mock.model, "messages": [{"role": "user", "content": "hi"}]},
+                              stream=True, timeout=5)
+            chunks = [json.loads(line) for line in r.iter_lines() if line]
+            gql = requests.post(f"{mock.base_url}/graphql", json={"query": "mutation {}"}, timeout=5).json()
+        self.assertEqual(len(chunks), 6)
+        self.assertEqual(chunks[0]["message"]["role"], "assistant")
+        self.assertTrue(chunks[-1]["done"])
+        self.assertIn("data", gql)
+
+    def test_parallel_limit_queues_generations(self) -> None:
+        with MockOllamaServer(latency_ms=100, tokens=1, tokens_per_sec=0, parallel=1) as mock:
+            def call() -> None:
+                requests.post(f"{mock.base_url}/api/generate", json={"prompt": "x", "stream": False}, timeout=5)
+
+            started = time.perf_counter()
+            threads = [threading.Thread(target=call) for _ in range(2)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - started
+        self.assertGreaterEqual(elapsed, 0.2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+Tests for notification_store.NotificationStore — counters, fan-out, TTL and cap eviction, legacy import.
+"""
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+_BACKEND = Path(__file__).resolve().parent.parent
+if str(_BACKEND) not in sys.path:
+    sys.path.insert(0, str(_BACKEND))
+
+from notification_store import NotificationStore  # noqa: E402
+
+
+class TestNotificationStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmpdir.name) / "notifications"
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def test_counters_follow_read_delete_and_clear(self) -> None:
+        store = NotificationStore(self.dir)
+        a = store.push("u1", {"title": "A"})
+        b = store.push("u1", {"title": "B", "pinned": True, "action": {"label": "Go", "href": "/x"}})
+        store.push("u1", {"title": "C"})
+        self.assertEqual(store.unread_count("u1"), 3)
+
+        self.assertTrue(store.mark_read("u1", a["id"]))
+        self.assertTrue(store.mark_read("u1", a["id"]))  # idempotent
+        self.assertFalse(store.mark_read("u2", a["id"]))  # other inboxes are separate
+        self.assertEqual(store.unread_count("u1"), 2)
+
+        page, total, unread = store.list("u1")
+        self.assertEqual([n["title"] for n in page], ["C", "B", "A"])
+        self.assertEqual((total, unread), (3, 2))
+        self.assertEqual(page[1]["action"], {"label": "Go", "href": "/x"})
+        self.assertEqual([n["title"] for n in store.list("u1", unread_only=True)[0]], ["C", "B"])
+
+        self.assertTrue(store.delete("u1", a["id"]))
+        self.assertFalse(store.delete("u1", a["id"]))
+        self.assertEqual(store.clear("u1"), 1)
+        self.assertEqual(store.list("u1")[0][0]["id"], b["id"])  # pinned survives
+        self.assertEqual(store.unread_count("u1"), 1)
+        store.close()
+
+    def test_fanout_cap_and_ttl(self) -> None:
+        store = NotificationStore(self.dir, max_per_user=3, ttl_days=7)
+        created = store.push_many(["s1", "s2", "s2", ""], {"title": "Class moved", "type": "announcement"})
+        self.assertEqual(len(created), 2)
+        self.assertEqual((store.unread_count("s1"), store.unread_count("s2")), (1, 1))
+
+        store.push("s1", {"title": "keep", "pinned": True})
+        for i in range(5):
+            store.push("s1", {"title": f"n{i}"})
+        page, total, unread = store.list("s1")
+        self.assertEqual([n["title"] for n in page], ["n4", "n3", "n2", "keep"])
+        self.assertEqual((total, unread), (4, 4))
+
+        store.close()
+        legacy = [
+            {"id": "new", "title": "recent", "timestamp": "2999-01-01T00:00:00+00:00", "read": False},
+            {"id": "old", "title": "stale", "timestamp": "2020-01-01T00:00:00+00:00", "read": False},
+        ]
+        (self.dir / "s3.json").write_text(json.dumps(legacy), encoding="utf-8")
+        reopened = NotificationStore(self.dir, ttl_days=7)
+        page, total, unread = reopened.list("s3")
+        self.assertEqual([n["id"] for n in page], ["new"])
+        self.assertEqual((total, unread), (1, 1))
+        self.assertTrue((self.dir / "s3.json.migrated").exists())
+        self.assertEqual(reopened.unread_count("s1"), 4)  # counters persist
+        reopened.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
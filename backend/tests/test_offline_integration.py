@@ -35,6 +35,10 @@ if "backend_main" in sys.modules:
 
 from fastapi.testclient import TestClient
 
+from sync_queue_log import SyncQueueLog
+from user_stats_cache import get_user_stats_cache
+from user_stats_store import UserStatsStore
+
 
 def _is_localhost_url(url_or_request) -> bool:
     """Check if target is localhost (Ollama, ChromaDB) — allow; else block as cloud."""
@@ -164,6 +168,7 @@ class TestOfflineIntegration(unittest.TestCase):
 
                 # Assert 2: user_stats.json updated with new score
                 stats_path = self.base_path / "data" / "users" / "offline_test_user" / "user_stats.json"
+                get_user_stats_cache().flush(stats_path)  # written back after a short delay
                 self.assertTrue(
                     stats_path.exists(),
                     f"user_stats.json should exist at {stats_path}",
@@ -176,19 +181,18 @@ class TestOfflineIntegration(unittest.TestCase):
                     "user_stats should have total_attempted > 0 after quiz submit",
                 )
                 self.assertIn("average_score", quiz_stats)
-                self.assertIn("by_topic", quiz_stats)
+                # per-topic stats are a cold section (stats/quiz_by_topic.json)
+                full = UserStatsStore(stats_path.parent).load(("quiz_stats.by_topic",))
+                self.assertTrue(full["quiz_stats"]["by_topic"], "by_topic should be recorded after quiz submit")
 
                 # Assert 3: Sync queue has pending item (pending_sync == in queue)
-                queue_path = self.base_path / "data" / "sync_queue.json"
-                self.assertTrue(
-                    queue_path.exists(),
-                    f"sync_queue.json should exist at {queue_path}",
-                )
-                queue = json.loads(queue_path.read_text(encoding="utf-8"))
+                queue_path = self.base_path / "data" / "sync_queue"
                 self.assertTrue(
-                    isinstance(queue, list),
-                    "sync_queue should be a list",
+                    any(queue_path.glob("seg-*.log")),
+                    f"sync queue log should exist at {queue_path}",
                 )
+                # Replay from disk (fresh instance, not the process-wide one)
+                queue = [item for _, item in SyncQueueLog(queue_path).pending()]
                 quiz_items = [q for q in queue if q.get("mutation_type") == "recordQuizAttempt"]
                 self.assertGreater(
                     len(quiz_items),
@@ -0,0 +1,82 @@
+"""
+Tests for quiz_history_store.QuizHistoryStore — attempt index, filters, legacy result files.
+"""
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+_BACKEND = Path(__file__).resolve().parent.parent
+if str(_BACKEND) not in sys.path:
+    sys.path.insert(0, str(_BACKEND))
+
+from quiz_history_store import QuizHistoryStore  # noqa: E402
+
+
+def _result(quiz_id: str, day: int, subject: str = "Physics") -> dict:
+    return {
+        "quiz_id": quiz_id,
+        "completed_at": f"2026-01-{day:02d}T09:00:00+00:00",
+        "score": float(day), "max_score": 30.0, "percent": day, "subject": subject,
+        "answers": [{"question_id": "q1", "user_answer": "x" * 200}],
+    }
+
+
+class TestQuizHistoryStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmpdir.name) / "quizzes" / "u1"
+        self.dir.mkdir(parents=True)
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def test_record_query_and_lazy_result(self) -> None:
+        store = QuizHistoryStore(self.dir)
+        ids = [store.record(f"quiz{d}", _result(f"quiz{d}", d, "Biology" if d % 2 else "Physics")) for d in range(1, 11)]
+
+        page, total = store.query(limit=3, offset=2)
+        self.assertEqual(total, 10)
+        self.assertEqual([r["quiz_id"] for r in page], ["quiz8", "quiz7", "quiz6"])
+        self.assertNotIn("answers", page[0])
+        self.assertNotIn("file", page[0])
+
+        bio, total = store.query(subject="BIOLOGY", since="2026-01-03", until="2026-01-07")
+        self.assertEqual([r["percent"] for r in bio], [7, 5, 3])
+        self.assertEqual(total, 3)
+        self.assertEqual(store.query(quiz_id="quiz4")[1], 1)
+
+        full = store.load_result(ids[0])
+        self.assertEqual(full["answers"][0]["question_id"], "q1")
+        self.assertEqual(full["attempt_id"], ids[0])
+        self.assertIsNone(store.load_result("unknown"))
+
+        # a second process replays the index without touching result files
+        for p in (self.dir / "results").iterdir():
+            p.write_text("not json", encoding="utf-8")
+        fresh = QuizHistoryStore(self.dir)
+        self.assertEqual(fresh.query(limit=1)[0][0]["quiz_id"], "quiz10")
+        self.assertIsNone(fresh.load_result(ids[0]))
+
+    def test_legacy_result_files_are_indexed_once(self) -> None:
+        for day, name in [(1, "quick_1767258000_0123abcd_result.json"), (2, "my_quiz_1767344400_89abcdef_result.json")]:
+            (self.dir / name).write_text(json.dumps(_result(name.split("_17")[0], day)), encoding="utf-8")
+        (self.dir / "quick.json").write_text(json.dumps({"items": []}), encoding="utf-8")
+
+        store = QuizHistoryStore(self.dir)
+        page, total = store.query()
+        self.assertEqual(total, 2)
+        self.assertEqual([(r["quiz_id"], r["attempt_id"]) for r in page],
+                         [("my_quiz", "1767344400_89abcdef"), ("quick", "1767258000_0123abcd")])
+        self.assertEqual(store.load_result("1767258000_0123abcd")["percent"], 1)
+        self.assertTrue((self.dir / "attempts.jsonl").is_file())
+
+        store.record("quick", _result("quick", 3))
+        self.assertEqual(QuizHistoryStore(self.dir).query()[1], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+"""
+Tests for startup_bootstrap.OllamaBootstrap and the /api/health, /api/ready endpoints.
+
+Stage functions are injected, so no Ollama, psutil probing or subprocess is involved.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+_BACKEND = Path(__file__).resolve().parent.parent
+if str(_BACKEND) not in sys.path:
+    sys.path.insert(0, str(_BACKEND))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main as backend_main  # noqa: E402
+from startup_bootstrap import OllamaBootstrap  # noqa: E402
+
+
+class TestOllamaBootstrap(unittest.TestCase):
+    def test_stages_run_in_order_and_report_ready(self) -> None:
+        calls = []
+        boot = OllamaBootstrap(
+            select_model=lambda: calls.append("select") or "llama3.2:3b",
+            ensure_serve=lambda: calls.append("serve") or True,
+            ensure_model=lambda m: calls.append(f"pull:{m}") or True,
+        )
+        self.assertEqual(boot.status()["state"], "not_started")
+        self.assertTrue(boot.start())
+        self.assertTrue(boot.wait(5))
+
+        status = boot.status()
+        self.assertEqual(calls, ["select", "serve", "pull:llama3.2:3b"])
+        self.assertEqual(status["state"], "ready")
+        self.assertTrue(status["ai_ready"])
+        self.assertEqual(status["model"], "llama3.2:3b")
+        self.assertEqual({s["status"] for s in status["stages"].values()}, {"done"})
+        self.assertFalse(boot.start(retry=True))  # ready: never re-run
+
+    def test_unreachable_ollama_is_degraded_and_retried(self) -> None:
+        serve_results = [False, True]
+        boot = OllamaBootstrap(
+            select_model=lambda: "m",
+            ensure_serve=lambda: serve_results.pop(0),
+            ensure_model=lambda m: True,
+        )
+        boot.run()
+        status = boot.status()
+        self.assertEqual(status["state"], "degraded")
+        self.assertEqual(status["stages"]["ollama_serve"]["status"], "failed")
+        self.assertEqual(status["stages"]["model_pull"]["status"], "skipped")
+
+        self.assertFalse(boot.start(retry=True))  # within RETRY_SECONDS
+        boot.RETRY_SECONDS = 0
+        self.assertFalse(boot.start())  # retry must be asked for
+        self.assertTrue(boot.start(retry=True))
+        self.assertTrue(boot.wait(5))
+        self.assertEqual(boot.status()["state"], "ready")
+        self.assertEqual(boot.status()["runs"], 2)
+
+    def test_stage_exception_is_recorded(self) -> None:
+        def broken() -> str:
+            raise OSError("config dir read-only")
+
+        boot = OllamaBootstrap(select_model=broken, ensure_serve=lambda: True, ensure_model=lambda m: True)
+        boot.run()
+        status = boot.status()
+        self.assertEqual(status["state"], "degraded")
+        self.assertEqual(status["stages"]["select_model"]["status"], "failed")
+        self.assertIn("read-only", status["stages"]["select_model"]["error"])
+        self.assertEqual(status["stages"]["ollama_serve"]["status"], "skipped")
+
+
+class TestReadinessEndpoints(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["STUDAXIS_BASE_PATH"] = self.tmpdir.name
+
+    def tearDown(self) -> None:
+        os.environ.pop("STUDAXIS_BASE_PATH", None)
+        self.tmpdir.cleanup()
+
+    def test_health_answers_while_bootstrap_blocks(self) -> None:
+        release = threading.Event()
+        boot = OllamaBootstrap(
+            select_model=lambda: "m",
+            ensure_serve=lambda: release.wait(10),
+            ensure_model=lambda m: True,
+        )
+        with patch.object(backend_main, "get_ollama_bootstrap", return_value=boot):
+            with TestClient(backend_main.app) as client:
+                health = client.get("/api/health")
+                pending = client.get("/api/ready")
+                release.set()
+                self.assertTrue(boot.wait(5))
+                done = client.get("/api/ready")
+
+        self.assertEqual(health.status_code, 200)
+        self.assertEqual(health.json()["startup"], "starting")
+        self.assertFalse(health.json()["ollama_available"])
+        self.assertEqual(pending.status_code, 503)
+        self.assertEqual(pending.json()["state"], "starting")
+        self.assertEqual(done.status_code, 200)
+        self.assertEqual(done.json()["state"], "ready")
+
+
+if __name__ == "__main__":
+    unittest.main()
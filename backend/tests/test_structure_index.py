@@ -0,0 +1,155 @@
+"""Tests for rag.structure_index — chapter/section detection and chunk tagging."""
+
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+_BACKEND = Path(__file__).resolve().parent.parent
+if str(_BACKEND) not in sys.path:
+    sys.path.insert(0, str(_BACKEND))
+
+import main as backend_main
+from rag.structure_index import (
+    _heading_sections,
+    annotate_chunks,
+    build_structure,
+    load_or_build,
+    metadata_filter,
+)
+from tests.helpers import make_pdf
+
+
+class _Doc:
+    def __init__(self, text: str, page: int, start: int = 0) -> None:
+        self.page_content = text
+        self.metadata = {"page": page, "start_index": start, "source": "book.pdf"}
+
+
+_BOOK = [
+    "Contents\nChapter 1 Motion ..... 2\nChapter 2 Forces ..... 4\nChapter 3 Energy ..... 6",
+    "Preface text.",
+    "Chapter 1 Motion\nBodies move.\n1.1 Speed\nSpeed is distance over time.",
+    "1.2 Acceleration\nRate of change of velocity.",
+    "Chapter 2 Forces\nPushes and pulls.\n2.1 Newton's Laws\nF = ma.",
+    "More on forces.",
+    "Chapter 3 Energy\nWork done.",
+]
+
+
+class TestHeadingDetection(unittest.TestCase):
+    def test_chapters_and_sections_with_page_ranges(self) -> None:
+        structure = build_structure(Path("book.txt"), _BOOK)
+        self.assertEqual(structure.method, "headings")
+        self.assertEqual([c.title for c in structure.chapters()], ["Chapter 1 Motion", "Chapter 2 Forces", "Chapter 3 Energy"])
+        ch2 = structure.find("Chapter 2")
+        self.assertEqual((ch2.page_start, ch2.page_end), (4, 6))
+        accel = structure.find("1.2")
+        self.assertEqual(accel.level, 2)
+        self.assertEqual(accel.chapter_id, structure.find("chapter 1").id)
+        self.assertEqual(structure.find("newtons laws").title, "2.1 Newton's Laws")
+        self.assertIsNone(structure.find("thermodynamics of stars"))
+
+    def test_toc_page_and_body_lists_ignored(self) -> None:
+        pages = ["1 Introduction\nText.", "Steps:\n3 Mix the Solution\n2 Heat It Up", "2 Methods\nMore."]
+        titles = [s.title for s in _heading_sections(pages)]
+        self.assertEqual(titles, ["1 Introduction", "2 Methods"])
+        self.assertEqual(_heading_sections(_BOOK[:1]), [])
+
+    def test_annotate_chunks_sets_metadata_and_chunk_ranges(self) -> None:
+        structure = build_structure(Path("book.txt"), _BOOK)
+        docs = [
+            _Doc("Preface text.", 1),
+            _Doc("Chapter 1 Motion Bodies move.", 2, 0),
+            _Doc("1.1 Speed ...", 2, 30),
+            _Doc("1.2 Acceleration ...", 3),
+            _Doc("Chapter 2 Forces ...", 4),
+        ]
+        annotate_chunks(structure, docs)
+        self.assertNotIn("chapter_id", docs[0].metadata)
+        ch1 = structure.find("chapter 1")
+        self.assertEqual(docs[2].metadata["chapter_id"], ch1.id)
+        self.assertEqual(docs[2].metadata["section"], "1.1 Speed")
+        self.assertEqual(docs[3].metadata["chunk_index"], 3)
+        self.assertEqual((ch1.chunk_start, ch1.chunk_end), (1, 4))
+        self.assertEqual(
+            metadata_filter("book.pdf", structure.find("1.2")),
+            {"$and": [{"source": "book.pdf"}, {"section_id": structure.find("1.2").id}]},
+        )
+
+
+class TestFileSources(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmpdir.name)
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def test_pdf_outline_preferred_over_headings(self) -> None:
+        from PyPDF2 import PdfReader, PdfWriter
+
+        raw = self.root / "raw.pdf"
+        raw.write_bytes(make_pdf(["Intro", "Kinematics", "Dynamics", "Waves"]))
+        writer = PdfWriter()
+        for page in PdfReader(str(raw)).pages:
+            writer.add_page(page)
+        mech = writer.add_outline_item("Mechanics", 1)
+        writer.add_outline_item("Dynamics", 2, parent=mech)
+        writer.add_outline_item("Waves", 3)
+        book = self.root / "physics_book.pdf"
+        with open(book, "wb") as fh:
+            writer.write(fh)
+
+        structure = build_structure(book, ["Intro", "Kinematics", "Dynamics", "Waves"])
+        self.assertEqual(structure.method, "outline")
+        self.assertEqual([(s.title, s.level, s.page_start, s.page_end) for s in structure.sections], [
+            ("Mechanics", 1, 1, 3), ("Dynamics", 2, 2, 3), ("Waves", 1, 3, 4),
+        ])
+
+    def test_pptx_slide_titles(self) -> None:
+        from pptx import Presentation
+
+        prs = Presentation()
+        for title in ("Unit 1 Cells", "Cell Membrane", "Cell Membrane", "Nucleus"):
+            slide = prs.slides.add_slide(prs.slide_layouts[1])
+            slide.shapes.title.text = title
+        deck = self.root / "biology.pptx"
+        prs.save(str(deck))
+
+        structure = build_structure(deck, ["a", "b", "c", "d"])
+        self.assertEqual(structure.method, "slides")
+        self.assertEqual([(s.title, s.level) for s in structure.sections], [
+            ("Unit 1 Cells", 1), ("Cell Membrane", 2), ("Nucleus", 2),
+        ])
+        self.assertEqual(structure.find("cell membrane").page_end, 3)
+
+    def test_load_or_build_persists_and_rebuilds_on_change(self) -> None:
+        book = self.root / "sample_textbooks" / "physics.txt"
+        book.parent.mkdir()
+        book.write_text("\n".join(_BOOK), encoding="utf-8")
+        first = load_or_build(book, self.root)
+        saved = json.loads((self.root / "textbook_index" / "physics.txt.json").read_text(encoding="utf-8"))
+        self.assertEqual(saved["content_hash"], first.content_hash)
+        with patch("rag.structure_index.build_structure", side_effect=AssertionError("rebuilt")):
+            self.assertEqual(len(load_or_build(book, self.root).sections), len(first.sections))
+        book.write_text("Chapter 1 Only\nText.", encoding="utf-8")
+        self.assertEqual([s.title for s in load_or_build(book, self.root).sections], ["Chapter 1 Only"])
+
+    def test_chapter_content_reads_only_chapter_pages(self) -> None:
+        book = self.root / "sample_textbooks" / "physics_book.pdf"
+        book.parent.mkdir()
+        book.write_bytes(make_pdf(["Chapter 1 Motion", "Speed basics", "Chapter 2 Forces", "Newton push"]))
+        with patch.object(backend_main, "DATA_DIR", self.root), \
+                patch.object(backend_main, "_get_rag_vector_store", return_value=None):
+            content = backend_main._get_chapter_content(book, "chapter 2")
+            missing = backend_main._get_chapter_content(book, "quantum chromodynamics")
+        self.assertIn("Newton push", content)
+        self.assertNotIn("Speed basics", content)
+        self.assertEqual(missing, "")
+
+
+if __name__ == "__main__":
+    unittest.main()
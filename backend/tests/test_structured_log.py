@@ -0,0 +1,81 @@
+"""Tests for utils.structured_log — async writer, rotation and tail reads."""
+
+import gzip
+import json
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from utils.structured_log import StructuredLog, get_structured_log
+
+
+class TestStructuredLog(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmpdir.name) / "data" / "events.jsonl"
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def test_registry_returns_shared_instance(self) -> None:
+        a = get_structured_log(self.path, max_bytes=1000)
+        b = get_structured_log(self.path, max_bytes=2000)
+        self.assertIs(a, b)
+        self.assertEqual(a.max_bytes, 2000)
+        self.assertIs(get_structured_log(self.path, sync=False).sync, False)
+
+    def test_tail_returns_last_rows_in_order(self) -> None:
+        log = StructuredLog(self.path, max_bytes=0)
+        for i in range(2000):
+            log.append({"i": i, "pad": "x" * 20})
+        rows = log.tail(50)
+        self.assertEqual([r["i"] for r in rows], list(range(1950, 2000)))
+
+    def test_size_rotation_gzips_and_caps_backups(self) -> None:
+        log = StructuredLog(self.path, max_bytes=200, backup_count=2, sync=True)
+        for i in range(40):
+            log.append({"i": i, "pad": "y" * 30})
+        log.flush()
+        self.assertLessEqual(self.path.stat().st_size, 200)
+        backup = self.path.with_name("events.jsonl.1.gz")
+        with gzip.open(backup, "rt", encoding="utf-8") as fh:
+            first = json.loads(fh.readline())
+        self.assertIn("i", first)
+        self.assertTrue(self.path.with_name("events.jsonl.2.gz").exists())
+        self.assertFalse(self.path.with_name("events.jsonl.3.gz").exists())
+
+    def test_tail_reads_into_backups_when_active_file_is_short(self) -> None:
+        log = StructuredLog(self.path, max_bytes=200, backup_count=3, sync=True)
+        for i in range(12):
+            log.append({"i": i, "pad": "z" * 30})
+        rows = log.tail(6)
+        self.assertEqual([r["i"] for r in rows], list(range(6, 12)))
+
+    def test_age_rotation(self) -> None:
+        log = StructuredLog(self.path, max_bytes=0, max_age_seconds=60, sync=True)
+        log.append({"i": 0})
+        log.flush()
+        old = time.time() - 3600
+        os.utime(self.path, (old, old))
+        log._started_at = None  # as if reopened by a new process
+        log.append({"i": 1})
+        log.flush()
+        self.assertTrue(self.path.with_name("events.jsonl.1.gz").exists())
+        self.assertEqual([r["i"] for r in log.tail(10)], [0, 1])
+
+    def test_background_writer_batches_rows(self) -> None:
+        log = StructuredLog(self.path, max_bytes=0, sync=False)
+        for i in range(300):
+            log.append({"i": i})
+        log.flush()
+        with open(self.path, encoding="utf-8") as fh:
+            self.assertEqual(sum(1 for _ in fh), 300)
+
+    def test_tail_missing_file(self) -> None:
+        self.assertEqual(StructuredLog(self.path).tail(5), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+"""Tests for sync_queue_log — append-only offline sync queue."""
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from sync_manager import SyncManager, enqueue_generic
+from sync_queue_log import SyncQueueLog, get_sync_queue
+
+
+def _item(n: int, kind: str = "quiz_result") -> dict:
+    return {"mutation_type": kind, "payload": {"n": n}, "queued_at": f"t{n}", "retry_count": 0}
+
+
+class TestSyncQueueLog(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmpdir.name) / "sync_queue"
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def _reopen(self, log: SyncQueueLog) -> SyncQueueLog:
+        log.close()
+        return SyncQueueLog(self.dir)
+
+    def test_append_ack_update_survive_replay(self) -> None:
+        log = SyncQueueLog(self.dir)
+        seqs = [log.append(_item(i)) for i in range(5)]
+        log.ack([seqs[0], seqs[2]])
+        log.update(seqs[1], 2, "HTTP 500")
+        log = self._reopen(log)
+        pending = log.pending()
+        self.assertEqual([s for s, _ in pending], [seqs[1], seqs[3], seqs[4]])
+        self.assertEqual(pending[0][1]["retry_count"], 2)
+        self.assertEqual(pending[0][1]["last_error"], "HTTP 500")
+        self.assertEqual(log.acked_upto, seqs[0])
+        self.assertGreater(log.append(_item(9)), seqs[-1])
+
+    def test_enqueue_appends_one_line(self) -> None:
+        log = SyncQueueLog(self.dir)
+        for i in range(200):
+            log.append(_item(i))
+        segment = next(self.dir.glob("seg-*.log"))
+        size = segment.stat().st_size
+        log.append(_item(200))
+        line = json.dumps({"op": "enq", "seq": 201, "item": _item(200)}, separators=(",", ":")) + "\n"
+        self.assertEqual(segment.stat().st_size - size, len(line))
+
+    def test_torn_tail_is_ignored(self) -> None:
+        log = SyncQueueLog(self.dir)
+        log.append(_item(1))
+        log.close()
+        with open(next(self.dir.glob("seg-*.log")), "a", encoding="utf-8") as fh:
+            fh.write('{"op":"enq","seq":2,"it')
+        self.assertEqual(len(SyncQueueLog(self.dir)), 1)
+
+    def test_acked_segments_deleted_and_compaction(self) -> None:
+        log = SyncQueueLog(self.dir)
+        log.SEGMENT_MAX_BYTES = 300
+        seqs = [log.append(_item(i)) for i in range(30)]
+        self.assertGreater(len(list(self.dir.glob("seg-*.log"))), 3)
+        log.ack(seqs[:20])
+        remaining = sorted(self.dir.glob("seg-*.log"))
+        self.assertLess(len(remaining), 8)
+        log.COMPACT_MIN_DEAD = 1
+        log.ack(seqs[20:25])
+        self.assertEqual(len(log), 5)
+        log = self._reopen(log)
+        self.assertEqual([s for s, _ in log.pending()], seqs[25:])
+        self.assertEqual(log.counts_by_type(), {"quiz_result": 5})
+
+    def test_legacy_queue_migrated_once(self) -> None:
+        legacy = Path(self.tmpdir.name) / "sync_queue.json"
+        legacy.write_text(json.dumps([_item(1, "recordQuizAttempt"), _item(2)]), encoding="utf-8")
+        log = SyncQueueLog(self.dir, legacy_path=legacy)
+        self.assertEqual(len(log), 2)
+        self.assertFalse(legacy.exists())
+        self.assertEqual(len(self._reopen(log)), 2)
+
+
+class TestSyncManagerQueue(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.base = self.tmpdir.name
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def test_managers_share_queue_and_try_sync_acks(self) -> None:
+        enqueue_generic(self.base, "flashcard_review", {"card": 1})
+        sm = SyncManager(base_path=self.base, user_id="u1")
+        sm.enqueue_streak_sync(user_id="u1", current_streak=3, class_code="SOLO")
+        self.assertEqual(SyncManager(base_path=self.base).queue_size, 2)
+        self.assertEqual(sm.get_queue_summary()["streak_updates"], 1)
+
+        def fake_mutation(mutation_type, variables):
+            return (True, "") if mutation_type == "updateStreak" else (False, "not configured")
+
+        with patch.object(SyncManager, "check_connectivity", return_value=True), \
+                patch.object(SyncManager, "_execute_mutation", side_effect=fake_mutation), \
+                patch("aws_sync.upload_heavy_payload_to_s3", return_value=None):
+            result = sm.try_sync()
+        self.assertEqual((result["synced"], result["pending"]), (1, 1))
+        queue = get_sync_queue(Path(self.base) / SyncManager.QUEUE_DIR)
+        queue.close()
+        (_, item), = SyncQueueLog(queue.directory).pending()
+        self.assertEqual((item["mutation_type"], item["retry_count"]), ("flashcard_review", 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
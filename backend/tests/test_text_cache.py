@@ -0,0 +1,70 @@
+"""Tests for utils.text_cache — page-level extracted-text cache."""
+
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from tests.helpers import make_pdf
+from utils.text_cache import ExtractedTextCache, _PdfPages
+
+
+class TestExtractedTextCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        root = Path(self.tmpdir.name)
+        self.cache = ExtractedTextCache(root / "cache")
+        self.pdf = root / "physics_book.pdf"
+        self.pdf.write_bytes(make_pdf([f"Page {i} about momentum" for i in range(6)]))
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def test_pages_extracted_once_then_served_from_cache(self) -> None:
+        self.assertEqual(list(self.cache.iter_pages(self.pdf))[2], "Page 2 about momentum")
+        with patch.object(_PdfPages, "text", side_effect=AssertionError("re-extracted")):
+            again = list(self.cache.iter_pages(self.pdf))
+        self.assertEqual(len(again), 6)
+        self.assertEqual(self.cache.page_count(self.pdf), 6)
+
+    def test_max_chars_stops_extraction_early(self) -> None:
+        calls = []
+        original = _PdfPages.text
+
+        def counting(source, index):
+            calls.append(index)
+            return original(source, index)
+
+        with patch.object(_PdfPages, "text", autospec=True, side_effect=counting):
+            text = self.cache.read_text(self.pdf, max_chars=30)
+        self.assertEqual(calls, [0, 1])
+        self.assertTrue(text.startswith("Page 0 about momentum"))
+        self.assertLessEqual(len(text), 30)
+
+    def test_page_range_and_content_key(self) -> None:
+        self.assertEqual(list(self.cache.iter_pages(self.pdf, start=4)), [
+            "Page 4 about momentum", "Page 5 about momentum",
+        ])
+        copy = self.pdf.with_name("renamed.pdf")
+        copy.write_bytes(self.pdf.read_bytes())
+        self.assertEqual(self.cache.content_hash(copy), self.cache.content_hash(self.pdf))
+
+    def test_pptx_slides_are_pages(self) -> None:
+        from pptx import Presentation
+        prs = Presentation()
+        for title in ("Kinematics", "Dynamics"):
+            slide = prs.slides.add_slide(prs.slide_layouts[1])
+            slide.shapes.title.text = title
+        path = Path(self.tmpdir.name) / "deck.pptx"
+        prs.save(str(path))
+        self.assertEqual(list(self.cache.iter_pages(path)), ["Kinematics", "Dynamics"])
+
+    def test_txt_not_cached(self) -> None:
+        path = Path(self.tmpdir.name) / "notes.txt"
+        path.write_text("plain notes", encoding="utf-8")
+        self.assertEqual(self.cache.read_text(path), "plain notes")
+        self.assertFalse((Path(self.tmpdir.name) / "cache").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
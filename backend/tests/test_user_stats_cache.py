@@ -0,0 +1,155 @@
+"""
+Tests for user_stats_cache.UserStatsCache — cached reads, coalesced write-back, per-user locking.
+"""
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+_BACKEND = Path(__file__).resolve().parent.parent
+if str(_BACKEND) not in sys.path:
+    sys.path.insert(0, str(_BACKEND))
+
+from user_stats_cache import UserStatsCache  # noqa: E402
+
+
+class TestUserStatsCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmpdir.name) / "users" / "u1" / "user_stats.json"
+        self.path.parent.mkdir(parents=True)
+        self.path.write_text(json.dumps({"streak": {"current": 1}, "chat_history": []}), encoding="utf-8")
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def _disk(self) -> dict:
+        return json.loads(self.path.read_text(encoding="utf-8"))
+
+    def test_reads_parse_once_and_return_private_copies(self) -> None:
+        cache = UserStatsCache(flush_delay=60)
+        first = cache.read(self.path)
+        first["streak"]["current"] = 99
+        second = cache.read(self.path)
+        self.assertEqual(second["streak"]["current"], 1)
+        self.assertEqual(cache.disk_reads, 1)
+        self.assertIsNone(cache.read(self.path.with_name("missing.json")))
+
+    def test_external_change_is_reloaded(self) -> None:
+        cache = UserStatsCache(flush_delay=60)
+        cache.read(self.path)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"streak": {"current": 5}}), encoding="utf-8")
+        tmp.replace(self.path)  # new inode, as every atomic writer produces
+        self.assertEqual(cache.read(self.path)["streak"]["current"], 5)
+        self.assertEqual(cache.disk_reads, 2)
+
+    def test_newer_file_on_disk_beats_pending_change(self) -> None:
+        cache = UserStatsCache(flush_delay=60)
+        cache.write(self.path, {"streak": {"current": 2}})
+        time.sleep(0.01)
+        self.path.write_text(json.dumps({"streak": {"current": 8}}), encoding="utf-8")
+        self.assertEqual(cache.read(self.path)["streak"]["current"], 8)
+        self.assertEqual(cache.flush(), 0)
+        self.assertEqual(self._disk()["streak"]["current"], 8)
+
+    def test_burst_of_writes_is_one_flush(self) -> None:
+        cache = UserStatsCache(flush_delay=0.2)
+        for n in range(20):
+            with cache.lock(self.path):
+                stats = cache.read(self.path)
+                stats["streak"]["current"] = n
+                cache.write(self.path, stats)
+        self.assertEqual(self._disk()["streak"]["current"], 1)  # not written yet
+        self.assertEqual(cache.read(self.path)["streak"]["current"], 19)
+
+        deadline = time.monotonic() + 5
+        while cache.disk_writes == 0 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(cache.disk_writes, 1)
+        self.assertEqual(self._disk()["streak"]["current"], 19)
+        self.assertFalse(self.path.with_suffix(".tmp").exists())
+        cache.close()
+
+    def test_flush_and_write_through(self) -> None:
+        cache = UserStatsCache(flush_delay=60)
+        cache.write(self.path, {"streak": {"current": 2}})
+        self.assertEqual(cache.flush(), 1)
+        self.assertEqual(cache.flush(), 0)
+        self.assertEqual(self._disk()["streak"]["current"], 2)
+
+        direct = UserStatsCache(flush_delay=0)
+        direct.write(self.path, {"streak": {"current": 3}})
+        self.assertEqual(self._disk()["streak"]["current"], 3)
+        cache.close()
+
+    def test_concurrent_increments_are_not_lost(self) -> None:
+        cache = UserStatsCache(flush_delay=0.05)
+
+        def bump() -> None:
+            for _ in range(50):
+                with cache.lock(self.path):
+                    stats = cache.read(self.path)
+                    stats["streak"]["current"] += 1
+                    cache.write(self.path, stats)
+
+        threads = [threading.Thread(target=bump) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        cache.close()
+        self.assertEqual(self._disk()["streak"]["current"], 1 + 8 * 50)
+        self.assertLess(cache.disk_writes, 8 * 50)
+
+    def test_eviction_keeps_dirty_entries(self) -> None:
+        cache = UserStatsCache(flush_delay=60, max_entries=2)
+        cache.write(self.path, {"streak": {"current": 7}})
+        for n in range(5):
+            other = Path(self.tmpdir.name) / f"other{n}.json"
+            other.write_text("{}", encoding="utf-8")
+            cache.read(other)
+        self.assertEqual(cache.read(self.path)["streak"]["current"], 7)
+        cache.close()
+        self.assertEqual(self._disk()["streak"]["current"], 7)
+
+    def test_evicted_entry_keeps_its_lock_and_writes(self) -> None:
+        cache = UserStatsCache(flush_delay=60, max_entries=1)
+        held = cache.lock(self.path)
+        with held:
+            other = Path(self.tmpdir.name) / "other.json"
+            other.write_text("{}", encoding="utf-8")
+            cache.read(other)  # evicts self.path's clean entry (its RLock is reentrant here)
+            self.assertIs(cache.lock(self.path), held)
+            cache.write(self.path, {"streak": {"current": 9}})
+        self.assertEqual(cache.flush(), 1)
+        cache.close()
+        self.assertEqual(self._disk()["streak"]["current"], 9)
+
+    def test_entry_evicted_before_lock_is_taken_is_looked_up_again(self) -> None:
+        cache = UserStatsCache(flush_delay=60, max_entries=1)
+        lookup, evicted = cache._entry, []
+
+        def evicting_lookup(path):
+            entry = lookup(path)
+            if Path(path) == self.path and not evicted:
+                evicted.append(path)  # another request's read evicts it before write() locks it
+                other = Path(self.tmpdir.name) / "other.json"
+                other.write_text("{}", encoding="utf-8")
+                cache.read(other)
+            return entry
+
+        cache._entry = evicting_lookup
+        cache.write(self.path, {"streak": {"current": 5}})
+        self.assertEqual(cache.flush(), 1)
+        cache.close()
+        self.assertEqual(self._disk()["streak"]["current"], 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+"""
+Tests for user_stats_store.UserStatsStore — hot summary + cold sections behind the legacy shape.
+"""
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+_BACKEND = Path(__file__).resolve().parent.parent
+if str(_BACKEND) not in sys.path:
+    sys.path.insert(0, str(_BACKEND))
+
+import user_stats_store  # noqa: E402
+from user_stats_cache import UserStatsCache  # noqa: E402
+from user_stats_store import ALL_SECTIONS, UserStatsStore  # noqa: E402
+
+
+def _legacy() -> dict:
+    return {
+        "user_id": "u1",
+        "streak": {"current": 3},
+        "quiz_stats": {"total_attempted": 2, "by_topic": {"Physics": {"attempts": 2, "avg_score": 7.0}}},
+        "flashcard_stats": {"mastered": 1, "cards": {"c1": {"ease": "easy", "mastered": True}}},
+        "chat_history": [{"role": "user", "content": f"q{i}"} for i in range(5)],
+        "grading_results": [{"score": 9}],
+        "preferences": {"theme": "dark"},
+    }
+
+
+class TestUserStatsStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmpdir.name) / "users" / "u1"
+        self.dir.mkdir(parents=True)
+        self.cache = UserStatsCache(flush_delay=0)
+        self.store = UserStatsStore(self.dir, cache=self.cache)
+
+    def tearDown(self) -> None:
+        self.cache.close()
+        self.tmpdir.cleanup()
+
+    def _hot_on_disk(self) -> dict:
+        return json.loads((self.dir / "user_stats.json").read_text(encoding="utf-8"))
+
+    def _lines(self, name: str) -> list:
+        return (self.dir / "stats" / name).read_text(encoding="utf-8").splitlines()
+
+    def test_legacy_document_is_split_and_round_trips(self) -> None:
+        (self.dir / "user_stats.json").write_text(json.dumps(_legacy()), encoding="utf-8")
+        self.assertEqual(self.store.load(ALL_SECTIONS), _legacy())
+
+        hot = self._hot_on_disk()
+        self.assertNotIn("chat_history", hot)
+        self.assertNotIn("grading_results", hot)
+        self.assertNotIn("cards", hot["flashcard_stats"])
+        self.assertNotIn("by_topic", hot["quiz_stats"])
+        self.assertEqual(hot["streak"], {"current": 3})
+        self.assertEqual(len(self._lines("chat_history.jsonl")), 5)
+
+        summary = self.store.load()
+        self.assertNotIn("chat_history", summary)
+        self.assertEqual(self.store.load(("quiz_stats.by_topic",))["quiz_stats"]["by_topic"]["Physics"]["attempts"], 2)
+
+    def test_hot_save_leaves_cold_sections_alone(self) -> None:
+        self.store.save(_legacy())
+        writes = self.cache.disk_writes
+        stats = self.store.load()
+        stats["streak"]["current"] = 4
+        self.store.save(stats)
+        self.assertEqual(self.cache.disk_writes, writes + 1)  # the hot document only
+        full = self.store.load(ALL_SECTIONS)
+        self.assertEqual(full["streak"]["current"], 4)
+        self.assertEqual(len(full["chat_history"]), 5)
+        self.assertIn("c1", full["flashcard_stats"]["cards"])
+
+        # unchanged map sections are compared, not rewritten
+        self.store.save(full)
+        self.assertEqual(self.cache.disk_writes, writes + 2)
+
+    def test_sliding_window_appends_instead_of_rewriting(self) -> None:
+        self.store.save(_legacy())
+        stats = self.store.load(("chat_history",))
+        window = stats["chat_history"][2:] + [{"role": "assistant", "content": "a"}]
+        self.store.save({**stats, "chat_history": window})
+        self.assertEqual(self.store.history("chat_history"), window)
+        self.assertEqual(self._lines("chat_history.jsonl")[5:], ['{"__trim__": 2}', '{"role": "assistant", "content": "a"}'])
+        self.assertEqual(self.store.history("chat_history", limit=1), window[-1:])
+
+        self.store.save({"chat_history": [{"role": "user", "content": "fresh"}]})
+        self.assertEqual(self.store.history("chat_history"), [{"role": "user", "content": "fresh"}])
+
+    def test_append_history_retention_and_compaction(self) -> None:
+        with patch.dict(user_stats_store.HISTORY_RETENTION, {"grading_results": 10}), \
+                patch.object(user_stats_store, "COMPACT_MIN_DEAD", 20):
+            for i in range(40):
+                self.store.append_history("grading_results", [{"n": i}])
+            self.assertEqual([r["n"] for r in self.store.history("grading_results")], list(range(30, 40)))
+            self.assertLessEqual(len(self._lines("grading_results.jsonl")), 2 * 20 + 2)
+
+            self.store.append_history("grading_results", [{"n": 40}, {"n": 41}], keep=3)
+            self.assertEqual([r["n"] for r in self.store.history("grading_results")], [39, 40, 41])
+
+        fresh = UserStatsStore(self.dir, cache=UserStatsCache(flush_delay=0))
+        user_stats_store._histories.clear()  # replay from disk
+        self.assertEqual([r["n"] for r in fresh.history("grading_results")], [39, 40, 41])
+
+    def test_replace_clears_missing_sections_and_default_has_no_cold_data(self) -> None:
+        self.store.save(_legacy())
+        self.store.save({"user_id": "u1", "streak": {"current": 0}}, replace=True)
+        full = self.store.load(ALL_SECTIONS)
+        self.assertEqual(full["chat_history"], [])
+        self.assertEqual(full["flashcard_stats"]["cards"], {})
+
+        empty = UserStatsStore(Path(self.tmpdir.name) / "users" / "new", cache=self.cache)
+        self.assertIsNone(empty.load())
+        loaded = empty.load(default=_legacy())
+        self.assertNotIn("chat_history", loaded)
+        self.assertNotIn("cards", loaded["flashcard_stats"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""Tests for utils.web_text — per-URL text cache, conditional revalidation, byte cap, stale fallback."""
+
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+
+from utils.web_text import FetchError, WebTextFetcher
+
+_PAGE = (
+    b"<html><head><style>p{}</style></head><body><nav>Home | About</nav>"
+    b"<p>Refraction bends light at a boundary.</p><script>track()</script>"
+    b"<p>Snell's law relates the angles.</p></body></html>"
+)
+
+
+class _Site(BaseHTTPRequestHandler):
+    hits: list = []
+    status = 200
+    body = _PAGE
+
+    def do_GET(self) -> None:
+        type(self).hits.append((self.path, self.headers.get("If-None-Match")))
+        if self.headers.get("If-None-Match") == '"v1"' and self.status == 200:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(self.status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class TestWebTextFetcher(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        _Site.hits, _Site.status, _Site.body = [], 200, _PAGE
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Site)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.fetcher = WebTextFetcher(Path(self.tmpdir.name) / "url_text", timeout=5)
+
+    def tearDown(self) -> None:
+        self.fetcher.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmpdir.cleanup()
+
+    def test_text_is_cached_then_revalidated(self) -> None:
+        first = self.fetcher.fetch_text(f"{self.base}/optics")
+        self.assertEqual(first.source, "network")
+        self.assertIn("Refraction bends light", first.text)
+        self.assertNotIn("track()", first.text)
+        self.assertNotIn("Home | About", first.text)
+
+        self.assertEqual(self.fetcher.fetch_text(f"{self.base}/optics").source, "cache")
+        self.assertEqual(len(_Site.hits), 1)
+
+        with patch.object(WebTextFetcher, "FRESH_SECONDS", 0):
+            again = self.fetcher.fetch_text(f"{self.base}/optics")
+        self.assertEqual((again.source, again.text), ("revalidated", first.text))
+        self.assertEqual(_Site.hits[-1], ("/optics", '"v1"'))
+
+    def test_errors_and_stale_fallback(self) -> None:
+        self.fetcher.fetch_text(f"{self.base}/optics")
+        _Site.status = 503
+        with patch.object(WebTextFetcher, "FRESH_SECONDS", 0):
+            self.assertEqual(self.fetcher.fetch_text(f"{self.base}/optics").source, "stale")
+
+        _Site.status = 403
+        with self.assertRaises(FetchError) as ctx:
+            self.fetcher.fetch_text(f"{self.base}/paywalled")
+        self.assertTrue(ctx.exception.blocked)
+        with self.assertRaises(FetchError):
+            self.fetcher.fetch_text("http://127.0.0.1:9/unreachable", timeout=1)
+
+    def test_body_is_capped(self) -> None:
+        _Site.body = b"<p>" + b"word " * 100_000 + b"</p>"
+        with patch.object(WebTextFetcher, "MAX_BYTES", 4096):
+            text = self.fetcher.fetch_text(f"{self.base}/long").text
+        self.assertLess(len(text), 4096)
+        self.assertTrue(text.startswith("word word"))
+
+
+if __name__ == "__main__":
+    unittest.main()
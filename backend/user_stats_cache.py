@@ -0,0 +1,311 @@
+"""
+Studaxis — user_stats Write-Back Cache
+═══════════════════════════════════════
+Process-wide, per-file cache of data/users/{user_id}/user_stats.json.
+
+  read(path)    copy of the cached dict; the file is parsed once and only
+                re-read when its (inode, mtime, size) stamp changes
+  write(path)   replace the cached dict and mark it dirty; no disk I/O
+  lock(path)    per-file RLock; hold it across read → modify → write so
+                concurrent requests from the same student do not lose updates
+
+A daemon thread flushes a dirty entry FLUSH_DELAY seconds after it first
+became dirty, so a burst of writes (chat streak updates, a review session)
+becomes one atomic tmp + replace. flush() forces it (shutdown, before the
+file is uploaded); the atexit hook flushes whatever is left.
+
+FLUSH_DELAY = 0 (or STUDAXIS_STATS_FLUSH_DELAY=0) makes write() write-through.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+logger = logging.getLogger("studaxis.user_stats")
+
+
+def copy_stats(value: Any) -> Any:
+    """Deep copy of a JSON tree (dict / list / scalars); much cheaper than copy.deepcopy."""
+    if isinstance(value, dict):
+        return {k: copy_stats(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [copy_stats(v) for v in value]
+    return value
+
+
+def _stamp(path: Path) -> Optional[tuple]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class _Entry:
+    __slots__ = ("lock", "data", "stamp", "dirty_since", "written_ns")
+
+    def __init__(self, lock: threading.RLock) -> None:
+        self.lock = lock
+        self.data: Optional[dict] = None
+        self.stamp: Optional[tuple] = None
+        self.dirty_since: Optional[float] = None  # monotonic; None when clean
+        self.written_ns = 0  # wall clock of the last write(), comparable with st_mtime_ns
+
+
+class UserStatsCache:
+    """Per-file user_stats cache with dirty tracking and delayed, coalesced flushes."""
+
+    FLUSH_DELAY = float(os.environ.get("STUDAXIS_STATS_FLUSH_DELAY", "0.5"))  # seconds
+    MAX_ENTRIES = 256  # clean entries beyond this are evicted, least recently used first
+
+    def __init__(self, flush_delay: Optional[float] = None, max_entries: Optional[int] = None) -> None:
+        if flush_delay is not None:
+            self.FLUSH_DELAY = flush_delay
+        if max_entries is not None:
+            self.MAX_ENTRIES = max_entries
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # Per-file locks outlive their entry while anyone holds them, so an
+        # entry recreated after eviction shares the lock already handed out.
+        self._locks: "weakref.WeakValueDictionary[str, threading.RLock]" = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        self.disk_reads = 0
+        self.disk_writes = 0
+
+    # ── per-file access ──────────────────────────────────────────────
+
+    def _entry(self, path: Path) -> _Entry:
+        key = os.path.abspath(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                lock = self._locks.get(key)
+                if lock is None:
+                    lock = self._locks[key] = threading.RLock()
+                entry = self._entries[key] = _Entry(lock)
+                self._evict()
+            else:
+                self._entries.move_to_end(key)
+            return entry
+
+    @contextmanager
+    def _locked(self, path: Path) -> Iterator[_Entry]:
+        """
+        The registered entry for path, with its lock held. An entry evicted
+        between lookup and acquire is looked up again, so changes never land
+        on an orphan the flusher cannot see.
+        """
+        key = os.path.abspath(path)
+        while True:
+            entry = self._entry(path)
+            entry.lock.acquire()
+            with self._lock:
+                current = self._entries.get(key) is entry
+            if current:
+                break
+            entry.lock.release()
+        try:
+            yield entry
+        finally:
+            entry.lock.release()
+
+    def lock(self, path: Path) -> threading.RLock:
+        """Per-file lock for read-modify-write sequences (reentrant; read/write take it too)."""
+        return self._entry(path).lock
+
+    def read(self, path: Path, copy: bool = True) -> Optional[dict]:
+        """
+        Copy of the stats at path; None when the file is missing or not a JSON
+        object. copy=False returns the cached object itself (compare only, never mutate).
+        """
+        path = Path(path)
+        with self._locked(path) as entry:
+            if entry.dirty_since is None:
+                stamp = _stamp(path)
+                if stamp is None:
+                    entry.data = entry.stamp = None
+                    return None
+                if entry.data is None or stamp != entry.stamp:
+                    self._load(path, entry, stamp)
+            else:
+                self._reload_if_overwritten(path, entry)
+            if entry.data is None or not copy:
+                return entry.data
+            return copy_stats(entry.data)
+
+    def _load(self, path: Path, entry: _Entry, stamp: tuple) -> None:
+        self.disk_reads += 1
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError, UnicodeDecodeError) as e:
+            logger.warning("Could not read %s: %s", path, e)
+            data = None
+        entry.data = data if isinstance(data, dict) else None
+        entry.stamp = stamp
+
+    def _reload_if_overwritten(self, path: Path, entry: _Entry) -> bool:
+        """
+        A dirty entry whose file was replaced by another writer after our last
+        write(): newest write wins, as it did when every save went straight to
+        disk. Drops the pending change and reloads. Caller holds entry.lock.
+        """
+        disk = _stamp(path)
+        if disk is None or disk == entry.stamp or disk[1] <= entry.written_ns:
+            return False
+        logger.warning("%s was rewritten on disk after a cached change; keeping the newer file", path)
+        entry.dirty_since = None
+        self._load(path, entry, disk)
+        return True
+
+    def write(self, path: Path, stats: dict) -> None:
+        """Replace the cached stats and schedule a flush (immediate when FLUSH_DELAY <= 0)."""
+        path = Path(path)
+        with self._locked(path) as entry:
+            entry.data = copy_stats(stats)
+            entry.written_ns = time.time_ns()
+            if self.FLUSH_DELAY <= 0:
+                self._flush_entry(path, entry)
+                return
+            if entry.dirty_since is not None:
+                return  # flush already scheduled; this write is coalesced into it
+            entry.dirty_since = time.monotonic()
+        with self._lock:
+            self._ensure_flusher()
+            self._wake.notify()
+
+    # ── flushing ─────────────────────────────────────────────────────
+
+    def _flush_entry(self, path: Path, entry: _Entry) -> bool:
+        """Write entry.data atomically. Caller holds entry.lock."""
+        if entry.data is None or (entry.dirty_since is not None and self._reload_if_overwritten(path, entry)):
+            entry.dirty_since = None
+            return False
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(entry.data, indent=2, ensure_ascii=False), encoding="utf-8")
+            tmp.replace(path)
+        except OSError as e:
+            logger.warning("Could not write %s (will retry): %s", path, e)
+            if entry.dirty_since is None:
+                entry.dirty_since = time.monotonic()
+            return False
+        self.disk_writes += 1
+        entry.stamp = _stamp(path)
+        entry.dirty_since = None
+        return True
+
+    def flush(self, path: Optional[Path] = None) -> int:
+        """Write pending changes now (one file, or all). Returns the number of files written."""
+        if path is not None:
+            with self._locked(Path(path)) as entry:
+                return int(entry.dirty_since is not None and self._flush_entry(Path(path), entry))
+        with self._lock:
+            items = list(self._entries.items())
+        written = 0
+        for key, entry in items:
+            with entry.lock:
+                if entry.dirty_since is not None and self._flush_entry(Path(key), entry):
+                    written += 1
+        return written
+
+    def invalidate(self, path: Optional[Path] = None) -> None:
+        """Flush, then drop cached copies so the next read goes to disk."""
+        self.flush(path)
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(path), None)
+
+    def _ensure_flusher(self) -> None:
+        """Start the flush thread. Caller holds self._lock."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="studaxis-user-stats-flush", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if self._stopped:
+                    return
+                due, wait = [], None
+                now = time.monotonic()
+                for key, entry in self._entries.items():
+                    since = entry.dirty_since
+                    if since is None:
+                        continue
+                    remaining = since + self.FLUSH_DELAY - now
+                    if remaining <= 0:
+                        due.append((key, entry))
+                    elif wait is None or remaining < wait:
+                        wait = remaining
+                if not due:
+                    self._wake.wait(wait)
+                    continue
+            for key, entry in due:
+                try:
+                    with entry.lock:
+                        if entry.dirty_since is not None:
+                            self._flush_entry(Path(key), entry)
+                except Exception as e:
+                    logger.warning("Flush of %s failed: %s", key, e)
+
+    def _evict(self) -> None:
+        """Drop least recently used clean, unlocked entries over MAX_ENTRIES. Caller holds self._lock."""
+        excess = len(self._entries) - self.MAX_ENTRIES
+        if excess <= 0:
+            return
+        for key in list(self._entries)[:-1]:
+            entry = self._entries[key]
+            if entry.dirty_since is not None or not entry.lock.acquire(blocking=False):
+                continue
+            try:
+                del self._entries[key]
+            finally:
+                entry.lock.release()
+            excess -= 1
+            if excess <= 0:
+                return
+
+    def close(self) -> None:
+        """Flush everything and stop the flush thread."""
+        with self._lock:
+            self._stopped = True
+            self._wake.notify_all()
+        self.flush()
+
+
+_cache: Optional[UserStatsCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_user_stats_cache() -> UserStatsCache:
+    """Process-wide cache shared by main, aws_sync and sync_manager."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = UserStatsCache()
+        return _cache
+
+
+@atexit.register
+def _flush_all() -> None:
+    if _cache is not None:
+        try:
+            _cache.close()
+        except Exception:
+            pass
@@ -0,0 +1,290 @@
+"""
+Studaxis — user_stats Storage Layout (hot summary + cold sections)
+═══════════════════════════════════════════════════════════════════
+user_stats used to be one document, so a streak bump rewrote every chat
+message, per-card review entry and grading result. The layout is now
+
+  {dir}/user_stats.json                 hot summary: streak, quiz totals,
+                                        flashcard counters, preferences, …
+  {dir}/stats/flashcard_cards.json      flashcard_stats.cards  (card id → entry)
+  {dir}/stats/quiz_by_topic.json        quiz_stats.by_topic    (topic → entry)
+  {dir}/stats/chat_history.jsonl        chat_history     (append-only)
+  {dir}/stats/grading_results.jsonl     grading_results  (append-only)
+
+JSON documents go through the user_stats write-back cache, so an unchanged
+section is never rewritten. History files are append-only: one entry per
+line, plus {"__trim__": n} records that drop the n oldest entries
+(retention, or a client replacing the list with a shorter window). They are
+compacted once dead lines outnumber live entries.
+
+UserStatsStore.load(sections) returns the legacy single-document shape with
+the requested cold sections filled in; save() splits a dict back into the
+files. A cold section missing from the saved dict is left untouched, so
+handlers that only need the hot summary never read or write history.
+A legacy user_stats.json that still embeds cold sections is migrated the
+first time it is touched.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from user_stats_cache import UserStatsCache, copy_stats, get_user_stats_cache
+
+logger = logging.getLogger("studaxis.user_stats")
+
+HOT_FILE = "user_stats.json"
+SECTIONS_DIR = "stats"
+
+# section (dotted path in the legacy document) → (kind, file under SECTIONS_DIR)
+SECTIONS: dict[str, tuple[str, str]] = {
+    "flashcard_stats.cards": ("map", "flashcard_cards.json"),
+    "quiz_stats.by_topic": ("map", "quiz_by_topic.json"),
+    "chat_history": ("history", "chat_history.jsonl"),
+    "grading_results": ("history", "grading_results.jsonl"),
+}
+ALL_SECTIONS = tuple(SECTIONS)
+
+HISTORY_RETENTION = {"chat_history": 1000, "grading_results": 1000}  # newest entries kept
+COMPACT_MIN_DEAD = 256  # dead lines tolerated before a history file is rewritten
+
+_TRIM = "__trim__"
+
+# path → (stamp, live entries, lines in file); guarded by the owning store's lock
+_histories: dict[str, tuple[Optional[tuple], list, int]] = {}
+
+
+def _split_path(section: str) -> tuple[Optional[str], str]:
+    parent, _, key = section.rpartition(".")
+    return (parent or None), key
+
+
+def get_section(stats: dict[str, Any], section: str) -> Any:
+    """Value of a cold section inside a legacy-shaped dict, or None when absent."""
+    parent, key = _split_path(section)
+    holder = stats.get(parent) if parent else stats
+    return holder.get(key) if isinstance(holder, dict) else None
+
+
+def split_stats(stats: dict[str, Any]) -> tuple[dict[str, Any], dict[str, Any]]:
+    """(hot summary, {section: value} for the cold sections present). Does not modify stats."""
+    hot = dict(stats)
+    cold: dict[str, Any] = {}
+    for section in SECTIONS:
+        parent, key = _split_path(section)
+        if parent is None:
+            if key in hot:
+                cold[section] = hot.pop(key)
+        elif isinstance(hot.get(parent), dict) and key in hot[parent]:
+            hot[parent] = dict(hot[parent])
+            cold[section] = hot[parent].pop(key)
+    return hot, cold
+
+
+def _has_cold(hot: dict[str, Any]) -> bool:
+    return any(get_section(hot, s) is not None for s in SECTIONS)
+
+
+def _file_stamp(path: Path) -> Optional[tuple]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _overlap_start(current: list, new: list) -> int:
+    """Smallest k with current[k:] == new[:len(current) - k]: new continues current after dropping k."""
+    n = len(current)
+    if not new:
+        return n
+    for k in range(max(0, n - len(new)), n):
+        if current[k] == new[0] and current[k:] == new[:n - k]:
+            return k
+    return n
+
+
+class UserStatsStore:
+    """Hot/cold user_stats for one directory (data/users/{user_id}, or data/ for the legacy single user)."""
+
+    def __init__(self, directory: Path, cache: Optional[UserStatsCache] = None) -> None:
+        self.directory = Path(directory)
+        self.hot_path = self.directory / HOT_FILE
+        self.sections_dir = self.directory / SECTIONS_DIR
+        self._cache = cache or get_user_stats_cache()
+
+    def _section_path(self, section: str) -> Path:
+        return self.sections_dir / SECTIONS[section][1]
+
+    def lock(self):
+        """Per-user RLock covering the hot document and every section."""
+        return self._cache.lock(self.hot_path)
+
+    # ── legacy-shaped access ─────────────────────────────────────────
+
+    def load(self, sections: Iterable[str] = (), default: Optional[dict] = None) -> Optional[dict[str, Any]]:
+        """
+        Hot summary plus the requested cold sections, in the legacy shape.
+        Without a hot document: a copy of default (None if not given).
+        """
+        with self.lock():
+            self._migrate_if_needed()
+            stats = self._cache.read(self.hot_path)
+            if stats is None:
+                if default is None:
+                    return None
+                stats, _ = split_stats(copy_stats(default))
+            for section in sections:
+                parent, key = _split_path(section)
+                holder = stats.setdefault(parent, {}) if parent else stats
+                if not isinstance(holder, dict):
+                    continue
+                if SECTIONS[section][0] == "map":
+                    holder[key] = self._cache.read(self._section_path(section)) or {}
+                else:
+                    holder[key] = self.history(section)
+            return stats
+
+    def save(self, stats: dict[str, Any], replace: bool = False) -> None:
+        """
+        Split stats into the hot document and the cold sections it contains.
+        Sections absent from stats are kept, unless replace=True (then they are cleared).
+        """
+        hot, cold = split_stats(stats)
+        with self.lock():
+            self._migrate_if_needed()
+            for section, (kind, _) in SECTIONS.items():
+                if section not in cold:
+                    if not replace:
+                        continue
+                    cold[section] = {} if kind == "map" else []
+                value = cold[section]
+                if kind == "map":
+                    self._save_map(section, value if isinstance(value, dict) else {})
+                else:
+                    self._set_history(section, value if isinstance(value, list) else [])
+            self._cache.write(self.hot_path, hot)
+
+    def _save_map(self, section: str, value: dict) -> None:
+        path = self._section_path(section)
+        current = self._cache.read(path, copy=False)
+        if current == value or (current is None and not value):
+            return
+        self._cache.write(path, value)
+
+    # ── history sections ────────────────────────────────────────────
+
+    def history(self, section: str, limit: Optional[int] = None) -> list:
+        """Copy of a history section, oldest first (the newest `limit` entries when given)."""
+        with self.lock():
+            entries = self._history_entries(section)[0]
+            if limit is not None:
+                entries = entries[-limit:] if limit > 0 else []
+            return copy_stats(entries)
+
+    def append_history(self, section: str, entries: list, keep: Optional[int] = None) -> None:
+        """Append entries; keep at most `keep` (and HISTORY_RETENTION) newest."""
+        if not entries:
+            return
+        with self.lock():
+            self._migrate_if_needed()
+            current = self._history_entries(section)[0]
+            self._write_history(section, current, 0, list(entries), keep)
+
+    def _set_history(self, section: str, new: list) -> None:
+        """Make the section equal to new, appending only what is new when new continues the stored list."""
+        current = self._history_entries(section)[0]
+        if current == new:
+            return
+        k = _overlap_start(current, new)
+        self._write_history(section, current, k, new[len(current) - k:], None)
+
+    def _history_entries(self, section: str) -> tuple[list, int]:
+        """(live entries, lines in file) — cached until the file's stamp changes. Caller holds the lock."""
+        path = self._section_path(section)
+        key = os.path.abspath(path)
+        stamp = _file_stamp(path)
+        cached = _histories.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1], cached[2]
+        entries: list = []
+        lines = 0
+        if stamp is not None:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            logger.warning("Skipping corrupt line in %s", path)
+                            continue
+                        lines += 1
+                        if isinstance(record, dict) and len(record) == 1 and _TRIM in record:
+                            del entries[:int(record[_TRIM])]
+                        else:
+                            entries.append(record)
+            except OSError as e:
+                logger.warning("Could not read %s: %s", path, e)
+        _histories[key] = (stamp, entries, lines)
+        return entries, lines
+
+    def _write_history(self, section: str, current: list, trim: int, tail: list, keep: Optional[int]) -> None:
+        """Drop `trim` oldest entries, append `tail`, apply retention. Caller holds the lock."""
+        path = self._section_path(section)
+        live = current[trim:] + copy_stats(tail)
+        limit = HISTORY_RETENTION.get(section, 0) or len(live)
+        if keep is not None:
+            limit = min(limit, max(0, keep))
+        excess = max(0, len(live) - limit)
+        if excess:
+            live = live[excess:]
+            # entries of tail that retention drops straight away are never written
+            skip = max(0, excess - (len(current) - trim))
+            trim, tail = trim + excess - skip, tail[skip:]
+        lines = self._history_entries(section)[1]
+        records = ([{_TRIM: trim}] if trim else []) + tail
+        if not records:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if lines + len(records) - len(live) > max(COMPACT_MIN_DEAD, len(live)):
+                tmp = path.with_suffix(".tmp")
+                tmp.write_text("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in live), encoding="utf-8")
+                tmp.replace(path)
+                lines = len(live)
+            else:
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+                lines += len(records)
+        except OSError as e:
+            logger.warning("Could not write %s: %s", path, e)
+            _histories.pop(os.path.abspath(path), None)
+            return
+        _histories[os.path.abspath(path)] = (_file_stamp(path), live, lines)
+
+    # ── migration ────────────────────────────────────────────────────
+
+    def _migrate_if_needed(self) -> None:
+        """Move cold sections out of a legacy single-document user_stats.json. Caller holds the lock."""
+        hot = self._cache.read(self.hot_path, copy=False)
+        if hot is None or not _has_cold(hot):
+            return
+        hot, cold = split_stats(hot)
+        for section, value in cold.items():
+            if SECTIONS[section][0] == "map":
+                path = self._section_path(section)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                self._cache.write(path, value if isinstance(value, dict) else {})
+                self._cache.flush(path)
+            else:
+                self._set_history(section, value if isinstance(value, list) else [])
+        # sections are on disk before the hot document stops carrying them
+        self._cache.write(self.hot_path, hot)
+        self._cache.flush(self.hot_path)
+        logger.info("Split %s into hot summary and %d cold section(s)", self.hot_path, len(cold))
@@ -0,0 +1,210 @@
+"""
+Multi-file ingestion for the upload-to-generate endpoints.
+
+/api/flashcards/generate/files and /api/quiz/panic/generate/files used to read
+each upload into memory, write it to tmp_upload/{filename}, parse the whole
+document on the request thread, one file after another, and then keep only
+the first 12 000 characters of the concatenation.
+
+  spool_uploads()  streams each upload to its own temp file (chunked copy,
+                   unique name, so concurrent requests never share a path)
+  extract_texts()  extracts every file concurrently — PDF/PPT in a process
+                   pool (parsing is CPU-bound and holds the GIL), .txt inline —
+                   through the page cache, stopping each file at max_chars
+  combine()        splits the character budget fairly across files, giving a
+                   short file's unused share to the others
+
+Every file reports its own timing (spool_ms, extract_ms) and outcome.
+
+STUDAXIS_INGEST_WORKERS sets the pool size (default min(4, CPUs)); with 0
+or 1 (a single-core device) files are extracted on the calling thread.
+The packaged .exe relies on multiprocessing.freeze_support() in run.py so
+spawned workers do not start another server.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Iterable, Optional
+
+logger = logging.getLogger("studaxis.ingest")
+
+SUPPORTED_SUFFIXES = (".txt", ".pdf", ".ppt", ".pptx")
+_CHUNK = 1024 * 1024
+
+_pool: Optional[Executor] = None
+_pool_lock = threading.Lock()
+
+
+@dataclass
+class IngestedFile:
+    """One upload through the pipeline."""
+
+    filename: str
+    path: Optional[Path] = None
+    size_bytes: int = 0
+    spool_ms: float = 0.0
+    extract_ms: float = 0.0
+    text: str = ""
+    error: Optional[str] = None
+    unavailable: bool = False  # no extractor installed for this type
+
+    def timing(self) -> dict[str, Any]:
+        out = {
+            "file": self.filename,
+            "bytes": self.size_bytes,
+            "chars": len(self.text),
+            "spool_ms": round(self.spool_ms, 1),
+            "extract_ms": round(self.extract_ms, 1),
+        }
+        if self.error:
+            out["error"] = self.error
+        return out
+
+
+def _workers() -> int:
+    raw = os.environ.get("STUDAXIS_INGEST_WORKERS")
+    if raw is not None:
+        try:
+            return max(0, int(raw))
+        except ValueError:
+            pass
+    return min(4, os.cpu_count() or 1)
+
+
+def _get_pool() -> Optional[Executor]:
+    """Process pool shared by all requests (created on first multi-document upload)."""
+    global _pool
+    workers = _workers()
+    if workers <= 1:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers)
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def spool_uploads(uploads: Iterable[Any], spool_dir: Path) -> list[IngestedFile]:
+    """
+    Copy supported uploads (objects with .filename and .file) to unique temp
+    files under spool_dir. Unsupported or unnamed uploads are skipped.
+    """
+    spool_dir = Path(spool_dir)
+    spool_dir.mkdir(parents=True, exist_ok=True)
+    files: list[IngestedFile] = []
+    for upload in uploads:
+        name = getattr(upload, "filename", None)
+        if not name:
+            continue
+        suffix = Path(name).suffix.lower()
+        if suffix not in SUPPORTED_SUFFIXES:
+            continue
+        item = IngestedFile(filename=name)
+        t0 = time.perf_counter()
+        fd, tmp = tempfile.mkstemp(prefix="upload_", suffix=suffix, dir=spool_dir)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                src: BinaryIO = upload.file
+                shutil.copyfileobj(src, out, _CHUNK)
+                item.size_bytes = out.tell()
+        except OSError as e:
+            item.error = f"could not store upload: {e}"
+            Path(tmp).unlink(missing_ok=True)
+        else:
+            item.path = Path(tmp)
+        item.spool_ms = (time.perf_counter() - t0) * 1000
+        files.append(item)
+    return files
+
+
+def _extract_one(path: str, max_chars: Optional[int], cache_dir: str) -> tuple[str, float, Optional[str], bool]:
+    """(text, seconds, error, unavailable) for one file. Runs in a pool worker or inline."""
+    from utils.text_cache import ExtractionUnavailable, get_text_cache
+
+    t0 = time.perf_counter()
+    p = Path(path)
+    try:
+        if p.suffix.lower() == ".txt":
+            with open(p, encoding="utf-8", errors="replace") as f:
+                text = f.read(max_chars) if max_chars is not None else f.read()
+        else:
+            text = get_text_cache(Path(cache_dir)).read_text(p, max_chars=max_chars)
+        return text, time.perf_counter() - t0, None, False
+    except ExtractionUnavailable as e:
+        return "", time.perf_counter() - t0, str(e), True
+    except Exception as e:
+        return "", time.perf_counter() - t0, f"{type(e).__name__}: {e}", False
+
+
+def extract_texts(files: list[IngestedFile], max_chars: Optional[int], cache_dir: Path) -> list[IngestedFile]:
+    """Fill .text for every spooled file, reading at most max_chars of each. Returns files."""
+    todo = [f for f in files if f.path is not None and f.error is None]
+    documents = [f for f in todo if f.path.suffix.lower() != ".txt"]
+    pool = _get_pool() if len(documents) > 1 else None
+    futures = {}
+    if pool is not None:
+        for f in documents:
+            try:
+                futures[id(f)] = pool.submit(_extract_one, str(f.path), max_chars, str(cache_dir))
+            except RuntimeError:  # pool shut down / broken: fall back to inline extraction
+                break
+    for f in todo:
+        fut = futures.get(id(f))
+        try:
+            text, seconds, error, unavailable = (
+                fut.result() if fut is not None else _extract_one(str(f.path), max_chars, str(cache_dir))
+            )
+        except Exception as e:  # worker died
+            text, seconds, error, unavailable = "", 0.0, f"{type(e).__name__}: {e}", False
+        f.text, f.extract_ms, f.error, f.unavailable = text, seconds * 1000, error, unavailable
+    return files
+
+
+def combine(files: list[IngestedFile], budget: int, sep: str = "\n\n") -> str:
+    """
+    Join file texts in upload order within budget characters: each file gets
+    an equal share, and whatever a shorter file leaves unused is handed on.
+    """
+    texts = [f.text for f in files if f.text.strip()]
+    if not texts:
+        return ""
+    budget = max(0, budget - len(sep) * (len(texts) - 1))
+    shares = [0] * len(texts)
+    remaining = budget
+    open_idx = list(range(len(texts)))
+    while open_idx and remaining > 0:
+        share = max(1, remaining // len(open_idx))
+        still_open = []
+        for i in open_idx:
+            take = min(share, len(texts[i]) - shares[i], remaining)
+            shares[i] += take
+            remaining -= take
+            if shares[i] < len(texts[i]):
+                still_open.append(i)
+        open_idx = still_open
+    return sep.join(t[:n] for t, n in zip(texts, shares) if n)
+
+
+def cleanup(files: list[IngestedFile]) -> None:
+    for f in files:
+        if f.path is not None:
+            try:
+                f.path.unlink(missing_ok=True)
+            except OSError:
+                pass
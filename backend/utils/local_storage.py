@@ -2,7 +2,8 @@
 Local storage for flashcards and user stats.
 
 Compatible with flashcards_system (add_flashcards, get_due_cards, load_user_stats, save_user_stats).
-Data paths: {base_path}/data/user_stats.json, {base_path}/data/flashcards.json.
+Data paths: {base_path}/data/users/{user_id}/user_stats.json (+ stats/ cold sections,
+see user_stats_store), {base_path}/data/users/{user_id}/flashcards.json.
 """
 
 from __future__ import annotations
@@ -12,6 +13,8 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
+from user_stats_store import ALL_SECTIONS, UserStatsStore
+
 
 def _default_base_path() -> Path:
     return Path(__file__).resolve().parent.parent
@@ -28,20 +31,16 @@ class LocalStorage:
         self._user_dir = self._data_dir / "users" / user_id
         self._stats_file = self._user_dir / "user_stats.json"
         self._flashcards_file = self._user_dir / "flashcards.json"
+        self._stats_store = UserStatsStore(self._user_dir)
 
     def _ensure_data_dir(self) -> None:
         self._user_dir.mkdir(parents=True, exist_ok=True)
 
     def load_user_stats(self) -> dict[str, Any]:
-        """Load user_stats.json; return dict with defaults on missing/error."""
-        try:
-            if self._stats_file.exists():
-                raw = self._stats_file.read_text(encoding="utf-8")
-                data = json.loads(raw)
-                if isinstance(data, dict):
-                    return data
-        except (OSError, json.JSONDecodeError):
-            pass
+        """Load user stats (hot summary + all cold sections); return dict with defaults on missing/error."""
+        data = self._stats_store.load(ALL_SECTIONS)
+        if data is not None:
+            return data
         return {
             "user_id": "student_001",
             "topic_performance": {},
@@ -49,14 +48,9 @@ class LocalStorage:
         }
 
     def save_user_stats(self, stats: dict[str, Any]) -> None:
-        """Persist user stats to user_stats.json."""
-        try:
-            self._ensure_data_dir()
-            self._stats_file.write_text(
-                json.dumps(stats, indent=2, ensure_ascii=False), encoding="utf-8"
-            )
-        except OSError:
-            pass
+        """Persist user stats (sections missing from stats are kept)."""
+        self._ensure_data_dir()
+        self._stats_store.save(stats)
 
     def add_flashcards(self, cards: list[dict[str, Any]]) -> None:
         """Append flashcards to flashcards.json. Each card must have keys expected by spaced_repetition."""
@@ -123,15 +117,11 @@ class LocalStorage:
 
     def add_chat_message(self, role: str, content: str, subject: str = "General") -> None:
         """Append a chat message to the chat_history list in user stats."""
-        stats = self.load_user_stats()
-        history = stats.setdefault("chat_history", [])
-        history.append({
+        self._ensure_data_dir()
+        # Cap history at 100 entries
+        self._stats_store.append_history("chat_history", [{
             "role": role,
             "content": content,
             "subject": subject,
             "timestamp": datetime.now(timezone.utc).isoformat(),
-        })
-        # Cap history at 100 entries
-        if len(history) > 100:
-            stats["chat_history"] = history[-100:]
-        self.save_user_stats(stats)
+        }], keep=100)
@@ -0,0 +1,300 @@
+"""
+Structured JSONL logs with a shared background writer.
+
+Used by the AI request log (ai_integration_layer) and the conflict audit log
+(conflict_resolution_engine). Callers hand a dict to StructuredLog.append();
+the row is serialized on the caller's thread and queued for a single daemon
+writer that batches rows per file, so request paths never open files.
+
+Rotation: when the active file would exceed max_bytes, or is older than
+max_age_seconds, it is renamed to <name>.1.gz (gzip) and older backups shift
+up to backup_count. tail() seeks from the end of the file instead of parsing
+the whole log.
+
+sync=True writes on the caller's thread instead (tests, short scripts).
+get_structured_log() defaults it from STUDAXIS_LOG_SYNC=1, read once at import.
+"""
+
+from __future__ import annotations
+
+import atexit
+import gzip
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger("studaxis.structured_log")
+
+_TAIL_BLOCK_SIZE = 8192
+SYNC_WRITES = os.environ.get("STUDAXIS_LOG_SYNC") == "1"
+
+
+class StructuredLog:
+    """A rotating, size/age-capped JSON Lines file. Obtain via get_structured_log()."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        max_bytes: int = 1024 * 1024,
+        max_age_seconds: float = 0,
+        backup_count: int = 3,
+        compress: bool = True,
+        sync: bool = False,
+    ) -> None:
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.backup_count = backup_count
+        self.compress = compress
+        self.sync = sync
+        self._write_lock = threading.Lock()
+        self._started_at: Optional[float] = None
+
+    # ── public API ───────────────────────────────────────────────────
+
+    def append(self, entry: dict[str, Any]) -> None:
+        """Queue one row for the background writer (inline when sync, or when the queue is full)."""
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=str) + "\n"
+        if self.sync:
+            self._write_lines([line])
+            return
+        _get_writer().submit(self, line)
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Block until every queued row (for all logs) has been written."""
+        _get_writer().flush(timeout)
+
+    def tail(self, limit: int = 50) -> list[dict[str, Any]]:
+        """
+        Return the last `limit` rows, oldest first. Pending rows are flushed
+        first; rotated backups are consulted only when the active file is short.
+        """
+        if limit <= 0:
+            return []
+        self.flush()
+        rows = _tail_lines(self.path, limit)
+        backup = 1
+        while len(rows) < limit and backup <= self.backup_count:
+            older = _read_backup_lines(self._backup_path(backup))
+            if older is None:
+                break
+            rows = older[-(limit - len(rows)):] + rows
+            backup += 1
+        out: list[dict[str, Any]] = []
+        for raw in rows:
+            try:
+                out.append(json.loads(raw))
+            except (json.JSONDecodeError, ValueError):
+                continue
+        return out
+
+    # ── writer-side (called on the background thread) ────────────────
+
+    def _write_lines(self, lines: list[str]) -> None:
+        with self._write_lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                size = self.path.stat().st_size
+            except OSError:
+                size = 0
+            handle = None
+            try:
+                for line in lines:
+                    incoming = len(line.encode("utf-8"))
+                    if self._should_rotate(size, incoming):
+                        if handle is not None:
+                            handle.close()
+                            handle = None
+                        self._rotate()
+                        size = 0
+                    if handle is None:
+                        handle = open(self.path, "a", encoding="utf-8")
+                        if self._started_at is None:
+                            self._started_at = time.time()
+                    handle.write(line)
+                    size += incoming
+            finally:
+                if handle is not None:
+                    handle.close()
+
+    def _should_rotate(self, size: int, incoming: int) -> bool:
+        if size == 0:
+            return False
+        if self.max_bytes > 0 and size + incoming > self.max_bytes:
+            return True
+        if self.max_age_seconds > 0:
+            if self._started_at is None:
+                self._started_at = self._infer_start_time()
+            if time.time() - self._started_at > self.max_age_seconds:
+                return True
+        return False
+
+    def _infer_start_time(self) -> float:
+        """Age origin for a file opened by a previous process: the last rotation, else its mtime."""
+        try:
+            return self._backup_path(1).stat().st_mtime
+        except OSError:
+            pass
+        try:
+            return self.path.stat().st_mtime
+        except OSError:
+            return time.time()
+
+    def _backup_path(self, index: int) -> Path:
+        suffix = f".{index}.gz" if self.compress else f".{index}"
+        return self.path.with_name(self.path.name + suffix)
+
+    def _rotate(self) -> None:
+        try:
+            if self.backup_count <= 0:
+                self.path.unlink()
+            else:
+                for i in range(self.backup_count - 1, 0, -1):
+                    src = self._backup_path(i)
+                    if src.exists():
+                        os.replace(src, self._backup_path(i + 1))
+                dest = self._backup_path(1)
+                if self.compress:
+                    tmp = dest.with_name(dest.name + ".tmp")
+                    with open(self.path, "rb") as src_fh, gzip.open(tmp, "wb") as gz:
+                        while True:
+                            chunk = src_fh.read(64 * 1024)
+                            if not chunk:
+                                break
+                            gz.write(chunk)
+                    os.replace(tmp, dest)
+                    self.path.unlink()
+                else:
+                    os.replace(self.path, dest)
+        except OSError as e:
+            logger.error("Log rotation failed for %s: %s", self.path, e)
+        self._started_at = time.time()
+
+
+def _tail_lines(path: Path, limit: int) -> list[str]:
+    """Read the last `limit` non-empty lines by seeking backwards in fixed blocks."""
+    try:
+        fh = open(path, "rb")
+    except OSError:
+        return []
+    with fh:
+        fh.seek(0, os.SEEK_END)
+        pos = fh.tell()
+        buf = b""
+        while pos > 0 and buf.count(b"\n") <= limit:
+            step = min(_TAIL_BLOCK_SIZE, pos)
+            pos -= step
+            fh.seek(pos)
+            buf = fh.read(step) + buf
+    lines = [ln for ln in buf.decode("utf-8", errors="replace").splitlines() if ln.strip()]
+    if pos > 0 and lines:
+        lines = lines[1:]  # first line may be partial
+    return lines[-limit:]
+
+
+def _read_backup_lines(path: Path) -> Optional[list[str]]:
+    if not path.exists():
+        return None
+    try:
+        opener = gzip.open if path.suffix == ".gz" else open
+        with opener(path, "rt", encoding="utf-8") as fh:
+            return [ln.rstrip("\n") for ln in fh if ln.strip()]
+    except (OSError, EOFError) as e:
+        logger.error("Could not read log backup %s: %s", path, e)
+        return []
+
+
+class _LogWriter:
+    """Single daemon thread draining a bounded queue of (log, line) rows."""
+
+    QUEUE_SIZE = 2048
+    BATCH_SIZE = 256
+
+    def __init__(self) -> None:
+        self._queue: queue.Queue[tuple[StructuredLog, str]] = queue.Queue(maxsize=self.QUEUE_SIZE)
+        self._pending = 0
+        self._drained = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="studaxis-log-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, log: StructuredLog, line: str) -> None:
+        with self._drained:
+            self._pending += 1
+        try:
+            self._queue.put_nowait((log, line))
+        except queue.Full:
+            self._done(1)
+            # Backpressure: write on the caller's thread rather than drop audit rows.
+            try:
+                log._write_lines([line])
+            except Exception as e:
+                logger.error("Inline log write failed for %s: %s", log.path, e)
+
+    def flush(self, timeout: float) -> None:
+        with self._drained:
+            self._drained.wait_for(lambda: self._pending == 0, timeout)
+
+    def _done(self, count: int) -> None:
+        with self._drained:
+            self._pending -= count
+            if self._pending == 0:
+                self._drained.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            batch = [first]
+            while len(batch) < self.BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            grouped: dict[int, tuple[StructuredLog, list[str]]] = {}
+            for log, line in batch:
+                grouped.setdefault(id(log), (log, []))[1].append(line)
+            for log, lines in grouped.values():
+                try:
+                    log._write_lines(lines)
+                except Exception as e:
+                    logger.error("Background log write failed for %s: %s", log.path, e)
+            self._done(len(batch))
+
+
+_writer: Optional[_LogWriter] = None
+_registry: dict[str, StructuredLog] = {}
+_registry_lock = threading.Lock()
+
+
+def _get_writer() -> _LogWriter:
+    global _writer
+    if _writer is None:
+        with _registry_lock:
+            if _writer is None:
+                _writer = _LogWriter()
+                atexit.register(_writer.flush, 5.0)
+    return _writer
+
+
+def get_structured_log(path: str | Path, **options: Any) -> StructuredLog:
+    """
+    Process-wide StructuredLog for `path`. Options (max_bytes, max_age_seconds,
+    backup_count, compress, sync) apply on first use and are refreshed on later
+    calls; sync defaults to SYNC_WRITES.
+    """
+    options.setdefault("sync", SYNC_WRITES)
+    key = str(Path(path).resolve())
+    with _registry_lock:
+        log = _registry.get(key)
+        if log is None:
+            log = StructuredLog(path, **options)
+            _registry[key] = log
+        else:
+            for name, value in options.items():
+                setattr(log, name, value)
+        return log
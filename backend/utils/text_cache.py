@@ -0,0 +1,273 @@
+"""
+Extracted-text cache for textbooks (PDF / PPTX).
+
+Text is extracted once per file *content* (sha256) and stored one file per
+page under {cache_dir}/{hash}/NNNN.txt with a small meta.json. iter_pages()
+is lazy: cached pages are read from disk one at a time, missing pages are
+extracted on demand and written back, so a caller that only needs the first
+few thousand characters never parses the rest of the book.
+
+Plain-text files are not cached (reading them is already cheap).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+logger = logging.getLogger("studaxis.text_cache")
+
+
+class ExtractionUnavailable(RuntimeError):
+    """No extractor library is installed for this file type."""
+
+
+def file_sha256(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        while True:
+            chunk = fh.read(chunk_size)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class _PdfPages:
+    """Random access to PDF page text, opening the reader only when first needed."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._reader: Any = None
+        self._fallback_pages: Optional[list[str]] = None
+
+    def _open(self) -> None:
+        if self._reader is not None or self._fallback_pages is not None:
+            return
+        try:
+            from PyPDF2 import PdfReader
+            self._reader = PdfReader(str(self.path))
+        except ImportError:
+            try:
+                from langchain_community.document_loaders import PyPDFLoader
+            except ImportError:
+                raise ExtractionUnavailable("Install PyPDF2 or langchain-community for PDF extraction")
+            self._fallback_pages = [d.page_content for d in PyPDFLoader(str(self.path)).load()]
+
+    def count(self) -> int:
+        self._open()
+        if self._reader is not None:
+            return len(self._reader.pages)
+        return len(self._fallback_pages or [])
+
+    def text(self, index: int) -> str:
+        self._open()
+        if self._reader is not None:
+            return self._reader.pages[index].extract_text() or ""
+        return (self._fallback_pages or [""])[index]
+
+
+class _SlidePages:
+    """One 'page' per slide via python-pptx; .ppt falls back to Unstructured as a single page."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._pages: Optional[list[str]] = None
+
+    def _load(self) -> list[str]:
+        if self._pages is not None:
+            return self._pages
+        if self.path.suffix.lower() == ".pptx":
+            try:
+                from pptx import Presentation
+                prs = Presentation(str(self.path))
+                pages = []
+                for slide in prs.slides:
+                    parts = [
+                        shape.text_frame.text
+                        for shape in slide.shapes
+                        if getattr(shape, "has_text_frame", False) and shape.text_frame.text.strip()
+                    ]
+                    pages.append("\n".join(parts))
+                self._pages = pages
+                return pages
+            except ImportError:
+                pass
+        try:
+            from langchain_community.document_loaders import UnstructuredPowerPointLoader
+        except ImportError:
+            raise ExtractionUnavailable("PPT support requires python-pptx or UnstructuredPowerPointLoader")
+        docs = UnstructuredPowerPointLoader(str(self.path)).load()
+        self._pages = ["\n".join(d.page_content for d in docs)]
+        return self._pages
+
+    def count(self) -> int:
+        return len(self._load())
+
+    def text(self, index: int) -> str:
+        return self._load()[index]
+
+
+def _tmp_path(target: Path) -> Path:
+    """Temp file next to target, unique per process and thread (pool workers and
+    request threads can fill the same entry at once)."""
+    return target.with_name(f"{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def _page_source(path: Path) -> Any:
+    suf = path.suffix.lower()
+    if suf == ".pdf":
+        return _PdfPages(path)
+    if suf in (".ppt", ".pptx"):
+        return _SlidePages(path)
+    return None
+
+
+class ExtractedTextCache:
+    """Content-addressed, per-page cache of extracted document text."""
+
+    MAX_ENTRIES = 64  # distinct documents kept; oldest (by meta mtime) pruned first
+
+    def __init__(self, cache_dir: Path) -> None:
+        self.cache_dir = Path(cache_dir)
+        self._hashes: dict[tuple[str, int, int], str] = {}
+        self._lock = threading.Lock()
+
+    # ── keys / metadata ──────────────────────────────────────────────
+
+    def content_hash(self, path: Path) -> str:
+        """sha256 of the file, memoized per (path, size, mtime) for this process."""
+        st = path.stat()
+        key = (str(path.resolve()), st.st_size, st.st_mtime_ns)
+        with self._lock:
+            cached = self._hashes.get(key)
+        if cached:
+            return cached
+        digest = file_sha256(path)
+        with self._lock:
+            self._hashes[key] = digest
+        return digest
+
+    def _entry_dir(self, digest: str) -> Path:
+        return self.cache_dir / digest
+
+    def _load_meta(self, entry: Path) -> dict[str, Any]:
+        try:
+            return json.loads((entry / "meta.json").read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _save_meta(self, entry: Path, meta: dict[str, Any]) -> None:
+        tmp = _tmp_path(entry / "meta.json")
+        tmp.write_text(json.dumps(meta, separators=(",", ":")), encoding="utf-8")
+        tmp.replace(entry / "meta.json")
+
+    def _page_file(self, entry: Path, index: int) -> Path:
+        return entry / f"{index:04d}.txt"
+
+    # ── public API ───────────────────────────────────────────────────
+
+    def page_count(self, path: Path) -> int:
+        path = Path(path)
+        source = _page_source(path)
+        if source is None:
+            return 1
+        entry = self._ensure_entry(path)
+        meta = self._load_meta(entry)
+        if "pages" not in meta:
+            meta["pages"] = source.count()
+            self._save_meta(entry, meta)
+        return int(meta["pages"])
+
+    def iter_pages(self, path: Path, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+        """Yield page texts lazily for pages [start, stop)."""
+        path = Path(path)
+        source = _page_source(path)
+        if source is None:
+            if start == 0:
+                yield path.read_text(encoding="utf-8", errors="replace")
+            return
+        entry = self._ensure_entry(path)
+        meta = self._load_meta(entry)
+        total = meta.get("pages")
+        if total is None:
+            total = source.count()
+            meta["pages"] = total
+            self._save_meta(entry, meta)
+        end = total if stop is None else min(stop, total)
+        for i in range(max(0, start), end):
+            page_file = self._page_file(entry, i)
+            try:
+                yield page_file.read_text(encoding="utf-8")
+                continue
+            except OSError:
+                pass
+            text = source.text(i)
+            tmp = _tmp_path(page_file)
+            try:
+                tmp.write_text(text, encoding="utf-8")
+                tmp.replace(page_file)
+            except OSError as e:
+                logger.warning("Could not cache page %d of %s: %s", i, path.name, e)
+            yield text
+
+    def read_text(self, path: Path, max_chars: Optional[int] = None, sep: str = "\n") -> str:
+        """Join pages until max_chars is reached (remaining pages are never extracted)."""
+        parts: list[str] = []
+        total = 0
+        for page in self.iter_pages(path):
+            parts.append(page)
+            total += len(page) + len(sep)
+            if max_chars is not None and total >= max_chars:
+                break
+        text = sep.join(parts)
+        return text[:max_chars] if max_chars is not None else text
+
+    # ── housekeeping ─────────────────────────────────────────────────
+
+    def _ensure_entry(self, path: Path) -> Path:
+        digest = self.content_hash(path)
+        entry = self._entry_dir(digest)
+        if not entry.is_dir():
+            entry.mkdir(parents=True, exist_ok=True)
+            self._save_meta(entry, {"source": path.name, "suffix": path.suffix.lower()})
+            self._prune()
+        return entry
+
+    def _prune(self) -> None:
+        try:
+            entries = [p for p in self.cache_dir.iterdir() if p.is_dir()]
+        except OSError:
+            return
+        if len(entries) <= self.MAX_ENTRIES:
+            return
+
+        def _age(p: Path) -> float:
+            try:
+                return (p / "meta.json").stat().st_mtime
+            except OSError:
+                return 0.0
+
+        for stale in sorted(entries, key=_age)[: len(entries) - self.MAX_ENTRIES]:
+            shutil.rmtree(stale, ignore_errors=True)
+
+
+_caches: dict[str, ExtractedTextCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_text_cache(cache_dir: Path) -> ExtractedTextCache:
+    """Process-wide cache instance per directory (keeps the hash memo warm)."""
+    key = os.path.abspath(cache_dir)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = ExtractedTextCache(Path(cache_dir))
+            _caches[key] = cache
+        return cache
@@ -0,0 +1,283 @@
+"""
+Article text for URL-based generation (flashcards, quiz, panic mode).
+
+Each URL endpoint used to open a fresh connection (httpx.get / requests.get),
+download the whole page, parse it with BeautifulSoup's pure-Python
+html.parser, and do all of that again every time a student regenerated
+cards from the same link.
+
+  • one pooled HTTP client per process (httpx.Client; requests.Session
+    when httpx is missing), so repeated fetches reuse connections
+  • the body is streamed and cut at MAX_BYTES (STUDAXIS_URL_MAX_BYTES,
+    default 2 MiB) — nothing past the cap is downloaded or parsed
+  • lxml is used as the BeautifulSoup backend when installed
+  • extracted text is cached on disk per URL ({cache_dir}/{sha256}.json)
+    with its ETag / Last-Modified: within FRESH_SECONDS
+    (STUDAXIS_URL_CACHE_FRESH, default 600) it is served without a request,
+    after that it is revalidated with a conditional GET (304 → cached text),
+    and if the site is unreachable a cached copy is served instead of an error
+
+Callers slice the returned text to their own prompt budget.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger("studaxis.web_text")
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; rv:91.0) Gecko/20100101 Firefox/91.0"
+STRIP_TAGS = ["nav", "footer", "script", "style", "header", "aside"]
+MAX_TEXT_CHARS = 50_000  # kept per cached article; every caller uses far less
+
+
+class FetchError(Exception):
+    """The URL could not be fetched; status is the HTTP status when there was one."""
+
+    def __init__(self, message: str, status: Optional[int] = None) -> None:
+        super().__init__(message)
+        self.status = status
+
+    @property
+    def blocked(self) -> bool:
+        return self.status in (401, 403)
+
+
+@dataclass
+class WebText:
+    text: str
+    source: str  # "network" | "revalidated" | "cache" | "stale"
+
+
+def _html_parser() -> Optional[str]:
+    """BeautifulSoup backend: lxml when installed, else html.parser; None without bs4."""
+    try:
+        import bs4  # noqa: F401
+    except ImportError:
+        return None
+    try:
+        import lxml  # noqa: F401
+        return "lxml"
+    except ImportError:
+        return "html.parser"
+
+
+def html_to_text(body: bytes, encoding: Optional[str] = None) -> str:
+    """Readable text of an HTML document (navigation, scripts and styles removed)."""
+    parser = _html_parser()
+    if parser is None:
+        html = body.decode(encoding or "utf-8", errors="replace")
+        text = re.sub(r"<[^>]+>", " ", html)
+        return re.sub(r"\s+", " ", text).strip()
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(body, parser, from_encoding=encoding)
+    for tag in soup(STRIP_TAGS):
+        tag.decompose()
+    return soup.get_text(separator="\n", strip=True)
+
+
+def _charset(content_type: str) -> Optional[str]:
+    m = re.search(r"charset=([\w.-]+)", content_type or "", re.I)
+    return m.group(1) if m else None
+
+
+class _HttpxClient:
+    def __init__(self, timeout: float) -> None:
+        import httpx
+        self._httpx = httpx
+        self._client = httpx.Client(
+            follow_redirects=True,
+            timeout=timeout,
+            headers={"User-Agent": USER_AGENT},
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+
+    def get(self, url: str, headers: dict[str, str], max_bytes: int, timeout: float) -> tuple[int, dict, bytes]:
+        try:
+            with self._client.stream("GET", url, headers=headers, timeout=timeout) as r:
+                body = bytearray()
+                if r.status_code == 200:
+                    for chunk in r.iter_bytes():
+                        body += chunk
+                        if len(body) >= max_bytes:
+                            break
+                return r.status_code, dict(r.headers), bytes(body[:max_bytes])
+        except self._httpx.HTTPError as e:
+            raise FetchError(f"Could not fetch URL: {e}") from e
+
+    def close(self) -> None:
+        self._client.close()
+
+
+class _RequestsClient:
+    def __init__(self, timeout: float) -> None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        self._requests = requests
+        self._session = requests.Session()
+        self._session.headers["User-Agent"] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    def get(self, url: str, headers: dict[str, str], max_bytes: int, timeout: float) -> tuple[int, dict, bytes]:
+        try:
+            with self._session.get(url, headers=headers, timeout=timeout, stream=True) as r:
+                body = bytearray()
+                if r.status_code == 200:
+                    for chunk in r.iter_content(64 * 1024):
+                        body += chunk
+                        if len(body) >= max_bytes:
+                            break
+                return r.status_code, dict(r.headers), bytes(body[:max_bytes])
+        except self._requests.exceptions.RequestException as e:
+            raise FetchError(f"Could not fetch URL: {e}") from e
+
+    def close(self) -> None:
+        self._session.close()
+
+
+class WebTextFetcher:
+    """Pooled client + per-URL extracted-text cache. Obtain via get_web_text_fetcher()."""
+
+    MAX_BYTES = int(os.environ.get("STUDAXIS_URL_MAX_BYTES", str(2 * 1024 * 1024)))
+    FRESH_SECONDS = float(os.environ.get("STUDAXIS_URL_CACHE_FRESH", "600"))
+    MAX_ENTRIES = 256
+
+    def __init__(self, cache_dir: Path, timeout: float = 20.0) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.timeout = timeout
+        self._client: Any = None
+        self._lock = threading.Lock()
+
+    def _http(self) -> Any:
+        with self._lock:
+            if self._client is None:
+                try:
+                    self._client = _HttpxClient(self.timeout)
+                except ImportError:
+                    self._client = _RequestsClient(self.timeout)
+            return self._client
+
+    # ── cache ────────────────────────────────────────────────────────
+
+    def _entry_path(self, url: str) -> Path:
+        return self.cache_dir / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json"
+
+    def _load(self, url: str) -> Optional[dict[str, Any]]:
+        try:
+            entry = json.loads(self._entry_path(url).read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return None
+        return entry if isinstance(entry, dict) and entry.get("url") == url else None
+
+    def _store(self, url: str, entry: dict[str, Any]) -> None:
+        path = self._entry_path(url)
+        is_new = not path.exists()
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+            tmp.replace(path)
+        except OSError as e:
+            logger.warning("Could not cache text for %s: %s", url, e)
+            return
+        if is_new:
+            self._prune()
+
+    def _prune(self) -> None:
+        try:
+            entries = list(self.cache_dir.glob("*.json"))
+        except OSError:
+            return
+        if len(entries) <= self.MAX_ENTRIES:
+            return
+
+        def _age(p: Path) -> float:
+            try:
+                return p.stat().st_mtime
+            except OSError:
+                return 0.0
+
+        for stale in sorted(entries, key=_age)[: len(entries) - self.MAX_ENTRIES]:
+            stale.unlink(missing_ok=True)
+
+    # ── public API ───────────────────────────────────────────────────
+
+    def fetch_text(self, url: str, timeout: Optional[float] = None) -> WebText:
+        """Article text for url (cached, revalidated, or fetched). Raises FetchError."""
+        url = url.strip()
+        cached = self._load(url)
+        now = time.time()
+        if cached is not None and now - float(cached.get("fetched_at", 0)) < self.FRESH_SECONDS:
+            return WebText(cached["text"], "cache")
+
+        headers: dict[str, str] = {}
+        if cached is not None:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+        try:
+            status, resp_headers, body = self._http().get(url, headers, self.MAX_BYTES, timeout or self.timeout)
+        except FetchError:
+            if cached is not None:
+                logger.info("Serving cached text for unreachable %s", url)
+                return WebText(cached["text"], "stale")
+            raise
+
+        if status == 304 and cached is not None:
+            cached["fetched_at"] = now
+            self._store(url, cached)
+            return WebText(cached["text"], "revalidated")
+        if status >= 500 and cached is not None:
+            return WebText(cached["text"], "stale")
+        if status != 200:
+            raise FetchError(f"Could not fetch URL: HTTP {status}", status=status)
+
+        lower = {k.lower(): v for k, v in resp_headers.items()}
+        text = html_to_text(body, _charset(lower.get("content-type", "")))[:MAX_TEXT_CHARS]
+        self._store(url, {
+            "url": url,
+            "etag": lower.get("etag"),
+            "last_modified": lower.get("last-modified"),
+            "fetched_at": now,
+            "bytes": len(body),
+            "text": text,
+        })
+        return WebText(text, "network")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+
+_fetchers: dict[str, WebTextFetcher] = {}
+_fetchers_lock = threading.Lock()
+
+
+def get_web_text_fetcher(cache_dir: Path) -> WebTextFetcher:
+    """Process-wide fetcher per cache directory (one connection pool)."""
+    key = os.path.abspath(cache_dir)
+    with _fetchers_lock:
+        fetcher = _fetchers.get(key)
+        if fetcher is None:
+            fetcher = _fetchers[key] = WebTextFetcher(Path(cache_dir))
+        return fetcher
+
+
+def close_all() -> None:
+    with _fetchers_lock:
+        for fetcher in _fetchers.values():
+            fetcher.close()
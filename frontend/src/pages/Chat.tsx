@@ -14,6 +14,7 @@ import {
   getTextbooks,
   uploadTextbook,
   fetchChatHistory,
+  getChatSession,
   saveChatHistoryToBackend,
   type ChatMessage,
   type ChatTaskType,
@@ -30,6 +31,8 @@ type ChatSession = {
   messages: ChatMessage[];
   timestamp: string;
   subject: string;
+  /** Set on sessions restored from the backend index; messages are fetched on open. */
+  message_count?: number;
 };
 
 const QUICK_ACTIONS: Array<{ label: string; prompt: string; taskType: ChatTaskType }> = [
@@ -221,7 +224,8 @@ export function ChatPage() {
     }
     if (!parsed.length) {
       fetchChatHistory()
-        .then((sessions) => {
+        .then((page) => {
+          const sessions: ChatSession[] = page.sessions.map((s) => ({ ...s, messages: [] }));
           setChatHistory(sessions);
           try {
             localStorage.setItem(CHAT_HISTORY_STORAGE, JSON.stringify(sessions));
@@ -422,8 +426,25 @@ export function ChatPage() {
   }, [messages, subject]);
 
   const loadChat = useCallback((session: ChatSession) => {
-    setMessages(session.messages);
     setActiveChatId(session.id);
+    if (session.messages.length || !session.message_count) {
+      setMessages(session.messages);
+      return;
+    }
+    getChatSession(session.id)
+      .then((full) => {
+        setMessages(full.messages);
+        setChatHistory((prev) => {
+          const next = prev.map((s) => (s.id === session.id ? { ...s, messages: full.messages } : s));
+          try {
+            localStorage.setItem(CHAT_HISTORY_STORAGE, JSON.stringify(next));
+          } catch {
+            // ignore
+          }
+          return next;
+        });
+      })
+      .catch(() => setError("Could not load this chat session."));
   }, []);
 
   const handleClear = useCallback(async () => {
@@ -143,6 +143,8 @@ export interface HealthResponse {
   status: string;
   service: string;
   ollama_available?: boolean;
+  /** Background Ollama bootstrap: "starting" | "ready" | "degraded" (details at /api/ready) */
+  startup?: string;
 }
 
 /** Auth: signup/login response with JWT */
@@ -347,9 +349,44 @@ export interface ChatHistorySession {
   subject: string;
 }
 
-/** Fetch chat history from backend (restore when localStorage is empty). */
-export async function fetchChatHistory(): Promise<ChatHistorySession[]> {
-  return request<ChatHistorySession[]>("/api/chat/history");
+/** Index entry for a saved session (no messages). */
+export interface ChatHistorySummary {
+  id: string;
+  title: string;
+  subject: string;
+  timestamp: string;
+  message_count: number;
+}
+
+/** Filters and page for GET /api/chat/history (q searches titles). */
+export interface ChatHistoryQuery {
+  limit?: number;
+  offset?: number;
+  q?: string;
+  subject?: string;
+}
+
+export interface ChatHistoryPage {
+  sessions: ChatHistorySummary[];
+  total: number;
+  limit: number;
+  offset: number;
+  next_offset: number | null;
+}
+
+/** Fetch a page of saved chat sessions, newest first (restore when localStorage is empty). */
+export async function fetchChatHistory(query: ChatHistoryQuery = {}): Promise<ChatHistoryPage> {
+  const params = new URLSearchParams();
+  for (const [key, value] of Object.entries(query)) {
+    if (value !== undefined && value !== null && value !== "") params.set(key, String(value));
+  }
+  const qs = params.toString();
+  return request<ChatHistoryPage>(`/api/chat/history${qs ? `?${qs}` : ""}`);
+}
+
+/** Fetch one saved chat session with its messages. */
+export async function getChatSession(sessionId: string): Promise<ChatHistorySession> {
+  return request<ChatHistorySession>(`/api/chat/history/${encodeURIComponent(sessionId)}`);
 }
 
 /** Save a chat session to backend after New Chat. */
@@ -1145,15 +1182,47 @@ export async function getQuiz(quizId: string): Promise<QuizResponse> {
   return request<QuizResponse>(`/api/quiz/${encodeURIComponent(quizId)}`);
 }
 
+/** Filters and page for GET /api/quiz/history (dates are ISO, inclusive). */
+export interface QuizHistoryQuery {
+  limit?: number;
+  offset?: number;
+  subject?: string;
+  quiz_id?: string;
+  since?: string;
+  until?: string;
+  include_answers?: boolean;
+}
+
+export interface QuizHistoryPage {
+  results: QuizResultItem[];
+  total: number;
+  limit: number;
+  offset: number;
+  next_offset: number | null;
+}
+
+/**
+ * Get a page of quiz history (newest first). Items are summaries; answers only with include_answers.
+ */
+export async function getQuizHistory(query: QuizHistoryQuery = {}): Promise<QuizHistoryPage> {
+  const params = new URLSearchParams();
+  for (const [key, value] of Object.entries(query)) {
+    if (value !== undefined && value !== null && value !== "") params.set(key, String(value));
+  }
+  const qs = params.toString();
+  return request<QuizHistoryPage>(`/api/quiz/history${qs ? `?${qs}` : ""}`);
+}
+
 /**
- * Get quiz history (all past results).
+ * Full result (with answers) of one past attempt.
  */
-export async function getQuizHistory(): Promise<{ results: QuizResultItem[] }> {
-  return request<{ results: QuizResultItem[] }>("/api/quiz/history");
+export async function getQuizAttempt(attemptId: string): Promise<QuizResultItem> {
+  return request<QuizResultItem>(`/api/quiz/history/${encodeURIComponent(attemptId)}`);
 }
 
 /** Quiz result item from API */
 export interface QuizResultItem {
+  attempt_id?: string;
   quiz_id: string;
   completed_at: string;
   score: number;
@@ -1366,13 +1435,38 @@ export async function verifyClassCode(
 
 /** Get assignments for class (teacher_linked students) */
 export async function getStudentAssignments(classCode: string): Promise<
-  Array<{ id: string; quiz_id: string; title: string; due_date: string; assigned_at: string; status: string }>
+  Array<{
+    id: string;
+    quiz_id: string;
+    title: string;
+    due_date: string;
+    assigned_at: string;
+    status: string;
+    score?: number | null;
+    completed_at?: string | null;
+  }>
 > {
   if (!classCode) return [];
   const params = new URLSearchParams({ class_code: classCode });
   return request(`/api/student/assignments?${params}`);
 }
 
+/** Assignments for a class with completion counts (teacher view) */
+export async function getTeacherAssignments(classCode: string): Promise<
+  Array<{
+    id: string;
+    quiz_id: string;
+    title: string;
+    due_date: string;
+    assigned_at: string;
+    completed_count: number;
+    average_score: number | null;
+  }>
+> {
+  const params = new URLSearchParams({ class_code: classCode });
+  return request(`/api/teacher/assignments?${params}`);
+}
+
 /** Mark assignment as completed */
 export async function postAssignmentComplete(params: {
   assignment_id: string;
@@ -1641,6 +1735,18 @@ export async function getNotifications(): Promise<ApiNotification[]> {
   }
 }
 
+/** GET /api/notifications/unread_count — cheap poll; 0 on 401/offline */
+export async function getUnreadNotificationCount(): Promise<number> {
+  try {
+    const res = await apiFetch("/api/notifications/unread_count");
+    if (!res.ok) return 0;
+    const data = await res.json();
+    return Number(data?.unread_count ?? 0);
+  } catch {
+    return 0;
+  }
+}
+
 /** POST /api/notifications/push */
 export async function postNotificationPush(params: {
   type?: string;
@@ -1670,6 +1776,23 @@ export async function deleteNotification(id: string): Promise<{ ok: boolean }> {
   });
 }
 
+/** POST /api/notifications/fanout — teacher broadcast to user_ids and/or a class's students */
+export async function postNotificationFanout(params: {
+  user_ids?: string[];
+  class_code?: string;
+  type?: string;
+  title: string;
+  message?: string;
+  tag?: string;
+  pinned?: boolean;
+  action?: { label: string; href: string };
+}): Promise<{ ok: boolean; delivered: number }> {
+  return request<{ ok: boolean; delivered: number }>("/api/notifications/fanout", {
+    method: "POST",
+    body: JSON.stringify(params),
+  });
+}
+
 /** DELETE /api/notifications/all */
 export async function deleteAllNotifications(): Promise<{ ok: boolean }> {
   return request<{ ok: boolean }>("/api/notifications/all", {
@@ -15,6 +15,7 @@ Architecture: .kiro/DOCS_NEW/ARCHITECTURE_NEW.md
 from __future__ import annotations
 
 import argparse
+import multiprocessing
 import os
 import shutil
 import sys
@@ -191,4 +192,8 @@ def main() -> None:
 
 
 if __name__ == "__main__":
+    # Ingestion uses a process pool (backend/utils/ingest.py). In the frozen .exe,
+    # spawned workers re-run this entry point; freeze_support() turns them into
+    # workers instead of second servers.
+    multiprocessing.freeze_support()
     main()